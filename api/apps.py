@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api'
+
+    def ready(self):
+        from . import authentication, manifest, metrics, pubsub, tracking
+        # Kebijakan cache_policy di views mendaftarkan signal invalidasi response cache
+        from . import views  # noqa: F401
+        tracking.connect_signals()
+        manifest.connect_signals()
+        authentication.connect_signals()
+        pubsub.connect_signals()
+        if metrics.get_config()['enabled']:
+            metrics.instrument_serializers()
@@ -0,0 +1,184 @@
+"""
+View async untuk jalur baca yang dipoll banyak client (``api/async/...``).
+
+Di ASGI (``ekspedisi/asgi.py``) view ini berjalan di event loop: koneksi yang
+menunggu (long-poll, SSE) tidak menahan thread worker, dan cache serta query
+memakai API async Django. View DRF biasa tetap sinkron; di WSGI view async
+ini tetap bisa dipanggil (Django menjalankannya lewat ``async_to_sync``),
+kecuali SSE yang butuh ASGI.
+
+* ``tracking/<nomor_resi>/``: dokumen tracking yang sama dengan
+  ``tracking_by_resi`` (cache, ETag, replica, arsip).
+* ``tracking/<nomor_resi>/events/``: event ``RiwayatPengiriman`` dengan id
+  lebih besar dari cursor (``?after=`` atau header ``Last-Event-ID``; tanpa
+  cursor hanya event baru). Long-poll menjawab segera jika ada event, atau
+  menunggu notifikasi ``api/pubsub.py`` sampai ``?timeout=`` detik (maksimal
+  ``long_poll_timeout``). Dengan ``Accept: text/event-stream`` atau
+  ``?stream=1`` response berupa stream SSE.
+* ``dashboard/stats/``: ringkasan dashboard, autentikasi token yang sama
+  dengan API DRF.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET, require_safe
+from rest_framework import exceptions
+
+from ekspedisi_app import statistik
+from ekspedisi_app.models import Pengiriman, RiwayatPengiriman
+from . import pubsub, tracking
+from .authentication import CachedTokenAuthentication
+from .replica import use_replica
+
+EVENT_FIELDS = ('id', 'status', 'keterangan', 'lokasi', 'waktu')
+
+_auth = CachedTokenAuthentication()
+
+
+async def authenticate(request):
+    """User dari header ``Authorization: Token ...``, ``None`` jika tidak ada atau tidak valid"""
+    try:
+        result = await sync_to_async(_auth.authenticate)(request)
+    except exceptions.AuthenticationFailed:
+        return None
+    if result is None:
+        return None
+    # Dipakai ReplicaRouter untuk pin read-your-writes
+    request.user = result[0]
+    return result[0]
+
+
+@use_replica
+@require_safe
+async def tracking_by_resi(request, nomor_resi):
+    """Tracking pengiriman berdasarkan nomor resi (async)"""
+    document = await tracking.aget_document(nomor_resi)
+    if document is None:
+        return JsonResponse({'message': 'Nomor resi tidak ditemukan'}, status=404)
+
+    response = get_conditional_response(
+        request, etag=document['etag'], last_modified=document['last_modified']
+    )
+    if response is None:
+        response = HttpResponse(document['body'], content_type='application/json')
+    response['ETag'] = document['etag']
+    response['Last-Modified'] = http_date(document['last_modified'])
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@use_replica
+@require_GET
+async def dashboard_stats(request):
+    """Statistik dashboard (async)"""
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    data = await statistik.aringkasan(None if user.role == 'admin' else user.id)
+    per_status = data['per_status']
+    return JsonResponse({
+        'total_pengiriman': sum(per_status.values()),
+        'pengiriman_pending': per_status['pending'],
+        'pengiriman_transit': per_status['transit'],
+        'pengiriman_delivered': per_status['delivered'],
+        'total_paket': data['total_paket'],
+        'total_user': data['total_user'],
+        'pengiriman_per_status': per_status
+    })
+
+
+async def riwayat_baru(pengiriman_id, cursor, limit):
+    """Riwayat pengiriman dengan id > ``cursor``, urut id"""
+    queryset = (
+        RiwayatPengiriman.aktif.filter(pengiriman_id=pengiriman_id, pk__gt=cursor)
+        .order_by('pk').values(*EVENT_FIELDS)[:limit]
+    )
+    return [row async for row in queryset]
+
+
+def _wants_stream(request):
+    return request.GET.get('stream') == '1' or 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def _format_sse(event):
+    return f"id: {event['id']}\nevent: riwayat\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def _stream(pengiriman_id, cursor, config):
+    # Subscribe di dalam generator: jika stream tidak pernah dimulai tidak ada subscriber yang tertinggal
+    subscription = pubsub.broker.subscribe(pengiriman_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config['stream_seconds']
+    try:
+        yield f"retry: {int(config['heartbeat'] * 1000)}\n\n"
+        while True:
+            events = await riwayat_baru(pengiriman_id, cursor, config['max_events'])
+            for event in events:
+                yield _format_sse(event)
+            if events:
+                cursor = events[-1]['id']
+                if len(events) == config['max_events']:
+                    continue
+            sisa = deadline - loop.time()
+            if sisa <= 0:
+                break
+            if not await subscription.wait(min(config['heartbeat'], sisa)):
+                yield ': ping\n\n'
+    finally:
+        pubsub.broker.unsubscribe(subscription)
+
+
+@require_GET
+async def tracking_events(request, nomor_resi):
+    """Long-poll / SSE event riwayat untuk satu nomor resi"""
+    config = pubsub.get_config()
+    try:
+        cursor = request.headers.get('Last-Event-ID') or request.GET.get('after')
+        cursor = None if cursor in (None, '') else int(cursor)
+        timeout = min(float(request.GET.get('timeout', config['long_poll_timeout'])), config['long_poll_timeout'])
+    except ValueError:
+        return JsonResponse({'message': 'after dan timeout harus berupa angka'}, status=400)
+    stream = _wants_stream(request)
+    if stream and not hasattr(request, 'scope'):
+        return JsonResponse({'message': 'SSE hanya tersedia lewat ASGI, gunakan long-poll'}, status=400)
+
+    pengiriman_id = await Pengiriman.aktif.filter(nomor_resi=nomor_resi).values_list('pk', flat=True).afirst()
+    if pengiriman_id is None:
+        return JsonResponse({'message': 'Nomor resi tidak ditemukan'}, status=404)
+    if pubsub.broker.subscribers >= config['max_subscribers']:
+        return JsonResponse({'message': 'Terlalu banyak koneksi menunggu, coba lagi'}, status=503,
+                            headers={'Retry-After': '5'})
+    if cursor is None:
+        terakhir = await RiwayatPengiriman.aktif.filter(pengiriman_id=pengiriman_id).aaggregate(Max('pk'))
+        cursor = terakhir['pk__max'] or 0
+
+    if stream:
+        return StreamingHttpResponse(
+            _stream(pengiriman_id, cursor, config), content_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    subscription = pubsub.broker.subscribe(pengiriman_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        # Subscribe sebelum membaca: event yang commit di antaranya tetap terbaca
+        events = await riwayat_baru(pengiriman_id, cursor, config['max_events'])
+        while not events:
+            sisa = deadline - loop.time()
+            if sisa <= 0 or not await subscription.wait(sisa):
+                break
+            events = await riwayat_baru(pengiriman_id, cursor, config['max_events'])
+    finally:
+        pubsub.broker.unsubscribe(subscription)
+    return JsonResponse({
+        'nomor_resi': nomor_resi,
+        'events': events,
+        'cursor': events[-1]['id'] if events else cursor,
+    }, headers={'Cache-Control': 'no-cache'})
@@ -0,0 +1,218 @@
+"""
+Autentikasi token dengan cache.
+
+``CachedTokenAuthentication`` menyimpan snapshot ringkas user (id,
+username, role, is_active) per token di LRU dalam proses dengan TTL, dan
+opsional di cache bersama (``settings.EKSPEDISI_AUTH_CACHE['shared_cache']``)
+agar proses lain tidak perlu query. Request dengan token yang sudah di-cache
+tidak menjalankan query ``Token`` + ``User``; field user lain dimuat
+(deferred) hanya jika diakses.
+
+Entri diinvalidasi setelah commit saat token dihapus (logout), dan saat
+password, role atau status aktif user berubah atau user dihapus. Invalidasi
+mengganti token generasi per token di ``revocation_cache`` (default
+``'default'``); setiap hit LRU lokal maupun cache bersama dicocokkan dengan
+token generasi itu, jadi setiap request yang ter-cache tetap membaca satu
+kunci cache (tanpa query database). Token generasi dibaca sebelum query
+``Token`` + ``User`` dan disimpan di snapshot, sehingga snapshot yang
+dibangun bersamaan dengan invalidasi tidak pernah dianggap berlaku.
+
+Batasan: pencabutan hanya langsung berlaku di semua proses jika
+``revocation_cache`` adalah backend bersama (Redis, Memcached, database).
+Dengan ``LocMemCache`` token generasi juga per proses: proses lain tetap
+menerima token yang dicabut atau role lama sampai ``ttl`` habis. Perubahan
+lewat ``QuerySet.update()`` tidak memicu signal dan baru terlihat setelah
+TTL habis.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from ekspedisi_app.models import User
+from ekspedisi_app.utils import defer_until_commit
+
+DEFAULT_CONFIG = {
+    'ttl': 60,
+    'max_entries': 10000,
+    # Alias di CACHES untuk berbagi snapshot antar proses; None = hanya lokal
+    'shared_cache': None,
+    'shared_ttl': 300,
+    # Alias di CACHES untuk token generasi (pencabutan); harus bersama antar proses
+    'revocation_cache': 'default',
+}
+SNAPSHOT_FIELDS = ('id', 'username', 'role', 'is_active')
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_AUTH_CACHE', {}))
+    return config
+
+
+class LRUCache:
+    """LRU dengan TTL per entri, aman untuk banyak thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, max_entries):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LRUCache()
+
+
+def _shared_key(key):
+    # Token tidak disimpan mentah sebagai kunci di cache bersama
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _generation_key(key):
+    return 'auth-gen:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_generation(key, config):
+    """Token generasi saat ini untuk token ``key``; dibuat jika belum ada"""
+    cache = caches[config['revocation_cache']]
+    generation = cache.get(_generation_key(key))
+    if generation is None:
+        # add: token yang lebih dulu dibuat proses lain tetap menang
+        cache.add(_generation_key(key), uuid.uuid4().hex, None)
+        generation = cache.get(_generation_key(key))
+    return generation
+
+
+def get_snapshot(key, config):
+    """``(snapshot yang masih berlaku atau None, token generasi saat ini)``"""
+    generation = get_generation(key, config)
+    snapshot = local_cache.get(key)
+    if snapshot is not None:
+        if snapshot['generation'] == generation:
+            return snapshot, generation
+        local_cache.delete([key])
+    if config['shared_cache']:
+        snapshot = caches[config['shared_cache']].get(_shared_key(key))
+        if snapshot is not None and snapshot['generation'] == generation:
+            local_cache.set(key, snapshot, config['ttl'], config['max_entries'])
+            return snapshot, generation
+    return None, generation
+
+
+def set_snapshot(key, snapshot, config):
+    local_cache.set(key, snapshot, config['ttl'], config['max_entries'])
+    if config['shared_cache']:
+        caches[config['shared_cache']].set(_shared_key(key), snapshot, config['shared_ttl'])
+
+
+def invalidate(keys):
+    """Ganti token generasi ``keys`` lalu hapus snapshotnya dari cache lokal dan bersama"""
+    keys = [key for key in keys if key]
+    if not keys:
+        return
+    config = get_config()
+    caches[config['revocation_cache']].set_many(
+        {_generation_key(key): uuid.uuid4().hex for key in keys}, None
+    )
+    local_cache.delete(keys)
+    if config['shared_cache']:
+        caches[config['shared_cache']].delete_many([_shared_key(key) for key in keys])
+
+
+def clear():
+    local_cache.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` dengan snapshot user yang di-cache"""
+
+    def authenticate_credentials(self, key):
+        config = get_config()
+        snapshot, generation = get_snapshot(key, config)
+        if snapshot is None:
+            user, token = super().authenticate_credentials(key)
+            snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+            # Generasi dibaca sebelum query: invalidasi di tengah jalan membuat snapshot ini basi
+            snapshot['generation'] = generation
+            set_snapshot(key, snapshot, config)
+            return user, token
+
+        if not snapshot['is_active']:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        using = router.db_for_read(User)
+        user = User.from_db(using, list(SNAPSHOT_FIELDS), [snapshot[field] for field in SNAPSHOT_FIELDS])
+        token = Token.from_db(using, ['key', 'user_id'], [key, snapshot['id']])
+        return user, token
+
+
+def _flush(items, using):
+    """``items`` berisi ('key', token_key) atau ('user', user_id)"""
+    keys = {value for kind, value in items if kind == 'key'}
+    user_ids = {value for kind, value in items if kind == 'user'}
+    if user_ids:
+        keys.update(Token.objects.using(using).filter(user_id__in=user_ids).values_list('key', flat=True))
+    invalidate(keys)
+
+
+def invalidate_on_commit(items, using):
+    defer_until_commit('auth', items, lambda batch: _flush(batch, using), using=using)
+
+
+def _user_saved(sender, instance, created, using, raw=False, **kwargs):
+    if created or raw:
+        return
+    # Nilai awal None berarti field tidak dimuat: anggap berubah
+    if any(
+        instance.nilai_awal(field) is None or instance.nilai_awal(field) != getattr(instance, field)
+        for field in ('password', 'role', 'is_active')
+    ):
+        invalidate_on_commit([('user', instance.pk)], using)
+
+
+def _token_deleted(sender, instance, using, **kwargs):
+    invalidate_on_commit([('key', instance.key)], using)
+
+
+def connect_signals():
+    post_save.connect(_user_saved, sender=User, dispatch_uid='auth_cache_user_saved')
+    post_delete.connect(_token_deleted, sender=Token, dispatch_uid='auth_cache_token_deleted')
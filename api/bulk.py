@@ -0,0 +1,148 @@
+"""
+Ingest manifest pengiriman dalam jumlah besar (``pengiriman/bulk/``).
+
+Manifest divalidasi sekali jalan dengan satu instance serializer, penerima
+yang sama digabung (juga dengan penerima aktif yang sudah ada di database),
+lalu semua baris disimpan dengan ``bulk_create`` per chunk transaksi.
+Nomor resi dan kode paket dipesan sekaligus per chunk, total dihitung di
+memori dengan tabel tarif (``ekspedisi_app.tarif``), dan ``save()`` model
+tidak dipanggil sehingga tidak ada kompresi gambar atau hitung ulang total
+per paket. Karena ``bulk_create`` tidak memicu signal, cache response
+penerima diinvalidasi langsung.
+"""
+from django.db import DatabaseError, router, transaction
+from rest_framework import serializers
+
+from ekspedisi_app import statistik
+from ekspedisi_app.models import JenisLayanan, Paket, Penerima, Pengiriman, User
+from ekspedisi_app.sequences import allocator
+from ekspedisi_app.signals import pengiriman_diperbarui
+from ekspedisi_app.totals import hitung_biaya
+from . import response_cache
+from .serializers import BulkPengirimanSerializer
+
+CHUNK_SIZE = 500
+PENERIMA_FIELDS = ('nama_penerima', 'alamat_penerima', 'nomor_telepon_penerima', 'kota_tujuan', 'kode_pos')
+
+
+def _penerima_key(values):
+    return tuple(str(value).strip().lower() for value in values)
+
+
+def _tarif_paket(paket):
+    return (
+        paket['penerima'].kode_pos, paket['berat'], paket['panjang'], paket['lebar'], paket['tinggi'],
+        paket.get('nilai_barang'), paket.get('asuransi', False),
+    )
+
+
+def validate_manifest(manifest):
+    """Validasi semua baris, kembalikan (baris_valid, hasil_per_baris)"""
+    kurir_ids = set(User.objects.filter(role='kurir', is_active=True).values_list('id', flat=True))
+    layanan = {obj.pk: obj for obj in JenisLayanan.aktif.all()}
+    serializer = BulkPengirimanSerializer(context={'layanan': layanan, 'kurir_ids': kurir_ids})
+
+    valid, results = [], []
+    for index, row in enumerate(manifest):
+        ref = row.get('ref', '') if isinstance(row, dict) else ''
+        try:
+            data = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            results.append({'index': index, 'ref': ref, 'status': 'invalid', 'errors': exc.detail})
+            continue
+        data['jenis_layanan'] = layanan[data['jenis_layanan']]
+        result = {'index': index, 'ref': ref, 'status': 'pending'}
+        results.append(result)
+        valid.append((data, result))
+    return valid, results
+
+
+def _resolve_penerima(valid):
+    """Gabungkan penerima duplikat dan pakai penerima aktif yang sudah ada"""
+    penerima = {}
+    for data, _ in valid:
+        for paket in data['paket']:
+            values = paket['penerima']
+            penerima.setdefault(_penerima_key(values[field] for field in PENERIMA_FIELDS), values)
+
+    phones = {values['nomor_telepon_penerima'] for values in penerima.values()}
+    existing = {}
+    for obj in Penerima.aktif.filter(nomor_telepon_penerima__in=phones):
+        existing.setdefault(_penerima_key(getattr(obj, field) for field in PENERIMA_FIELDS), obj)
+
+    objects = {key: existing.get(key) or Penerima(**values) for key, values in penerima.items()}
+    for data, _ in valid:
+        for paket in data['paket']:
+            values = paket['penerima']
+            paket['penerima'] = objects[_penerima_key(values[field] for field in PENERIMA_FIELDS)]
+
+
+def ingest_manifest(manifest, user, chunk_size=CHUNK_SIZE):
+    """Validasi dan simpan manifest, kembalikan hasil per baris"""
+    valid, results = validate_manifest(manifest)
+    _resolve_penerima(valid)
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        baru = []
+        try:
+            with transaction.atomic():
+                baru = list({
+                    id(paket['penerima']): paket['penerima']
+                    for data, _ in chunk for paket in data['paket']
+                    if paket['penerima'].pk is None
+                }.values())
+                Penerima.objects.bulk_create(baru)
+                if baru:
+                    # bulk_create tidak memicu post_save
+                    response_cache.invalidate_on_commit([Penerima], router.db_for_write(Penerima))
+
+                jumlah_paket = sum(len(data['paket']) for data, _ in chunk)
+                nomor_resi = iter(allocator.allocate('EKS', Pengiriman, 'nomor_resi', len(chunk)))
+                kode_paket = iter(allocator.allocate('PKT', Paket, 'kode_paket', jumlah_paket))
+
+                pengiriman_list = []
+                for data, _ in chunk:
+                    total_berat, total_biaya = hitung_biaya(
+                        data['jenis_layanan'].pk, [_tarif_paket(paket) for paket in data['paket']]
+                    )
+                    pengiriman_list.append(Pengiriman(
+                        pengirim=user,
+                        kurir_id=data.get('kurir'),
+                        nomor_resi=next(nomor_resi),
+                        jenis_layanan=data['jenis_layanan'],
+                        catatan=data.get('catatan'),
+                        total_berat=total_berat,
+                        total_biaya=total_biaya,
+                    ))
+                Pengiriman.objects.bulk_create(pengiriman_list)
+
+                paket_list = []
+                for pengiriman, (data, result) in zip(pengiriman_list, chunk):
+                    kode = []
+                    for paket in data['paket']:
+                        obj = Paket(pengiriman=pengiriman, kode_paket=next(kode_paket), **paket)
+                        paket_list.append(obj)
+                        kode.append(obj.kode_paket)
+                    result.update({
+                        'status': 'created',
+                        'id': pengiriman.pk,
+                        'nomor_resi': pengiriman.nomor_resi,
+                        'kode_paket': kode,
+                    })
+                Paket.objects.bulk_create(paket_list)
+                statistik.catat_pengiriman_baru(pengiriman_list, paket_list)
+                # Manifest kurir dan index pencarian untuk pengiriman baru (setelah commit)
+                pengiriman_diperbarui.send(
+                    sender=Pengiriman, pengiriman_ids=[obj.pk for obj in pengiriman_list],
+                    using=router.db_for_write(Pengiriman),
+                )
+        except DatabaseError as exc:
+            for obj in baru:
+                obj.pk = None
+                obj._state.adding = True
+            for _, result in chunk:
+                for key in ('id', 'nomor_resi', 'kode_paket'):
+                    result.pop(key, None)
+                result.update({'status': 'failed', 'errors': str(exc)})
+    return results
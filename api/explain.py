@@ -0,0 +1,125 @@
+"""
+Pemeriksaan rencana query (EXPLAIN) untuk list endpoint.
+
+Setiap URL di ``LIST_ENDPOINTS`` dipanggil untuk tiap role, query SELECT
+yang dijalankan ditangkap lalu di-``EXPLAIN``. Baris rencana yang membaca
+seluruh tabel (``SCAN <tabel>`` tanpa index di SQLite, ``Seq Scan`` di
+PostgreSQL) dilaporkan sebagai full table scan. Keputusan di SQLite
+diambil dari rencananya, bukan dari teks SQL:
+
+* ``SCAN`` (tabel atau index) yang hasilnya masih diurutkan ulang
+  (``USE TEMP B-TREE FOR ORDER BY``) selalu full scan: semua baris dibaca
+  sebelum ``LIMIT`` berlaku.
+* ``SCAN`` tanpa temp B-tree (lewat index, atau tabel dalam urutan rowid)
+  sudah memenuhi ``ORDER BY``; dengan ``LIMIT`` ia berhenti setelah satu
+  halaman sehingga tidak dihitung, tanpa ``LIMIT`` tetap full scan (untuk
+  index: seluruh index dibaca). Ini berlaku apa pun bentuk ``ORDER BY``-nya
+  (``"tabel"."id"`` atau posisi kolom seperti ``ORDER BY 3`` dari jalur
+  ``.values()``).
+* ``SEARCH`` tanpa ``LIMIT`` membaca semua baris yang cocok dengan index,
+  sehingga juga dilaporkan, kecuali dibatasi kunci (``rowid``/``id`` atau
+  kolom FK ``*_id``) seperti query prefetch untuk baris satu halaman.
+
+Pemeriksaan dibatasi pada tabel ``TABEL_DIPERIKSA``; tabel referensi kecil
+seperti jenis layanan boleh dibaca utuh. Response cache dimatikan selama
+pengukuran agar setiap URL benar-benar menjalankan query-nya.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from ekspedisi_app.models import Paket, Penerima, Pengiriman, RiwayatPengiriman
+
+from . import response_cache
+
+LIST_ENDPOINTS = (
+    '/api/pengiriman/',
+    '/api/pengiriman/?status_pengiriman=pending',
+    '/api/pengiriman/?jenis_layanan__nama_layanan=Reguler',
+    '/api/paket/',
+    '/api/paket/?jenis_paket=kecil',
+    '/api/paket/?pengiriman__status_pengiriman=transit',
+    '/api/riwayat-pengiriman/',
+    '/api/riwayat-pengiriman/?status=transit',
+    '/api/riwayat-pengiriman/?pengiriman__nomor_resi=EKS000001',
+    '/api/penerima/',
+    '/api/penerima/?kota_tujuan=Bandung',
+    '/api/penerima/?nama_penerima=Budi',
+)
+
+TABEL_DIPERIKSA = frozenset(
+    model._meta.db_table for model in (Pengiriman, Paket, RiwayatPengiriman, Penerima)
+)
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\S+)( USING (COVERING )?INDEX \S+)?$')
+_SQLITE_SEARCH = re.compile(r'^SEARCH (\S+) USING (.*)$')
+_SQLITE_KUNCI = re.compile(r'\((rowid|id|\w+_id)=\?')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\S+)')
+_LIMIT = re.compile(r'\bLIMIT \d+', re.IGNORECASE)
+
+
+def explain(sql, using=DEFAULT_DB_ALIAS):
+    """Baris rencana query untuk ``sql`` (sudah berisi parameter)"""
+    connection = connections[using]
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def scanned_table(line, vendor, sql='', sorted_after=False):
+    """
+    Nama tabel jika baris rencana adalah full table scan, selain itu
+    ``None``. ``sorted_after`` menandai rencana yang memakai temp B-tree
+    untuk ORDER BY.
+    """
+    if vendor == 'sqlite':
+        search = _SQLITE_SEARCH.match(line.strip())
+        if search is not None:
+            if _LIMIT.search(sql) or _SQLITE_KUNCI.search(search.group(2)):
+                return None
+            return search.group(1)
+        match = _SQLITE_SCAN.match(line.strip())
+        if match is None:
+            return None
+        # Scan berurutan (index atau rowid) dengan LIMIT berhenti setelah satu halaman
+        if not sorted_after and _LIMIT.search(sql):
+            return None
+    else:
+        match = _POSTGRES_SCAN.search(line)
+        if match is None:
+            return None
+    return match.group(1).strip('"')
+
+
+def capture_plans(user, urls=LIST_ENDPOINTS, using=DEFAULT_DB_ALIAS):
+    """Jalankan ``urls`` sebagai ``user``; kembalikan ``(url, sql, rencana)`` per query SELECT"""
+    connection = connections[using]
+    client = APIClient()
+    client.force_authenticate(user)
+    plans = []
+    tanpa_cache = override_settings(EKSPEDISI_RESPONSE_CACHE=dict(response_cache.get_config(), enabled=False))
+    for url in urls:
+        with tanpa_cache, CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f'{url}: status {response.status_code}')
+        for query in queries.captured_queries:
+            if query['sql'].lstrip().upper().startswith('SELECT'):
+                plans.append((url, query['sql'], explain(query['sql'], using)))
+    return plans
+
+
+def full_scans(plans, using=DEFAULT_DB_ALIAS, tables=TABEL_DIPERIKSA):
+    """Filter ``plans`` menjadi ``(url, tabel, sql)`` yang melakukan full table scan"""
+    vendor = connections[using].vendor
+    found = []
+    for url, sql, lines in plans:
+        sorted_after = any('TEMP B-TREE FOR ORDER BY' in line for line in lines)
+        for line in lines:
+            table = scanned_table(line, vendor, sql, sorted_after)
+            if table and (tables is None or table in tables):
+                found.append((url, table, sql))
+    return found
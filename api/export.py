@@ -0,0 +1,287 @@
+"""
+Export streaming pengiriman, paket dan riwayat (CSV, XLSX, NDJSON).
+
+Baris dibaca sebagai tuple kolom datar (``values_list``) dengan
+``iterator(chunk_size=...)`` — server-side cursor di PostgreSQL, fetch
+bertahap di SQLite — tanpa serializer nested atau prefetch, lalu ditulis
+per blok ke generator untuk ``StreamingHttpResponse``. Memori tetap
+konstan berapa pun jumlah barisnya.
+
+XLSX ditulis langsung sebagai zip (tanpa dependensi tambahan) ke stream
+yang tidak bisa di-seek; sheet baru dibuat setiap ``XLSX_MAX_ROWS`` baris
+karena batas baris Excel. CSV dan NDJSON bisa dikompres gzip secara
+streaming.
+"""
+import csv
+import io
+import re
+import zipfile
+import zlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from ekspedisi_app.models import Paket, Pengiriman, RiwayatPengiriman
+
+CHUNK_SIZE = 2000
+# Ukuran blok byte yang dikirim ke client
+BLOCK_SIZE = 64 * 1024
+XLSX_MAX_ROWS = 1048575
+
+# nama: (model, field tanggal untuk dari/sampai, [(header, lookup)])
+EXPORTS = {
+    'pengiriman': (Pengiriman, 'tanggal_pengiriman', [
+        ('nomor_resi', 'nomor_resi'),
+        ('tanggal_pengiriman', 'tanggal_pengiriman'),
+        ('status_pengiriman', 'status_pengiriman'),
+        ('pengirim', 'pengirim__username'),
+        ('kurir', 'kurir__username'),
+        ('jenis_layanan', 'jenis_layanan__nama_layanan'),
+        ('total_berat', 'total_berat'),
+        ('total_biaya', 'total_biaya'),
+        ('catatan', 'catatan'),
+    ]),
+    'paket': (Paket, 'pengiriman__tanggal_pengiriman', [
+        ('kode_paket', 'kode_paket'),
+        ('nomor_resi', 'pengiriman__nomor_resi'),
+        ('tanggal_pengiriman', 'pengiriman__tanggal_pengiriman'),
+        ('status_pengiriman', 'pengiriman__status_pengiriman'),
+        ('nama_barang', 'nama_barang'),
+        ('jenis_paket', 'jenis_paket'),
+        ('berat', 'berat'),
+        ('panjang', 'panjang'),
+        ('lebar', 'lebar'),
+        ('tinggi', 'tinggi'),
+        ('nilai_barang', 'nilai_barang'),
+        ('asuransi', 'asuransi'),
+        ('nama_penerima', 'penerima__nama_penerima'),
+        ('kota_tujuan', 'penerima__kota_tujuan'),
+        ('kode_pos', 'penerima__kode_pos'),
+    ]),
+    'riwayat': (RiwayatPengiriman, 'waktu', [
+        ('nomor_resi', 'pengiriman__nomor_resi'),
+        ('waktu', 'waktu'),
+        ('status', 'status'),
+        ('lokasi', 'lokasi'),
+        ('keterangan', 'keterangan'),
+        ('event_id', 'event_id'),
+    ]),
+}
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+
+def filter_tanggal(queryset, field, dari=None, sampai=None):
+    """Batasi ``queryset`` ke rentang tanggal lokal ``dari``..``sampai`` (inklusif)"""
+    if dari:
+        queryset = queryset.filter(**{f'{field}__gte': timezone.make_aware(datetime.combine(dari, time.min))})
+    if sampai:
+        akhir = timezone.make_aware(datetime.combine(sampai + timedelta(days=1), time.min))
+        queryset = queryset.filter(**{f'{field}__lt': akhir})
+    return queryset
+
+
+def export_rows(nama, queryset, chunk_size=CHUNK_SIZE):
+    """(header, iterator baris) untuk export ``nama`` dari ``queryset``"""
+    _, _, columns = EXPORTS[nama]
+    rows = (
+        queryset.order_by('pk').values_list(*(lookup for _, lookup in columns))
+        .iterator(chunk_size=chunk_size)
+    )
+    return [header for header, _ in columns], rows
+
+
+def _teks(value, tz):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.astimezone(tz).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _lokal(row, tz):
+    """Ubah datetime di ``row`` ke ISO zona waktu lokal; nilai lain apa adanya"""
+    return [value.astimezone(tz).isoformat() if type(value) is datetime else value for value in row]
+
+
+def _blok(parts):
+    """Gabungkan potongan bytes menjadi blok sekitar ``BLOCK_SIZE``"""
+    buffer, ukuran = [], 0
+    for part in parts:
+        buffer.append(part)
+        ukuran += len(part)
+        if ukuran >= BLOCK_SIZE:
+            yield b''.join(buffer)
+            buffer, ukuran = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def write_csv(header, rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    tz = timezone.get_current_timezone()
+
+    def lines():
+        writer.writerow(header)
+        for row in rows:
+            # csv.writer menulis None sebagai string kosong
+            writer.writerow(_lokal(row, tz))
+            if output.tell() >= BLOCK_SIZE:
+                yield output.getvalue().encode()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue().encode()
+
+    return lines()
+
+
+def write_ndjson(header, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    tz = timezone.get_current_timezone()
+
+    def lines():
+        for row in rows:
+            # Waktu ditulis dalam zona waktu lokal, sama seperti CSV/XLSX
+            yield (encoder.encode(dict(zip(header, _lokal(row, tz)))) + '\n').encode()
+
+    return _blok(lines())
+
+
+class _Stream(io.RawIOBase):
+    """Tujuan tulis zipfile yang tidak bisa di-seek; isinya diambil per blok"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def ambil(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+_XML_ILEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_SHEET_AWAL = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_AKHIR = b'</sheetData></worksheet>'
+
+
+def _xlsx_row(values, tz):
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append('<c/>')
+        elif isinstance(value, bool):
+            cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float, Decimal)):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            teks = escape(_XML_ILEGAL.sub('', _teks(value, tz)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{teks}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'.encode()
+
+
+def _xlsx_meta(jumlah_sheet):
+    sheets = ''.join(
+        f'<sheet name="Sheet{i}" sheetId="{i}" r:id="rId{i}"/>' for i in range(1, jumlah_sheet + 1)
+    )
+    rels = ''.join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+        f'worksheet" Target="worksheets/sheet{i}.xml"/>' for i in range(1, jumlah_sheet + 1)
+    )
+    overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+        f'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' for i in range(1, jumlah_sheet + 1)
+    )
+    return {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{overrides}</Types>'
+        ),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            'officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels}</Relationships>'
+        ),
+    }
+
+
+def write_xlsx(header, rows, max_rows=XLSX_MAX_ROWS):
+    stream = _Stream()
+    tz = timezone.get_current_timezone()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        jumlah_sheet, sheet, baris = 0, None, max_rows
+        for row in rows:
+            if baris >= max_rows:
+                if sheet is not None:
+                    sheet.write(_SHEET_AKHIR)
+                    sheet.close()
+                jumlah_sheet += 1
+                sheet = archive.open(f'xl/worksheets/sheet{jumlah_sheet}.xml', 'w', force_zip64=True)
+                sheet.write(_SHEET_AWAL + _xlsx_row(header, tz))
+                baris = 0
+            sheet.write(_xlsx_row(row, tz))
+            baris += 1
+            if len(stream.buffer) >= BLOCK_SIZE:
+                yield stream.ambil()
+        if sheet is None:
+            jumlah_sheet = 1
+            sheet = archive.open('xl/worksheets/sheet1.xml', 'w')
+            sheet.write(_SHEET_AWAL + _xlsx_row(header, tz))
+        sheet.write(_SHEET_AKHIR)
+        sheet.close()
+        for name, content in _xlsx_meta(jumlah_sheet).items():
+            archive.writestr(name, content)
+    yield stream.ambil()
+
+
+WRITERS = {'csv': write_csv, 'ndjson': write_ndjson, 'xlsx': write_xlsx}
+
+
+def gzip_stream(chunks, level=6):
+    """Kompres generator bytes sebagai satu stream gzip"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def nama_file(nama, tipe, dari=None, sampai=None):
+    bagian = [nama] + [tanggal.isoformat() for tanggal in (dari, sampai) if tanggal]
+    return f"{'_'.join(bagian)}.{FORMATS[tipe][1]}"
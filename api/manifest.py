@@ -0,0 +1,243 @@
+"""
+Manifest rute kurir untuk endpoint ``kurir/manifest/``.
+
+Manifest adalah daftar datar paket milik satu kurir pada satu hari,
+dikelompokkan menjadi stop per ``(kota_tujuan, kode_pos)`` penerima dan
+diurutkan dengan heuristik nearest-neighbour di atas tabel centroid kode
+pos (``ekspedisi_app.kode_pos``). Rute dimulai dari depot
+(``depot_kode_pos``) jika diatur, jika tidak dari stop terjauh dari titik
+tengah semua stop. Stop yang kode posnya tidak dikenal diletakkan di akhir.
+
+Dokumen yang sudah di-render disimpan di cache
+``settings.EKSPEDISI_MANIFEST['cache']`` per ``(kurir, tanggal)``. Setelah
+commit, perubahan ``Pengiriman`` (termasuk pindah kurir atau tanggal),
+``Paket`` dan ``Penerima`` membangun ulang manifest yang terdampak
+(``precompute``, untuk hari ini dan ``precompute_hari`` hari sebelumnya;
+manifest lebih lama hanya dihapus) sehingga request kurir cukup membaca
+cache.
+``manage.py build_manifests`` mengisi cache untuk satu hari sekaligus.
+"""
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from ekspedisi_app import kode_pos
+from ekspedisi_app.models import Paket, Penerima, Pengiriman
+from ekspedisi_app.signals import pengiriman_diperbarui
+from ekspedisi_app.utils import defer_until_commit
+from .renderers import FastJSONRenderer
+
+DEFAULT_CONFIG = {
+    'cache': 'default',
+    'timeout': 2 * 24 * 3600,
+    # Bangun ulang manifest setelah commit; False = hanya hapus dari cache
+    'precompute': True,
+    # Hanya manifest mulai ``precompute_hari`` hari lalu yang dibangun ulang,
+    # manifest lama cukup dihapus dan dibangun saat diminta
+    'precompute_hari': 1,
+    'depot_kode_pos': None,
+    'centroid_file': None,
+}
+PAKET_FIELDS = (
+    'kode_paket', 'nama_barang', 'berat', 'jenis_paket', 'pengiriman__nomor_resi',
+    'pengiriman__status_pengiriman', 'penerima__nama_penerima', 'penerima__alamat_penerima',
+    'penerima__nomor_telepon_penerima', 'penerima__kota_tujuan', 'penerima__kode_pos',
+)
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_MANIFEST', {}))
+    return config
+
+
+def get_cache():
+    return caches[get_config()['cache']]
+
+
+def cache_key(kurir_id, tanggal):
+    return f'manifest:{kurir_id}:{tanggal.isoformat()}'
+
+
+def rentang_hari(tanggal):
+    """Awal dan akhir hari ``tanggal`` di zona waktu lokal"""
+    awal = timezone.make_aware(datetime.combine(tanggal, time.min))
+    return awal, awal + timedelta(days=1)
+
+
+def urutkan_stop(stops, depot_kode_pos=None):
+    """Urutkan stop dengan nearest-neighbour; stop tanpa centroid di akhir"""
+    dikenal = [stop for stop in stops if stop['_titik'] is not None]
+    lain = sorted(
+        (stop for stop in stops if stop['_titik'] is None), key=lambda s: (s['kota_tujuan'], s['kode_pos'])
+    )
+    if not dikenal:
+        return lain
+
+    posisi = kode_pos.centroid(depot_kode_pos) if depot_kode_pos else None
+    kode_sekarang = depot_kode_pos or ''
+    if posisi is None:
+        tengah = (
+            sum(stop['_titik'][0] for stop in dikenal) / len(dikenal),
+            sum(stop['_titik'][1] for stop in dikenal) / len(dikenal),
+        )
+        awal = max(dikenal, key=lambda s: (kode_pos.jarak_km(tengah, s['_titik']), s['kode_pos']))
+        posisi, kode_sekarang = awal['_titik'], awal['kode_pos']
+
+    hasil, sisa, total = [], list(dikenal), 0.0
+    while sisa:
+        # Seri jarak (kode pos dengan centroid sama) dipecah oleh selisih nomor kode pos
+        berikut = min(sisa, key=lambda s: (
+            round(kode_pos.jarak_km(posisi, s['_titik']), 3), _selisih(kode_sekarang, s['kode_pos']),
+            s['kode_pos'],
+        ))
+        total += kode_pos.jarak_km(posisi, berikut['_titik'])
+        berikut['jarak_km'] = round(total, 1)
+        posisi, kode_sekarang = berikut['_titik'], berikut['kode_pos']
+        sisa.remove(berikut)
+        hasil.append(berikut)
+    return hasil + lain
+
+
+def _selisih(a, b):
+    try:
+        return abs(int(a) - int(b))
+    except ValueError:
+        return 0
+
+
+def build_document(kurir_id, tanggal, using=DEFAULT_DB_ALIAS):
+    """Render manifest ``kurir_id`` untuk ``tanggal`` dari database (satu query)"""
+    awal, akhir = rentang_hari(tanggal)
+    rows = (
+        Paket.aktif.using(using)
+        .filter(
+            pengiriman__is_active=True, pengiriman__kurir_id=kurir_id,
+            pengiriman__tanggal_pengiriman__gte=awal, pengiriman__tanggal_pengiriman__lt=akhir,
+        )
+        .exclude(pengiriman__status_pengiriman='cancelled')
+        .order_by('pengiriman__tanggal_pengiriman', 'id')
+        .values_list(*PAKET_FIELDS)
+    )
+
+    stops = {}
+    for (kode_paket, nama_barang, berat, jenis_paket, nomor_resi, status_pengiriman,
+         nama_penerima, alamat, telepon, kota, kode) in rows:
+        stop = stops.get((kota, kode))
+        if stop is None:
+            stop = stops[(kota, kode)] = {
+                'kota_tujuan': kota, 'kode_pos': kode, 'jumlah_paket': 0, 'total_berat': 0,
+                'paket': [], '_titik': kode_pos.centroid(kode),
+            }
+        stop['jumlah_paket'] += 1
+        stop['total_berat'] += berat
+        stop['paket'].append({
+            'kode_paket': kode_paket, 'nomor_resi': nomor_resi, 'status_pengiriman': status_pengiriman,
+            'nama_barang': nama_barang, 'berat': str(berat), 'jenis_paket': jenis_paket,
+            'nama_penerima': nama_penerima, 'alamat_penerima': alamat, 'nomor_telepon_penerima': telepon,
+        })
+
+    urutan = urutkan_stop(list(stops.values()), get_config()['depot_kode_pos'])
+    for nomor, stop in enumerate(urutan, 1):
+        del stop['_titik']
+        stop['urutan'] = nomor
+        stop['total_berat'] = str(stop['total_berat'])
+    renderer = FastJSONRenderer()
+    # ETag hanya dari isi stop agar tidak berubah saat manifest dibangun ulang tanpa perubahan
+    etag = '"%s"' % hashlib.md5(renderer.render([kurir_id, tanggal.isoformat(), urutan])).hexdigest()
+    body = renderer.render({
+        'kurir': kurir_id,
+        'tanggal': tanggal.isoformat(),
+        'jumlah_stop': len(urutan),
+        'jumlah_paket': sum(stop['jumlah_paket'] for stop in urutan),
+        'jarak_km': max((stop.get('jarak_km', 0) for stop in urutan), default=0),
+        'dibuat': timezone.now().isoformat(),
+        'stops': urutan,
+    })
+    return {'body': body, 'etag': etag}
+
+
+def get_document(kurir_id, tanggal):
+    """Ambil manifest dari cache, bangun ulang jika belum ada"""
+    cache = get_cache()
+    key = cache_key(kurir_id, tanggal)
+    document = cache.get(key)
+    if document is None:
+        document = build_document(kurir_id, tanggal)
+        cache.set(key, document, get_config()['timeout'])
+    return document
+
+
+def refresh(pasangan, using=DEFAULT_DB_ALIAS):
+    """Bangun ulang (atau hapus) manifest untuk pasangan ``(kurir_id, tanggal)``"""
+    pasangan = {(kurir_id, tanggal) for kurir_id, tanggal in pasangan if kurir_id and tanggal}
+    config = get_config()
+    cache = get_cache()
+    batas = timezone.localdate() - timedelta(days=config['precompute_hari'])
+    bangun = {item for item in pasangan if config['precompute'] and item[1] >= batas}
+    if pasangan - bangun:
+        cache.delete_many([cache_key(*item) for item in pasangan - bangun])
+    if bangun:
+        cache.set_many(
+            {cache_key(*item): build_document(*item, using=using) for item in bangun}, config['timeout']
+        )
+
+
+def _tanggal(value):
+    return timezone.localtime(value).date() if value else None
+
+
+def _flush(items, using):
+    """``items`` berisi ('manifest', (kurir_id, tanggal)), ('pengiriman', id) atau ('penerima', id)"""
+    pasangan = {value for kind, value in items if kind == 'manifest'}
+    pengiriman_ids = {value for kind, value in items if kind == 'pengiriman'}
+    penerima_ids = {value for kind, value in items if kind == 'penerima'}
+    if penerima_ids:
+        pengiriman_ids.update(
+            Paket._base_manager.using(using).filter(penerima_id__in=penerima_ids)
+            .values_list('pengiriman_id', flat=True)
+        )
+    if pengiriman_ids:
+        pasangan.update(
+            (kurir_id, _tanggal(tanggal)) for kurir_id, tanggal in
+            Pengiriman._base_manager.using(using).filter(pk__in=pengiriman_ids, kurir__isnull=False)
+            .values_list('kurir_id', 'tanggal_pengiriman')
+        )
+    refresh(pasangan, using)
+
+
+def refresh_on_commit(items, using):
+    defer_until_commit('manifest', items, lambda batch: _flush(batch, using), using=using)
+
+
+def _pengiriman_changed(sender, instance, using, **kwargs):
+    baru = (instance.kurir_id, _tanggal(instance.tanggal_pengiriman))
+    # Manifest kurir/tanggal lama juga dibangun ulang agar paket yang pindah hilang dari sana
+    lama = (instance.nilai_awal('kurir_id'), _tanggal(instance.nilai_awal('tanggal_pengiriman')))
+    refresh_on_commit([('manifest', baru), ('manifest', lama)], using)
+
+
+def _paket_changed(sender, instance, using, **kwargs):
+    refresh_on_commit([('pengiriman', instance.pengiriman_id)], using)
+
+
+def _penerima_changed(sender, instance, using, created=False, **kwargs):
+    if not created:
+        refresh_on_commit([('penerima', instance.pk)], using)
+
+
+def _pengiriman_bulk_changed(sender, pengiriman_ids, using, **kwargs):
+    refresh_on_commit([('pengiriman', pk) for pk in pengiriman_ids], using)
+
+
+def connect_signals():
+    for signal in (post_save, post_delete):
+        signal.connect(_pengiriman_changed, sender=Pengiriman, dispatch_uid='manifest_pengiriman')
+        signal.connect(_paket_changed, sender=Paket, dispatch_uid='manifest_paket')
+        signal.connect(_penerima_changed, sender=Penerima, dispatch_uid='manifest_penerima')
+    pengiriman_diperbarui.connect(_pengiriman_bulk_changed, dispatch_uid='manifest_bulk')
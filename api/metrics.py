@@ -0,0 +1,234 @@
+"""
+Metrik performa per view (di memori, per proses).
+
+``PerformanceMiddleware`` mencatat untuk setiap request: waktu total,
+jumlah dan waktu query database, waktu serializer dan ukuran response.
+Nilai dimasukkan ke histogram bucket tetap per ``(view, method)`` sehingga
+memori tidak tumbuh dengan jumlah request; percentil dihitung dari bucket
+(interpolasi linear), sama seperti ``histogram_quantile`` di Prometheus.
+
+Hasilnya tersedia sebagai teks Prometheus di ``/metrics`` (token bearer
+``token``, atau admin jika token tidak diisi) dan JSON untuk admin di
+``api/metrics/``. Konfigurasi di ``settings.EKSPEDISI_METRICS``.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+DEFAULT_CONFIG = {
+    'enabled': True,
+    # Token bearer untuk scraper /metrics; None berarti /metrics hanya untuk admin
+    'token': None,
+    # Log request lambat: dipilih acak sebelum request berjalan lalu disimpan
+    # jika melewati ambang. 0 berarti nonaktif.
+    'slow_sample_rate': 0.0,
+    'slow_ms': 500,
+    'slow_log_size': 50,
+    'slow_profile': True,
+    'slow_profile_dir': None,
+}
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# (nama metrik, bucket, keterangan)
+HISTOGRAMS = {
+    'duration': ('ekspedisi_request_duration_seconds', DURATION_BUCKETS, 'Waktu total request'),
+    'db_queries': ('ekspedisi_db_queries_per_request', QUERY_BUCKETS, 'Jumlah query database per request'),
+    'db_time': ('ekspedisi_db_duration_seconds', DURATION_BUCKETS, 'Waktu query database per request'),
+    'serializer_time': (
+        'ekspedisi_serializer_duration_seconds', DURATION_BUCKETS, 'Waktu serializer DRF per request'
+    ),
+    'response_bytes': ('ekspedisi_response_bytes', BYTES_BUCKETS, 'Ukuran body response'),
+}
+
+current = contextvars.ContextVar('ekspedisi_request_metrics', default=None)
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_METRICS', {}))
+    return config
+
+
+class Histogram:
+    """Histogram bucket tetap (kumulatif saat diekspor)"""
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        jumlah, hasil = 0, []
+        for bound, count in zip((*self.bounds, float('inf')), self.counts):
+            jumlah += count
+            hasil.append((bound, jumlah))
+        return hasil
+
+    def quantile(self, q):
+        """Estimasi persentil ``q`` (0-1) dari bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        lower, sebelumnya = 0.0, 0
+        for bound, jumlah in self.cumulative():
+            if jumlah >= target:
+                if bound == float('inf'):
+                    return lower
+                isi = jumlah - sebelumnya
+                return lower + (bound - lower) * ((target - sebelumnya) / isi if isi else 0)
+            lower, sebelumnya = bound, jumlah
+        return lower
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class RequestMetrics:
+    """Pengukuran satu request; diisi middleware, wrapper query dan serializer"""
+    __slots__ = ('db_queries', 'db_time', 'serializer_time', 'serializer_depth', 'queries')
+
+    def __init__(self, capture_sql=False):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.queries = [] if capture_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` yang menghitung query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            durasi = time.perf_counter() - started
+            self.db_queries += 1
+            self.db_time += durasi
+            if self.queries is not None:
+                self.queries.append({'sql': sql, 'params': repr(params)[:500], 'ms': round(durasi * 1000, 3)})
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.series = {}
+            self.status = {}
+            self.slow = deque(maxlen=get_config()['slow_log_size'])
+            self.started = time.time()
+
+    def observe(self, view, method, status_code, values):
+        key = (view, method)
+        status_key = (view, method, f'{status_code // 100}xx')
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {
+                    nama: Histogram(bucket) for nama, (_, bucket, _) in HISTOGRAMS.items()
+                }
+            for nama, value in values.items():
+                series[nama].observe(value)
+            self.status[status_key] = self.status.get(status_key, 0) + 1
+
+    def add_slow(self, entry):
+        with self._lock:
+            self.slow.append(entry)
+
+    def snapshot(self):
+        with self._lock:
+            views = {
+                f'{method} {view}': {nama: histogram.snapshot() for nama, histogram in series.items()}
+                for (view, method), series in sorted(self.series.items())
+            }
+            status = {f'{method} {view} {kelas}': jumlah for (view, method, kelas), jumlah in self.status.items()}
+            slow = list(self.slow)
+        return {'since': self.started, 'views': views, 'status': status, 'slow_requests': slow}
+
+    def render_prometheus(self, extra=()):
+        """Semua metrik dalam format teks Prometheus 0.0.4"""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP ekspedisi_requests_total Jumlah request per view, method dan kelas status',
+                '# TYPE ekspedisi_requests_total counter',
+            ]
+            for (view, method, kelas), jumlah in sorted(self.status.items()):
+                lines.append(f'ekspedisi_requests_total{{{_labels(view, method)},status="{kelas}"}} {jumlah}')
+            for nama, (metric, _, keterangan) in HISTOGRAMS.items():
+                lines += [f'# HELP {metric} {keterangan}', f'# TYPE {metric} histogram']
+                for (view, method), series in sorted(self.series.items()):
+                    histogram, labels = series[nama], _labels(view, method)
+                    for bound, jumlah in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(float(bound))
+                        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {jumlah}')
+                    lines.append(f'{metric}_sum{{{labels}}} {histogram.total}')
+                    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+        for metric, jenis, keterangan, value in extra:
+            lines += [f'# HELP {metric} {keterangan}', f'# TYPE {metric} {jenis}']
+            # value berupa {label: nilai} untuk metrik berlabel
+            if isinstance(value, dict):
+                lines += [f'{metric}{{{labels}}} {jumlah}' for labels, jumlah in value.items()]
+            else:
+                lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(view, method):
+    return f'view="{_escape(view)}",method="{_escape(method)}"'
+
+
+registry = Registry()
+
+
+def instrument_serializers():
+    """
+    Ukur waktu ``serializer.data`` (termasuk query lazy yang dijalankan saat
+    serialisasi). Hanya serializer terluar yang dihitung; nested serializer
+    tidak memanggil ``.data``.
+    """
+    from rest_framework.serializers import BaseSerializer
+    original = BaseSerializer.data
+    if getattr(original.fget, 'instrumented', False):
+        return
+
+    def data(self):
+        metrics = current.get()
+        if metrics is None:
+            return original.fget(self)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    data.instrumented = True
+    BaseSerializer.data = property(data)
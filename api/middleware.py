@@ -0,0 +1,187 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.utils import timezone
+
+from . import metrics, replica
+
+logger = logging.getLogger('ekspedisi.slow_request')
+
+
+class _Ukuran:
+    __slots__ = ('sampled', 'measurement', 'profiler', 'durasi')
+
+    def __init__(self, sampled, config):
+        self.sampled = sampled
+        self.measurement = metrics.RequestMetrics(capture_sql=sampled)
+        self.profiler = cProfile.Profile() if sampled and config['slow_profile'] else None
+        self.durasi = 0.0
+
+
+class PerformanceMiddleware:
+    """
+    Catat waktu, query database, waktu serializer dan ukuran response per
+    view ke ``metrics.registry``. Request yang terpilih sampel log lambat
+    juga merekam SQL dan cProfile; hasilnya disimpan hanya jika durasinya
+    melewati ``slow_ms``. Mendukung sync dan async sehingga view async di
+    ASGI tidak dipindah ke thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = metrics.get_config()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.config['enabled']:
+            return self.get_response(request)
+        with self.measure() as ukuran:
+            response = self.get_response(request)
+        return self.record(request, response, ukuran)
+
+    async def __acall__(self, request):
+        if not self.config['enabled']:
+            return await self.get_response(request)
+        with self.measure() as ukuran:
+            response = await self.get_response(request)
+        return self.record(request, response, ukuran)
+
+    @contextmanager
+    def measure(self):
+        config = self.config
+        sampled = config['slow_sample_rate'] > 0 and random.random() < config['slow_sample_rate']
+        ukuran = _Ukuran(sampled, config)
+        token = metrics.current.set(ukuran.measurement)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(ukuran.measurement))
+                if ukuran.profiler is not None:
+                    ukuran.profiler.enable()
+                try:
+                    yield ukuran
+                finally:
+                    if ukuran.profiler is not None:
+                        ukuran.profiler.disable()
+        finally:
+            metrics.current.reset(token)
+        ukuran.durasi = time.perf_counter() - started
+
+    def record(self, request, response, ukuran):
+        view = self.view_name(request)
+        measurement = ukuran.measurement
+        metrics.registry.observe(view, request.method, response.status_code, {
+            'duration': ukuran.durasi,
+            'db_queries': measurement.db_queries,
+            'db_time': measurement.db_time,
+            'serializer_time': measurement.serializer_time,
+            'response_bytes': self.response_bytes(response),
+        })
+        if ukuran.sampled and ukuran.durasi * 1000 >= self.config['slow_ms']:
+            self.log_slow(request, response, view, ukuran.durasi, measurement, ukuran.profiler)
+        return response
+
+    def view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        return match.view_name or match.route or match._func_path
+
+    def response_bytes(self, response):
+        if response.streaming:
+            return int(response.get('Content-Length') or 0)
+        return len(response.content)
+
+    def log_slow(self, request, response, view, durasi, measurement, profiler):
+        entry = {
+            'time': timezone.now().isoformat(),
+            'view': view,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(durasi * 1000, 2),
+            'db_queries': measurement.db_queries,
+            'db_ms': round(measurement.db_time * 1000, 2),
+            'serializer_ms': round(measurement.serializer_time * 1000, 2),
+            'sql': measurement.queries,
+        }
+        if profiler is not None:
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+            entry['profile'] = output.getvalue()
+            profile_dir = self.config['slow_profile_dir']
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+                path = os.path.join(profile_dir, f"{time.time():.6f}-{view.replace('/', '_')}.prof")
+                profiler.dump_stats(path)
+                entry['profile_file'] = path
+        metrics.registry.add_slow(entry)
+        logger.warning(
+            'Request lambat %s %s: %.1fms, %d query (%.1fms)', request.method, entry['path'],
+            entry['duration_ms'], measurement.db_queries, entry['db_ms'],
+        )
+
+
+class ReplicaMiddleware:
+    """
+    Simpan status request untuk ``replica.ReplicaRouter``: view baca dengan
+    method aman boleh membaca dari replica, dan user yang menulis dibaca
+    dari primary selama ``pin_seconds``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = replica.get_config()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.config['aliases']:
+            return self.get_response(request)
+        state = replica.RequestState(request)
+        token = replica.current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica.current.reset(token)
+        if state.wrote:
+            replica.pin(request, self.config)
+        return response
+
+    async def __acall__(self, request):
+        if not self.config['aliases']:
+            return await self.get_response(request)
+        state = replica.RequestState(request)
+        token = replica.current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica.current.reset(token)
+        if state.wrote:
+            replica.pin(request, self.config)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = replica.current.get()
+        if state is not None:
+            state.eligible = request.method in replica.SAFE_METHODS and replica.replica_view(view_func)
@@ -1,17 +1,246 @@
-from rest_framework.pagination import PageNumberPagination
+"""
+Paginasi list endpoint.
+
+* ``KeysetPagination`` (default) memakai cursor berisi nilai kolom urutan
+  baris terakhir/pertama, lalu mengambil halaman berikutnya dengan
+  ``WHERE tanggal < t OR (tanggal = t AND id > i)`` (ekspansi OR dari AND
+  per kolom, bukan row-value ``(tanggal, id) < (...)`` karena arah urutan
+  kolom bisa berbeda, mis. ``-tanggal_pengiriman, id``) tanpa ``OFFSET``
+  dan tanpa ``COUNT(*)``.
+  Biaya per halaman tetap, berapa pun dalamnya halaman, dan baris baru tidak
+  membuat halaman bergeser.
+* ``CustomPagination`` (page number + ``count``) tetap tersedia untuk view
+  yang membutuhkan jumlah total; ``EstimatedCountPagination`` memakai
+  estimasi jumlah baris agar tidak menghitung seluruh tabel.
+"""
+import base64
+import binascii
+import json
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_INVALID = 'Cursor tidak valid'
+
+
+def get_ordering(queryset, view=None):
+    """
+    Urutan keyset: ``view.keyset_ordering`` atau ``Meta.ordering`` model,
+    ditambah ``id`` sebagai pemecah seri agar urutannya unik.
+    """
+    ordering = getattr(view, 'keyset_ordering', None) or queryset.model._meta.ordering or ()
+    ordering = [field for field in ordering if isinstance(field, str)]
+    if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+        ordering.append('id')
+    return tuple(ordering)
+
+
+class KeysetPagination(BasePagination):
+    """Paginasi cursor berbasis keyset (tanpa OFFSET dan COUNT)"""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = get_ordering(queryset, view)
+        self.fields = [
+            (queryset.model._meta.get_field(name.lstrip('-')), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+        values, reverse = self.decode_cursor(request)
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        else:
+            ordering = list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(values, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def after(self, values, reverse=False):
+        """
+        Kondisi baris yang letaknya setelah ``values`` dalam urutan keyset:
+        OR dari ``k1 = v1 AND ... AND kN <op> vN`` untuk setiap kolom, dengan
+        ``<op>`` mengikuti arah kolom masing-masing.
+        """
+        condition = Q()
+        for index, (field, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{field.attname}__{lookup}': values[index]})
+            for (previous, _), value in zip(self.fields[:index], values):
+                step &= Q(**{previous.attname: value})
+            condition |= step
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            raw = data['v']
+            if len(raw) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(value) for (field, _), value in zip(self.fields, raw)]
+            return values, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(CURSOR_INVALID)
+
+    def encode_cursor(self, instance, reverse=False):
+        # Baris .values() (api/values.py) dibaca lewat atribut seperti instance model
+        if isinstance(instance, dict):
+            instance = SimpleNamespace(**instance)
+        data = {'v': [field.value_to_string(instance) for field, _ in self.fields]}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
-    
+
     def get_paginated_response(self, data):
         return Response({
             'count': self.page.paginator.count,
+            'count_is_estimate': getattr(self.page.paginator, 'count_is_estimate', False),
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'total_pages': self.page.paginator.num_pages,
             'current_page': self.page.number,
             'results': data
-        })
\ No newline at end of file
+        })
+
+
+def estimate_table_rows(model, using):
+    """Estimasi jumlah baris tabel dari statistik database, ``None`` jika tidak ada"""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]
+    elif connection.vendor == 'sqlite':
+        # Terisi setelah ANALYZE; angka pertama kolom stat adalah jumlah baris
+        sql, params = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+def tanpa_filter(queryset):
+    """
+    ``True`` jika queryset tidak difilter selain ``is_active`` dari manager
+    ``aktif`` (list endpoint utama), sehingga statistik tabel masih bisa
+    dipakai sebagai estimasi.
+    """
+    where = queryset.query.where
+    if not where:
+        return True
+    aktif = getattr(queryset.model, 'aktif', None)
+    return aktif is not None and where == aktif.all().query.where
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator dengan ``count`` murah: estimasi statistik tabel untuk
+    queryset tanpa filter (atau hanya ``aktif``), selain itu ``COUNT`` yang
+    dibatasi ``count_limit`` baris.
+    """
+    count_limit = 10000
+
+    def __init__(self, *args, count_limit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count_limit is not None:
+            self.count_limit = count_limit
+        self.count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return len(queryset)
+        if tanpa_filter(queryset):
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.count_limit:
+                self.count_is_estimate = True
+                return estimate
+        jumlah = queryset[:self.count_limit + 1].count()
+        if jumlah > self.count_limit:
+            self.count_is_estimate = True
+            return self.count_limit
+        return jumlah
+
+
+class EstimatedCountPagination(CustomPagination):
+    """``CustomPagination`` dengan jumlah total yang diestimasi"""
+    django_paginator_class = EstimatedCountPaginator
@@ -0,0 +1,49 @@
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+PENGIRIMAN_COLUMNS = ('ref', 'jenis_layanan', 'kurir', 'catatan')
+PENERIMA_COLUMNS = ('nama_penerima', 'alamat_penerima', 'nomor_telepon_penerima', 'kota_tujuan', 'kode_pos')
+
+
+class CSVManifestParser(BaseParser):
+    """
+    Parser manifest CSV: satu baris per paket.
+
+    Baris dengan kolom ``ref`` yang sama digabung menjadi satu pengiriman
+    (kolom pengiriman diambil dari baris pertama). Baris tanpa ``ref``
+    menjadi pengiriman tersendiri. Hasilnya berbentuk sama dengan manifest
+    JSON sehingga validasinya cukup satu jalur.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if stream is None:
+            return []
+        lines = (line.decode(encoding) for line in iter(stream.readline, b''))
+        try:
+            reader = csv.DictReader(lines)
+            manifest, by_ref = [], {}
+            for row in reader:
+                row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+                ref = row.get('ref', '')
+                pengiriman = by_ref.get(ref) if ref else None
+                if pengiriman is None:
+                    pengiriman = {key: row[key] for key in PENGIRIMAN_COLUMNS if row.get(key)}
+                    pengiriman['paket'] = []
+                    manifest.append(pengiriman)
+                    if ref:
+                        by_ref[ref] = pengiriman
+                paket = {
+                    key: value for key, value in row.items()
+                    if key not in PENGIRIMAN_COLUMNS and key not in PENERIMA_COLUMNS and value != ''
+                }
+                paket['penerima'] = {key: row.get(key, '') for key in PENERIMA_COLUMNS}
+                pengiriman['paket'].append(paket)
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
+        return manifest
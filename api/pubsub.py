@@ -0,0 +1,141 @@
+"""
+Pub/sub dalam proses untuk event riwayat pengiriman (long-poll dan SSE).
+
+Topik adalah id pengiriman. Setelah commit, ``RiwayatPengiriman`` baru
+(``post_save``) dan operasi massal (``pengiriman_diperbarui``, mis. scan)
+membangunkan semua subscriber pengiriman itu. Notifikasi tidak membawa data:
+subscriber membaca riwayat dengan id lebih besar dari cursor-nya sendiri,
+sehingga notifikasi yang terlewat atau bergabung tidak menghilangkan event.
+
+Subscriber hidup di event loop (view async ``api/async_views.py``);
+``publish`` aman dipanggil dari thread mana pun dan hanya menjadwalkan
+``asyncio.Event.set`` di loop subscriber. Pub/sub ini per proses: proses
+lain tidak dibangunkan, client-nya menerima event saat timeout long-poll
+atau heartbeat SSE berikutnya. Konfigurasi di ``settings.EKSPEDISI_EVENTS``.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db.models.signals import post_save
+
+from ekspedisi_app.models import RiwayatPengiriman
+from ekspedisi_app.signals import pengiriman_diperbarui
+from ekspedisi_app.utils import defer_until_commit
+
+DEFAULT_CONFIG = {
+    # Lama long-poll menunggu event sebelum menjawab kosong (detik)
+    'long_poll_timeout': 25,
+    # Komentar SSE dikirim jika tidak ada event selama ini (detik)
+    'heartbeat': 15,
+    # Stream SSE ditutup setelah ini; client menyambung ulang dengan Last-Event-ID
+    'stream_seconds': 300,
+    # Maksimal event per response long-poll / per pembacaan SSE
+    'max_events': 100,
+    # Batas koneksi menunggu per proses; lebih dari ini dijawab 503
+    'max_subscribers': 10000,
+}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_EVENTS', {}))
+    return config
+
+
+class Subscription:
+    __slots__ = ('topic', 'loop', 'event')
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout):
+        """True jika dibangunkan sebelum ``timeout`` detik"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class Broker:
+    """Subscriber per topik dan counter publish/notifikasi (per proses)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+        self.subscribers = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.published = 0
+            self.delivered = 0
+
+    def subscribe(self, topic):
+        """Daftarkan subscriber ``topic`` di event loop yang sedang berjalan"""
+        subscription = Subscription(topic)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+            self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subs = self._topics.get(subscription.topic)
+            if subs is None or subscription not in subs:
+                return
+            subs.discard(subscription)
+            self.subscribers -= 1
+            if not subs:
+                del self._topics[subscription.topic]
+
+    def publish(self, topics):
+        """Bangunkan subscriber ``topics``; aman dari thread mana pun"""
+        with self._lock:
+            targets = [sub for topic in set(topics) for sub in self._topics.get(topic, ())]
+            self.published += 1
+            self.delivered += len(targets)
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.event.set)
+            except RuntimeError:
+                # Loop sudah ditutup (mis. request WSGI yang selesai lewat async_to_sync)
+                self.unsubscribe(subscription)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'subscribers': self.subscribers,
+                'topics': len(self._topics),
+                'published': self.published,
+                'delivered': self.delivered,
+            }
+
+
+broker = Broker()
+
+
+def _flush(items):
+    broker.publish([pengiriman_id for _, pengiriman_id in items])
+
+
+def publish_on_commit(pengiriman_ids, using):
+    defer_until_commit('events', [('pengiriman', pk) for pk in pengiriman_ids], _flush, using=using)
+
+
+def _riwayat_saved(sender, instance, created, using, raw=False, **kwargs):
+    if created and not raw:
+        publish_on_commit([instance.pengiriman_id], using)
+
+
+def _pengiriman_bulk_changed(sender, pengiriman_ids, using, **kwargs):
+    publish_on_commit(pengiriman_ids, using)
+
+
+def connect_signals():
+    post_save.connect(_riwayat_saved, sender=RiwayatPengiriman, dispatch_uid='events_riwayat')
+    pengiriman_diperbarui.connect(_pengiriman_bulk_changed, dispatch_uid='events_bulk')
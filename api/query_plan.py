@@ -0,0 +1,126 @@
+"""
+Perencana query: turunkan ``select_related``/``prefetch_related`` dari
+pohon field serializer sehingga serialisasi nested tidak memicu N+1 query.
+
+Aturannya:
+
+* ``source`` bertitik (``pengirim.username``) dan serializer nested tunggal
+  melewati relasi forward/one-to-one -> ``select_related``.
+* Serializer nested ``many=True`` atau relasi reverse/many-to-many ->
+  ``Prefetch`` dengan queryset anak yang direncanakan secara rekursif.
+* Field relasi primary key (``PrimaryKeyRelatedField``) cukup membaca
+  kolom ``*_id`` sehingga tidak perlu join.
+
+Rencana di-cache per kelas serializer (dan per himpunan field untuk
+sparse fieldset ``?fields=``).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+_plans = {}
+# Kombinasi ?fields= ditentukan client: batasi jumlah rencana yang disimpan
+MAX_PLANS = 1024
+
+
+class QueryPlan:
+    def __init__(self):
+        self.select = set()
+        self.prefetch = {}
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        lookups = []
+        for path, (model, child_plan) in sorted(self.prefetch.items()):
+            child_queryset = child_plan.apply(getattr(model, 'aktif', model._default_manager).all())
+            lookups.append(Prefetch(path, queryset=child_queryset))
+        if lookups:
+            queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+
+def _relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _walk(model, serializer, plan, prefix, via=None):
+    """Tambahkan kebutuhan join untuk semua field ``serializer`` ke ``plan``"""
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        attrs = field.source.split('.')
+        if isinstance(field, serializers.ManyRelatedField):
+            _add_path(model, attrs, plan, prefix, None, via)
+            continue
+        if isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization() and len(attrs) == 1:
+            continue
+        child = None
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            child = field
+        _add_path(model, attrs, plan, prefix, child, via)
+
+
+def _add_path(model, attrs, plan, prefix, child, via=None):
+    """Telusuri ``attrs`` dari ``model``; relasi yang dilewati dicatat di ``plan``"""
+    path = prefix
+    for index, attr in enumerate(attrs):
+        relation = _relation(model, attr)
+        if relation is None:
+            return
+        path = f'{path}__{attr}' if path else attr
+        related_model = relation.related_model
+        if relation.many_to_many or relation.one_to_many:
+            child_plan = QueryPlan()
+            rest = attrs[index + 1:]
+            if rest:
+                _add_path(related_model, rest, child_plan, '', child, relation)
+            elif child is not None:
+                _walk(related_model, child, child_plan, '', relation)
+            plan.prefetch[path] = (related_model, child_plan)
+            return
+        # Relasi balik ke objek induk sudah di-cache oleh select_related induknya
+        if via is None or relation is not via.remote_field:
+            plan.select.add(path)
+        model, via = related_model, relation
+    if child is not None:
+        _walk(model, child, plan, path, via)
+
+
+def get_plan(serializer_class, fields=None):
+    """Rencana query (di-cache) untuk kelas serializer, opsional hanya untuk ``fields``"""
+    key = serializer_class if fields is None else (serializer_class, frozenset(fields))
+    plan = _plans.get(key)
+    if plan is None:
+        plan = QueryPlan()
+        serializer = serializer_class()
+        if fields is not None:
+            for name in set(serializer.fields) - set(fields):
+                serializer.fields.pop(name)
+        _walk(serializer_class.Meta.model, serializer, plan, '')
+        if len(_plans) < MAX_PLANS:
+            _plans[key] = plan
+    return plan
+
+
+def plan_queryset(queryset, serializer_class, fields=None):
+    """Terapkan join dan prefetch yang dibutuhkan ``serializer_class`` (atau ``fields`` saja)"""
+    return get_plan(serializer_class, fields).apply(queryset)
+
+
+class QueryPlanMixin:
+    """Mixin generic view: queryset otomatis dioptimasi sesuai serializer"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = None
+        if 'fields' in self.request.query_params:
+            # Sparse fieldset (SparseFieldsMixin): join/prefetch hanya untuk field yang diminta
+            fields = list(self.get_serializer().fields)
+        return plan_queryset(queryset, self.get_serializer_class(), fields)
@@ -0,0 +1,41 @@
+"""
+Quote tarif untuk batch paket hipotetis (``quote/``).
+
+Semua paket divalidasi dengan satu instance serializer lalu dihitung dengan
+tabel tarif yang sudah dikompilasi di memori (``ekspedisi_app.tarif``);
+tidak ada query per paket dan tidak ada yang ditulis ke database.
+"""
+from django.db import router
+from rest_framework import serializers
+
+from ekspedisi_app import tarif
+from ekspedisi_app.models import JenisLayanan
+from .serializers import QuotePaketSerializer
+
+RINCIAN_FIELDS = (
+    'berat', 'berat_volumetrik', 'berat_tagih', 'tarif_per_kg', 'biaya_tetap', 'ongkir', 'asuransi', 'total',
+)
+
+
+def quote_paket(paket_list):
+    """Hitung quote untuk ``paket_list``, kembalikan hasil per paket"""
+    tabel = tarif.get_tabel(router.db_for_read(JenisLayanan))
+    serializer = QuotePaketSerializer(context={'layanan': tabel.aktif})
+    results = []
+    for index, paket in enumerate(paket_list):
+        ref = paket.get('ref', '') if isinstance(paket, dict) else ''
+        try:
+            data = serializer.run_validation(paket)
+        except serializers.ValidationError as exc:
+            results.append({'index': index, 'ref': ref, 'status': 'invalid', 'errors': exc.detail})
+            continue
+        rincian = tabel.quote(
+            data['jenis_layanan'], data['kode_pos'], data['berat'], data.get('panjang'), data.get('lebar'),
+            data.get('tinggi'), data.get('nilai_barang'), data['asuransi'],
+        )
+        result = {'index': index, 'ref': ref, 'status': 'ok', 'jenis_layanan': data['jenis_layanan']}
+        result['zona'] = rincian['zona']
+        # Nilai uang dan berat sebagai string, sama seperti DecimalField serializer
+        result.update({field: str(rincian[field]) for field in RINCIAN_FIELDS})
+        results.append(result)
+    return results
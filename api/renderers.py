@@ -0,0 +1,51 @@
+"""
+Renderer JSON untuk seluruh API (``DEFAULT_RENDERER_CLASSES``).
+
+``FastJSONRenderer`` memakai orjson jika terpasang (encoder C, langsung
+menghasilkan bytes UTF-8) dan kembali ke ``json`` standar jika tidak.
+Keluarannya sama dengan ``JSONRenderer`` DRF: compact, tanpa escape
+non-ASCII, U+2028/U+2029 di-escape, datetime/time ISO 8601 dengan presisi
+milidetik dan ``Z`` untuk UTC. Bedanya ``Decimal`` ditulis sebagai string
+(sesuai ``COERCE_DECIMAL_TO_STRING``) seperti ``DecimalField`` serializer,
+bukan float yang bisa kehilangan presisi. Request dengan ``indent``
+(mis. browsable API) tetap lewat ``json`` standar.
+"""
+import decimal
+
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """Encoder DRF dengan ``Decimal`` sebagai string"""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+        return super().default(obj)
+
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Datetime lewat encoder DRF agar formatnya sama dengan JSONRenderer
+        ret = orjson.dumps(
+            data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
@@ -0,0 +1,195 @@
+"""
+Routing bacaan ke database replica (``DATABASE_ROUTERS``).
+
+Hanya request GET/HEAD/OPTIONS ke view baca yang memakai replica: semua
+``ListAPIView``/``ListCreateAPIView`` (lewat ``ListModelMixin``) dan view
+fungsi yang ditandai ``@use_replica`` (tracking dan dashboard).
+``ReplicaMiddleware`` menyimpan status request di context var; query di luar
+request (command, signal, test) dan model autentikasi selalu ke ``default``.
+
+Read-your-writes:
+
+* Setelah request menulis (router memilih database untuk write), sisa
+  request membaca dari ``default``.
+* Request yang menulis menandai user-nya di cache selama ``pin_seconds``;
+  request user itu berikutnya membaca dari ``default`` sampai replica
+  menyusul.
+* Bacaan di dalam transaksi ``default`` tetap di ``default``.
+
+Replica dipilih bergiliran. Jumlah bacaan per alias (dan alasan bacaan yang
+tetap ke ``default``) tersedia di ``/metrics`` dan ``api/metrics/``.
+Konfigurasi di ``settings.EKSPEDISI_REPLICA``; alias replica diambil dari
+``DATABASES`` (lihat ``ekspedisi/database.py``).
+"""
+import contextvars
+import itertools
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.mixins import ListModelMixin
+
+DEFAULT_CONFIG = {
+    'aliases': [],
+    # Lama user dibaca dari default setelah menulis
+    'pin_seconds': 5,
+    'cache': 'default',
+    # TTL dokumen cache (mis. tracking) yang dibangun dari replica
+    'max_lag': 30,
+}
+
+# Model yang tidak boleh tertinggal dari primary (token baru dipakai langsung setelah login)
+PRIMARY_APPS = {'authtoken', 'sessions', 'contenttypes', 'auth', 'admin'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+current = contextvars.ContextVar('ekspedisi_replica_state', default=None)
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_REPLICA', {}))
+    return config
+
+
+def use_replica(view):
+    """Tandai view fungsi sebagai view baca yang boleh memakai replica"""
+    view.use_replica = True
+    return view
+
+
+def replica_view(view_func):
+    if getattr(view_func, 'use_replica', False):
+        return True
+    view_class = getattr(view_func, 'cls', None)
+    return view_class is not None and issubclass(view_class, ListModelMixin)
+
+
+class ReplicaStats:
+    """Counter bacaan per alias dan alasan bacaan ke primary (per proses)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.reads = {}
+            self.primary = {}
+
+    def incr(self, alias, alasan=None):
+        with self._lock:
+            self.reads[alias] = self.reads.get(alias, 0) + 1
+            if alasan:
+                self.primary[alasan] = self.primary.get(alasan, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            reads, primary = dict(self.reads), dict(self.primary)
+        total = sum(reads.values())
+        replica = total - reads.get(DEFAULT_DB_ALIAS, 0)
+        return {
+            'reads': reads,
+            'primary_reasons': primary,
+            'replica_ratio': round(replica / total, 4) if total else 0.0,
+        }
+
+
+stats = ReplicaStats()
+
+
+class RequestState:
+    __slots__ = ('request', 'eligible', 'wrote', 'pinned', 'used')
+
+    def __init__(self, request):
+        self.request = request
+        self.eligible = False
+        self.wrote = False
+        self.pinned = None
+        self.used = False
+
+
+def pin_key(user_id):
+    return f'replica:pin:{user_id}'
+
+
+def _resolved_user(request):
+    """User request jika sudah diautentikasi; tidak memicu query autentikasi"""
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+def is_pinned(state, config):
+    if state.pinned is None:
+        user = _resolved_user(state.request)
+        if user is None:
+            return False
+        state.pinned = bool(caches[config['cache']].get(pin_key(user.pk)))
+    return state.pinned
+
+
+def pin(request, config):
+    user = _resolved_user(request)
+    if user is not None and config['pin_seconds'] > 0:
+        caches[config['cache']].set(pin_key(user.pk), True, config['pin_seconds'])
+
+
+def used():
+    """True jika request ini sudah membaca dari replica"""
+    state = current.get()
+    return state is not None and state.used
+
+
+_giliran = itertools.count()
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.config = get_config()
+        self.aliases = list(self.config['aliases'])
+
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        if state is None or not state.eligible or not self.aliases:
+            return None
+        alasan = self.primary_reason(state, model)
+        if alasan:
+            stats.incr(DEFAULT_DB_ALIAS, alasan)
+            return DEFAULT_DB_ALIAS
+        alias = self.aliases[next(_giliran) % len(self.aliases)]
+        state.used = True
+        stats.incr(alias)
+        return alias
+
+    def primary_reason(self, state, model):
+        if model._meta.app_label in PRIMARY_APPS:
+            return 'auth'
+        if state.wrote:
+            return 'after_write'
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return 'transaction'
+        if is_pinned(state, self.config):
+            return 'pinned'
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = current.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.aliases}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.aliases:
+            return False
+        return None
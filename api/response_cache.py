@@ -0,0 +1,221 @@
+"""
+Cache response ter-render untuk resource yang jarang berubah (jenis layanan,
+penerima).
+
+View mendeklarasikan ``cache_policy = CachePolicy(...)`` dan memakai
+``ResponseCacheMixin``. Response GET 200 berformat JSON disimpan sebagai
+bytes di cache ``settings.EKSPEDISI_RESPONSE_CACHE['cache']`` dengan kunci
+dari nama policy, URL (path dan query param yang diurutkan), nilai
+``vary`` (``role`` atau ``user``) dan token versi setiap model di
+``models``. Request berikutnya hanya menjalankan autentikasi dan
+permission lalu mengembalikan bytes tersebut tanpa query dan serialisasi.
+``ETag`` dihitung dari body sehingga ``If-None-Match`` dijawab 304.
+
+Invalidasi tidak menghapus kunci satu per satu: setelah commit, simpan atau
+hapus model yang diawasi (signal, atau ``invalidate_on_commit`` untuk
+operasi massal seperti ``bulk_create``) mengganti token versi model itu
+sehingga semua varian response lama tidak lagi terjangkau dan habis oleh
+TTL/LRU. Token versi dibaca sebelum query sehingga response yang dibangun
+bersamaan dengan commit disimpan di bawah versi lama.
+
+Token versi hanya berlaku lintas proses jika alias ``cache`` memakai
+backend bersama (Redis, Memcached, database). Dengan ``LocMemCache`` (per
+proses) perubahan hanya menginvalidasi proses yang menulis; proses lain
+melihatnya setelah entri kedaluwarsa, jadi TTL-nya diturunkan ke
+``local_timeout`` (penerima juga sering bertambah lewat bulk ingest).
+"""
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from ekspedisi_app.utils import defer_until_commit
+
+DEFAULT_CONFIG = {
+    'enabled': True,
+    'cache': 'default',
+    # TTL response di cache bersama; invalidasi tetap lewat token versi
+    'timeout': 3600,
+    # TTL jika ``cache`` per proses (LocMem): batas basi perubahan dari proses lain
+    'local_timeout': 15,
+}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_RESPONSE_CACHE', {}))
+    return config
+
+
+def get_cache():
+    return caches[get_config()['cache']]
+
+
+def get_timeout(timeout=None):
+    """TTL entri response; dibatasi ``local_timeout`` jika cache tidak dibagi antar proses"""
+    config = get_config()
+    timeout = config['timeout'] if timeout is None else timeout
+    if isinstance(get_cache(), LocMemCache):
+        timeout = min(timeout, config['local_timeout'])
+    return timeout
+
+
+class CacheStats:
+    """Counter hit/miss per policy (per proses)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.invalidations = 0
+
+    def incr(self, policy, name):
+        with self._lock:
+            counts = self.counts.setdefault(policy, {'hits': 0, 'misses': 0, 'not_modified': 0})
+            counts[name] += 1
+
+    def incr_invalidations(self, jumlah):
+        with self._lock:
+            self.invalidations += jumlah
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'policies': {policy: dict(counts) for policy, counts in self.counts.items()},
+                'invalidations': self.invalidations,
+            }
+
+
+stats = CacheStats()
+
+
+def version_key(model):
+    return f'response:v:{model._meta.label_lower}'
+
+
+def versions(models):
+    """Token versi untuk ``models``; model tanpa token mendapat token baru"""
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # add: proses lain yang lebih dulu membuat token tetap menang
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def invalidate(models):
+    """Ganti token versi ``models`` sehingga semua response lama tidak terpakai"""
+    keys = {version_key(model) for model in models}
+    if keys:
+        get_cache().set_many({key: uuid.uuid4().hex for key in keys}, None)
+        stats.incr_invalidations(len(keys))
+
+
+def invalidate_on_commit(models, using):
+    defer_until_commit('response_cache', [('model', model) for model in models],
+                       lambda batch: invalidate({model for _, model in batch}), using=using)
+
+
+def _model_changed(sender, using, **kwargs):
+    invalidate_on_commit([sender], using)
+
+
+def watch(model):
+    for signal in (post_save, post_delete):
+        signal.connect(_model_changed, sender=model, dispatch_uid=f'response_cache_{model._meta.label_lower}')
+
+
+class CachePolicy:
+    """
+    Kebijakan cache sebuah view.
+
+    ``models`` adalah model yang isinya membentuk response; perubahan pada
+    salah satunya menginvalidasi response. ``vary`` berisi ``'role'``
+    (response sama untuk semua user dengan role yang sama) dan/atau
+    ``'user'`` (response per user).
+    """
+
+    def __init__(self, name, models, vary=('role',), timeout=None):
+        self.name = name
+        self.models = tuple(models)
+        self.vary = tuple(vary)
+        self.timeout = timeout
+        for model in self.models:
+            watch(model)
+
+    def key(self, request, tokens):
+        user = request.user
+        parts = [self.name, request.path, ':'.join(tokens)]
+        for nama in self.vary:
+            parts.append(f"{nama}={getattr(user, 'role' if nama == 'role' else 'pk', '')}")
+        parts += [f'{param}={value}' for param, value in sorted(request.GET.lists())]
+        return 'response:' + hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+class ResponseCacheMixin:
+    """Layani GET dari cache ``cache_policy``; mixin diletakkan sebelum view generic DRF"""
+    cache_policy = None
+
+    def _cacheable(self, request):
+        return (
+            self.cache_policy is not None and request.method in ('GET', 'HEAD')
+            and getattr(request, 'accepted_renderer', None) is not None
+            and request.accepted_renderer.format == 'json' and get_config()['enabled']
+        )
+
+    def get(self, request, *args, **kwargs):
+        if not self._cacheable(request):
+            return super().get(request, *args, **kwargs)
+        policy = self.cache_policy
+        request._response_cache_key = key = policy.key(request, versions(policy.models))
+        entry = get_cache().get(key)
+        if entry is None:
+            stats.incr(policy.name, 'misses')
+            return super().get(request, *args, **kwargs)
+
+        stats.incr(policy.name, 'hits')
+        return self._respond(request, entry)
+
+    def _respond(self, request, entry):
+        response = get_conditional_response(request, etag=entry['etag'])
+        if response is None:
+            response = HttpResponse(entry['body'], content_type=entry['content_type'])
+        else:
+            stats.incr(self.cache_policy.name, 'not_modified')
+        response['ETag'] = entry['etag']
+        response['Cache-Control'] = 'private, no-cache'
+        response['X-Response-Cache'] = 'hit'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(request, '_response_cache_key', None)
+        if key is None or response.status_code != 200 or response.has_header('X-Response-Cache'):
+            return response
+
+        response.render()
+        entry = {
+            'body': response.content,
+            'content_type': response['Content-Type'],
+            'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+        }
+        get_cache().set(key, entry, get_timeout(self.cache_policy.timeout))
+        # Miss juga bisa dijawab 304 jika client sudah memegang body yang sama
+        conditional = get_conditional_response(request, etag=entry['etag'])
+        if conditional is not None:
+            response = conditional
+        response['ETag'] = entry['etag']
+        response['Cache-Control'] = 'private, no-cache'
+        response['X-Response-Cache'] = 'miss'
+        return response
@@ -0,0 +1,157 @@
+"""
+Ingest event scan hub dalam batch (``scan/``).
+
+Setiap event berisi ``event_id`` dari scanner, nomor resi atau kode paket,
+status, lokasi dan waktu. Satu batch diproses dalam satu transaksi:
+
+* ``event_id`` yang sudah tersimpan (kirim ulang) dilaporkan ``duplicate``
+  tanpa ditulis lagi; kolom unik ``RiwayatPengiriman.event_id`` menjaga
+  batch yang dikirim ulang bersamaan. ``event_id`` yang muncul lebih dari
+  sekali dalam satu batch hanya diproses sekali; salinannya melaporkan
+  hasil yang sama dengan kemunculan pertama (mis. ``rejected``).
+* Nomor resi dan kode paket di-resolve dengan satu query per jenis kode,
+  pengiriman dikunci (``select_for_update``) selama batch berjalan.
+* Event per pengiriman diterapkan berurutan menurut ``waktu`` dengan
+  aturan ``Pengiriman.TRANSISI_STATUS``; riwayat ditulis dengan
+  ``bulk_create`` dan status akhir beserta ``last_event_at``/``last_lokasi``
+  lewat ``transisi.simpan`` (UPDATE compare-and-set per pasangan status).
+  Jika status sudah diubah request lain di tengah batch, batch diulang sekali.
+
+Karena ``bulk_create`` tidak memicu signal, event webhook riwayat ditulis ke
+outbox lewat ``webhook.catat_riwayat``; ``transisi.simpan`` mencatat
+statistik, event status dan signal ``pengiriman_diperbarui``.
+"""
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from ekspedisi_app import transisi, webhook
+from ekspedisi_app.models import Paket, Pengiriman, RiwayatPengiriman
+from .serializers import ScanEventSerializer
+
+PENGIRIMAN_FIELDS = (
+    'id', 'nomor_resi', 'status_pengiriman', 'pengirim_id', 'tanggal_pengiriman', 'jenis_layanan_id',
+    'last_event_at', 'last_lokasi',
+)
+
+
+def validate_events(events):
+    """
+    Validasi semua event, kembalikan (event_valid, hasil_per_event, ulang).
+    ``ulang`` berisi pasangan (hasil, hasil_pertama) untuk ``event_id`` yang
+    muncul lagi di batch yang sama.
+    """
+    serializer = ScanEventSerializer()
+    valid, results, ulang, pertama = [], [], [], {}
+    for index, event in enumerate(events):
+        event_id = event.get('event_id', '') if isinstance(event, dict) else ''
+        try:
+            data = serializer.run_validation(event)
+        except serializers.ValidationError as exc:
+            results.append({'index': index, 'event_id': event_id, 'status': 'invalid', 'errors': exc.detail})
+            continue
+        result = {'index': index, 'event_id': data['event_id'], 'status': 'pending'}
+        results.append(result)
+        if data['event_id'] in pertama:
+            ulang.append((result, pertama[data['event_id']]))
+            continue
+        pertama[data['event_id']] = result
+        data.setdefault('waktu', timezone.now())
+        valid.append((data, result))
+    return valid, results, ulang
+
+
+def _resolve(valid):
+    """Petakan event ke pengiriman aktif (terkunci sampai commit)"""
+    kode = {data['kode_paket'] for data, _ in valid if 'kode_paket' in data}
+    paket = dict(
+        Paket.aktif.filter(kode_paket__in=kode).values_list('kode_paket', 'pengiriman_id')
+    ) if kode else {}
+    resi = {data['nomor_resi'] for data, _ in valid if 'nomor_resi' in data}
+    pengiriman = {
+        obj.pk: obj for obj in
+        Pengiriman.aktif.select_for_update()
+        .filter(Q(nomor_resi__in=resi) | Q(pk__in=set(paket.values())))
+        .only(*PENGIRIMAN_FIELDS)
+    }
+    per_resi = {obj.nomor_resi: obj for obj in pengiriman.values()}
+    for data, _ in valid:
+        if 'kode_paket' in data:
+            data['pengiriman'] = pengiriman.get(paket.get(data['kode_paket']))
+        else:
+            data['pengiriman'] = per_resi.get(data['nomor_resi'])
+
+
+def _apply(valid, using):
+    existing = set(
+        RiwayatPengiriman._base_manager.filter(event_id__in=[data['event_id'] for data, _ in valid])
+        .values_list('event_id', flat=True)
+    )
+    baru = []
+    for data, result in valid:
+        if data['event_id'] in existing:
+            result['status'] = 'duplicate'
+        else:
+            baru.append((data, result))
+    _resolve(baru)
+
+    status_awal, status_akhir, terakhir, riwayat = {}, {}, {}, []
+    for data, result in sorted(baru, key=lambda item: (item[0]['waktu'], item[1]['index'])):
+        pengiriman = data['pengiriman']
+        if pengiriman is None:
+            result['status'] = 'not_found'
+            continue
+        sekarang = status_akhir.get(pengiriman.pk, pengiriman.status_pengiriman)
+        if not transisi.diizinkan(sekarang, data['status']):
+            result.update({
+                'status': 'rejected', 'errors': f"Transisi {sekarang} -> {data['status']} tidak diizinkan",
+            })
+            continue
+        status_awal.setdefault(pengiriman.pk, pengiriman.status_pengiriman)
+        status_akhir[pengiriman.pk] = data['status']
+        terakhir[pengiriman.pk] = (data['waktu'], data['lokasi'])
+        keterangan = data.get('keterangan') or f"Scan {data['status']} di {data['lokasi']}"
+        if 'kode_paket' in data:
+            keterangan = f"{keterangan} ({data['kode_paket']})"
+        riwayat.append(RiwayatPengiriman(
+            pengiriman_id=pengiriman.pk, status=data['status'], keterangan=keterangan,
+            lokasi=data['lokasi'], waktu=data['waktu'], event_id=data['event_id'],
+        ))
+        result.update({
+            'status': 'applied' if data['status'] != sekarang else 'recorded',
+            'nomor_resi': pengiriman.nomor_resi,
+            'status_pengiriman': data['status'],
+        })
+    RiwayatPengiriman.objects.bulk_create(riwayat)
+
+    pengiriman = {data['pengiriman'].pk: data['pengiriman'] for data, _ in baru if data['pengiriman'] is not None}
+    transisi.simpan([
+        (pengiriman[pk], status_awal[pk], status, *terakhir[pk]) for pk, status in status_akhir.items()
+    ], using)
+    webhook.catat_riwayat(riwayat, pengiriman, using)
+
+
+def ingest_scans(events):
+    """Validasi dan terapkan batch event scan, kembalikan hasil per event"""
+    valid, results, ulang = validate_events(events)
+    if not valid:
+        return results
+    using = router.db_for_write(Pengiriman)
+    for percobaan in range(2):
+        try:
+            with transaction.atomic(using=using):
+                _apply(valid, using)
+            break
+        except (IntegrityError, transisi.StatusBerubah):
+            # event_id yang sama baru saja disimpan oleh batch lain, atau status
+            # pengiriman diubah request lain: ulangi sekali dengan data terbaru
+            if percobaan:
+                raise
+            for _, result in valid:
+                for key in ('nomor_resi', 'status_pengiriman', 'errors'):
+                    result.pop(key, None)
+                result['status'] = 'pending'
+    for result, hasil_pertama in ulang:
+        result.update({key: value for key, value in hasil_pertama.items() if key != 'index'})
+    return results
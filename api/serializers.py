@@ -1,11 +1,82 @@
-from rest_framework import serializers
+from decimal import Decimal
+
+from rest_framework import exceptions, serializers, status
+from rest_framework.permissions import SAFE_METHODS
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.db import router, transaction
+from ekspedisi_app import transisi
+from ekspedisi_app.images import get_config as get_foto_config
+from ekspedisi_app.webhook import AlamatDitolak, periksa_url, get_config as get_webhook_config
 from ekspedisi_app.models import (
     User, Profile, JenisLayanan, Penerima, 
-    Pengiriman, Paket, RiwayatPengiriman
+    Pengiriman, Paket, RiwayatPengiriman, PengirimanArsip, WebhookEndpoint
 )
 
+def pilih_varian_foto(request):
+    """Varian foto untuk request: ?foto_varian=..., role kurir, atau Accept image/webp"""
+    if request is None:
+        return 'asli'
+    varian = request.query_params.get('foto_varian')
+    if varian in get_foto_config()['varian'] or varian == 'asli':
+        return varian
+    if getattr(request.user, 'role', None) == 'kurir':
+        return 'kurir'
+    if 'image/webp' in request.META.get('HTTP_ACCEPT', ''):
+        return 'webp'
+    return 'asli'
+
+class FotoVarianField(serializers.Field):
+    """URL foto dalam varian yang sesuai dengan request"""
+    
+    def __init__(self, foto_field, **kwargs):
+        self.foto_field = foto_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, instance):
+        foto = getattr(instance, self.foto_field)
+        if not foto:
+            return None
+        request = self.context.get('request')
+        varian = getattr(instance, f'{self.foto_field}_varian') or {}
+        name = varian.get(pilih_varian_foto(request), {}).get('name') or foto.name
+        url = foto.storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+def daftar_field(request, param):
+    """Nama field dari query param berisi daftar dipisah koma"""
+    return {nama.strip() for nama in request.query_params.get(param, '').split(',') if nama.strip()}
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldset untuk request baca: ``?fields=a,b`` hanya mengembalikan
+    field tersebut, ``?expand=`` menambahkan field nested (relasi). Tanpa
+    ``?fields=`` semua field dikembalikan. Hanya serializer terluar (yang
+    menerima ``request`` di context) yang dipangkas; ``QueryPlanMixin``
+    memakai field yang tersisa untuk memangkas join dan prefetch.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or 'fields' not in request.query_params:
+            return
+        fields = daftar_field(request, 'fields')
+        expand = daftar_field(request, 'expand')
+        errors = {}
+        unknown = (fields | expand) - set(self.fields)
+        if unknown:
+            errors['fields'] = f"Field tidak dikenal: {', '.join(sorted(unknown))}"
+        flat = {nama for nama in expand - unknown if not isinstance(self.fields[nama], serializers.BaseSerializer)}
+        if flat:
+            errors['expand'] = f"Bukan relasi nested: {', '.join(sorted(flat))}"
+        if errors:
+            raise serializers.ValidationError(errors)
+        for nama in set(self.fields) - fields - expand:
+            self.fields.pop(nama)
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True)
@@ -47,49 +118,127 @@ class LoginSerializer(serializers.Serializer):
 class ProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     role = serializers.CharField(source='user.role', read_only=True)
+    foto_profil_url = FotoVarianField('foto_profil')
     
     class Meta:
         model = Profile
         fields = '__all__'
-        read_only_fields = ('user', 'created_at', 'updated_at')
+        read_only_fields = ('user', 'foto_profil_hash', 'foto_profil_varian', 'created_at', 'updated_at')
 
-class JenisLayananSerializer(serializers.ModelSerializer):
+class JenisLayananSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = JenisLayanan
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
-class PenerimaSerializer(serializers.ModelSerializer):
+class PenerimaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Penerima
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
-class RiwayatPengirimanSerializer(serializers.ModelSerializer):
+class StatusKonflik(exceptions.APIException):
+    """Compare-and-set transisi gagal karena status sudah diubah request lain"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Status pengiriman sudah diubah, muat ulang lalu coba lagi.'
+    default_code = 'conflict'
+
+class RiwayatPengirimanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Riwayat baru adalah transisi status pengiriman (transisi.terapkan)"""
+    
     class Meta:
         model = RiwayatPengiriman 
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
+    
+    def validate(self, attrs):
+        if self.instance is not None:
+            for field in ('pengiriman', 'status'):
+                if field in attrs and attrs[field] != getattr(self.instance, field):
+                    raise serializers.ValidationError({field: 'Tidak dapat diubah; buat riwayat baru.'})
+        elif not attrs['pengiriman'].is_active:
+            raise serializers.ValidationError({'pengiriman': 'Pengiriman sudah nonaktif.'})
+        elif not transisi.diizinkan(attrs['pengiriman'].status_pengiriman, attrs['status']):
+            raise serializers.ValidationError({'status': (
+                f"Transisi {attrs['pengiriman'].status_pengiriman} -> {attrs['status']} tidak diizinkan"
+            )})
+        return attrs
+    
+    def create(self, validated_data):
+        try:
+            return transisi.terapkan(
+                validated_data['pengiriman'], validated_data['status'], validated_data['lokasi'],
+                validated_data['keterangan'], validated_data.get('waktu'),
+            )
+        except transisi.PengirimanNonaktif:
+            raise serializers.ValidationError({'pengiriman': 'Pengiriman sudah nonaktif.'})
+        except transisi.StatusBerubah:
+            raise StatusKonflik()
 
-class PaketSerializer(serializers.ModelSerializer):
+class PaketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     penerima_detail = PenerimaSerializer(source='penerima', read_only=True)
+    foto_paket_url = FotoVarianField('foto_paket')
     
     class Meta:
         model = Paket
         fields = '__all__'
-        read_only_fields = ('kode_paket', 'created_at', 'updated_at')
+        read_only_fields = ('kode_paket', 'foto_paket_hash', 'foto_paket_varian', 'created_at', 'updated_at')
+    
+    def validate_pengiriman(self, value):
+        if not value.is_active:
+            raise serializers.ValidationError('Pengiriman sudah nonaktif.')
+        return value
 
-class PengirimanSerializer(serializers.ModelSerializer):
+class PengirimanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     pengirim_username = serializers.CharField(source='pengirim.username', read_only=True)
     kurir_username = serializers.CharField(source='kurir.username', read_only=True)
     jenis_layanan_detail = JenisLayananSerializer(source='jenis_layanan', read_only=True)
     paket_list = PaketSerializer(source='paket_set', many=True, read_only=True)
     riwayat_pengiriman = RiwayatPengirimanSerializer(many=True, read_only=True) 
+    # Lokasi/keterangan riwayat saat status_pengiriman diubah
+    lokasi = serializers.CharField(max_length=255, write_only=True, required=False)
+    keterangan = serializers.CharField(write_only=True, required=False, allow_blank=True)
     
     class Meta:
         model = Pengiriman
         fields = '__all__'
         read_only_fields = ('nomor_resi', 'pengirim', 'total_berat', 'total_biaya', 'created_at', 'updated_at')
+    
+    def validate_status_pengiriman(self, value):
+        lama = self.instance.status_pengiriman if self.instance is not None else 'pending'
+        if value != lama and not transisi.diizinkan(lama, value):
+            raise serializers.ValidationError(f"Transisi {lama} -> {value} tidak diizinkan")
+        return value
+    
+    def update(self, instance, validated_data):
+        """
+        Status diubah lewat ``transisi.terapkan`` (compare-and-set dan riwayat
+        dalam transaksi yang sama); field lain disimpan dengan ``update_fields``
+        agar tidak menimpa status yang baru ditulis.
+        """
+        status_baru = validated_data.pop('status_pengiriman', instance.status_pengiriman)
+        lokasi = validated_data.pop('lokasi', None)
+        keterangan = validated_data.pop('keterangan', '')
+        with transaction.atomic(using=router.db_for_write(Pengiriman, instance=instance)):
+            if status_baru != instance.status_pengiriman:
+                try:
+                    transisi.terapkan(
+                        instance, status_baru, lokasi or instance.last_lokasi or '-', keterangan,
+                    )
+                except transisi.PengirimanNonaktif:
+                    raise serializers.ValidationError({'status_pengiriman': 'Pengiriman sudah nonaktif.'})
+                except transisi.StatusBerubah:
+                    raise StatusKonflik()
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+class PengirimanArsipSerializer(PengirimanSerializer):
+    """Bentuk sama dengan PengirimanSerializer untuk pengiriman yang diarsipkan"""
+    
+    class Meta(PengirimanSerializer.Meta):
+        model = PengirimanArsip
 
 class PengirimanCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -106,4 +255,90 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'role', 'is_active', 'created_at', 'profile')
-        read_only_fields = ('created_at',)
\ No newline at end of file
+        read_only_fields = ('created_at',)
+
+class BulkPenerimaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Penerima
+        fields = ('nama_penerima', 'alamat_penerima', 'nomor_telepon_penerima', 'kota_tujuan', 'kode_pos')
+
+class BulkPaketSerializer(serializers.ModelSerializer):
+    penerima = BulkPenerimaSerializer()
+    
+    class Meta:
+        model = Paket
+        fields = (
+            'nama_barang', 'deskripsi_barang', 'berat', 'panjang', 'lebar', 'tinggi',
+            'jenis_paket', 'nilai_barang', 'asuransi', 'penerima'
+        )
+
+class BulkPengirimanSerializer(serializers.Serializer):
+    """Validasi satu baris manifest; jenis layanan dan kurir dicek ke data di context"""
+    ref = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    jenis_layanan = serializers.IntegerField()
+    kurir = serializers.IntegerField(required=False, allow_null=True)
+    catatan = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    paket = BulkPaketSerializer(many=True, allow_empty=False)
+    
+    def validate_jenis_layanan(self, value):
+        if value not in self.context['layanan']:
+            raise serializers.ValidationError('Jenis layanan tidak ditemukan')
+        return value
+    
+    def validate_kurir(self, value):
+        if value is not None and value not in self.context['kurir_ids']:
+            raise serializers.ValidationError('Kurir tidak ditemukan')
+        return value
+
+class ScanEventSerializer(serializers.Serializer):
+    """Validasi satu event scan hub; paket diidentifikasi lewat nomor resi atau kode paket"""
+    event_id = serializers.CharField(max_length=64)
+    nomor_resi = serializers.CharField(max_length=20, required=False)
+    kode_paket = serializers.CharField(max_length=20, required=False)
+    status = serializers.ChoiceField(choices=Pengiriman.STATUS_CHOICES)
+    lokasi = serializers.CharField(max_length=255)
+    waktu = serializers.DateTimeField(required=False)
+    keterangan = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        if ('nomor_resi' in attrs) == ('kode_paket' in attrs):
+            raise serializers.ValidationError('Isi salah satu dari nomor_resi atau kode_paket')
+        return attrs
+
+class QuotePaketSerializer(serializers.Serializer):
+    """Validasi satu paket hipotetis untuk quote tarif"""
+    ref = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    jenis_layanan = serializers.IntegerField()
+    kode_pos = serializers.CharField(max_length=10)
+    berat = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    panjang = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    lebar = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    tinggi = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    nilai_barang = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0, required=False)
+    asuransi = serializers.BooleanField(required=False, default=False)
+    
+    def validate_jenis_layanan(self, value):
+        if value not in self.context['layanan']:
+            raise serializers.ValidationError('Jenis layanan tidak ditemukan')
+        return value
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    """Endpoint webhook milik user; ``secret`` dipakai merchant untuk verifikasi signature"""
+    
+    class Meta:
+        model = WebhookEndpoint
+        fields = ('id', 'url', 'konkurensi', 'secret', 'is_active', 'created_at', 'updated_at')
+        read_only_fields = ('secret', 'created_at', 'updated_at')
+    
+    def validate_url(self, value):
+        try:
+            periksa_url(value)
+        except AlamatDitolak as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+    
+    def validate_konkurensi(self, value):
+        maksimal = get_webhook_config()['max_konkurensi']
+        if not 1 <= value <= maksimal:
+            raise serializers.ValidationError(f'Konkurensi harus antara 1 dan {maksimal}')
+        return value
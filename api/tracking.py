@@ -0,0 +1,246 @@
+"""
+Read model untuk endpoint publik ``tracking/<nomor_resi>/``.
+
+Dokumen tracking (JSON yang sudah di-render, ETag dan Last-Modified)
+disimpan per nomor resi di cache ``settings.EKSPEDISI_TRACKING_CACHE``.
+Backend cache bisa diganti lewat ``CACHES`` (local-memory, file, database);
+LocMemCache membuang entri yang paling lama tidak dipakai (LRU) setelah
+``MAX_ENTRIES`` terlampaui.
+
+Dokumen diinvalidasi setelah commit ketika ``Pengiriman``, ``Paket``,
+``RiwayatPengiriman`` atau ``Penerima`` terkait berubah, lalu dibangun
+ulang pada request berikutnya. Seperti ``api/response_cache.py``,
+invalidasi mengganti token versi per resi (``tracking:v:<resi>``), bukan
+sekadar menghapus dokumen: token dibaca sebelum query dan disimpan di dalam
+dokumen, sehingga dokumen yang dibangun dari data sebelum commit lalu
+di-``set`` setelah invalidasi tidak cocok dengan token baru dan dianggap
+miss. Dokumen dan token dibaca dalam satu ``get_many``. Dokumen yang dibangun dari replica hanya
+disimpan selama ``EKSPEDISI_REPLICA['max_lag']`` detik karena replica bisa
+belum memuat perubahan yang sudah diinvalidasi. Resi yang sudah dipindah
+ke arsip (``ekspedisi_app/arsip.py``) dibaca dari tabel arsip dengan bentuk
+dokumen yang sama.
+
+``aget_document`` adalah jalur yang sama untuk view async
+(``api/async_views.py``): cache dan query memakai API async Django.
+"""
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import post_delete, post_save
+
+from ekspedisi_app.models import Paket, Penerima, Pengiriman, PengirimanArsip, RiwayatPengiriman
+from ekspedisi_app.signals import pengiriman_diperbarui
+from ekspedisi_app.utils import defer_until_commit
+from . import replica
+from .query_plan import plan_queryset
+from .renderers import FastJSONRenderer
+from .serializers import PengirimanArsipSerializer, PengirimanSerializer
+
+
+class CacheStats:
+    """Counter hit/miss cache tracking (per proses)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counts = {'hits': 0, 'misses': 0, 'not_found': 0, 'invalidations': 0}
+
+    def incr(self, name, jumlah=1):
+        with self._lock:
+            self.counts[name] += jumlah
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else 0.0
+        return counts
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'EKSPEDISI_TRACKING_CACHE', 'default')]
+
+
+# Tabel utama dulu, lalu arsip untuk pengiriman lama
+SUMBER = ((Pengiriman, PengirimanSerializer), (PengirimanArsip, PengirimanArsipSerializer))
+
+
+def cache_key(nomor_resi):
+    return f'tracking:{nomor_resi}'
+
+
+def version_key(nomor_resi):
+    return f'tracking:v:{nomor_resi}'
+
+
+def _baca(found, cache, nomor_resi):
+    """(dokumen yang masih berlaku atau None, token versi saat ini) dari hasil ``get_many``"""
+    version = found.get(version_key(nomor_resi))
+    if version is None:
+        # add: token yang lebih dulu dibuat proses lain tetap menang
+        cache.add(version_key(nomor_resi), uuid.uuid4().hex, None)
+        version = cache.get(version_key(nomor_resi))
+    document = found.get(cache_key(nomor_resi))
+    if document is not None and document.get('version') == version:
+        return document, version
+    return None, version
+
+
+async def _abaca(found, cache, nomor_resi):
+    version = found.get(version_key(nomor_resi))
+    if version is None:
+        await cache.aadd(version_key(nomor_resi), uuid.uuid4().hex, None)
+        version = await cache.aget(version_key(nomor_resi))
+    document = found.get(cache_key(nomor_resi))
+    if document is not None and document.get('version') == version:
+        return document, version
+    return None, version
+
+
+def _queryset(model, serializer_class, nomor_resi):
+    return plan_queryset(model.aktif.all(), serializer_class).filter(nomor_resi=nomor_resi)
+
+
+def _render(pengiriman, serializer_class):
+    body = FastJSONRenderer().render({
+        'message': 'Data tracking ditemukan',
+        'data': serializer_class(pengiriman).data
+    })
+    waktu = [pengiriman.updated_at]
+    waktu += [paket.updated_at for paket in pengiriman.paket_set.all()]
+    waktu += [riwayat.updated_at for riwayat in pengiriman.riwayat_pengiriman.all()]
+    return {
+        'body': body,
+        'etag': '"%s"' % hashlib.md5(body).hexdigest(),
+        'last_modified': max(waktu).timestamp(),
+    }
+
+
+def build_document(nomor_resi):
+    """Render dokumen tracking dari database (atau arsip), ``None`` jika resi tidak ada"""
+    for model, serializer_class in SUMBER:
+        pengiriman = _queryset(model, serializer_class, nomor_resi).first()
+        if pengiriman is not None:
+            return _render(pengiriman, serializer_class)
+    return None
+
+
+async def abuild_document(nomor_resi):
+    """Versi async ``build_document``: query lewat ORM async, render tanpa query"""
+    for model, serializer_class in SUMBER:
+        pengiriman = await _queryset(model, serializer_class, nomor_resi).afirst()
+        if pengiriman is not None:
+            return _render(pengiriman, serializer_class)
+    return None
+
+
+def _timeout():
+    """TTL dokumen yang baru dibangun"""
+    if replica.used():
+        # Replica bisa tertinggal dari invalidasi: simpan sebentar saja
+        return replica.get_config()['max_lag']
+    return DEFAULT_TIMEOUT
+
+
+def get_document(nomor_resi):
+    """Ambil dokumen tracking dari cache, bangun ulang jika belum ada"""
+    cache = get_cache()
+    found = cache.get_many([cache_key(nomor_resi), version_key(nomor_resi)])
+    document, version = _baca(found, cache, nomor_resi)
+    if document is not None:
+        stats.incr('hits')
+        return document
+
+    stats.incr('misses')
+    document = build_document(nomor_resi)
+    if document is None:
+        stats.incr('not_found')
+    else:
+        document['version'] = version
+        cache.set(cache_key(nomor_resi), document, _timeout())
+    return document
+
+
+async def aget_document(nomor_resi):
+    """Versi async ``get_document`` untuk view ASGI"""
+    cache = get_cache()
+    found = await cache.aget_many([cache_key(nomor_resi), version_key(nomor_resi)])
+    document, version = await _abaca(found, cache, nomor_resi)
+    if document is not None:
+        stats.incr('hits')
+        return document
+
+    stats.incr('misses')
+    document = await abuild_document(nomor_resi)
+    if document is None:
+        stats.incr('not_found')
+    else:
+        document['version'] = version
+        await cache.aset(cache_key(nomor_resi), document, _timeout())
+    return document
+
+
+def invalidate(nomor_resi_list):
+    """Ganti token versi (dan hapus dokumen) untuk nomor resi yang diberikan"""
+    resi = [nomor_resi for nomor_resi in nomor_resi_list if nomor_resi]
+    if resi:
+        cache = get_cache()
+        cache.set_many({version_key(nomor_resi): uuid.uuid4().hex for nomor_resi in resi}, None)
+        cache.delete_many([cache_key(nomor_resi) for nomor_resi in resi])
+        stats.incr('invalidations', len(resi))
+
+
+def _flush(items, using):
+    """``items`` berisi ('resi', nomor_resi), ('pengiriman', id) atau ('penerima', id)"""
+    resi = {value for kind, value in items if kind == 'resi'}
+    pengiriman_ids = {value for kind, value in items if kind == 'pengiriman'}
+    penerima_ids = {value for kind, value in items if kind == 'penerima'}
+    if penerima_ids:
+        pengiriman_ids.update(
+            Paket._base_manager.using(using).filter(penerima_id__in=penerima_ids)
+            .values_list('pengiriman_id', flat=True)
+        )
+    if pengiriman_ids:
+        resi.update(
+            Pengiriman._base_manager.using(using).filter(pk__in=pengiriman_ids)
+            .values_list('nomor_resi', flat=True)
+        )
+    invalidate(resi)
+
+
+def invalidate_on_commit(items, using):
+    defer_until_commit('tracking', items, lambda batch: _flush(batch, using), using=using)
+
+
+def _pengiriman_changed(sender, instance, using, **kwargs):
+    invalidate_on_commit([('resi', instance.nomor_resi)], using)
+
+
+def _child_changed(sender, instance, using, **kwargs):
+    invalidate_on_commit([('pengiriman', instance.pengiriman_id)], using)
+
+
+def _penerima_changed(sender, instance, using, **kwargs):
+    invalidate_on_commit([('penerima', instance.pk)], using)
+
+
+def _pengiriman_bulk_changed(sender, pengiriman_ids, using, **kwargs):
+    invalidate_on_commit([('pengiriman', pk) for pk in pengiriman_ids], using)
+
+
+def connect_signals():
+    for signal in (post_save, post_delete):
+        signal.connect(_pengiriman_changed, sender=Pengiriman, dispatch_uid='tracking_pengiriman')
+        signal.connect(_child_changed, sender=Paket, dispatch_uid='tracking_paket')
+        signal.connect(_child_changed, sender=RiwayatPengiriman, dispatch_uid='tracking_riwayat')
+        signal.connect(_penerima_changed, sender=Penerima, dispatch_uid='tracking_penerima')
+    pengiriman_diperbarui.connect(_pengiriman_bulk_changed, dispatch_uid='tracking_bulk')
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('auth/register/', views.register_view, name='register'),
@@ -8,6 +8,7 @@ urlpatterns = [
     path('auth/profile/', views.profile_view, name='profile'),
     
     path('dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
+    path('dashboard/stats/harian/', views.dashboard_stats_harian, name='dashboard_stats_harian'),
     
     path('jenis-layanan/', views.JenisLayananListCreateView.as_view(), name='jenis_layanan_list_create'),
     path('jenis-layanan/<int:pk>/', views.JenisLayananDetailView.as_view(), name='jenis_layanan_detail'),
@@ -16,16 +17,32 @@ urlpatterns = [
     path('penerima/<int:pk>/', views.PenerimaDetailView.as_view(), name='penerima_detail'),
     
     path('pengiriman/', views.PengirimanListView.as_view(), name='pengiriman_list'),
+    path('pengiriman/export/', views.PengirimanExportView.as_view(), name='pengiriman_export'),
     path('pengiriman/create/', views.PengirimanCreateView.as_view(), name='pengiriman_create'),
+    path('pengiriman/bulk/', views.PengirimanBulkCreateView.as_view(), name='pengiriman_bulk_create'),
     path('pengiriman/<int:pk>/', views.PengirimanDetailView.as_view(), name='pengiriman_detail'),
     
     path('paket/', views.PaketListCreateView.as_view(), name='paket_list_create'),
+    path('paket/export/', views.PaketExportView.as_view(), name='paket_export'),
     path('paket/<int:pk>/', views.PaketDetailView.as_view(), name='paket_detail'),
     
     path('riwayat-pengiriman/', views.RiwayatPengirimanListCreateView.as_view(), name='riwayat_pengiriman_list_create'), # tracking_log_list_create diubah
+    path('riwayat-pengiriman/export/', views.RiwayatPengirimanExportView.as_view(), name='riwayat_pengiriman_export'),
     path('riwayat-pengiriman/<int:pk>/', views.RiwayatPengirimanDetailView.as_view(), name='riwayat_pengiriman_detail'), # tracking_log_detail diubah
     
+    path('webhooks/', views.WebhookEndpointListCreateView.as_view(), name='webhook_list_create'),
+    path('webhooks/<int:pk>/', views.WebhookEndpointDetailView.as_view(), name='webhook_detail'),
+    
     path('tracking/<str:nomor_resi>/', views.tracking_by_resi, name='tracking_by_resi'),
+    path('scan/', views.scan_ingest, name='scan_ingest'),
+    path('search/', views.search_pengiriman, name='search_pengiriman'),
+    path('quote/', views.quote_tarif, name='quote_tarif'),
+    path('kurir/manifest/', views.kurir_manifest, name='kurir_manifest'),
+    path('async/tracking/<str:nomor_resi>/', async_views.tracking_by_resi, name='async_tracking_by_resi'),
+    path('async/tracking/<str:nomor_resi>/events/', async_views.tracking_events, name='async_tracking_events'),
+    path('async/dashboard/stats/', async_views.dashboard_stats, name='async_dashboard_stats'),
+    path('tracking-cache/stats/', views.tracking_cache_stats, name='tracking_cache_stats'),
+    path('metrics/', views.metrics_admin, name='metrics_admin'),
     
 
     path('users/', views.UserListView.as_view(), name='user_list'),
@@ -0,0 +1,182 @@
+"""
+Jalur baca ringan untuk list endpoint: baris ``.values()`` langsung diubah
+menjadi dict tanpa membuat instance model dan tanpa ``Serializer.to_representation``.
+
+``get_values_plan`` menurunkan dari serializer (setelah sparse fieldset
+``?fields=``) daftar kolom ``.values()`` dan fungsi konversi per field.
+Field yang didukung:
+
+* field model biasa -> ``field.to_representation`` serializer (Decimal,
+  datetime dengan zona waktu, choice, dst. sama persis dengan serializer);
+* ``PrimaryKeyRelatedField`` untuk FK -> kolom ``*_id``;
+* ``source`` bertitik lewat FK (``pengirim.username``) -> lookup join;
+* serializer nested tunggal lewat FK -> dict nested, ``None`` jika FK kosong.
+
+Serializer dengan field lain (``many=True``, relasi reverse, file/foto,
+``SerializerMethodField``, ``source='*'``) tidak punya rencana dan view
+kembali ke jalur serializer biasa. Relasi kosong di tengah ``source``
+bertitik diperlakukan sama seperti DRF (default, ``None`` atau field
+dilewati).
+"""
+import time
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+from . import metrics
+from .paginators import get_ordering
+
+# Field dilewati (SkipField) jika relasi di tengah source kosong
+SKIP = object()
+_plans = {}
+MAX_PLANS = 1024
+
+
+class ValuesPlan:
+    def __init__(self, entries, lookups):
+        self.entries = entries
+        self.lookups = lookups
+
+    def render(self, row):
+        return _render(self.entries, row)
+
+
+def _render(entries, row):
+    ret = {}
+    for name, lookup, convert, guards, missing, children in entries:
+        if guards and any(row[guard] is None for guard in guards):
+            if missing is SKIP:
+                continue
+            value = missing
+        elif children is not None:
+            ret[name] = _render(children, row)
+            continue
+        else:
+            value = row[lookup]
+        if value is None:
+            ret[name] = None
+        else:
+            ret[name] = convert(value) if convert is not None else value
+    return ret
+
+
+def _forward_relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field.is_relation and field.concrete and (field.many_to_one or field.one_to_one):
+        return field
+    return None
+
+
+def _missing(field):
+    """Nilai field jika relasi di tengah ``source`` kosong, mengikuti ``Field.get_attribute``"""
+    if field.default is not empty:
+        return field.get_default()
+    if field.allow_null:
+        return None
+    if not field.required:
+        return SKIP
+    raise ValueError(field.field_name)
+
+
+def _compile(model, serializer, prefix, lookups):
+    """Entri render untuk ``serializer``; ``None`` jika ada field yang butuh instance model"""
+    entries = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            return None
+        attrs = field.source.split('.')
+        current, guards, path = model, [], prefix
+        nested = isinstance(field, serializers.BaseSerializer)
+        hops = attrs if nested else attrs[:-1]
+        for attr in hops:
+            relation = _forward_relation(current, attr)
+            if relation is None:
+                return None
+            path = f'{path}__{attr}' if path else attr
+            guards.append(path)
+            current = relation.related_model
+        lookups.update(guards)
+
+        if nested:
+            children = _compile(current, field, path, lookups)
+            if children is None:
+                return None
+            # FK terakhir kosong -> None; relasi kosong sebelumnya mengikuti DRF
+            missing = None
+            if len(guards) > 1:
+                try:
+                    missing = _missing(field)
+                except ValueError:
+                    return None
+            entries.append((name, None, None, guards, missing, children))
+            continue
+
+        try:
+            model_field = current._meta.get_field(attrs[-1])
+        except FieldDoesNotExist:
+            return None
+        lookup = f'{path}__{attrs[-1]}' if path else attrs[-1]
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None or _forward_relation(current, attrs[-1]) is None:
+                return None
+            convert = None
+        elif model_field.is_relation or not model_field.concrete or isinstance(model_field, models.FileField):
+            return None
+        elif isinstance(field, serializers.RelatedField):
+            return None
+        else:
+            convert = field.to_representation
+        try:
+            missing = _missing(field) if guards else None
+        except ValueError:
+            return None
+        lookups.add(lookup)
+        entries.append((name, lookup, convert, guards, missing, None))
+    return entries
+
+
+def get_values_plan(serializer):
+    """Rencana ``.values()`` (di-cache) untuk ``serializer``, ``None`` jika tidak didukung"""
+    key = (type(serializer), frozenset(serializer.fields))
+    if key in _plans:
+        return _plans[key]
+    lookups = set()
+    entries = _compile(serializer.Meta.model, serializer, '', lookups)
+    plan = None if entries is None else ValuesPlan(entries, sorted(lookups))
+    if len(_plans) < MAX_PLANS:
+        _plans[key] = plan
+    return plan
+
+
+class ValuesListMixin:
+    """List view: pakai ``.values()`` jika semua field serializer (setelah ``?fields=``) didukung"""
+
+    def list(self, request, *args, **kwargs):
+        plan = get_values_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        # Kolom urutan ikut dibaca untuk cursor KeysetPagination
+        ordering = [queryset.model._meta.get_field(name.lstrip('-')).attname
+                    for name in get_ordering(queryset, self)]
+        queryset = queryset.values(*plan.lookups, *ordering)
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+
+        started = time.perf_counter()
+        data = [plan.render(row) for row in rows]
+        request_metrics = metrics.current.get()
+        if request_metrics is not None:
+            request_metrics.serializer_time += time.perf_counter() - started
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
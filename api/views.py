@@ -1,23 +1,49 @@
+import hmac
+from datetime import timedelta
+
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import login, logout
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 
+from ekspedisi_app import pencarian, statistik
 from ekspedisi_app.models import (
     User, Profile, JenisLayanan, Penerima, 
-    Pengiriman, Paket, RiwayatPengiriman
+    Pengiriman, Paket, RiwayatPengiriman, StatistikHarian, WebhookEndpoint
 )
+from . import export, manifest, metrics, pubsub, replica, response_cache, tracking
+from .authentication import CachedTokenAuthentication
+from .bulk import ingest_manifest
+from .parsers import CSVManifestParser
+from .query_plan import QueryPlanMixin
+from .quote import quote_paket
+from .replica import use_replica
+from .response_cache import CachePolicy, ResponseCacheMixin
+from .scan import ingest_scans
 from .serializers import (
     UserRegistrationSerializer, LoginSerializer, ProfileSerializer,
     JenisLayananSerializer, PenerimaSerializer, PengirimanSerializer,
     PaketSerializer, RiwayatPengirimanSerializer, UserSerializer,
-    PengirimanCreateSerializer
+    PengirimanCreateSerializer, WebhookEndpointSerializer
 )
+from .values import ValuesListMixin
+
+STATISTIK_HARIAN_GROUP_BY = {'tanggal', 'jenis_layanan', 'kota_tujuan', 'status_pengiriman'}
+SCAN_MAX_EVENTS = 5000
+QUOTE_MAX_PAKET = 5000
+SEARCH_MAX_LIMIT = 100
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -81,7 +107,7 @@ def profile_view(request):
     """API untuk melihat profile user"""
     try:
         profile = request.user.profile
-        serializer = ProfileSerializer(profile)
+        serializer = ProfileSerializer(profile, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Profile.DoesNotExist:
         return Response({
@@ -89,39 +115,66 @@ def profile_view(request):
         }, status=status.HTTP_404_NOT_FOUND)
 
 # CRUD Views untuk Jenis Layanan
-class JenisLayananListCreateView(generics.ListCreateAPIView):
-    queryset = JenisLayanan.objects.filter(is_active=True)
+# Data referensi: response di-cache per role (api/response_cache.py)
+JENIS_LAYANAN_CACHE = CachePolicy('jenis_layanan', models=[JenisLayanan])
+PENERIMA_CACHE = CachePolicy('penerima', models=[Penerima])
+
+class JenisLayananListCreateView(ResponseCacheMixin, ValuesListMixin, QueryPlanMixin, generics.ListCreateAPIView):
+    cache_policy = JENIS_LAYANAN_CACHE
+    queryset = JenisLayanan.aktif.all()
     serializer_class = JenisLayananSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['nama_layanan']
 
-class JenisLayananDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = JenisLayanan.objects.filter(is_active=True)
+class JenisLayananDetailView(ResponseCacheMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_policy = JENIS_LAYANAN_CACHE
+    queryset = JenisLayanan.aktif.all()
     serializer_class = JenisLayananSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
 # CRUD Views untuk Penerima
-class PenerimaListCreateView(generics.ListCreateAPIView):
-    queryset = Penerima.objects.filter(is_active=True)
+class PenerimaListCreateView(ResponseCacheMixin, ValuesListMixin, QueryPlanMixin, generics.ListCreateAPIView):
+    cache_policy = PENERIMA_CACHE
+    queryset = Penerima.aktif.all()
     serializer_class = PenerimaSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['nama_penerima', 'kota_tujuan']
 
-class PenerimaDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Penerima.objects.filter(is_active=True)
+class PenerimaDetailView(ResponseCacheMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_policy = PENERIMA_CACHE
+    queryset = Penerima.aktif.all()
     serializer_class = PenerimaSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+# Endpoint webhook merchant (lihat ekspedisi_app/webhook.py)
+class WebhookEndpointMixin:
+    serializer_class = WebhookEndpointSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'admin':
+            return WebhookEndpoint.objects.all()
+        return WebhookEndpoint.objects.filter(pemilik=user)
+
+class WebhookEndpointListCreateView(WebhookEndpointMixin, generics.ListCreateAPIView):
+    def perform_create(self, serializer):
+        serializer.save(pemilik=self.request.user)
+
+class WebhookEndpointDetailView(WebhookEndpointMixin, generics.RetrieveUpdateDestroyAPIView):
+    pass
+
 # CRUD Views untuk Pengiriman
-class PengirimanListView(generics.ListAPIView):
+class PengirimanListView(ValuesListMixin, QueryPlanMixin, generics.ListAPIView):
     serializer_class = PengirimanSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status_pengiriman', 'jenis_layanan__nama_layanan']
@@ -129,35 +182,70 @@ class PengirimanListView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return Pengiriman.objects.filter(is_active=True)
+            return Pengiriman.aktif.all()
         elif user.role == 'kurir':
-            return Pengiriman.objects.filter(kurir=user, is_active=True)
+            return Pengiriman.aktif.filter(kurir=user)
         else:
-            return Pengiriman.objects.filter(pengirim=user, is_active=True)
+            return Pengiriman.aktif.filter(pengirim=user)
 
 class PengirimanCreateView(generics.CreateAPIView):
     serializer_class = PengirimanCreateSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
-class PengirimanDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PengirimanBulkCreateView(generics.GenericAPIView):
+    """API untuk membuat banyak pengiriman sekaligus dari manifest JSON/CSV"""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, CSVManifestParser]
+    max_rows = 20000
+    
+    def post(self, request):
+        manifest = request.data
+        if isinstance(manifest, dict):
+            manifest = manifest.get('pengiriman')
+        if not isinstance(manifest, list) or not manifest:
+            return Response({
+                'message': 'Manifest harus berupa daftar pengiriman'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(manifest) > self.max_rows:
+            return Response({
+                'message': f'Manifest maksimal {self.max_rows} pengiriman'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = ingest_manifest(manifest, request.user)
+        created = sum(1 for result in results if result['status'] == 'created')
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'message': f'{created} dari {len(results)} pengiriman berhasil dibuat',
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }, status=response_status)
+
+class PengirimanDetailView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PengirimanSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return Pengiriman.objects.filter(is_active=True)
+            return Pengiriman.aktif.all()
         elif user.role == 'kurir':
-            return Pengiriman.objects.filter(kurir=user, is_active=True)
+            return Pengiriman.aktif.filter(kurir=user)
         else:
-            return Pengiriman.objects.filter(pengirim=user, is_active=True)
+            return Pengiriman.aktif.filter(pengirim=user)
 
 # CRUD Views untuk Paket
-class PaketListCreateView(generics.ListCreateAPIView):
+class PaketListCreateView(ValuesListMixin, QueryPlanMixin, generics.ListCreateAPIView):
     serializer_class = PaketSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['jenis_paket', 'pengiriman__status_pengiriman']
@@ -165,30 +253,30 @@ class PaketListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return Paket.objects.filter(is_active=True)
+            return Paket.aktif.all()
         elif user.role == 'kurir':
-            return Paket.objects.filter(pengiriman__kurir=user, is_active=True)
+            return Paket.aktif.filter(pengiriman__kurir=user)
         else:
-            return Paket.objects.filter(pengiriman__pengirim=user, is_active=True)
+            return Paket.aktif.filter(pengiriman__pengirim=user)
 
-class PaketDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PaketDetailView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PaketSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return Paket.objects.filter(is_active=True)
+            return Paket.aktif.all()
         elif user.role == 'kurir':
-            return Paket.objects.filter(pengiriman__kurir=user, is_active=True)
+            return Paket.aktif.filter(pengiriman__kurir=user)
         else:
-            return Paket.objects.filter(pengiriman__pengirim=user, is_active=True)
+            return Paket.aktif.filter(pengiriman__pengirim=user)
 
 
-class RiwayatPengirimanListCreateView(generics.ListCreateAPIView): 
+class RiwayatPengirimanListCreateView(ValuesListMixin, QueryPlanMixin, generics.ListCreateAPIView): 
     serializer_class = RiwayatPengirimanSerializer 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['pengiriman__nomor_resi', 'status']
@@ -196,77 +284,393 @@ class RiwayatPengirimanListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return RiwayatPengiriman.objects.filter(is_active=True) 
+            return RiwayatPengiriman.aktif.all() 
         elif user.role == 'kurir':
-            return RiwayatPengiriman.objects.filter(pengiriman__kurir=user, is_active=True) 
+            return RiwayatPengiriman.aktif.filter(pengiriman__kurir=user) 
         else:
-            return RiwayatPengiriman.objects.filter(pengiriman__pengirim=user, is_active=True) 
+            return RiwayatPengiriman.aktif.filter(pengiriman__pengirim=user) 
 
-class RiwayatPengirimanDetailView(generics.RetrieveUpdateDestroyAPIView):
+class RiwayatPengirimanDetailView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = RiwayatPengirimanSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
         if user.role == 'admin':
-            return RiwayatPengiriman.objects.filter(is_active=True)
+            return RiwayatPengiriman.aktif.all()
         elif user.role == 'kurir':
-            return RiwayatPengiriman.objects.filter(pengiriman__kurir=user, is_active=True)
+            return RiwayatPengiriman.aktif.filter(pengiriman__kurir=user)
         else:
-            return RiwayatPengiriman.objects.filter(pengiriman__pengirim=user, is_active=True) 
+            return RiwayatPengiriman.aktif.filter(pengiriman__pengirim=user) 
+
+# Export streaming (CSV/XLSX/NDJSON) dengan filter yang sama seperti list view
+class ExportMixin:
+    """Ganti list JSON dengan export streaming; ``?tipe=csv|xlsx|ndjson&dari=&sampai=``"""
+    export_name = None
+    http_method_names = ['get', 'head', 'options']
+    
+    def filter_queryset(self, queryset):
+        # Tanpa rencana select/prefetch QueryPlanMixin: export membaca kolom datar
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        tipe = request.query_params.get('tipe', 'csv')
+        if tipe not in export.FORMATS:
+            return Response({
+                'message': f"tipe harus salah satu dari: {', '.join(export.FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            dari = parse_date(request.query_params.get('dari', ''))
+            sampai = parse_date(request.query_params.get('sampai', ''))
+        except ValueError:
+            return Response({
+                'message': 'Format tanggal harus YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        _, field_tanggal, _ = export.EXPORTS[self.export_name]
+        queryset = export.filter_tanggal(self.filter_queryset(self.get_queryset()), field_tanggal, dari, sampai)
+        header, rows = export.export_rows(self.export_name, queryset)
+        chunks = export.WRITERS[tipe](header, rows)
+        content_type, _ = export.FORMATS[tipe]
+        # XLSX sudah berupa zip; gzip hanya untuk CSV/NDJSON
+        gzip = tipe != 'xlsx' and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        response = StreamingHttpResponse(export.gzip_stream(chunks) if gzip else chunks, content_type=content_type)
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export.nama_file(self.export_name, tipe, dari, sampai)}"'
+        )
+        return response
 
+class PengirimanExportView(ExportMixin, PengirimanListView):
+    export_name = 'pengiriman'
+
+class PaketExportView(ExportMixin, PaketListCreateView):
+    export_name = 'paket'
+
+class RiwayatPengirimanExportView(ExportMixin, RiwayatPengirimanListCreateView):
+    export_name = 'riwayat'
+
+@use_replica
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def tracking_by_resi(request, nomor_resi):
     """API untuk tracking pengiriman berdasarkan nomor resi"""
-    try:
-        pengiriman = Pengiriman.objects.get(nomor_resi=nomor_resi, is_active=True)
-        serializer = PengirimanSerializer(pengiriman)
-        return Response({
-            'message': 'Data tracking ditemukan',
-            'data': serializer.data
-        }, status=status.HTTP_200_OK)
-    except Pengiriman.DoesNotExist:
+    document = tracking.get_document(nomor_resi)
+    if document is None:
         return Response({
             'message': 'Nomor resi tidak ditemukan'
         }, status=status.HTTP_404_NOT_FOUND)
+    
+    response = get_conditional_response(
+        request, etag=document['etag'], last_modified=document['last_modified']
+    )
+    if response is None:
+        response = HttpResponse(document['body'], content_type='application/json')
+    response['ETag'] = document['etag']
+    response['Last-Modified'] = http_date(document['last_modified'])
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def scan_ingest(request):
+    """API untuk batch event scan hub (riwayat + transisi status)"""
+    if request.user.role not in ('admin', 'staf', 'kurir'):
+        return Response({
+            'message': 'Hanya admin, staf dan kurir yang dapat mengirim scan'
+        }, status=status.HTTP_403_FORBIDDEN)
+    events = request.data.get('events') if isinstance(request.data, dict) else request.data
+    if not isinstance(events, list) or not events:
+        return Response({
+            'message': 'events harus berupa daftar event scan'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > SCAN_MAX_EVENTS:
+        return Response({
+            'message': f'Maksimal {SCAN_MAX_EVENTS} event per batch'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = ingest_scans(events)
+    jumlah = {}
+    for result in results:
+        jumlah[result['status']] = jumlah.get(result['status'], 0) + 1
+    diterima = jumlah.get('applied', 0) + jumlah.get('recorded', 0)
+    if diterima + jumlah.get('duplicate', 0) == len(results):
+        response_status = status.HTTP_200_OK
+    elif diterima:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({
+        'message': f'{diterima} dari {len(results)} event diterima',
+        'jumlah': jumlah,
+        'results': results,
+    }, status=response_status)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def quote_tarif(request):
+    """API untuk quote tarif banyak paket sekaligus (tanpa menyimpan data)"""
+    paket_list = request.data.get('paket') if isinstance(request.data, dict) else request.data
+    if not isinstance(paket_list, list) or not paket_list:
+        return Response({
+            'message': 'paket harus berupa daftar paket'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(paket_list) > QUOTE_MAX_PAKET:
+        return Response({
+            'message': f'Maksimal {QUOTE_MAX_PAKET} paket per quote'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = quote_paket(paket_list)
+    berhasil = sum(1 for result in results if result['status'] == 'ok')
+    if berhasil == len(results):
+        response_status = status.HTTP_200_OK
+    elif berhasil:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({
+        'message': f'{berhasil} dari {len(results)} paket berhasil dihitung',
+        'berhasil': berhasil,
+        'gagal': len(results) - berhasil,
+        'results': results,
+    }, status=response_status)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_pengiriman(request):
+    """API pencarian pengiriman berdasarkan resi, kode paket, barang dan penerima"""
+    q = request.query_params.get('q', '').strip()
+    if not pencarian.kata_kunci(q):
+        return Response({
+            'message': f'q minimal {pencarian.MIN_PANJANG} karakter'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return Response({
+            'message': 'limit harus berupa angka'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Cakupan per role sama dengan daftar pengiriman
+    user = request.user
+    if user.role == 'admin':
+        queryset = Pengiriman.aktif.all()
+    elif user.role == 'kurir':
+        queryset = Pengiriman.aktif.filter(kurir=user)
+    else:
+        queryset = Pengiriman.aktif.filter(pengirim=user)
+    hasil = pencarian.cari(queryset, q, limit)
+    ids = [pk for pk, _ in hasil]
+    rows = {
+        row['id']: row for row in
+        Pengiriman.objects.filter(pk__in=ids).values(
+            'id', 'nomor_resi', 'status_pengiriman', 'tanggal_pengiriman', 'jenis_layanan__nama_layanan'
+        )
+    }
+    docs = pencarian.dokumen(ids, using=queryset.db)
+    results = []
+    for pk, skor in hasil:
+        row = rows[pk]
+        row['jenis_layanan'] = row.pop('jenis_layanan__nama_layanan')
+        row.update({'skor': skor, 'cocok': pencarian.cocok(docs[pk], q), 'dokumen': docs[pk]})
+        results.append(row)
+    return Response({
+        'q': q,
+        'backend': 'fts5' if pencarian.fts_tersedia(queryset.db) else 'orm',
+        'count': len(results),
+        'results': results,
+    })
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def kurir_manifest(request):
+    """API manifest rute kurir per hari (stop berurutan per kota/kode pos)"""
+    user = request.user
+    if user.role == 'kurir':
+        kurir_id = user.id
+    elif user.role in ('admin', 'staf'):
+        kurir_id = request.query_params.get('kurir', '')
+        if not kurir_id.isdigit():
+            return Response({
+                'message': 'Parameter kurir (id) wajib diisi'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        kurir_id = int(kurir_id)
+    else:
+        return Response({
+            'message': 'Hanya kurir, admin dan staf yang dapat melihat manifest'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        tanggal = parse_date(request.query_params.get('tanggal', '')) or timezone.localdate()
+    except ValueError:
+        return Response({
+            'message': 'Format tanggal harus YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    document = manifest.get_document(kurir_id, tanggal)
+    response = get_conditional_response(request, etag=document['etag'])
+    if response is None:
+        response = HttpResponse(document['body'], content_type='application/json')
+    response['ETag'] = document['etag']
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def tracking_cache_stats(request):
+    """API untuk melihat statistik cache tracking"""
+    if request.user.role != 'admin':
+        return Response({
+            'message': 'Hanya admin yang dapat melihat statistik cache'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return Response(tracking.stats.snapshot(), status=status.HTTP_200_OK)
+
+
+def _user_metrics(request):
+    """User dari session atau header ``Token`` (view Django biasa, tanpa autentikasi DRF)"""
+    if request.user.is_authenticated:
+        return request.user
+    try:
+        hasil = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return hasil[0] if hasil else None
+
+
+def metrics_view(request):
+    """
+    Endpoint metrik format teks Prometheus. Dengan ``token`` di
+    ``EKSPEDISI_METRICS`` wajib ``Authorization: Bearer <token>``; tanpa
+    token hanya admin (seperti ``api/metrics/``).
+    """
+    token = metrics.get_config()['token']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    else:
+        user = _user_metrics(request)
+        if user is None:
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        if user.role != 'admin':
+            return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    cache_stats = tracking.stats.snapshot()
+    extra = [
+        (f'ekspedisi_tracking_cache_{nama}_total', 'counter', f'Cache tracking: {nama}', cache_stats[nama])
+        for nama in ('hits', 'misses', 'not_found', 'invalidations')
+    ]
+    replica_stats = replica.stats.snapshot()
+    extra += [
+        ('ekspedisi_db_reads_total', 'counter', 'Bacaan view baca per alias database',
+         {f'alias="{alias}"': jumlah for alias, jumlah in sorted(replica_stats['reads'].items())}),
+        ('ekspedisi_db_primary_reads_total', 'counter', 'Bacaan view baca yang tetap ke primary per alasan',
+         {f'reason="{alasan}"': jumlah for alasan, jumlah in sorted(replica_stats['primary_reasons'].items())}),
+    ]
+    event_stats = pubsub.broker.snapshot()
+    extra += [
+        ('ekspedisi_event_subscribers', 'gauge', 'Koneksi long-poll/SSE yang menunggu event',
+         event_stats['subscribers']),
+        ('ekspedisi_events_published_total', 'counter', 'Notifikasi event riwayat yang dipublish',
+         event_stats['published']),
+        ('ekspedisi_events_delivered_total', 'counter', 'Subscriber yang dibangunkan notifikasi',
+         event_stats['delivered']),
+    ]
+    cache_stats = response_cache.stats.snapshot()
+    extra += [
+        (f'ekspedisi_response_cache_{nama}_total', 'counter', f'Cache response data referensi: {nama}',
+         {f'policy="{policy}"': counts[nama] for policy, counts in sorted(cache_stats['policies'].items())})
+        for nama in ('hits', 'misses', 'not_modified')
+    ]
+    extra.append(('ekspedisi_response_cache_invalidations_total', 'counter',
+                  'Token versi model yang diganti', cache_stats['invalidations']))
+    return HttpResponse(
+        metrics.registry.render_prometheus(extra), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def metrics_admin(request):
+    """API untuk melihat (atau mereset dengan DELETE) metrik performa per view"""
+    if request.user.role != 'admin':
+        return Response({
+            'message': 'Hanya admin yang dapat melihat metrik'
+        }, status=status.HTTP_403_FORBIDDEN)
+    if request.method == 'DELETE':
+        metrics.registry.reset()
+        replica.stats.reset()
+        response_cache.stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(
+        dict(metrics.registry.snapshot(), replica=replica.stats.snapshot(),
+             response_cache=response_cache.stats.snapshot()),
+        status=status.HTTP_200_OK
+    )
+
+
+@use_replica
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
     """API untuk mendapatkan statistik dashboard"""
     user = request.user
+    data = statistik.ringkasan(None if user.role == 'admin' else user.id)
+    per_status = data['per_status']
     
-    if user.role == 'admin':
-        total_pengiriman = Pengiriman.objects.filter(is_active=True).count()
-        pengiriman_pending = Pengiriman.objects.filter(status_pengiriman='pending', is_active=True).count()
-        pengiriman_transit = Pengiriman.objects.filter(status_pengiriman='transit', is_active=True).count()
-        pengiriman_delivered = Pengiriman.objects.filter(status_pengiriman='delivered', is_active=True).count()
-        total_paket = Paket.objects.filter(is_active=True).count()
-        total_user = User.objects.filter(is_active=True).count()
-    else:
-        total_pengiriman = Pengiriman.objects.filter(pengirim=user, is_active=True).count()
-        pengiriman_pending = Pengiriman.objects.filter(pengirim=user, status_pengiriman='pending', is_active=True).count()
-        pengiriman_transit = Pengiriman.objects.filter(pengirim=user, status_pengiriman='transit', is_active=True).count()
-        pengiriman_delivered = Pengiriman.objects.filter(pengirim=user, status_pengiriman='delivered', is_active=True).count()
-        total_paket = Paket.objects.filter(pengiriman__pengirim=user, is_active=True).count()
-        total_user = 1
+    return Response({
+        'total_pengiriman': sum(per_status.values()),
+        'pengiriman_pending': per_status['pending'],
+        'pengiriman_transit': per_status['transit'],
+        'pengiriman_delivered': per_status['delivered'],
+        'total_paket': data['total_paket'],
+        'total_user': data['total_user'],
+        'pengiriman_per_status': per_status
+    }, status=status.HTTP_200_OK)
+
+@use_replica
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_stats_harian(request):
+    """API untuk statistik paket per hari/layanan/kota/status"""
+    if request.user.role not in ('admin', 'staf'):
+        return Response({
+            'message': 'Hanya admin dan staf yang dapat melihat statistik harian'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        sampai = parse_date(request.query_params.get('sampai', '')) or timezone.localdate()
+        dari = parse_date(request.query_params.get('dari', '')) or sampai - timedelta(days=30)
+    except ValueError:
+        return Response({
+            'message': 'Format tanggal harus YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    group_by = [field for field in request.query_params.get('group_by', 'tanggal').split(',') if field]
+    invalid = set(group_by) - STATISTIK_HARIAN_GROUP_BY
+    if invalid:
+        return Response({
+            'message': f"group_by tidak valid: {', '.join(sorted(invalid))}"
+        }, status=status.HTTP_400_BAD_REQUEST)
     
+    rows = (
+        StatistikHarian.objects.filter(tanggal__range=(dari, sampai))
+        .values(*group_by)
+        .annotate(jumlah_paket=Sum('jumlah_paket'), total_berat=Sum('total_berat'))
+        .order_by(*group_by)
+    )
     return Response({
-        'total_pengiriman': total_pengiriman,
-        'pengiriman_pending': pengiriman_pending,
-        'pengiriman_transit': pengiriman_transit,
-        'pengiriman_delivered': pengiriman_delivered,
-        'total_paket': total_paket,
-        'total_user': total_user
+        'dari': dari,
+        'sampai': sampai,
+        'group_by': group_by,
+        'results': list(rows)
     }, status=status.HTTP_200_OK)
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = UserSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['role', 'is_active']
@@ -278,15 +682,15 @@ class UserListView(generics.ListAPIView):
         else:
             return User.objects.none()
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
         user = self.request.user
-        obj = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
+        obj = get_object_or_404(self.filter_queryset(self.get_queryset()), pk=self.kwargs['pk'])
         if user.role != 'admin' and user != obj:
             self.permission_denied(self.request)
         return obj
\ No newline at end of file
@@ -3,6 +3,11 @@ ASGI config for ekspedisi project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Jalankan dengan server ASGI (mis. ``uvicorn ekspedisi.asgi:application``)
+untuk endpoint ``api/async/...`` (``api/async_views.py``): long-poll dan SSE
+menunggu di event loop tanpa menahan thread worker. View DRF lain tetap
+sinkron dan dijalankan Django di thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,141 @@
+"""
+Konfigurasi database dari environment (dipakai ``settings.DATABASES``).
+
+``EKSPEDISI_DB_ENGINE`` memilih backend:
+
+* ``sqlite`` (default): file ``EKSPEDISI_DB_NAME`` (default ``db.sqlite3``)
+  dengan profil ``EKSPEDISI_DB_PROFILE``. Profil ``production`` (default)
+  menjalankan PRAGMA WAL, ``synchronous=NORMAL``, ``mmap_size`` dan
+  ``cache_size`` setiap koneksi dibuka, menunggu lock sampai ``timeout``
+  detik (``busy_timeout``) dan membuka transaksi dengan ``BEGIN IMMEDIATE``
+  sehingga penulis antre di awal transaksi, bukan gagal dengan "database
+  is locked" saat upgrade dari lock baca. Profil ``basic`` adalah
+  konfigurasi bawaan Django (journal rollback, timeout 5 detik).
+* ``postgresql``: ``EKSPEDISI_DB_NAME``/``USER``/``PASSWORD``/``HOST``/``PORT``
+  dengan connection pool psycopg 3 (``EKSPEDISI_DB_POOL_MIN``/``_MAX``,
+  butuh ``psycopg[pool]``). ``EKSPEDISI_DB_POOL=0`` mematikan pool dan
+  memakai koneksi persisten biasa.
+
+Koneksi persisten (``CONN_MAX_AGE``, default 60 detik, ``EKSPEDISI_DB_CONN_MAX_AGE``)
+diperiksa dulu sebelum dipakai ulang (``CONN_HEALTH_CHECKS``).
+
+``EKSPEDISI_DB_REPLICAS`` (dipisah koma) menambah alias ``replica1``,
+``replica2``, ... untuk bacaan (lihat ``api/replica.py``): path file salinan
+untuk SQLite (disegarkan ``manage.py sync_replica``, dibuka
+``query_only``) atau ``host[:port]`` untuk PostgreSQL. Saat test, replica
+menjadi mirror dari ``default``.
+"""
+import os
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+SQLITE_PROFILES = {
+    'basic': {
+        'pragma': {},
+        'timeout': 5,
+        'transaction_mode': None,
+    },
+    'production': {
+        'pragma': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            # Negatif = KiB, jadi 64 MiB page cache per koneksi
+            'cache_size': -64000,
+            'temp_store': 'MEMORY',
+        },
+        'timeout': 20,
+        'transaction_mode': 'IMMEDIATE',
+    },
+}
+
+
+def _env_int(env, name, default):
+    value = env.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} harus berupa angka, bukan {value!r}') from None
+
+
+def sqlite_options(profile='production'):
+    """``OPTIONS`` backend sqlite3 untuk profil ``profile``"""
+    try:
+        config = SQLITE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Profil SQLite tidak dikenal: {profile!r} (pilihan: {', '.join(SQLITE_PROFILES)})")
+    options = {'timeout': config['timeout']}
+    if config['pragma']:
+        options['init_command'] = ''.join(f'PRAGMA {nama}={nilai};' for nama, nilai in config['pragma'].items())
+    if config['transaction_mode']:
+        options['transaction_mode'] = config['transaction_mode']
+    return options
+
+
+def sqlite_config(name, profile='production', conn_max_age=60):
+    return {
+        'ENGINE': ENGINES['sqlite'],
+        'NAME': name,
+        'OPTIONS': sqlite_options(profile),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+    }
+
+
+def postgresql_config(env, conn_max_age=60):
+    config = {
+        'ENGINE': ENGINES['postgresql'],
+        'NAME': env.get('EKSPEDISI_DB_NAME', 'ekspedisi'),
+        'USER': env.get('EKSPEDISI_DB_USER', ''),
+        'PASSWORD': env.get('EKSPEDISI_DB_PASSWORD', ''),
+        'HOST': env.get('EKSPEDISI_DB_HOST', ''),
+        'PORT': env.get('EKSPEDISI_DB_PORT', ''),
+        'OPTIONS': {},
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if env.get('EKSPEDISI_DB_POOL', '1') not in ('0', 'false', 'False', ''):
+        config['OPTIONS']['pool'] = {
+            'min_size': _env_int(env, 'EKSPEDISI_DB_POOL_MIN', 2),
+            'max_size': _env_int(env, 'EKSPEDISI_DB_POOL_MAX', 20),
+            'timeout': _env_int(env, 'EKSPEDISI_DB_POOL_TIMEOUT', 10),
+        }
+        # Koneksi dikembalikan ke pool di akhir request; Django menolak CONN_MAX_AGE > 0
+        config['CONN_MAX_AGE'] = 0
+    return config
+
+
+def replica_configs(primary, env=None):
+    """Alias replica ``{nama: konfigurasi}`` dari ``EKSPEDISI_DB_REPLICAS`` untuk konfigurasi ``primary``"""
+    env = os.environ if env is None else env
+    replicas = {}
+    targets = [target.strip() for target in env.get('EKSPEDISI_DB_REPLICAS', '').split(',') if target.strip()]
+    for nomor, target in enumerate(targets, start=1):
+        config = dict(primary, OPTIONS=dict(primary['OPTIONS']), TEST={'MIRROR': 'default'})
+        if primary['ENGINE'] == ENGINES['sqlite']:
+            config['NAME'] = target
+            config['OPTIONS']['init_command'] = config['OPTIONS'].get('init_command', '') + 'PRAGMA query_only=ON;'
+            config['OPTIONS'].pop('transaction_mode', None)
+        else:
+            host, _, port = target.partition(':')
+            config.update(HOST=host, PORT=port or primary['PORT'])
+        replicas[f'replica{nomor}'] = config
+    return replicas
+
+
+def database_config(base_dir, env=None):
+    """Konfigurasi alias ``default`` dari environment ``env`` (default ``os.environ``)"""
+    env = os.environ if env is None else env
+    engine = env.get('EKSPEDISI_DB_ENGINE', 'sqlite')
+    conn_max_age = _env_int(env, 'EKSPEDISI_DB_CONN_MAX_AGE', 60)
+    if engine == 'sqlite':
+        name = env.get('EKSPEDISI_DB_NAME') or base_dir / 'db.sqlite3'
+        return sqlite_config(name, env.get('EKSPEDISI_DB_PROFILE', 'production'), conn_max_age)
+    if engine == 'postgresql':
+        return postgresql_config(env, conn_max_age)
+    raise ValueError(f"EKSPEDISI_DB_ENGINE tidak dikenal: {engine!r} (pilihan: {', '.join(ENGINES)})")
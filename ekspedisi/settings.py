@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 import os
 from pathlib import Path
 
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,6 +50,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'ekspedisi_app.User'
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,14 +84,47 @@ WSGI_APPLICATION = 'ekspedisi.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# SQLite profil production (WAL) secara default; EKSPEDISI_DB_ENGINE=postgresql
+# untuk PostgreSQL dengan connection pool, lihat ekspedisi/database.py
 
 DATABASES = {
+    'default': database_config(BASE_DIR),
+}
+# EKSPEDISI_DB_REPLICAS menambah replica1, replica2, ... untuk view baca
+DATABASES.update(replica_configs(DATABASES['default']))
+
+DATABASE_ROUTERS = ['api.replica.ReplicaRouter']
+
+# Routing bacaan ke replica, lihat api/replica.py
+EKSPEDISI_REPLICA = {
+    'aliases': [alias for alias in DATABASES if alias != 'default'],
+    'pin_seconds': 5,
+    # Alias di CACHES untuk pin read-your-writes; pakai cache bersama untuk banyak proses
+    'cache': 'default',
+    # TTL dokumen tracking yang dibangun dari replica
+    'max_lag': 30,
+}
+
+
+# Cache
+# Dokumen tracking disimpan di alias 'tracking'; ganti BACKEND ke
+# FileBasedCache/DatabaseCache untuk berbagi cache antar proses.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'tracking': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tracking',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
 }
 
+EKSPEDISI_TRACKING_CACHE = 'tracking'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -109,11 +146,19 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # orjson jika terpasang, Decimal sebagai string (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Cursor keyset tanpa OFFSET/COUNT; CustomPagination tersedia per view
+    'DEFAULT_PAGINATION_CLASS': 'api.paginators.KeysetPagination',
+    'PAGE_SIZE': 10,
     # 'DEFAULT_FILTER_BACKENDS': [
     #     'django_filters.rest_framework.DjangoFilterBackend',
     #     'rest_framework.filters.SearchFilter',
@@ -124,6 +169,99 @@ REST_FRAMEWORK = {
     
 }
 
+# Nomor urut resi (EKS) dan kode paket (PKT), lihat ekspedisi_app/sequences.py
+EKSPEDISI_NOMOR_URUT = {
+    'EKS': {'per_hari': False, 'digit': 6, 'blok': 20},
+    'PKT': {'per_hari': False, 'digit': 6, 'blok': 50},
+}
+
+# Kompresi dan varian foto di background, lihat ekspedisi_app/images.py
+EKSPEDISI_IMAGE_PIPELINE = {
+    'workers': 2,
+    'sync': False,
+    'quality': 85,
+    'varian': {
+        'webp': {'ukuran': 1600, 'format': 'WEBP'},
+        'kurir': {'ukuran': 800, 'format': 'JPEG'},
+        'thumb': {'ukuran': 200, 'format': 'JPEG'},
+    },
+}
+
+# Metrik performa per view (/metrics dan api/metrics/), lihat api/metrics.py
+EKSPEDISI_METRICS = {
+    'enabled': True,
+    'token': os.environ.get('EKSPEDISI_METRICS_TOKEN') or None,
+    # Log request lambat (SQL + cProfile) untuk sebagian request, 0 = nonaktif
+    'slow_sample_rate': 0.0,
+    'slow_ms': 500,
+    'slow_log_size': 50,
+    'slow_profile': True,
+    'slow_profile_dir': None,
+}
+
+# Cache snapshot user per token untuk autentikasi, lihat api/authentication.py
+EKSPEDISI_AUTH_CACHE = {
+    'ttl': 60,
+    'max_entries': 10000,
+    # Alias di CACHES untuk berbagi antar proses (mis. Redis); None = hanya lokal
+    'shared_cache': None,
+    'shared_ttl': 300,
+    # Token generasi untuk pencabutan token/role; pakai backend bersama jika worker > 1
+    'revocation_cache': 'default',
+}
+
+# Manifest rute kurir (kurir/manifest/), lihat api/manifest.py
+EKSPEDISI_MANIFEST = {
+    'cache': 'default',
+    'timeout': 2 * 24 * 3600,
+    'precompute': True,
+    'precompute_hari': 1,
+    # Kode pos depot sebagai titik awal rute; None = mulai dari stop terluar
+    'depot_kode_pos': None,
+    # CSV ``prefix,lat,lon`` untuk tabel centroid yang lebih rinci
+    'centroid_file': None,
+}
+
+# Tabel tarif quote/total (quote/), lihat ekspedisi_app/tarif.py
+EKSPEDISI_TARIF = {
+    # Selang (detik) pemeriksaan versi tabel tarif di database oleh tiap proses
+    'interval': 5,
+}
+
+# Cache response data referensi (jenis-layanan/, penerima/), lihat api/response_cache.py
+EKSPEDISI_RESPONSE_CACHE = {
+    'enabled': True,
+    # Alias di CACHES; pakai cache bersama agar invalidasi berlaku di semua proses.
+    # Dengan LocMem (per proses) TTL dibatasi local_timeout.
+    'cache': 'default',
+    'timeout': 3600,
+    'local_timeout': 15,
+}
+
+# Webhook status pengiriman ke merchant (manage.py deliver_webhooks), lihat ekspedisi_app/webhook.py
+EKSPEDISI_WEBHOOK = {
+    'workers': 8,
+    'batch_size': 50,
+    'timeout': 10,
+    'max_attempts': 8,
+    'backoff_base': 5,
+    'backoff_max': 3600,
+    'lease': 60,
+    'interval': 1,
+    # URL endpoint wajib https dan ter-resolve ke alamat publik, kecuali host berikut
+    'require_https': True,
+    'allowed_hosts': [],
+}
+
+# Long-poll/SSE event riwayat (async/tracking/<resi>/events/), lihat api/pubsub.py
+EKSPEDISI_EVENTS = {
+    'long_poll_timeout': 25,
+    'heartbeat': 15,
+    'stream_seconds': 300,
+    'max_events': 100,
+    'max_subscribers': 10000,
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Profile, JenisLayanan, Penerima, Pengiriman, Paket, RiwayatPengiriman
+from .models import (
+    User, Profile, JenisLayanan, Penerima, Pengiriman, Paket, RiwayatPengiriman, NomorUrut,
+    Statistik, StatistikHarian, TarifLayanan, ZonaTarif, PengirimanArsip, PaketArsip, RiwayatPengirimanArsip,
+    WebhookEndpoint, WebhookDelivery,
+)
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'role', 'is_active', 'created_at')
@@ -17,11 +21,28 @@ class ProfileAdmin(admin.ModelAdmin):
     search_fields = ('nama_lengkap', 'nomor_telepon')
     list_filter = ('is_active',)
 
+class TarifLayananInline(admin.TabularInline):
+    model = TarifLayanan
+    extra = 0
+    fields = ('zona', 'berat_min', 'berat_maks', 'tarif_per_kg', 'biaya_tetap', 'is_active')
+
 @admin.register(JenisLayanan)
 class JenisLayananAdmin(admin.ModelAdmin):
-    list_display = ('nama_layanan', 'tarif_per_kg', 'is_active')
+    list_display = ('nama_layanan', 'tarif_per_kg', 'pembagi_volumetrik', 'asuransi_persen', 'is_active')
     search_fields = ('nama_layanan',)
     list_filter = ('is_active',)
+    inlines = [TarifLayananInline]
+
+@admin.register(ZonaTarif)
+class ZonaTarifAdmin(admin.ModelAdmin):
+    list_display = ('nama', 'prefix_kode_pos', 'is_active')
+    search_fields = ('nama',)
+    list_filter = ('is_active',)
+
+@admin.register(TarifLayanan)
+class TarifLayananAdmin(admin.ModelAdmin):
+    list_display = ('jenis_layanan', 'zona', 'berat_min', 'berat_maks', 'tarif_per_kg', 'biaya_tetap', 'is_active')
+    list_filter = ('jenis_layanan', 'zona', 'is_active')
 
 @admin.register(Penerima)
 class PenerimaAdmin(admin.ModelAdmin):
@@ -31,10 +52,16 @@ class PenerimaAdmin(admin.ModelAdmin):
 
 @admin.register(Pengiriman)
 class PengirimanAdmin(admin.ModelAdmin):
-    list_display = ('nomor_resi', 'pengirim', 'status_pengiriman', 'total_berat', 'total_biaya', 'tanggal_pengiriman')
+    list_display = (
+        'nomor_resi', 'pengirim', 'status_pengiriman', 'last_lokasi', 'total_berat', 'total_biaya',
+        'tanggal_pengiriman',
+    )
     search_fields = ('nomor_resi', 'pengirim__username')
     list_filter = ('status_pengiriman', 'jenis_layanan', 'tanggal_pengiriman')
-    readonly_fields = ('nomor_resi', 'total_berat', 'total_biaya')
+    # Status hanya berubah lewat transisi (API/scan) agar riwayatnya ikut tertulis
+    readonly_fields = (
+        'nomor_resi', 'status_pengiriman', 'last_event_at', 'last_lokasi', 'total_berat', 'total_biaya',
+    )
 
 @admin.register(Paket)
 class PaketAdmin(admin.ModelAdmin):
@@ -48,6 +75,66 @@ class RiwayatPengirimanAdmin(admin.ModelAdmin):
     list_display = ('pengiriman', 'status', 'lokasi', 'waktu')
     search_fields = ('pengiriman__nomor_resi', 'status', 'lokasi')
     list_filter = ('status', 'waktu')
+    readonly_fields = ('pengiriman', 'status', 'waktu')
+    
+    def has_add_permission(self, request):
+        # Riwayat baru ditulis oleh transisi.terapkan bersama status pengiriman
+        return False
+
+class ArsipAdmin(admin.ModelAdmin):
+    """Arsip hanya dibaca; isinya dipindah oleh manage.py archive_pengiriman"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(PengirimanArsip)
+class PengirimanArsipAdmin(ArsipAdmin):
+    list_display = ('nomor_resi', 'pengirim', 'status_pengiriman', 'tanggal_pengiriman', 'diarsipkan_at')
+    search_fields = ('nomor_resi',)
+    list_filter = ('status_pengiriman', 'diarsipkan_at')
+
+@admin.register(PaketArsip)
+class PaketArsipAdmin(ArsipAdmin):
+    list_display = ('kode_paket', 'nama_barang', 'berat', 'pengiriman')
+    search_fields = ('kode_paket',)
+
+@admin.register(RiwayatPengirimanArsip)
+class RiwayatPengirimanArsipAdmin(ArsipAdmin):
+    list_display = ('pengiriman', 'status', 'lokasi', 'waktu')
+    search_fields = ('pengiriman__nomor_resi',)
+
+@admin.register(NomorUrut)
+class NomorUrutAdmin(admin.ModelAdmin):
+    list_display = ('kunci', 'nilai_terakhir')
+    search_fields = ('kunci',)
+    readonly_fields = ('kunci',)
+
+@admin.register(Statistik)
+class StatistikAdmin(admin.ModelAdmin):
+    list_display = ('kunci', 'nilai')
+    search_fields = ('kunci',)
+
+@admin.register(StatistikHarian)
+class StatistikHarianAdmin(admin.ModelAdmin):
+    list_display = ('tanggal', 'jenis_layanan', 'kota_tujuan', 'status_pengiriman', 'jumlah_paket', 'total_berat')
+    list_filter = ('status_pengiriman', 'jenis_layanan', 'tanggal')
+    search_fields = ('kota_tujuan',)
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ('url', 'pemilik', 'konkurensi', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    search_fields = ('url', 'pemilik__username')
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('endpoint', 'outbox', 'status', 'percobaan', 'berikutnya', 'terkirim_at')
+    list_filter = ('status',)
+    list_select_related = ('endpoint', 'outbox')
+    readonly_fields = ('endpoint', 'outbox', 'klaim', 'created_at')
 
 admin.site.register(User, CustomUserAdmin)
 admin.site.site_header = "Admin Sistem Ekspedisi"
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class EkspedisiAppConfig(AppConfig):
+    name = 'ekspedisi_app'
+
+    def ready(self):
+        from . import pencarian, statistik, tarif, webhook
+        statistik.connect_signals()
+        tarif.connect_signals()
+        pencarian.connect_signals()
+        webhook.connect_signals()
@@ -0,0 +1,84 @@
+"""
+Arsip pengiriman lama (``manage.py archive_pengiriman``).
+
+Pengiriman ``delivered``/``cancelled`` yang tidak berubah sejak batas waktu
+(``updated_at``) dipindah per batch beserta paket dan riwayatnya ke
+``PengirimanArsip``, ``PaketArsip`` dan ``RiwayatPengirimanArsip`` dengan id
+yang sama. Setiap batch satu transaksi: salin dengan ``bulk_create`` lalu
+hapus dari tabel utama tanpa signal per baris, sehingga tabel utama dan
+index-nya hanya berisi pengiriman yang masih berjalan.
+
+Counter statistik tidak berubah karena ``statistik.rekonsiliasi`` ikut
+menghitung tabel arsip. Index pencarian, cache tracking dan manifest
+diperbarui lewat signal ``pengiriman_diperbarui``; tracking membaca arsip
+jika resi tidak ada di tabel utama (``api/tracking.py``).
+"""
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .models import Paket, PaketArsip, Pengiriman, PengirimanArsip, RiwayatPengiriman, RiwayatPengirimanArsip
+from .signals import pengiriman_diperbarui
+
+BATCH_SIZE = 500
+STATUS_SELESAI = ('delivered', 'cancelled')
+# (model utama, model arsip, kolom ke id pengiriman)
+TABEL = (
+    (Pengiriman, PengirimanArsip, 'pk'),
+    (Paket, PaketArsip, 'pengiriman_id'),
+    (RiwayatPengiriman, RiwayatPengirimanArsip, 'pengiriman_id'),
+)
+
+
+def _kolom(model_arsip):
+    return [field.attname for field in model_arsip._meta.concrete_fields if field.attname != 'diarsipkan_at']
+
+
+def kandidat(sebelum, status=STATUS_SELESAI, nonaktif=False, using=DEFAULT_DB_ALIAS):
+    """Queryset id pengiriman yang akan diarsipkan"""
+    queryset = Pengiriman._base_manager.using(using).filter(updated_at__lt=sebelum)
+    if nonaktif:
+        # Pengiriman yang sudah dihapus (soft delete) ikut dipindah apa pun statusnya
+        queryset = queryset.filter(status_pengiriman__in=status) | queryset.filter(is_active=False)
+    else:
+        queryset = queryset.filter(status_pengiriman__in=status)
+    return queryset.order_by('pk').values_list('pk', flat=True)
+
+
+def arsipkan_batch(ids, using=DEFAULT_DB_ALIAS):
+    """Pindahkan pengiriman ``ids`` beserta paket dan riwayatnya, kembalikan jumlah baris per tabel"""
+    jumlah = {}
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        for model, model_arsip, lookup in TABEL:
+            rows = model._base_manager.using(using).filter(**{f'{lookup}__in': ids}).values(*_kolom(model_arsip))
+            objs = [model_arsip(**row) for row in rows]
+            if model_arsip is PengirimanArsip:
+                for obj in objs:
+                    obj.diarsipkan_at = now
+            model_arsip._base_manager.using(using).bulk_create(objs)
+            jumlah[model._meta.model_name] = len(objs)
+        # Anak dulu; _raw_delete tidak mengirim signal delete per baris (counter statistik tetap)
+        for model, _, lookup in reversed(TABEL):
+            model._base_manager.using(using).filter(**{f'{lookup}__in': ids})._raw_delete(using)
+        pengiriman_diperbarui.send(sender=Pengiriman, pengiriman_ids=list(ids), using=using)
+    return jumlah
+
+
+def arsipkan(hari, status=STATUS_SELESAI, nonaktif=False, batch_size=BATCH_SIZE, using=DEFAULT_DB_ALIAS,
+             limit=None, log=None):
+    """Arsipkan pengiriman yang tidak berubah lebih dari ``hari`` hari, kembalikan total per tabel"""
+    sebelum = timezone.now() - timedelta(days=hari)
+    total = {model._meta.model_name: 0 for model, _, _ in TABEL}
+    while limit is None or total['pengiriman'] < limit:
+        jumlah_batch = batch_size if limit is None else min(batch_size, limit - total['pengiriman'])
+        ids = list(kandidat(sebelum, status, nonaktif, using)[:jumlah_batch])
+        if not ids:
+            break
+        for nama, jumlah in arsipkan_batch(ids, using).items():
+            total[nama] += jumlah
+        if log:
+            log(f"{total['pengiriman']} pengiriman diarsipkan")
+    return total
+
@@ -0,0 +1,192 @@
+"""
+Utilitas bersama untuk command benchmark (``manage.py bench_*``).
+
+Benchmark selalu berjalan di database uji sementara (file SQLite terpisah
+atau database ``test_*`` milik backend lain) sehingga ``db.sqlite3`` tidak
+tersentuh.
+"""
+import json
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.db import connection, connections
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """Buat database uji sementara selama blok ``with`` berjalan"""
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        # Database in-memory tidak bisa dipakai bersama oleh banyak thread
+        tmpdir = tempfile.mkdtemp(prefix='ekspedisi-bench-')
+        test_settings['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+    try:
+        connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+        yield connection.settings_dict['NAME']
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+        if tmpdir:
+            for name in os.listdir(tmpdir):
+                os.remove(os.path.join(tmpdir, name))
+            os.rmdir(tmpdir)
+
+
+def percentile(samples, p):
+    """Persentil ``p`` (0-100) dengan metode nearest-rank"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Ringkasan latensi (ms) dan throughput dari satu putaran benchmark"""
+    return {
+        'requests': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_concurrently(worker, threads):
+    """Jalankan ``worker(index)`` di banyak thread, kembalikan (hasil, durasi)"""
+    results = [None] * threads
+    errors = []
+    start_barrier = threading.Barrier(threads + 1)
+
+    def target(index):
+        try:
+            start_barrier.wait()
+            results[index] = worker(index)
+        except Exception as exc:  # dilaporkan ke pemanggil
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    pool = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    return results, elapsed
+
+
+def git_revision():
+    """Commit yang sedang di-checkout (untuk metadata hasil), ``None`` jika bukan repo git"""
+    try:
+        output = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def save_results(name, results, output=None):
+    """
+    Simpan hasil benchmark sebagai JSON (default ``bench-results/<name>-<waktu>.json``)
+    dengan metadata commit, waktu dan backend database; kembalikan path-nya.
+    """
+    waktu = datetime.now(timezone.utc)
+    if output is None:
+        output = os.path.join(settings.BASE_DIR, 'bench-results', f"{name}-{waktu:%Y%m%dT%H%M%SZ}.json")
+    data = {
+        'benchmark': name,
+        'timestamp': waktu.isoformat(),
+        'git_revision': git_revision(),
+        'database': connection.vendor,
+        **results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(data, handle, indent=2, default=str)
+    return output
+
+
+def compare_results(lama, baru, metrics=('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')):
+    """Selisih metrik per skenario antara dua hasil ``save_results``"""
+    rows = []
+    for skenario, nilai_baru in baru.get('scenarios', {}).items():
+        nilai_lama = lama.get('scenarios', {}).get(skenario)
+        if nilai_lama is None:
+            continue
+        for metric in metrics:
+            if metric in nilai_lama and metric in nilai_baru:
+                a, b = nilai_lama[metric], nilai_baru[metric]
+                perubahan = round((b - a) / a * 100, 1) if a else None
+                rows.append((skenario, metric, a, b, perubahan))
+    return rows
+
+
+class WebhookReceiver:
+    """
+    Server HTTP lokal pengganti endpoint merchant (test dan ``bench_webhooks``).
+    Mencatat setiap POST; ``responses`` berisi status yang dijawab berurutan
+    (setelah habis: 200) dan ``delay`` menahan tiap jawaban.
+    """
+
+    def __init__(self, delay=0.0, responses=()):
+        self.delay = delay
+        self.responses = list(responses)
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with receiver._lock:
+                    receiver.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if receiver.delay:
+                    time.sleep(receiver.delay)
+                with receiver._lock:
+                    status = receiver.responses.pop(0) if receiver.responses else 200
+                    receiver.requests.append((time.time(), dict(self.headers), body, status))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/hook'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,202 @@
+"""
+Pipeline pemrosesan foto (``Profile.foto_profil`` dan ``Paket.foto_paket``).
+
+``save()`` model hanya menjadwalkan pekerjaan setelah commit; kompresi dan
+pembuatan varian berjalan di thread pool background. Foto yang isinya sama
+(dibandingkan lewat SHA-256) tidak diproses ulang. Semua varian dibuat dari
+satu kali decode: varian terbesar diturunkan dari gambar asli, varian
+berikutnya dari varian sebelumnya.
+
+Hasil kompresi dan varian disimpan dengan nama berisi hash kontennya, tidak
+pernah menimpa file yang sedang dipakai. Field model baru dipindah ke nama
+baru lewat UPDATE bersyarat, setelah itu file lama dihapus; pembaca tidak
+pernah melihat file yang hilang di tengah proses.
+
+Konfigurasi lewat ``settings.EKSPEDISI_IMAGE_PIPELINE``::
+
+    EKSPEDISI_IMAGE_PIPELINE = {
+        'workers': 2,
+        'sync': False,   # True: proses langsung di thread pemanggil
+        'quality': 85,
+        'varian': {
+            'webp': {'ukuran': 1600, 'format': 'WEBP'},
+            'kurir': {'ukuran': 800, 'format': 'JPEG'},
+            'thumb': {'ukuran': 200, 'format': 'JPEG'},
+        },
+    }
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connections, transaction
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'workers': 2,
+    'sync': False,
+    'quality': 85,
+    'varian': {
+        'webp': {'ukuran': 1600, 'format': 'WEBP'},
+        'kurir': {'ukuran': 800, 'format': 'JPEG'},
+        'thumb': {'ukuran': 200, 'format': 'JPEG'},
+    },
+}
+EKSTENSI = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_IMAGE_PIPELINE', {}))
+    return config
+
+
+def foto_berubah(instance, field_name):
+    """True jika foto di-set dan nama filenya berbeda dari saat dimuat dari DB"""
+    foto = getattr(instance, field_name)
+    if not foto:
+        return False
+    return foto.name != instance.nilai_awal(field_name)
+
+
+def _encode(img, format_name, quality):
+    buffer = io.BytesIO()
+    if format_name == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img.save(buffer, format=format_name, optimize=True, quality=quality)
+    return buffer.getvalue()
+
+
+def _simpan(storage, name, data):
+    """Simpan ``data`` dengan nama berisi hash kontennya (isi sama -> file yang sama dipakai ulang)"""
+    stem, ext = os.path.splitext(name)
+    name = f'{stem}_{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+    if storage.exists(name):
+        return name
+    return storage.save(name, ContentFile(data))
+
+
+def process_image(model, pk, field_name):
+    """Kompresi foto asli sekali dan buat semua varian, lalu catat di model"""
+    config = get_config()
+    instance = model._base_manager.filter(pk=pk).first()
+    if instance is None:
+        return
+    foto = getattr(instance, field_name)
+    if not foto:
+        return
+    storage = foto.storage
+    varian_lama = getattr(instance, f'{field_name}_varian') or {}
+
+    with storage.open(foto.name, 'rb') as handle:
+        source = handle.read()
+    source_hash = hashlib.sha256(source).hexdigest()
+    if source_hash in (getattr(instance, f'{field_name}_hash'), varian_lama.get('asli', {}).get('sha256')):
+        return
+
+    img = Image.open(io.BytesIO(source))
+    format_asli = img.format or 'JPEG'
+    img.load()
+
+    varian = {}
+    data = _encode(img, format_asli, config['quality'])
+    if len(data) < len(source):
+        nama_asli = _simpan(storage, foto.name, data)
+    else:
+        nama_asli, data = foto.name, source
+    varian['asli'] = {
+        'name': nama_asli,
+        'width': img.width,
+        'height': img.height,
+        'bytes': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+    folder, filename = os.path.split(nama_asli)
+    stem = os.path.splitext(filename)[0]
+    current = img
+    daftar = sorted(config['varian'].items(), key=lambda item: item[1]['ukuran'], reverse=True)
+    for nama, spec in daftar:
+        current = current.copy()
+        current.thumbnail((spec['ukuran'], spec['ukuran']))
+        data = _encode(current, spec['format'], config['quality'])
+        name = os.path.join(folder, 'varian', f"{stem}_{nama}.{EKSTENSI.get(spec['format'], 'img')}")
+        varian[nama] = {
+            'name': _simpan(storage, name, data),
+            'width': current.width,
+            'height': current.height,
+            'bytes': len(data),
+        }
+
+    updated = model._base_manager.filter(pk=pk, **{field_name: foto.name}).update(**{
+        field_name: nama_asli,
+        f'{field_name}_hash': source_hash,
+        f'{field_name}_varian': varian,
+    })
+    if not updated:
+        # Foto sudah diganti lagi; file baru dibiarkan, pemrosesan berikutnya yang berlaku
+        return
+    # File lama baru dihapus setelah field menunjuk ke file baru
+    dipakai = {info['name'] for info in varian.values()}
+    lama = {foto.name} | {info.get('name') for info in varian_lama.values()}
+    for name in lama - dipakai - {None}:
+        if storage.exists(name):
+            storage.delete(name)
+
+
+class ImagePipeline:
+    """Antrean lokal + thread pool untuk pemrosesan foto"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = set()
+
+    def _get_executor(self, workers):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='foto')
+            return self._executor
+
+    def _run(self, model, pk, field_name):
+        close_old_connections()
+        try:
+            process_image(model, pk, field_name)
+        except Exception:
+            logger.exception('Gagal memproses %s %s.%s', model.__name__, pk, field_name)
+        finally:
+            connections.close_all()
+
+    def submit(self, model, pk, field_name):
+        """Masukkan foto ke antrean pemrosesan"""
+        config = get_config()
+        if config['sync']:
+            process_image(model, pk, field_name)
+            return
+        future = self._get_executor(config['workers']).submit(self._run, model, pk, field_name)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+    def schedule(self, instance, field_name):
+        """Jadwalkan pemrosesan setelah transaksi yang menyimpan ``instance`` commit"""
+        model, pk = type(instance), instance.pk
+        transaction.on_commit(
+            lambda: self.submit(model, pk, field_name), using=instance._state.db
+        )
+
+    def wait(self, timeout=None):
+        """Tunggu semua pekerjaan di antrean selesai"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+
+pipeline = ImagePipeline()
@@ -0,0 +1,89 @@
+"""
+Tabel centroid kode pos lokal untuk estimasi jarak antar alamat.
+
+Kode pos Indonesia dikelompokkan per wilayah lewat dua digit pertamanya;
+tabel bawaan berisi koordinat perkiraan untuk prefix tersebut. Tabel yang
+lebih rinci (prefix 3-5 digit) bisa dipasang lewat
+``settings.EKSPEDISI_MANIFEST['centroid_file']`` berupa CSV
+``prefix,lat,lon``; pencarian memakai prefix terpanjang yang cocok.
+"""
+import csv
+import math
+from functools import lru_cache
+
+from django.conf import settings
+
+# prefix: (lat, lon, wilayah)
+CENTROID = {
+    '10': (-6.18, 106.83, 'Jakarta Pusat'),
+    '11': (-6.14, 106.81, 'Jakarta Barat/Utara'),
+    '12': (-6.26, 106.81, 'Jakarta Selatan'),
+    '13': (-6.23, 106.90, 'Jakarta Timur'),
+    '14': (-6.12, 106.88, 'Jakarta Utara'),
+    '15': (-6.18, 106.63, 'Tangerang'),
+    '16': (-6.60, 106.80, 'Bogor'),
+    '17': (-6.24, 107.00, 'Bekasi'),
+    '20': (3.59, 98.67, 'Medan'),
+    '23': (5.55, 95.32, 'Banda Aceh'),
+    '25': (-0.95, 100.35, 'Padang'),
+    '28': (0.51, 101.45, 'Pekanbaru'),
+    '29': (1.05, 104.03, 'Batam'),
+    '30': (-2.98, 104.76, 'Palembang'),
+    '35': (-5.43, 105.26, 'Bandar Lampung'),
+    '36': (-1.61, 103.61, 'Jambi'),
+    '38': (-3.80, 102.27, 'Bengkulu'),
+    '40': (-6.91, 107.61, 'Bandung'),
+    '45': (-6.73, 108.55, 'Cirebon'),
+    '50': (-6.99, 110.42, 'Semarang'),
+    '55': (-7.80, 110.36, 'Yogyakarta'),
+    '57': (-7.57, 110.82, 'Surakarta'),
+    '60': (-7.25, 112.75, 'Surabaya'),
+    '65': (-7.98, 112.63, 'Malang'),
+    '68': (-8.17, 113.70, 'Jember'),
+    '70': (-3.32, 114.59, 'Banjarmasin'),
+    '73': (-2.21, 113.92, 'Palangka Raya'),
+    '75': (-0.50, 117.15, 'Samarinda'),
+    '76': (-1.24, 116.85, 'Balikpapan'),
+    '78': (-0.03, 109.33, 'Pontianak'),
+    '80': (-8.65, 115.22, 'Denpasar'),
+    '83': (-8.58, 116.12, 'Mataram'),
+    '85': (-10.18, 123.60, 'Kupang'),
+    '90': (-5.15, 119.43, 'Makassar'),
+    '93': (-3.97, 122.51, 'Kendari'),
+    '94': (-0.90, 119.87, 'Palu'),
+    '95': (1.47, 124.84, 'Manado'),
+    '97': (-3.70, 128.18, 'Ambon'),
+    '99': (-2.53, 140.72, 'Jayapura'),
+}
+
+
+@lru_cache(maxsize=None)
+def _table(path):
+    table = {prefix: (lat, lon) for prefix, (lat, lon, _) in CENTROID.items()}
+    if path:
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                table[row['prefix'].strip()] = (float(row['lat']), float(row['lon']))
+    return table, sorted({len(prefix) for prefix in table}, reverse=True)
+
+
+def get_table():
+    manifest = getattr(settings, 'EKSPEDISI_MANIFEST', {})
+    return _table(manifest.get('centroid_file'))
+
+
+def centroid(kode_pos):
+    """(lat, lon) untuk ``kode_pos`` dari prefix terpanjang, ``None`` jika tidak dikenal"""
+    kode_pos = (kode_pos or '').strip()
+    table, panjang = get_table()
+    for n in panjang:
+        if len(kode_pos) >= n and kode_pos[:n] in table:
+            return table[kode_pos[:n]]
+    return None
+
+
+def jarak_km(a, b):
+    """Jarak haversine antara dua titik (lat, lon) dalam kilometer"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 12742 * math.asin(math.sqrt(h))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ekspedisi_app.arsip import BATCH_SIZE, STATUS_SELESAI, arsipkan
+
+
+class Command(BaseCommand):
+    help = 'Pindahkan pengiriman delivered/cancelled lama beserta paket dan riwayatnya ke tabel arsip'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, required=True, metavar='HARI',
+            help='Arsipkan pengiriman yang tidak berubah lebih dari HARI hari',
+        )
+        parser.add_argument(
+            '--status', action='append', choices=STATUS_SELESAI,
+            help='Status yang diarsipkan (default delivered dan cancelled)',
+        )
+        parser.add_argument(
+            '--include-inactive', action='store_true',
+            help='Ikut arsipkan pengiriman yang sudah dihapus (is_active=False) apa pun statusnya',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--limit', type=int, help='Maksimal pengiriman yang diarsipkan dalam satu jalan')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than tidak boleh negatif')
+        total = arsipkan(
+            options['older_than'],
+            status=tuple(options['status'] or STATUS_SELESAI),
+            nonaktif=options['include_inactive'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['pengiriman']} pengiriman, {total['paket']} paket dan "
+            f"{total['riwayatpengiriman']} riwayat diarsipkan"
+        ))
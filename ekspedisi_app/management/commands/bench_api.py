@@ -0,0 +1,190 @@
+import json
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ekspedisi_app.benchmark import (
+    benchmark_database, compare_results, run_concurrently, save_results, summarize
+)
+from ekspedisi_app.models import JenisLayanan, Pengiriman, User
+from ekspedisi_app.seed import seed
+from ekspedisi_app.sequences import allocator
+
+# Campuran default: polling tracking publik mendominasi trafik
+DEFAULT_MIX = 'tracking=55,kurir=20,dashboard=15,create=10'
+SKENARIO = ('tracking', 'kurir', 'dashboard', 'create')
+
+
+def parse_mix(value):
+    mix = {}
+    for bagian in value.split(','):
+        nama, _, bobot = bagian.partition('=')
+        nama = nama.strip()
+        if nama not in SKENARIO:
+            raise CommandError(f"Skenario tidak dikenal: {nama} (pilihan: {', '.join(SKENARIO)})")
+        try:
+            mix[nama] = float(bobot)
+        except ValueError:
+            raise CommandError(f'Bobot skenario {nama} harus angka')
+    if not any(bobot > 0 for bobot in mix.values()):
+        raise CommandError('Minimal satu skenario harus berbobot positif')
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark campuran endpoint (tracking, list kurir, dashboard, burst pembuatan pengiriman) '
+        'di database sintetis; hasil p50/p95/p99, throughput dan query per request disimpan sebagai JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help='Jumlah request per thread')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Bobot skenario, default {DEFAULT_MIX}')
+        parser.add_argument('--burst', type=int, default=5, help='Jumlah pembuatan pengiriman per burst')
+        parser.add_argument('--pengiriman', type=int, default=5000, help='Volume data sintetis')
+        parser.add_argument('--pelanggan', type=int, default=200)
+        parser.add_argument('--kurir', type=int, default=20)
+        parser.add_argument('--penerima', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+        parser.add_argument('--compare', help='File JSON hasil sebelumnya untuk dibandingkan')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        threads, per_thread = options['threads'], options['requests']
+        volume = {
+            key: options[key] for key in ('pengiriman', 'pelanggan', 'kurir', 'penerima')
+        }
+
+        with benchmark_database():
+            allocator.reset()
+            started = time.perf_counter()
+            volume.update(seed(
+                admin=1, staf=1, kurir=options['kurir'], pelanggan=options['pelanggan'],
+                pengiriman=options['pengiriman'], penerima=options['penerima'],
+                random_seed=options['seed'],
+            ))
+            self.stdout.write(f'seed selesai dalam {time.perf_counter() - started:.1f}s: {volume}')
+
+            tokens = self.create_tokens(threads)
+            resi = list(Pengiriman.objects.values_list('nomor_resi', flat=True)[:5000])
+            layanan_id = JenisLayanan.objects.values_list('pk', flat=True).first()
+            if not resi:
+                raise CommandError('Benchmark membutuhkan minimal satu pengiriman (--pengiriman)')
+
+            def worker(index):
+                return self.replay(index, mix, per_thread, options, tokens, resi, layanan_id)
+
+            results, elapsed = run_concurrently(worker, threads)
+            allocator.reset()
+
+        samples = defaultdict(list)
+        for hasil in results:
+            for skenario, latency, queries, ok in hasil:
+                samples[skenario].append((latency, queries, ok))
+        report = {
+            'options': {
+                'threads': threads, 'requests_per_thread': per_thread, 'mix': mix, 'burst': options['burst'],
+            },
+            'volume': volume,
+            'overall': self.summarize_samples([s for rows in samples.values() for s in rows], elapsed),
+            'scenarios': {nama: self.summarize_samples(rows, elapsed) for nama, rows in sorted(samples.items())},
+        }
+        self.print_report(report)
+        path = save_results('api', report, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'hasil disimpan di {path}'))
+        if options['compare']:
+            self.print_comparison(options['compare'], report)
+
+    def create_tokens(self, threads):
+        """Token untuk sebagian user per role (satu set per thread)"""
+        tokens = {}
+        for role in ('admin', 'kurir', 'pelanggan'):
+            users = list(User.objects.filter(role=role, is_active=True).order_by('pk')[:threads])
+            Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+            tokens[role] = list(Token.objects.filter(user__in=users).values_list('key', flat=True))
+        return tokens
+
+    def replay(self, index, mix, jumlah, options, tokens, resi, layanan_id):
+        rng = random.Random(options['seed'] * 1000 + index)
+        clients = {}
+        for role, keys in tokens.items():
+            client = APIClient()
+            if keys:
+                client.credentials(HTTP_AUTHORIZATION=f'Token {keys[index % len(keys)]}')
+            clients[role] = client
+        anonim = APIClient()
+        etags = {}
+        nama, bobot = zip(*mix.items())
+        samples = []
+
+        def request(skenario, method, url, **kwargs):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = method(url, **kwargs)
+            samples.append((
+                skenario, time.perf_counter() - started, len(queries), response.status_code < 400
+            ))
+            return response
+
+        while len(samples) < jumlah:
+            skenario = rng.choices(nama, bobot)[0]
+            if skenario == 'tracking':
+                # Sebagian kecil resi "panas" dipoll berulang dengan If-None-Match
+                nomor = resi[(int(rng.paretovariate(1.2)) - 1) % len(resi)]
+                headers = {'HTTP_IF_NONE_MATCH': etags[nomor]} if nomor in etags else {}
+                response = request(skenario, anonim.get, f'/api/tracking/{nomor}/', **headers)
+                if response.status_code == 200:
+                    etags[nomor] = response['ETag']
+            elif skenario == 'kurir':
+                response = request(skenario, clients['kurir'].get, '/api/pengiriman/')
+                if rng.random() < 0.3 and response.status_code == 200 and response.data.get('next'):
+                    request(skenario, clients['kurir'].get, response.data['next'])
+            elif skenario == 'dashboard':
+                role = 'admin' if rng.random() < 0.3 else 'pelanggan'
+                request(skenario, clients[role].get, '/api/dashboard/stats/')
+            else:
+                for _ in range(max(1, options['burst'])):
+                    request(
+                        skenario, clients['pelanggan'].post, '/api/pengiriman/create/',
+                        data={'jenis_layanan': layanan_id, 'catatan': 'bench'}, format='json',
+                    )
+        return samples[:jumlah]
+
+    def summarize_samples(self, rows, elapsed):
+        latencies = [latency for latency, _, _ in rows]
+        queries = [jumlah for _, jumlah, _ in rows]
+        ringkasan = summarize(latencies, elapsed)
+        ringkasan.update({
+            'errors': sum(1 for _, _, ok in rows if not ok),
+            'queries_mean': round(sum(queries) / len(queries), 2) if queries else 0.0,
+            'queries_max': max(queries, default=0),
+        })
+        return ringkasan
+
+    def print_report(self, report):
+        rows = [('semua', report['overall'])] + list(report['scenarios'].items())
+        for nama, nilai in rows:
+            self.stdout.write(
+                f"{nama:<10} req={nilai['requests']:<6} rps={nilai['throughput_rps']:<8} "
+                f"p50={nilai['p50_ms']}ms p95={nilai['p95_ms']}ms p99={nilai['p99_ms']}ms "
+                f"query={nilai['queries_mean']} (maks {nilai['queries_max']}) error={nilai['errors']}"
+            )
+
+    def print_comparison(self, path, report):
+        try:
+            with open(path) as handle:
+                lama = json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Tidak bisa membaca {path}: {exc}')
+        self.stdout.write(f"dibandingkan dengan {path} ({lama.get('git_revision') or '-'}):")
+        for skenario, metric, a, b, perubahan in compare_results(lama, report):
+            persen = f'{perubahan:+.1f}%' if perubahan is not None else '-'
+            self.stdout.write(f'  {skenario:<10} {metric:<15} {a} -> {b} ({persen})')
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from api import pubsub
+from ekspedisi_app.benchmark import benchmark_database, percentile, save_results, summarize
+from ekspedisi_app.models import JenisLayanan, Pengiriman, RiwayatPengiriman, User
+from ekspedisi_app.sequences import allocator
+
+
+async def asgi_get(app, path, query=''):
+    """Satu request GET langsung ke aplikasi ASGI (tanpa server), kembalikan (status, body)"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    request_sent = False
+    hasil = {'status': None, 'body': []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Client tidak pernah memutus koneksi
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            hasil['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            hasil['body'].append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return hasil['status'], b''.join(hasil['body'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark kapasitas koneksi long-poll async/tracking/<resi>/events/: ASGI (event loop) '
+        'dibanding WSGI (thread worker); hasil koneksi tertahan, latensi tracking dan fan-out event'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=500, help='Jumlah client long-poll')
+        parser.add_argument('--workers', type=int, default=32, help='Thread worker WSGI')
+        parser.add_argument('--hold', type=float, default=10, help='Timeout long-poll (detik)')
+        parser.add_argument('--tracking', type=int, default=200, help='Request tracking selama koneksi tertahan')
+        parser.add_argument('--mode', action='append', choices=('asgi', 'wsgi'), help='Default keduanya')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        if options['connections'] < 1 or options['workers'] < 1:
+            raise CommandError('--connections dan --workers minimal 1')
+        report = {
+            'options': {key: options[key] for key in ('connections', 'workers', 'hold', 'tracking')},
+            'scenarios': {},
+        }
+        with benchmark_database():
+            allocator.reset()
+            user = User.objects.create_user(username='bench', password='bench-pass-123', role='pelanggan')
+            layanan = JenisLayanan.objects.create(nama_layanan='Reguler', deskripsi='Benchmark', tarif_per_kg=10000)
+            self.pengiriman = Pengiriman.objects.create(pengirim=user, jenis_layanan=layanan)
+            self.tambah_riwayat()
+            for mode in options['mode'] or ('asgi', 'wsgi'):
+                pubsub.broker.reset()
+                hasil = getattr(self, f'ukur_{mode}')(options)
+                report['scenarios'][mode] = hasil
+                self.stdout.write(
+                    f"{mode:<5} tertahan={hasil['held']}/{options['connections']} "
+                    f"thread_puncak={hasil['threads_peak']} tracking p50={hasil['p50_ms']}ms "
+                    f"p99={hasil['p99_ms']}ms event_terkirim={hasil['delivered']} "
+                    f"fanout p50={hasil['fanout_p50_ms']}ms p99={hasil['fanout_p99_ms']}ms"
+                )
+            allocator.reset()
+        self.stdout.write(f"hasil disimpan di {save_results('async', report, options['output'])}")
+
+    def tambah_riwayat(self):
+        return RiwayatPengiriman.objects.create(
+            pengiriman=self.pengiriman, status='transit', keterangan='bench', lokasi='Hub'
+        ).pk
+
+    def paths(self):
+        resi = self.pengiriman.nomor_resi
+        return f'/api/async/tracking/{resi}/', f'/api/async/tracking/{resi}/events/'
+
+    def hasil(self, tracking_latencies, elapsed, held, threads_peak, fanout, delivered):
+        hasil = summarize(tracking_latencies, elapsed)
+        hasil.update({
+            'held': held,
+            'threads_peak': threads_peak,
+            'delivered': delivered,
+            'fanout_p50_ms': round(percentile(fanout, 50) * 1000, 2),
+            'fanout_p99_ms': round(percentile(fanout, 99) * 1000, 2),
+        })
+        return hasil
+
+    def ukur_asgi(self, options):
+        return asyncio.run(self._ukur_asgi(options))
+
+    async def _ukur_asgi(self, options):
+        app = ASGIHandler()
+        tracking_path, events_path = self.paths()
+        cursor = await sync_to_async(self.tambah_riwayat)()
+        query = f"after={cursor}&timeout={options['hold']}"
+        selesai = {}
+
+        async def poll(index):
+            status, body = await asgi_get(app, events_path, query)
+            selesai[index] = (time.perf_counter(), status, status == 200 and bool(json.loads(body)['events']))
+
+        polls = [asyncio.ensure_future(poll(i)) for i in range(options['connections'])]
+        held, threads_peak = await self._tunggu_tertahan(options, asyncio.sleep)
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(options['tracking']):
+            mulai = time.perf_counter()
+            await asgi_get(app, tracking_path)
+            latencies.append(time.perf_counter() - mulai)
+            threads_peak = max(threads_peak, threading.active_count())
+        elapsed = time.perf_counter() - started
+
+        published = time.perf_counter()
+        await sync_to_async(self.tambah_riwayat)()
+        await asyncio.gather(*polls)
+        return self._ringkas(latencies, elapsed, held, threads_peak, published, selesai)
+
+    def ukur_wsgi(self, options):
+        tracking_path, events_path = self.paths()
+        cursor = self.tambah_riwayat()
+        data = {'after': cursor, 'timeout': options['hold']}
+        local = threading.local()
+        selesai = {}
+
+        def client():
+            # Satu Client (handler + middleware) per thread worker
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST='localhost')
+            return local.client
+
+        def poll(index):
+            response = client().get(events_path, data)
+            selesai[index] = (time.perf_counter(), response.status_code, bool(response.json()['events']))
+
+        def lacak(mulai):
+            # Latensi dihitung dari request masuk, termasuk antre menunggu thread worker
+            client().get(tracking_path)
+            return time.perf_counter() - mulai
+
+        with ThreadPoolExecutor(options['workers']) as pool:
+            polls = [pool.submit(poll, i) for i in range(options['connections'])]
+            held, threads_peak = self._tunggu_tertahan_sync(options)
+            # Request tracking mengantre di pool yang sama dengan koneksi long-poll
+            started = time.perf_counter()
+            futures = [pool.submit(lacak, time.perf_counter()) for _ in range(options['tracking'])]
+            wait(futures)
+            elapsed = time.perf_counter() - started
+            latencies = [future.result() for future in futures]
+            threads_peak = max(threads_peak, threading.active_count())
+            published = time.perf_counter()
+            self.tambah_riwayat()
+            wait(polls)
+            for future in polls:
+                future.result()
+        return self._ringkas(latencies, elapsed, held, threads_peak, published, selesai)
+
+    async def _tunggu_tertahan(self, options, sleep):
+        """Tunggu sampai semua client menunggu event atau jumlahnya berhenti naik selama 1 detik"""
+        held = threads_peak = stabil = 0
+        batas = time.perf_counter() + options['hold'] / 2
+        while time.perf_counter() < batas and held < options['connections'] and stabil < 5:
+            await sleep(0.2)
+            threads_peak = max(threads_peak, threading.active_count())
+            sekarang = pubsub.broker.subscribers
+            stabil = stabil + 1 if sekarang and sekarang == held else 0
+            held = sekarang
+        return held, threads_peak
+
+    def _tunggu_tertahan_sync(self, options):
+        return asyncio.run(self._tunggu_tertahan(options, asyncio.sleep))
+
+    def _ringkas(self, latencies, elapsed, held, threads_peak, published, selesai):
+        gagal = [index for index, (_, status, _) in selesai.items() if status != 200]
+        if gagal:
+            raise CommandError(f'{len(gagal)} request long-poll gagal')
+        fanout = [waktu - published for waktu, _, ada_event in selesai.values() if ada_event]
+        return self.hasil(latencies, elapsed, held, threads_peak, fanout, len(fanout))
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import authentication, metrics
+from ekspedisi_app.benchmark import benchmark_database, save_results, summarize
+from ekspedisi_app.models import User
+from ekspedisi_app.seed import seed
+from ekspedisi_app.sequences import allocator
+
+
+class Command(BaseCommand):
+    help = 'Ukur biaya autentikasi token: TokenAuthentication vs CachedTokenAuthentication (hit/miss)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Jumlah operasi per skenario')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        jumlah = options['requests']
+        with benchmark_database():
+            allocator.reset()
+            seed(admin=1, staf=0, kurir=5, pelanggan=50, pengiriman=200, penerima=100)
+            keys = [Token.objects.create(user=user).key for user in User.objects.filter(is_active=True)]
+            tanpa_cache, dengan_cache = TokenAuthentication(), authentication.CachedTokenAuthentication()
+
+            def dengan_cache_miss(key):
+                authentication.clear()
+                dengan_cache.authenticate_credentials(key)
+
+            skenario = {
+                'token_authentication': tanpa_cache.authenticate_credentials,
+                'cached_miss': dengan_cache_miss,
+                'cached_hit': dengan_cache.authenticate_credentials,
+            }
+            report = {'options': {'requests': jumlah, 'tokens': len(keys)}, 'scenarios': {}}
+            for nama, fungsi in skenario.items():
+                for key in keys:
+                    fungsi(key)  # pemanasan (dan isi cache untuk skenario hit)
+                report['scenarios'][nama] = self.ukur(lambda i: fungsi(keys[i % len(keys)]), jumlah)
+
+            # End-to-end: request dashboard dengan header Authorization
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {keys[0]}')
+
+            def request_miss(i):
+                authentication.clear()
+                client.get('/api/dashboard/stats/')
+
+            client.get('/api/dashboard/stats/')
+            report['scenarios']['dashboard:cached_miss'] = self.ukur(request_miss, jumlah // 4)
+            report['scenarios']['dashboard:cached_hit'] = self.ukur(
+                lambda i: client.get('/api/dashboard/stats/'), jumlah // 4
+            )
+            allocator.reset()
+
+        for nama, hasil in report['scenarios'].items():
+            self.stdout.write(
+                f"{nama:<22} mean={hasil['mean_us']}us p50={hasil['p50_ms']}ms p95={hasil['p95_ms']}ms "
+                f"queries/op={hasil['queries_mean']}"
+            )
+        self.stdout.write(f"hasil disimpan di {save_results('auth', report, options['output'])}")
+
+    def ukur(self, fungsi, jumlah):
+        latencies = []
+        queries = metrics.RequestMetrics()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            for i in range(jumlah):
+                mulai = time.perf_counter()
+                fungsi(i)
+                latencies.append(time.perf_counter() - mulai)
+            elapsed = time.perf_counter() - started
+        hasil = summarize(latencies, elapsed)
+        hasil['mean_us'] = round(sum(latencies) / jumlah * 1e6, 1)
+        hasil['queries_mean'] = round(queries.db_queries / jumlah, 2)
+        return hasil
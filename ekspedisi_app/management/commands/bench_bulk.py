@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.parsers import PENERIMA_COLUMNS
+from ekspedisi_app.benchmark import benchmark_database
+from ekspedisi_app.models import JenisLayanan, Paket, Penerima, User
+from ekspedisi_app.sequences import allocator
+
+TARGET_PAKET_PER_MENIT = 10000
+KOTA = ['Jakarta', 'Bandung', 'Surabaya', 'Medan', 'Makassar', 'Semarang', 'Denpasar', 'Pontianak']
+
+
+def build_manifest(jumlah_pengiriman, paket_per_pengiriman, jumlah_penerima, layanan_id, seed=0):
+    rng = random.Random(seed)
+    penerima = [
+        {
+            'nama_penerima': f'Penerima {i}',
+            'alamat_penerima': f'Jl. Contoh No. {i}',
+            'nomor_telepon_penerima': f'08{i:010d}',
+            'kota_tujuan': rng.choice(KOTA),
+            'kode_pos': f'{rng.randint(10000, 99999)}',
+        }
+        for i in range(jumlah_penerima)
+    ]
+    return [
+        {
+            'ref': f'ORD-{i}',
+            'jenis_layanan': layanan_id,
+            'catatan': 'Manifest benchmark',
+            'paket': [
+                {
+                    'nama_barang': f'Barang {i}-{j}',
+                    'deskripsi_barang': 'Benchmark',
+                    'berat': f'{rng.uniform(0.1, 20):.2f}',
+                    'panjang': '10.00', 'lebar': '10.00', 'tinggi': '10.00',
+                    'penerima': rng.choice(penerima),
+                }
+                for j in range(paket_per_pengiriman)
+            ],
+        }
+        for i in range(jumlah_pengiriman)
+    ]
+
+
+def manifest_to_csv(manifest):
+    output = io.StringIO()
+    paket_columns = ['nama_barang', 'deskripsi_barang', 'berat', 'panjang', 'lebar', 'tinggi']
+    writer = csv.DictWriter(output, ['ref', 'jenis_layanan', 'catatan', *PENERIMA_COLUMNS, *paket_columns])
+    writer.writeheader()
+    for pengiriman in manifest:
+        for paket in pengiriman['paket']:
+            row = {key: pengiriman[key] for key in ('ref', 'jenis_layanan', 'catatan')}
+            row.update(paket['penerima'])
+            row.update({key: paket[key] for key in paket_columns})
+            writer.writerow(row)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ingest manifest lewat pengiriman/bulk/ (JSON dan CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pengiriman', type=int, default=2000)
+        parser.add_argument('--paket', type=int, default=5, help='Paket per pengiriman')
+        parser.add_argument('--penerima', type=int, default=1000, help='Jumlah penerima unik')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            allocator.reset()
+            layanan = JenisLayanan.objects.create(
+                nama_layanan='Reguler', deskripsi='Benchmark', tarif_per_kg=10000
+            )
+            user = User.objects.create_user(username='merchant', password='bench-pass-123')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+            for format_name in ('json', 'csv'):
+                manifest = build_manifest(
+                    options['pengiriman'], options['paket'], options['penerima'], layanan.pk,
+                    seed=len(format_name),
+                )
+                if format_name == 'json':
+                    body, content_type = json.dumps(manifest), 'application/json'
+                else:
+                    body, content_type = manifest_to_csv(manifest), 'text/csv'
+
+                paket_awal = Paket.objects.count()
+                started = time.perf_counter()
+                response = client.post('/api/pengiriman/bulk/', body, content_type=content_type)
+                elapsed = time.perf_counter() - started
+                dibuat = Paket.objects.count() - paket_awal
+                per_menit = dibuat / elapsed * 60 if elapsed else 0
+
+                self.stdout.write(
+                    f"{format_name}: status={response.status_code} paket={dibuat} "
+                    f"waktu={elapsed:.2f}s throughput={per_menit:,.0f} paket/menit "
+                    f"penerima={Penerima.objects.count()}"
+                )
+                style = self.style.SUCCESS if per_menit >= TARGET_PAKET_PER_MENIT else self.style.ERROR
+                self.stdout.write(style(f"target {TARGET_PAKET_PER_MENIT:,} paket/menit"))
+            allocator.reset()
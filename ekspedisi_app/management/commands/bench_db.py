@@ -0,0 +1,106 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+
+from api.scan import ingest_scans
+from ekspedisi.database import SQLITE_PROFILES, sqlite_options
+from ekspedisi_app.benchmark import benchmark_database, run_concurrently, save_results, summarize
+from ekspedisi_app.models import JenisLayanan, Pengiriman, User
+from ekspedisi_app.sequences import allocator
+
+
+class Command(BaseCommand):
+    help = 'Benchmark tulis bersamaan (pengiriman baru + scan) per profil database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--operasi', type=int, default=100, help='Jumlah transaksi tulis per thread')
+        parser.add_argument('--scan-batch', type=int, default=20, help='Event per batch scan')
+        parser.add_argument(
+            '--profile', action='append', choices=sorted(SQLITE_PROFILES),
+            help='Profil SQLite yang diukur (default semua); diabaikan untuk backend lain',
+        )
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            profiles = options['profile'] or list(SQLITE_PROFILES)
+        else:
+            profiles = [connection.vendor]
+        report = {
+            'options': {key: options[key] for key in ('threads', 'operasi', 'scan_batch')},
+            'scenarios': {},
+        }
+        old_options = connection.settings_dict.get('OPTIONS', {})
+        try:
+            for profile in profiles:
+                if connection.vendor == 'sqlite':
+                    # settings_dict dipakai bersama oleh koneksi semua thread
+                    connections.close_all()
+                    connection.settings_dict['OPTIONS'] = sqlite_options(profile)
+                report['scenarios'][profile] = self.ukur(options)
+        finally:
+            connections.close_all()
+            connection.settings_dict['OPTIONS'] = old_options
+
+        for profile, hasil in report['scenarios'].items():
+            self.stdout.write(
+                f"{profile:<12} throughput={hasil['throughput_rps']} tx/s p50={hasil['p50_ms']}ms "
+                f"p95={hasil['p95_ms']}ms p99={hasil['p99_ms']}ms locked={hasil['locked']}"
+            )
+        self.stdout.write(f"hasil disimpan di {save_results('db', report, options['output'])}")
+
+    def ukur(self, options):
+        threads, operasi, scan_batch = options['threads'], options['operasi'], options['scan_batch']
+        with benchmark_database():
+            allocator.reset()
+            layanan = JenisLayanan.objects.create(
+                nama_layanan='Reguler', deskripsi='Benchmark', tarif_per_kg=10000
+            )
+            users = [
+                User.objects.create_user(username=f'bench{i}', password='bench-pass-123', role='kurir')
+                for i in range(threads)
+            ]
+            resi_awal = [
+                Pengiriman.objects.create(pengirim=user, jenis_layanan=layanan).nomor_resi for user in users
+            ]
+
+            def worker(index):
+                rng = random.Random(index)
+                latencies, locked = [], 0
+                for n in range(operasi):
+                    started = time.perf_counter()
+                    try:
+                        if n % 2:
+                            ingest_scans([
+                                {
+                                    'event_id': f'bench-{index}-{n}-{i}',
+                                    'nomor_resi': rng.choice(resi_awal),
+                                    'status': 'pending',
+                                    'lokasi': f'Hub {index}',
+                                }
+                                for i in range(scan_batch)
+                            ])
+                        else:
+                            with transaction.atomic():
+                                Pengiriman.objects.create(
+                                    pengirim=users[index], jenis_layanan=layanan, catatan='bench'
+                                )
+                    except OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        locked += 1
+                    latencies.append(time.perf_counter() - started)
+                return latencies, locked
+
+            try:
+                results, elapsed = run_concurrently(worker, threads)
+            except OperationalError as exc:
+                raise CommandError(f'Benchmark gagal: {exc}') from exc
+            allocator.reset()
+
+        hasil = summarize([lat for latencies, _ in results for lat in latencies], elapsed)
+        hasil['locked'] = sum(locked for _, locked in results)
+        return hasil
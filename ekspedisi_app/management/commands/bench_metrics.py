@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api import metrics
+from ekspedisi_app.benchmark import benchmark_database, save_results, summarize
+from ekspedisi_app.models import Pengiriman, User
+from ekspedisi_app.seed import seed
+from ekspedisi_app.sequences import allocator
+
+MIDDLEWARE = 'api.middleware.PerformanceMiddleware'
+# Batas overhead middleware per request (median) sebelum dianggap regresi
+BATAS_OVERHEAD_MS = 0.25
+
+
+class Command(BaseCommand):
+    help = 'Ukur overhead PerformanceMiddleware (tanpa middleware, aktif, dan log lambat tersampel)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Jumlah request per endpoint per mode')
+        parser.add_argument('--rounds', type=int, default=3, help='Putaran bergantian per mode')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        tanpa = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+        modes = {
+            'tanpa_middleware': {'MIDDLEWARE': tanpa},
+            'aktif': {'MIDDLEWARE': [MIDDLEWARE, *tanpa], 'EKSPEDISI_METRICS': {'slow_sample_rate': 0.0}},
+            'sampel_1persen': {
+                'MIDDLEWARE': [MIDDLEWARE, *tanpa],
+                'EKSPEDISI_METRICS': {'slow_sample_rate': 0.01, 'slow_ms': 0, 'slow_log_size': 10},
+            },
+        }
+
+        with benchmark_database():
+            allocator.reset()
+            seed(admin=1, staf=0, kurir=5, pelanggan=20, pengiriman=500, penerima=200)
+            kurir = User.objects.filter(role='kurir').first()
+            resi = Pengiriman.objects.values_list('nomor_resi', flat=True).first()
+            endpoints = {'tracking': (None, f'/api/tracking/{resi}/'), 'kurir_list': (kurir, '/api/pengiriman/')}
+
+            samples = {(mode, nama): [] for mode in modes for nama in endpoints}
+            elapsed = {key: 0.0 for key in samples}
+            # Mode dijalankan bergantian per putaran agar noise mesin terbagi rata
+            for _ in range(options['rounds']):
+                for mode, overrides in modes.items():
+                    with override_settings(**overrides):
+                        metrics.registry.reset()
+                        for nama, (user, url) in endpoints.items():
+                            client = APIClient()
+                            client.force_authenticate(user)
+                            client.get(url)  # pemanasan
+                            started = time.perf_counter()
+                            for _ in range(options['requests']):
+                                mulai = time.perf_counter()
+                                client.get(url)
+                                samples[mode, nama].append(time.perf_counter() - mulai)
+                            elapsed[mode, nama] += time.perf_counter() - started
+            allocator.reset()
+
+        report = {'options': {'requests': options['requests'], 'rounds': options['rounds']}, 'scenarios': {}}
+        for (mode, nama), latencies in samples.items():
+            report['scenarios'][f'{nama}:{mode}'] = summarize(latencies, elapsed[mode, nama])
+        lolos = True
+        for nama in endpoints:
+            dasar = report['scenarios'][f'{nama}:tanpa_middleware']['p50_ms']
+            for mode in modes:
+                hasil = report['scenarios'][f'{nama}:{mode}']
+                overhead = round(hasil['p50_ms'] - dasar, 3)
+                hasil['overhead_p50_ms'] = overhead
+                if mode != 'tanpa_middleware' and overhead > BATAS_OVERHEAD_MS:
+                    lolos = False
+                self.stdout.write(
+                    f"{nama:<11} {mode:<17} p50={hasil['p50_ms']}ms p95={hasil['p95_ms']}ms "
+                    f"overhead p50={overhead:+}ms"
+                )
+        report['overhead_limit_ms'] = BATAS_OVERHEAD_MS
+        report['passed'] = lolos
+        self.stdout.write(f"hasil disimpan di {save_results('metrics', report, options['output'])}")
+        style = self.style.SUCCESS if lolos else self.style.ERROR
+        self.stdout.write(style(f'overhead median per request {"<=" if lolos else ">"} {BATAS_OVERHEAD_MS}ms'))
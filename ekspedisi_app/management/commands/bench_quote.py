@@ -0,0 +1,108 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import metrics
+from api.quote import quote_paket
+from ekspedisi_app import tarif
+from ekspedisi_app.benchmark import benchmark_database, save_results
+from ekspedisi_app.models import JenisLayanan, TarifLayanan, User, ZonaTarif
+from ekspedisi_app.seed import PREFIX_KOTA, seed
+from ekspedisi_app.sequences import allocator
+
+# Rentang berat (kg) dan faktor tarif per rentang
+RENTANG = [(0, 5, Decimal('1.0')), (5, 20, Decimal('0.9')), (20, None, Decimal('0.8'))]
+
+
+class Command(BaseCommand):
+    help = 'Ukur throughput quote tarif: mesin tarif, quote_paket (dengan validasi) dan endpoint quote/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paket', type=int, default=20000, help='Jumlah paket yang di-quote per skenario')
+        parser.add_argument('--batch', type=int, default=1000, help='Jumlah paket per request quote/')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        jumlah, batch = options['paket'], options['batch']
+        rng = random.Random(0)
+        with benchmark_database():
+            allocator.reset()
+            seed(admin=1, staf=0, kurir=0, pelanggan=1, pengiriman=0, penerima=0)
+            layanan = list(JenisLayanan.aktif.all())
+            zona = [
+                ZonaTarif.objects.create(nama=f'Zona {prefix}', prefix_kode_pos=[f'{prefix:02d}'])
+                for prefix in PREFIX_KOTA
+            ]
+            TarifLayanan.objects.bulk_create([
+                TarifLayanan(
+                    jenis_layanan=obj, zona=zona_obj, berat_min=bawah, berat_maks=atas,
+                    tarif_per_kg=(obj.tarif_per_kg * faktor * (10 + index % 4) / 10).quantize(tarif.SEN),
+                    biaya_tetap=5000,
+                )
+                for obj in layanan for index, zona_obj in enumerate(zona) for bawah, atas, faktor in RENTANG
+            ])
+            tarif.clear()
+            paket_list = [
+                {
+                    'jenis_layanan': rng.choice(layanan).pk,
+                    'kode_pos': f'{rng.randint(10, 99)}{rng.randint(0, 999):03d}',
+                    'berat': str(Decimal(rng.randint(10, 3000)) / 100),
+                    'panjang': rng.randint(5, 80), 'lebar': rng.randint(5, 80), 'tinggi': rng.randint(5, 80),
+                    'nilai_barang': str(rng.randint(0, 5000000)), 'asuransi': rng.random() < 0.3,
+                }
+                for _ in range(jumlah)
+            ]
+            user = User.objects.get(role='admin')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+            mulai = time.perf_counter()
+            tabel = tarif.TabelTarif.compile()
+            compile_ms = round((time.perf_counter() - mulai) * 1000, 2)
+            data = [
+                (p['jenis_layanan'], p['kode_pos'], Decimal(p['berat']), p['panjang'], p['lebar'], p['tinggi'],
+                 Decimal(p['nilai_barang']), p['asuransi'])
+                for p in paket_list
+            ]
+            batches = [paket_list[start:start + batch] for start in range(0, jumlah, batch)]
+            client.post('/api/quote/', {'paket': batches[0]}, format='json')  # pemanasan tabel dan auth
+            skenario = {
+                'engine': lambda: [tabel.quote(*args) for args in data],
+                'quote_paket': lambda: quote_paket(paket_list),
+                'endpoint': lambda: [
+                    client.post('/api/quote/', {'paket': item}, format='json') for item in batches
+                ],
+            }
+            report = {
+                'options': {'paket': jumlah, 'batch': batch, 'zona': len(zona), 'tarif': TarifLayanan.objects.count()},
+                'compile_ms': compile_ms,
+                'scenarios': {nama: self.ukur(fungsi, jumlah) for nama, fungsi in skenario.items()},
+            }
+            tarif.clear()
+            allocator.reset()
+
+        self.stdout.write(f"kompilasi tabel: {report['compile_ms']}ms")
+        for nama, hasil in report['scenarios'].items():
+            self.stdout.write(
+                f"{nama:<12} {hasil['quotes_per_s']} quote/s ({hasil['us_per_quote']}us/quote) "
+                f"queries={hasil['queries']}"
+            )
+        self.stdout.write(f"hasil disimpan di {save_results('quote', report, options['output'])}")
+
+    def ukur(self, fungsi, jumlah):
+        queries = metrics.RequestMetrics()
+        with connection.execute_wrapper(queries):
+            mulai = time.perf_counter()
+            fungsi()
+            elapsed = time.perf_counter() - mulai
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'quotes_per_s': round(jumlah / elapsed),
+            'us_per_quote': round(elapsed / jumlah * 1e6, 1),
+            'queries': queries.db_queries,
+        }
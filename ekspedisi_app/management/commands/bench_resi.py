@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ekspedisi_app.benchmark import benchmark_database, run_concurrently, summarize
+from ekspedisi_app.models import JenisLayanan, Pengiriman, User
+from ekspedisi_app.sequences import allocator
+
+
+class Command(BaseCommand):
+    help = 'Benchmark pembuatan nomor resi secara bersamaan lewat PengirimanCreateView'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=50, help='Jumlah request per thread')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        per_thread = options['requests']
+
+        with benchmark_database():
+            allocator.reset()
+            layanan = JenisLayanan.objects.create(
+                nama_layanan='Reguler', deskripsi='Benchmark', tarif_per_kg=10000
+            )
+            tokens = []
+            for i in range(threads):
+                user = User.objects.create_user(username=f'bench{i}', password='bench-pass-123')
+                tokens.append(Token.objects.create(user=user).key)
+
+            def worker(index):
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f'Token {tokens[index]}')
+                latencies, gagal = [], 0
+                for _ in range(per_thread):
+                    started = time.perf_counter()
+                    response = client.post(
+                        '/api/pengiriman/create/',
+                        {'jenis_layanan': layanan.pk, 'catatan': 'bench'},
+                        format='json',
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 201:
+                        gagal += 1
+                return latencies, gagal
+
+            results, elapsed = run_concurrently(worker, threads)
+            latencies = [lat for hasil in results for lat in hasil[0]]
+            gagal = sum(hasil[1] for hasil in results)
+            duplikat = (
+                Pengiriman.objects.values('nomor_resi')
+                .annotate(jumlah=Count('id'))
+                .filter(jumlah__gt=1)
+                .count()
+            )
+            total = Pengiriman.objects.count()
+            allocator.reset()
+
+        ringkasan = summarize(latencies, elapsed)
+        self.stdout.write(f"threads={threads} requests={ringkasan['requests']} gagal={gagal}")
+        self.stdout.write(f"pengiriman dibuat={total} resi duplikat={duplikat}")
+        self.stdout.write(
+            f"throughput={ringkasan['throughput_rps']} req/s "
+            f"p50={ringkasan['p50_ms']}ms p95={ringkasan['p95_ms']}ms p99={ringkasan['p99_ms']}ms"
+        )
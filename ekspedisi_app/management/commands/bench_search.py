@@ -0,0 +1,80 @@
+import random
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import metrics
+from ekspedisi_app import pencarian
+from ekspedisi_app.benchmark import benchmark_database, save_results, summarize
+from ekspedisi_app.models import Paket, Pengiriman, User
+from ekspedisi_app.seed import seed
+from ekspedisi_app.sequences import allocator
+
+
+class Command(BaseCommand):
+    help = 'Ukur pencarian pengiriman: index FTS5 vs fallback ORM (LIKE) per role'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pengiriman', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=200, help='Jumlah pencarian per skenario')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with benchmark_database():
+            allocator.reset()
+            mulai = time.perf_counter()
+            seed(pengiriman=options['pengiriman'], pelanggan=200, penerima=options['pengiriman'] // 2)
+            self.stdout.write(f'seed + index: {time.perf_counter() - mulai:.1f}s')
+            mulai = time.perf_counter()
+            jumlah_index = pencarian.rebuild()
+            rebuild_s = round(time.perf_counter() - mulai, 2)
+
+            resi = list(Pengiriman.objects.values_list('nomor_resi', flat=True)[:1000])
+            paket = list(Paket.objects.values_list(
+                'penerima__nama_penerima', 'penerima__nomor_telepon_penerima'
+            )[:1000])
+            kata = (
+                [value[-5:] for value in resi] + [nama for nama, _ in paket] + [telepon[-6:] for _, telepon in paket]
+            )
+            daftar_q = [rng.choice(kata) for _ in range(options['queries'])]
+            scope = {
+                'admin': Pengiriman.aktif.all(),
+                'pelanggan': Pengiriman.aktif.filter(
+                    pengirim=User.objects.filter(role='pelanggan').first()
+                ),
+            }
+            report = {
+                'options': {key: options[key] for key in ('pengiriman', 'queries')},
+                'index': {'dokumen': jumlah_index, 'rebuild_s': rebuild_s},
+                'scenarios': {},
+            }
+            for role, queryset in scope.items():
+                report['scenarios'][f'{role}:fts5'] = self.ukur(queryset, daftar_q)
+                with mock.patch.object(pencarian, 'fts_tersedia', return_value=False):
+                    report['scenarios'][f'{role}:orm'] = self.ukur(queryset, daftar_q)
+            allocator.reset()
+
+        self.stdout.write(f"rebuild index: {jumlah_index} dokumen dalam {rebuild_s}s")
+        for nama, hasil in report['scenarios'].items():
+            self.stdout.write(
+                f"{nama:<16} p50={hasil['p50_ms']}ms p95={hasil['p95_ms']}ms hasil/query={hasil['hasil_mean']}"
+            )
+        self.stdout.write(f"hasil disimpan di {save_results('search', report, options['output'])}")
+
+    def ukur(self, queryset, daftar_q):
+        latencies, jumlah_hasil = [], 0
+        queries = metrics.RequestMetrics()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            for q in daftar_q:
+                mulai = time.perf_counter()
+                jumlah_hasil += len(pencarian.cari(queryset, q))
+                latencies.append(time.perf_counter() - mulai)
+            elapsed = time.perf_counter() - started
+        hasil = summarize(latencies, elapsed)
+        hasil['hasil_mean'] = round(jumlah_hasil / len(daftar_q), 1)
+        hasil['queries_mean'] = round(queries.db_queries / len(daftar_q), 2)
+        return hasil
@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.query_plan import plan_queryset
+from api.renderers import FastJSONRenderer
+from api.serializers import PenerimaSerializer, PengirimanSerializer
+from api.values import get_values_plan
+from ekspedisi_app.benchmark import benchmark_database, save_results, summarize
+from ekspedisi_app.models import Penerima, Pengiriman
+from ekspedisi_app.seed import seed
+from ekspedisi_app.sequences import allocator
+
+SPARSE_FIELDS = ('id', 'nomor_resi', 'status_pengiriman', 'tanggal_pengiriman', 'total_biaya')
+
+
+def trimmed(serializer_class, fields=None):
+    """Instance serializer dengan hanya ``fields`` (seperti ``?fields=``)"""
+    serializer = serializer_class()
+    if fields is not None:
+        for name in set(serializer.fields) - set(fields):
+            serializer.fields.pop(name)
+    return serializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark serialisasi + render JSON satu halaman list: DRF JSONRenderer dibanding orjson, '
+        'sparse fieldset dan jalur .values() (query, serialisasi dan render, tanpa HTTP)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Baris per halaman')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--pengiriman', type=int, default=1000, help='Volume data sintetis')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['iterations'] < 1:
+            raise CommandError('--rows dan --iterations minimal 1')
+        rows = options['rows']
+        report = {'options': {key: options[key] for key in ('rows', 'iterations', 'pengiriman')}, 'scenarios': {}}
+        with benchmark_database():
+            allocator.reset()
+            seed(admin=1, staf=0, kurir=10, pelanggan=50, pengiriman=options['pengiriman'],
+                 penerima=max(rows * 2, 500))
+            pengiriman = Pengiriman.objects.order_by('-tanggal_pengiriman', 'id')
+            penerima = Penerima.objects.order_by('id')
+
+            def serializer_path(queryset, serializer_class, fields=None, renderer=JSONRenderer):
+                serializer = trimmed(serializer_class, fields)
+                page = plan_queryset(queryset, serializer_class, fields)[:rows]
+                return renderer().render([serializer.to_representation(obj) for obj in page])
+
+            def values_path(queryset, serializer_class, fields=None):
+                plan = get_values_plan(trimmed(serializer_class, fields))
+                return FastJSONRenderer().render(
+                    [plan.render(row) for row in queryset.values(*plan.lookups)[:rows]]
+                )
+
+            # Render saja, dari data yang sudah diserialisasi
+            data = [
+                PengirimanSerializer(obj).data
+                for obj in plan_queryset(pengiriman, PengirimanSerializer)[:rows]
+            ]
+
+            skenario = {
+                'render_drf': lambda: JSONRenderer().render(data),
+                'render_orjson': lambda: FastJSONRenderer().render(data),
+                'pengiriman_full_drf': lambda: serializer_path(pengiriman, PengirimanSerializer),
+                'pengiriman_full_orjson': lambda: serializer_path(
+                    pengiriman, PengirimanSerializer, renderer=FastJSONRenderer),
+                'pengiriman_sparse_drf': lambda: serializer_path(pengiriman, PengirimanSerializer, SPARSE_FIELDS),
+                'pengiriman_sparse_values': lambda: values_path(pengiriman, PengirimanSerializer, SPARSE_FIELDS),
+                'penerima_drf': lambda: serializer_path(penerima, PenerimaSerializer),
+                'penerima_values': lambda: values_path(penerima, PenerimaSerializer),
+            }
+            for nama, fungsi in skenario.items():
+                fungsi()
+                latencies = []
+                for _ in range(options['iterations']):
+                    started = time.perf_counter()
+                    body = fungsi()
+                    latencies.append(time.perf_counter() - started)
+                hasil = summarize(latencies, sum(latencies))
+                hasil['bytes'] = len(body)
+                report['scenarios'][nama] = hasil
+                self.stdout.write(
+                    f"{nama:<26} p50={hasil['p50_ms']}ms p95={hasil['p95_ms']}ms bytes={hasil['bytes']}"
+                )
+            allocator.reset()
+        self.stdout.write(f"hasil disimpan di {save_results('serialization', report, options['output'])}")
@@ -0,0 +1,99 @@
+import json
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ekspedisi_app import webhook
+from ekspedisi_app.benchmark import WebhookReceiver, benchmark_database, percentile, save_results
+from ekspedisi_app.models import User, WebhookDelivery, WebhookEndpoint, WebhookOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark dispatcher webhook ke server HTTP lokal: throughput event, latensi outbox -> '
+        'receiver dan jumlah koneksi per ukuran batch'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--endpoints', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--konkurensi', type=int, default=2, help='Batch bersamaan per endpoint')
+        parser.add_argument(
+            '--batch-size', type=int, action='append', help='Ukuran batch yang diukur (default 1 dan 50)'
+        )
+        parser.add_argument('--delay', type=float, default=5, help='Waktu respon receiver (ms)')
+        parser.add_argument('--output', help='Path file JSON hasil (default bench-results/)')
+
+    def handle(self, *args, **options):
+        if options['events'] < 1 or options['endpoints'] < 1:
+            raise CommandError('--events dan --endpoints minimal 1')
+        batch_sizes = options['batch_size'] or [1, 50]
+        report = {
+            'options': {key: options[key] for key in ('events', 'endpoints', 'workers', 'konkurensi', 'delay')},
+            'scenarios': {},
+        }
+        with benchmark_database(), WebhookReceiver(delay=options['delay'] / 1000) as receiver:
+            pemilik = User.objects.bulk_create([
+                User(username=f'merchant{i}', role='pelanggan') for i in range(options['endpoints'])
+            ])
+            for i, user in enumerate(pemilik):
+                WebhookEndpoint.objects.create(
+                    pemilik=user, url=f'{receiver.url}?merchant={i}', konkurensi=options['konkurensi']
+                )
+            for batch_size in batch_sizes:
+                hasil = self.ukur(options, receiver, pemilik, batch_size)
+                report['scenarios'][f'batch_{batch_size}'] = hasil
+                self.stdout.write(
+                    f"batch={batch_size:<4} {hasil['throughput_eps']} event/s requests={hasil['requests']} "
+                    f"koneksi={hasil['connections']} latensi p50={hasil['p50_ms']}ms p95={hasil['p95_ms']}ms "
+                    f"p99={hasil['p99_ms']}ms"
+                )
+        self.stdout.write(f"hasil disimpan di {save_results('webhooks', report, options['output'])}")
+
+    def ukur(self, options, receiver, pemilik, batch_size):
+        WebhookDelivery.objects.all().delete()
+        WebhookOutbox.objects.all().delete()
+        receiver.requests.clear()
+        receiver.connections = 0
+
+        now = timezone.now()
+        WebhookOutbox.objects.bulk_create([
+            WebhookOutbox(
+                pengirim=pemilik[i % len(pemilik)], pengiriman_id=i, jenis='riwayat', created_at=now,
+                payload={'nomor_resi': f'BENCH{i:08d}', 'status': 'transit', 'lokasi': 'Hub'},
+            )
+            for i in range(options['events'])
+        ], batch_size=1000)
+
+        config = dict(
+            webhook.get_config(), batch_size=batch_size, max_konkurensi=options['konkurensi'],
+            allowed_hosts=['127.0.0.1'],
+        )
+        dispatcher = webhook.Dispatcher(workers=options['workers'], config=config)
+        started = time.perf_counter()
+        try:
+            dispatcher.run_once()
+        finally:
+            elapsed = time.perf_counter() - started
+            dispatcher.close()
+
+        latencies = []
+        for diterima, _, body, _ in receiver.requests:
+            for event in json.loads(body)['events']:
+                latencies.append(diterima - datetime.fromisoformat(event['created_at']).timestamp())
+        terkirim = WebhookDelivery.objects.filter(status='delivered').count()
+        if terkirim != options['events']:
+            raise CommandError(f"Hanya {terkirim} dari {options['events']} event terkirim")
+        return {
+            'events': terkirim,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_eps': round(terkirim / elapsed, 1) if elapsed else 0.0,
+            'requests': len(receiver.requests),
+            'connections': receiver.connections,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        }
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api import manifest
+from ekspedisi_app.models import Pengiriman
+
+
+class Command(BaseCommand):
+    help = 'Bangun manifest rute semua kurir untuk satu hari dan simpan ke cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tanggal', help='Tanggal YYYY-MM-DD (default hari ini)')
+        parser.add_argument('--kurir', type=int, nargs='*', help='ID kurir; kosongkan untuk semua kurir')
+
+    def handle(self, *args, **options):
+        tanggal = timezone.localdate()
+        if options['tanggal']:
+            tanggal = parse_date(options['tanggal'])
+            if tanggal is None:
+                raise CommandError('Format tanggal harus YYYY-MM-DD')
+
+        kurir_ids = options['kurir']
+        if not kurir_ids:
+            awal, akhir = manifest.rentang_hari(tanggal)
+            kurir_ids = (
+                Pengiriman.aktif.filter(
+                    kurir__isnull=False,
+                    tanggal_pengiriman__gte=awal, tanggal_pengiriman__lt=akhir,
+                )
+                .order_by().values_list('kurir_id', flat=True).distinct()
+            )
+        kurir_ids = list(kurir_ids)
+        config = manifest.get_config()
+        manifest.get_cache().set_many(
+            {
+                manifest.cache_key(kurir_id, tanggal): manifest.build_document(kurir_id, tanggal)
+                for kurir_id in kurir_ids
+            },
+            config['timeout'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'{len(kurir_ids)} manifest dibangun untuk {tanggal}'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.explain import capture_plans, full_scans
+from ekspedisi_app.models import User
+
+
+class Command(BaseCommand):
+    help = 'Periksa EXPLAIN list endpoint di database saat ini dan gagal jika ada full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='Tampilkan semua rencana query')
+
+    def handle(self, *args, **options):
+        found = []
+        for role in ('admin', 'kurir', 'pelanggan'):
+            user = User.objects.filter(role=role, is_active=True).first()
+            if user is None:
+                self.stdout.write(self.style.WARNING(f'Tidak ada user aktif dengan role {role}, dilewati'))
+                continue
+            plans = capture_plans(user)
+            if options['verbose_plan']:
+                for url, sql, lines in plans:
+                    self.stdout.write(f'[{role}] {url}\n  ' + '\n  '.join(lines))
+            found += [(role, *scan) for scan in full_scans(plans)]
+
+        for role, url, table, sql in found:
+            self.stdout.write(self.style.ERROR(f'[{role}] {url}: full scan {table}\n  {sql}'))
+        if found:
+            raise CommandError(f'{len(found)} query melakukan full table scan')
+        self.stdout.write(self.style.SUCCESS('Tidak ada full table scan pada list endpoint'))
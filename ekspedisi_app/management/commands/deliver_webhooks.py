@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ekspedisi_app.webhook import Dispatcher, bersihkan, get_config, stats
+
+
+class Command(BaseCommand):
+    help = 'Kirim event webhook dari outbox ke endpoint merchant (worker pool dengan retry)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Thread pengirim (default EKSPEDISI_WEBHOOK workers)')
+        parser.add_argument('--once', action='store_true', help='Kirim yang jatuh tempo lalu berhenti')
+        parser.add_argument(
+            '--purge-days', type=int,
+            help='Hapus delivery selesai/gagal dan outbox lebih tua dari N hari sebelum mulai',
+        )
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            delivery, outbox = bersihkan(options['purge_days'])
+            self.stdout.write(f'{delivery} delivery dan {outbox} event outbox dihapus')
+
+        workers = options['workers'] if options['workers'] is not None else get_config()['workers']
+        dispatcher = Dispatcher(workers=workers)
+        try:
+            if options['once']:
+                batch = dispatcher.run_once()
+                self.stdout.write(self.style.SUCCESS(f'{batch} batch dikirim: {stats.snapshot()}'))
+                return
+            stop = threading.Event()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+            self.stdout.write(f'Dispatcher webhook berjalan dengan {workers} worker')
+            dispatcher.run(stop)
+            self.stdout.write(f'Berhenti: {stats.snapshot()}')
+        finally:
+            dispatcher.close()
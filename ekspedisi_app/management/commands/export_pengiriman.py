@@ -0,0 +1,67 @@
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from django_filters.filterset import filterset_factory
+
+from api import export, views
+
+# Filter yang diizinkan sama dengan filterset list view API
+FILTERSETS = {
+    'pengiriman': views.PengirimanListView.filterset_fields,
+    'paket': views.PaketListCreateView.filterset_fields,
+    'riwayat': views.RiwayatPengirimanListCreateView.filterset_fields,
+}
+
+
+class Command(BaseCommand):
+    help = 'Export pengiriman, paket atau riwayat aktif ke CSV/XLSX/NDJSON secara streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument('data', nargs='?', default='pengiriman', choices=sorted(export.EXPORTS))
+        parser.add_argument('--tipe', default='csv', choices=sorted(export.FORMATS))
+        parser.add_argument('--output', help='Path file; akhiran .gz untuk gzip (default stdout)')
+        parser.add_argument('--dari', help='Tanggal awal YYYY-MM-DD (inklusif)')
+        parser.add_argument('--sampai', help='Tanggal akhir YYYY-MM-DD (inklusif)')
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='FIELD=NILAI',
+            help='Filter seperti query param list endpoint, mis. status_pengiriman=delivered',
+        )
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        nama = options['data']
+        model, field_tanggal, _ = export.EXPORTS[nama]
+        tanggal = {}
+        for key in ('dari', 'sampai'):
+            tanggal[key] = options[key] and parse_date(options[key])
+            if options[key] and tanggal[key] is None:
+                raise CommandError(f'Format --{key} harus YYYY-MM-DD')
+
+        params = {}
+        for item in options['filter']:
+            field, sep, value = item.partition('=')
+            if not sep or field not in FILTERSETS[nama]:
+                raise CommandError(f"Filter tidak valid: {item} (pilihan: {', '.join(FILTERSETS[nama])})")
+            params[field] = value
+        filterset = filterset_factory(model, fields=FILTERSETS[nama])(
+            params, queryset=model.aktif.all()
+        )
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+
+        queryset = export.filter_tanggal(filterset.qs, field_tanggal, tanggal['dari'], tanggal['sampai'])
+        header, rows = export.export_rows(nama, queryset, options['chunk_size'])
+        chunks = export.WRITERS[options['tipe']](header, rows)
+        output = options['output']
+        if output and output.endswith('.gz'):
+            chunks = export.gzip_stream(chunks)
+
+        ukuran = 0
+        with (open(output, 'wb') if output else nullcontext(sys.stdout.buffer)) as file:
+            for chunk in chunks:
+                file.write(chunk)
+                ukuran += len(chunk)
+        if output:
+            self.stdout.write(self.style.SUCCESS(f'{nama} ({options["tipe"]}) ditulis ke {output}: {ukuran} byte'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from ekspedisi_app.images import pipeline, process_image
+from ekspedisi_app.models import Paket, Profile
+
+
+class Command(BaseCommand):
+    help = 'Proses foto yang belum punya varian (backfill pipeline foto)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semua', action='store_true', help='Proses ulang semua foto')
+        parser.add_argument('--background', action='store_true', help='Pakai thread pool pipeline')
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Profile, Paket):
+            for field in model.foto_fields:
+                queryset = model._base_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                if not options['semua']:
+                    queryset = queryset.filter(**{f'{field}_hash': ''})
+                for pk in queryset.values_list('pk', flat=True).iterator():
+                    if options['background']:
+                        pipeline.submit(model, pk, field)
+                    else:
+                        process_image(model, pk, field)
+                    total += 1
+        pipeline.wait()
+        self.stdout.write(self.style.SUCCESS(f'{total} foto diproses'))
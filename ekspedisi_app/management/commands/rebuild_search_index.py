@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ekspedisi_app import pencarian
+
+
+class Command(BaseCommand):
+    help = 'Bangun ulang index pencarian FTS5 pengiriman (resi, paket, penerima)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=pencarian.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not pencarian.buat_index():
+            self.stdout.write('Database tidak mendukung FTS5; pencarian memakai fallback ORM')
+            return
+        total = pencarian.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} pengiriman diindex'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from ekspedisi_app.models import Pengiriman
+from ekspedisi_app.totals import BATCH_SIZE, recalculate_totals
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang total_berat dan total_biaya pengiriman (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='ID pengiriman; kosongkan untuk semua')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        ids = options['ids']
+        batch_size = options['batch_size']
+        if not ids:
+            ids = Pengiriman._base_manager.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size)
+
+        total, chunk = 0, []
+        for pk in ids:
+            chunk.append(pk)
+            if len(chunk) >= batch_size:
+                total += recalculate_totals(chunk, batch_size=batch_size)
+                chunk = []
+        if chunk:
+            total += recalculate_totals(chunk, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'{total} pengiriman dihitung ulang'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ekspedisi_app.statistik import rekonsiliasi
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang counter statistik dashboard dari tabel sumber (jalankan berkala)'
+
+    def handle(self, *args, **options):
+        jumlah_counter, jumlah_harian = rekonsiliasi()
+        self.stdout.write(self.style.SUCCESS(
+            f'{jumlah_counter} counter dan {jumlah_harian} bucket harian diperbarui'
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ekspedisi_app.seed import PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = 'Isi database dengan data sintetis (user per role, pengiriman, paket, riwayat, kota)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--admin', type=int, default=2)
+        parser.add_argument('--staf', type=int, default=5)
+        parser.add_argument('--kurir', type=int, default=50)
+        parser.add_argument('--pelanggan', type=int, default=1000)
+        parser.add_argument('--pengiriman', type=int, default=10000)
+        parser.add_argument('--paket', type=int, default=3, help='Rata-rata paket per pengiriman')
+        parser.add_argument('--riwayat', type=int, default=3, help='Maksimal riwayat per pengiriman')
+        parser.add_argument('--penerima', type=int, default=5000)
+        parser.add_argument('--kota', type=int, default=16)
+        parser.add_argument('--hari', type=int, default=90, help='Rentang tanggal pengiriman ke belakang')
+        parser.add_argument('--seed', type=int, default=0, help='Seed random (data deterministik)')
+        parser.add_argument('--prefix', default='seed', help='Prefix username user sintetis')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size harus lebih dari 0')
+        started = time.perf_counter()
+        try:
+            hasil = seed(
+                admin=options['admin'], staf=options['staf'], kurir=options['kurir'],
+                pelanggan=options['pelanggan'], pengiriman=options['pengiriman'], paket=options['paket'],
+                riwayat=options['riwayat'], kota=options['kota'], penerima=options['penerima'],
+                hari=options['hari'], random_seed=options['seed'], prefix=options['prefix'],
+                using=options['database'], batch_size=options['batch_size'], log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        ringkasan = ', '.join(f'{nama}={jumlah}' for nama, jumlah in hasil.items())
+        self.stdout.write(self.style.SUCCESS(f'Selesai dalam {elapsed:.1f}s: {ringkasan}'))
+        self.stdout.write(f"Password semua user sintetis: {PASSWORD}")
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Salin database SQLite default ke replica lokal (EKSPEDISI_DB_REPLICAS) dengan backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', action='append', help='Alias replica (default semua)')
+        parser.add_argument('--interval', type=float, default=0, help='Ulangi tiap N detik (0 = sekali)')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replica hanya untuk SQLite; replica backend lain diisi replikasi database')
+        aliases = options['alias'] or settings.EKSPEDISI_REPLICA['aliases']
+        if not aliases:
+            raise CommandError('Tidak ada replica, isi EKSPEDISI_DB_REPLICAS')
+        unknown = set(aliases) - set(settings.EKSPEDISI_REPLICA['aliases'])
+        if unknown:
+            raise CommandError(f"Alias bukan replica: {', '.join(sorted(unknown))}")
+
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                self.sync(primary.settings_dict['NAME'], connections[alias].settings_dict['NAME'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'{alias} disalin dalam {(time.perf_counter() - started) * 1000:.0f}ms'
+                ))
+            if options['interval'] <= 0:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, source, target):
+        # Backup membaca snapshot konsisten; penulis di primary (WAL) tidak terblokir
+        # dan pembaca replica melihat salinan lama atau baru, tidak setengah jadi
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(target, timeout=30)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
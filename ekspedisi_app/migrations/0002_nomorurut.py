@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NomorUrut',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kunci', models.CharField(max_length=50, unique=True)),
+                ('nilai_terakhir', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Nomor Urut',
+                'verbose_name_plural': 'Nomor Urut',
+            },
+        ),
+    ]
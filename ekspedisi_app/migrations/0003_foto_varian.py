@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0002_nomorurut'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paket',
+            name='foto_paket_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='paket',
+            name='foto_paket_varian',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='foto_profil_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='foto_profil_varian',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def isi_statistik(apps, schema_editor):
+    from ekspedisi_app.statistik import rekonsiliasi
+    rekonsiliasi(apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0003_foto_varian'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Statistik',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kunci', models.CharField(max_length=100, unique=True)),
+                ('nilai', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistik',
+                'verbose_name_plural': 'Statistik',
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistikHarian',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tanggal', models.DateField()),
+                ('kota_tujuan', models.CharField(max_length=100)),
+                ('status_pengiriman', models.CharField(choices=[('pending', 'Pending'), ('pickup', 'Pickup'), ('transit', 'Transit'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('jumlah_paket', models.BigIntegerField(default=0)),
+                ('total_berat', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('jenis_layanan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ekspedisi_app.jenislayanan')),
+            ],
+            options={
+                'verbose_name': 'Statistik Harian',
+                'verbose_name_plural': 'Statistik Harian',
+                'ordering': ['-tanggal'],
+                'constraints': [models.UniqueConstraint(fields=('tanggal', 'jenis_layanan', 'kota_tujuan', 'status_pengiriman'), name='statistik_harian_unik')],
+            },
+        ),
+        migrations.RunPython(isi_statistik, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0004_statistik'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paket',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='paket_aktif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paket',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pengiriman', 'id'], name='paket_pengiriman_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paket',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['jenis_paket', 'id'], name='paket_jenis_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='penerima',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='penerima_aktif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='penerima',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['kota_tujuan', 'id'], name='penerima_kota_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='penerima',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['nama_penerima', 'id'], name='penerima_nama_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-tanggal_pengiriman', 'id'], name='pengiriman_aktif_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pengirim', '-tanggal_pengiriman', 'id'], name='pengiriman_pengirim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['kurir', '-tanggal_pengiriman', 'id'], name='pengiriman_kurir_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status_pengiriman', '-tanggal_pengiriman', 'id'], name='pengiriman_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='riwayatpengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-waktu', 'id'], name='riwayat_aktif_waktu_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='riwayatpengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pengiriman', '-waktu', 'id'], name='riwayat_pengiriman_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='riwayatpengiriman',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', '-waktu', 'id'], name='riwayat_status_idx'),
+        ),
+    ]
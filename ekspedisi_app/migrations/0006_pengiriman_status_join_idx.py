@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:46
+
+from django.db import migrations, models
+
+# Pelengkap index list endpoint di 0005: filter paket/riwayat lewat
+# pengiriman__status_pengiriman melakukan join ke pengiriman tanpa syarat
+# is_active, sehingga index parsial pengiriman_status_idx tidak terpakai.
+# Ditemukan oleh manage.py check_query_plans pada database yang di-seed.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0005_index_list_endpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pengiriman',
+            index=models.Index(fields=['status_pengiriman'], name='pengiriman_status_join_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0006_pengiriman_status_join_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riwayatpengiriman',
+            name='event_id',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-17 16:09
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0007_riwayat_event_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZonaTarif',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('nama', models.CharField(max_length=100, unique=True)),
+                ('prefix_kode_pos', models.JSONField(blank=True, default=list, help_text='Daftar prefix kode pos, mis. ["40", "401"]')),
+            ],
+            options={
+                'verbose_name': 'Zona Tarif',
+                'verbose_name_plural': 'Zona Tarif',
+            },
+        ),
+        migrations.AddField(
+            model_name='jenislayanan',
+            name='asuransi_minimum',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='jenislayanan',
+            name='asuransi_persen',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.20'), max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='jenislayanan',
+            name='pembagi_volumetrik',
+            field=models.PositiveIntegerField(default=6000),
+        ),
+        migrations.CreateModel(
+            name='TarifLayanan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('berat_min', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('berat_maks', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('tarif_per_kg', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('biaya_tetap', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('jenis_layanan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarif', to='ekspedisi_app.jenislayanan')),
+                ('zona', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tarif', to='ekspedisi_app.zonatarif')),
+            ],
+            options={
+                'verbose_name': 'Tarif Layanan',
+                'verbose_name_plural': 'Tarif Layanan',
+                'ordering': ['jenis_layanan', 'zona', 'berat_min'],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 16:40
+
+from django.db import migrations
+
+
+def buat_index(apps, schema_editor):
+    from ekspedisi_app import pencarian
+    using = schema_editor.connection.alias
+    if pencarian.buat_index(using):
+        pencarian.rebuild(apps, using)
+
+
+def hapus_index(apps, schema_editor):
+    from ekspedisi_app.pencarian import hapus_index
+    hapus_index(schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0008_tarif_layanan'),
+    ]
+
+    operations = [
+        migrations.RunPython(buat_index, hapus_index),
+    ]
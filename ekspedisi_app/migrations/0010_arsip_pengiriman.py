@@ -0,0 +1,92 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0009_pencarian_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PengirimanArsip',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nomor_resi', models.CharField(max_length=20, unique=True)),
+                ('tanggal_pengiriman', models.DateTimeField()),
+                ('status_pengiriman', models.CharField(choices=[('pending', 'Pending'), ('pickup', 'Pickup'), ('transit', 'Transit'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('total_berat', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_biaya', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('catatan', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('diarsipkan_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('jenis_layanan', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='ekspedisi_app.jenislayanan')),
+                ('kurir', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('pengirim', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Arsip Pengiriman',
+                'verbose_name_plural': 'Arsip Pengiriman',
+                'ordering': ['-tanggal_pengiriman'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PaketArsip',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('kode_paket', models.CharField(max_length=20, unique=True)),
+                ('nama_barang', models.CharField(max_length=255)),
+                ('deskripsi_barang', models.TextField()),
+                ('berat', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('panjang', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('lebar', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('tinggi', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('jenis_paket', models.CharField(choices=[('kecil', 'Paket Kecil'), ('kargo', 'Kargo')], default='kecil', max_length=20)),
+                ('nilai_barang', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('asuransi', models.BooleanField(default=False)),
+                ('foto_paket', models.ImageField(blank=True, null=True, upload_to='paket_pics/')),
+                ('foto_paket_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('foto_paket_varian', models.JSONField(blank=True, default=dict)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('penerima', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='ekspedisi_app.penerima')),
+                ('pengiriman', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='paket_set', to='ekspedisi_app.pengirimanarsip')),
+            ],
+            options={
+                'verbose_name': 'Arsip Paket',
+                'verbose_name_plural': 'Arsip Paket',
+            },
+        ),
+        migrations.CreateModel(
+            name='RiwayatPengirimanArsip',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(max_length=100)),
+                ('keterangan', models.TextField()),
+                ('lokasi', models.CharField(max_length=255)),
+                ('waktu', models.DateTimeField()),
+                ('event_id', models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('pengiriman', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='riwayat_pengiriman', to='ekspedisi_app.pengirimanarsip')),
+            ],
+            options={
+                'verbose_name': 'Arsip Riwayat Pengiriman',
+                'verbose_name_plural': 'Arsip Riwayat Pengiriman',
+                'ordering': ['-waktu'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pengirimanarsip',
+            index=models.Index(fields=['pengirim', '-tanggal_pengiriman'], name='arsip_pengirim_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:29
+
+import django.db.models.deletion
+import django.utils.timezone
+import ekspedisi_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0010_arsip_pengiriman'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('url', models.URLField(max_length=500)),
+                ('secret', models.CharField(default=ekspedisi_app.models.buat_secret_webhook, editable=False, max_length=64)),
+                ('konkurensi', models.PositiveSmallIntegerField(default=2, help_text='Maksimal batch yang dikirim bersamaan')),
+                ('pemilik', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhook_endpoints', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Webhook Endpoint',
+                'verbose_name_plural': 'Webhook Endpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pengiriman_id', models.BigIntegerField()),
+                ('jenis', models.CharField(choices=[('status', 'Perubahan Status'), ('riwayat', 'Riwayat Baru')], max_length=20)),
+                ('payload', models.JSONField()),
+                ('diteruskan', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pengirim', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Webhook Outbox',
+                'verbose_name_plural': 'Webhook Outbox',
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('delivered', 'Delivered'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('percobaan', models.PositiveIntegerField(default=0)),
+                ('berikutnya', models.DateTimeField(default=django.utils.timezone.now)),
+                ('klaim', models.CharField(blank=True, default='', editable=False, max_length=32)),
+                ('error', models.TextField(blank=True, default='')),
+                ('terkirim_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('endpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='ekspedisi_app.webhookendpoint')),
+                ('outbox', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='ekspedisi_app.webhookoutbox')),
+            ],
+            options={
+                'verbose_name': 'Webhook Delivery',
+                'verbose_name_plural': 'Webhook Delivery',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='webhookendpoint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['pemilik'], name='webhook_pemilik_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookoutbox',
+            index=models.Index(condition=models.Q(('diteruskan', False)), fields=['id'], name='webhook_outbox_baru_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['endpoint', 'berikutnya', 'id'], name='webhook_delivery_due_idx'),
+        ),
+    ]
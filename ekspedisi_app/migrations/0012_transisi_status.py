@@ -0,0 +1,87 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Status teks bebas lama (sebelum ada choices) yang bukan sekadar beda huruf
+STATUS_LAMA = {
+    'pick up': 'pickup',
+    'picked up': 'pickup',
+    'in transit': 'transit',
+    'dikirim': 'transit',
+    'terkirim': 'delivered',
+    'diterima': 'delivered',
+    'canceled': 'cancelled',
+    'batal': 'cancelled',
+    'dibatalkan': 'cancelled',
+    'menunggu': 'pending',
+}
+STATUS = {'pending', 'pickup', 'transit', 'delivered', 'cancelled'}
+
+
+def normalisasi_status(apps, schema_editor):
+    """Ubah status riwayat/pengiriman lama (mis. 'Pending', 'In Transit') ke kode choices"""
+    using = schema_editor.connection.alias
+    for nama, kolom in (('RiwayatPengiriman', 'status'), ('RiwayatPengirimanArsip', 'status'),
+                        ('Pengiriman', 'status_pengiriman'), ('PengirimanArsip', 'status_pengiriman')):
+        manager = apps.get_model('ekspedisi_app', nama)._base_manager.using(using)
+        for lama in manager.exclude(**{f'{kolom}__in': STATUS}).values_list(kolom, flat=True).distinct():
+            kunci = ' '.join(lama.split()).lower()
+            baru = STATUS_LAMA.get(kunci, kunci)
+            if baru in STATUS:
+                manager.filter(**{kolom: lama}).update(**{kolom: baru})
+
+
+def isi_riwayat_terakhir(apps, schema_editor):
+    """Isi last_event_at/last_lokasi dari riwayat aktif terakhir tiap pengiriman"""
+    using = schema_editor.connection.alias
+    for nama, nama_riwayat in (('Pengiriman', 'RiwayatPengiriman'),
+                               ('PengirimanArsip', 'RiwayatPengirimanArsip')):
+        model = apps.get_model('ekspedisi_app', nama)
+        terakhir = (
+            apps.get_model('ekspedisi_app', nama_riwayat)._base_manager
+            .filter(pengiriman=OuterRef('pk'), is_active=True).order_by('-waktu', '-id')
+        )
+        model._base_manager.using(using).update(
+            last_event_at=Subquery(terakhir.values('waktu')[:1]),
+            last_lokasi=Coalesce(Subquery(terakhir.values('lokasi')[:1]), models.Value('')),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ekspedisi_app', '0011_webhook'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pengiriman',
+            name='last_event_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pengiriman',
+            name='last_lokasi',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='pengirimanarsip',
+            name='last_event_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pengirimanarsip',
+            name='last_lokasi',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='riwayatpengiriman',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('pickup', 'Pickup'), ('transit', 'Transit'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=100),
+        ),
+        migrations.RunPython(normalisasi_status, migrations.RunPython.noop),
+        migrations.RunPython(isi_riwayat_terakhir, migrations.RunPython.noop),
+    ]
@@ -1,44 +1,66 @@
+import secrets
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
-from PIL import Image
-import os
-
-def compress_image(image_path, quality=85):
-    """Fungsi untuk mengkompresi gambar"""
-    if os.path.exists(image_path):
-        img = Image.open(image_path)
-        img.save(image_path, optimize=True, quality=quality)
 
 def increment_resi_number():
     """Fungsi untuk membuat nomor resi otomatis"""
-    last_shipment = Pengiriman.objects.filter(
-        nomor_resi__startswith='EKS'
-    ).order_by('-id').first()
-    
-    if last_shipment:
-        last_number = int(last_shipment.nomor_resi[3:])
-        new_number = last_number + 1
-    else:
-        new_number = 1
-    
-    return f"EKS{new_number:06d}"
+    from .sequences import allocator
+    return allocator.next_code('EKS', Pengiriman, 'nomor_resi')
+
+def buat_secret_webhook():
+    """Secret HMAC acak untuk endpoint webhook baru"""
+    return secrets.token_hex(32)
 
 def increment_paket_code():
     """Fungsi untuk membuat kode paket otomatis"""
-    last_paket = Paket.objects.filter(
-        kode_paket__startswith='PKT'
-    ).order_by('-id').first()
+    from .sequences import allocator
+    return allocator.next_code('PKT', Paket, 'kode_paket')
+
+class TrackedFieldsMixin:
+    """Mixin untuk mencatat nilai field saat dimuat dari DB (deteksi perubahan)"""
+    tracked_fields = ()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_nilai_awal()
+        return instance
+    
+    def reset_nilai_awal(self):
+        nilai = {}
+        for field in self.tracked_fields:
+            value = self.__dict__.get(field)
+            # FieldFile dicatat sebagai nama filenya
+            nilai[field] = getattr(value, 'name', value)
+        self._nilai_awal = nilai
     
-    if last_paket:
-        last_number = int(last_paket.kode_paket[3:])
-        new_number = last_number + 1
-    else:
-        new_number = 1
+    def nilai_awal(self, field):
+        """Nilai ``field`` saat dimuat dari DB (None untuk objek baru)"""
+        return getattr(self, '_nilai_awal', {}).get(field)
     
-    return f"PKT{new_number:06d}"
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.setelah_simpan()
+        self.reset_nilai_awal()
+    
+    def setelah_simpan(self):
+        """Hook setelah save, sebelum nilai awal diperbarui"""
 
-class User(AbstractUser):
+class FotoMixin(TrackedFieldsMixin):
+    """Mixin untuk model dengan foto yang diproses di background"""
+    foto_fields = ()
+    
+    def setelah_simpan(self):
+        super().setelah_simpan()
+        from .images import foto_berubah, pipeline
+        for field in self.foto_fields:
+            if foto_berubah(self, field):
+                pipeline.schedule(self, field)
+
+class User(TrackedFieldsMixin, AbstractUser):
     """Model User dengan role yang diperluas"""
     ROLE_CHOICES = [
         ('admin', 'Admin'),
@@ -52,19 +74,48 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    tracked_fields = ('is_active', 'role', 'password')
+    
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+class NomorUrut(models.Model):
+    """Model counter untuk nomor urut resi dan kode paket"""
+    kunci = models.CharField(max_length=50, unique=True)
+    nilai_terakhir = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Nomor Urut"
+        verbose_name_plural = "Nomor Urut"
+    
+    def __str__(self):
+        return f"{self.kunci}: {self.nilai_terakhir}"
+
+# Kondisi partial index: list endpoint hanya membaca baris aktif
+AKTIF = models.Q(is_active=True)
+
+class AktifManager(models.Manager):
+    """Manager yang hanya mengembalikan baris aktif (soft delete lewat ``is_active``)"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(AKTIF)
+
 class StatusModel(models.Model):
     """Abstract model untuk status"""
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # ``objects`` (default manager) tetap tanpa filter supaya validasi unik,
+    # queryset field relasi, admin dan transisi melihat baris nonaktif juga.
+    # ``aktif`` untuk list/API yang hanya menampilkan baris aktif.
+    objects = models.Manager()
+    aktif = AktifManager()
+    
     class Meta:
         abstract = True
 
-class Profile(StatusModel):
+class Profile(FotoMixin, StatusModel):
     """Model Profile untuk informasi detail user"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     nama_lengkap = models.CharField(max_length=255)
@@ -72,11 +123,11 @@ class Profile(StatusModel):
     nomor_telepon = models.CharField(max_length=20)
     email = models.EmailField()
     foto_profil = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    foto_profil_hash = models.CharField(max_length=64, blank=True, default='')
+    foto_profil_varian = models.JSONField(default=dict, blank=True)
     
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        if self.foto_profil:
-            compress_image(self.foto_profil.path)
+    foto_fields = ('foto_profil',)
+    tracked_fields = ('foto_profil',)
     
     def __str__(self):
         return f"Profile: {self.nama_lengkap}"
@@ -86,6 +137,10 @@ class JenisLayanan(StatusModel):
     nama_layanan = models.CharField(max_length=100)
     deskripsi = models.TextField()
     tarif_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
+    # Berat volumetrik = panjang x lebar x tinggi (cm) / pembagi; 0 = tidak dipakai
+    pembagi_volumetrik = models.PositiveIntegerField(default=6000)
+    asuransi_persen = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.20'))
+    asuransi_minimum = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     
     class Meta:
         verbose_name = "Jenis Layanan"
@@ -94,6 +149,38 @@ class JenisLayanan(StatusModel):
     def __str__(self):
         return self.nama_layanan
 
+class ZonaTarif(StatusModel):
+    """Model zona tujuan tarif, dikenali dari prefix kode pos penerima"""
+    nama = models.CharField(max_length=100, unique=True)
+    prefix_kode_pos = models.JSONField(default=list, blank=True, help_text='Daftar prefix kode pos, mis. ["40", "401"]')
+    
+    class Meta:
+        verbose_name = "Zona Tarif"
+        verbose_name_plural = "Zona Tarif"
+    
+    def __str__(self):
+        return self.nama
+
+class TarifLayanan(StatusModel):
+    """Model tarif per jenis layanan, zona tujuan dan rentang berat"""
+    jenis_layanan = models.ForeignKey(JenisLayanan, on_delete=models.CASCADE, related_name='tarif')
+    # Kosong = berlaku untuk tujuan yang tidak punya tarif zona sendiri
+    zona = models.ForeignKey(ZonaTarif, on_delete=models.CASCADE, null=True, blank=True, related_name='tarif')
+    berat_min = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Kosong = tanpa batas atas
+    berat_maks = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    tarif_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
+    biaya_tetap = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = "Tarif Layanan"
+        verbose_name_plural = "Tarif Layanan"
+        ordering = ['jenis_layanan', 'zona', 'berat_min']
+    
+    def __str__(self):
+        batas = f"{self.berat_min}-{self.berat_maks}" if self.berat_maks is not None else f">={self.berat_min}"
+        return f"{self.jenis_layanan} / {self.zona or 'Semua zona'} / {batas} kg"
+
 class Penerima(StatusModel):
     """Model untuk data penerima paket"""
     nama_penerima = models.CharField(max_length=255)
@@ -105,11 +192,16 @@ class Penerima(StatusModel):
     class Meta:
         verbose_name = "Penerima"
         verbose_name_plural = "Penerima"
+        indexes = [
+            models.Index(fields=['id'], condition=AKTIF, name='penerima_aktif_idx'),
+            models.Index(fields=['kota_tujuan', 'id'], condition=AKTIF, name='penerima_kota_idx'),
+            models.Index(fields=['nama_penerima', 'id'], condition=AKTIF, name='penerima_nama_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nama_penerima} - {self.kota_tujuan}"
 
-class Pengiriman(StatusModel):
+class Pengiriman(TrackedFieldsMixin, StatusModel):
     """Model untuk data pengiriman"""
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -118,6 +210,15 @@ class Pengiriman(StatusModel):
         ('delivered', 'Delivered'),
         ('cancelled', 'Cancelled'),
     ]
+    # Status tujuan yang diizinkan dari tiap status; status yang sama berarti
+    # scan ulang (mis. transit di hub berikutnya) tanpa perubahan status
+    TRANSISI_STATUS = {
+        'pending': {'pending', 'pickup', 'transit', 'delivered', 'cancelled'},
+        'pickup': {'pickup', 'transit', 'delivered', 'cancelled'},
+        'transit': {'transit', 'delivered'},
+        'delivered': set(),
+        'cancelled': set(),
+    }
     
     pengirim = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pengiriman_pengirim')
     kurir = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, 
@@ -129,23 +230,41 @@ class Pengiriman(StatusModel):
     total_berat = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total_biaya = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     catatan = models.TextField(blank=True, null=True)
+    # Denormalisasi riwayat terakhir, diisi oleh transisi.simpan bersama status
+    last_event_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_lokasi = models.CharField(max_length=255, blank=True, default='', editable=False)
+    
+    tracked_fields = ('status_pengiriman', 'is_active', 'kurir_id', 'tanggal_pengiriman')
     
     class Meta:
         verbose_name = "Pengiriman"
         verbose_name_plural = "Pengiriman"
         ordering = ['-tanggal_pengiriman']
+        # Cocok dengan urutan keyset (-tanggal_pengiriman, id) per scope role
+        indexes = [
+            models.Index(fields=['-tanggal_pengiriman', 'id'], condition=AKTIF, name='pengiriman_aktif_tgl_idx'),
+            models.Index(
+                fields=['pengirim', '-tanggal_pengiriman', 'id'], condition=AKTIF, name='pengiriman_pengirim_idx'
+            ),
+            models.Index(fields=['kurir', '-tanggal_pengiriman', 'id'], condition=AKTIF, name='pengiriman_kurir_idx'),
+            models.Index(
+                fields=['status_pengiriman', '-tanggal_pengiriman', 'id'], condition=AKTIF,
+                name='pengiriman_status_idx'
+            ),
+            # Filter paket/riwayat lewat pengiriman__status_pengiriman (tanpa syarat is_active pengiriman)
+            models.Index(fields=['status_pengiriman'], name='pengiriman_status_join_idx'),
+        ]
     
     def __str__(self):
         return f"Resi: {self.nomor_resi} - {self.pengirim.username}"
     
     def calculate_total(self):
         """Hitung total berat dan biaya"""
-        paket_list = self.paket_set.all()
-        self.total_berat = sum(paket.berat for paket in paket_list)
-        self.total_biaya = self.total_berat * self.jenis_layanan.tarif_per_kg
-        self.save()
+        from .totals import recalculate_totals
+        recalculate_totals([self.pk], using=self._state.db)
+        self.refresh_from_db(fields=['total_berat', 'total_biaya', 'updated_at'])
 
-class Paket(StatusModel):
+class Paket(FotoMixin, StatusModel):
     """Model untuk paket dalam pengiriman"""
     JENIS_PAKET_CHOICES = [
         ('kecil', 'Paket Kecil'),
@@ -165,33 +284,262 @@ class Paket(StatusModel):
     nilai_barang = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     asuransi = models.BooleanField(default=False)
     foto_paket = models.ImageField(upload_to='paket_pics/', blank=True, null=True)
+    foto_paket_hash = models.CharField(max_length=64, blank=True, default='')
+    foto_paket_varian = models.JSONField(default=dict, blank=True)
+    
+    foto_fields = ('foto_paket',)
+    tracked_fields = ('foto_paket', 'is_active')
     
     class Meta:
         verbose_name = "Paket"
         verbose_name_plural = "Paket"
+        indexes = [
+            models.Index(fields=['id'], condition=AKTIF, name='paket_aktif_idx'),
+            models.Index(fields=['pengiriman', 'id'], condition=AKTIF, name='paket_pengiriman_idx'),
+            models.Index(fields=['jenis_paket', 'id'], condition=AKTIF, name='paket_jenis_idx'),
+        ]
     
     def __str__(self):
         return f"{self.kode_paket} - {self.nama_barang}"
     
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        if self.foto_paket:
-            compress_image(self.foto_paket.path)
-        # Update total pengiriman
-        self.pengiriman.calculate_total()
+        # Update total pengiriman (sekali per transaksi)
+        from .totals import schedule_recalculate
+        schedule_recalculate(self.pengiriman_id, using=self._state.db)
+    
+    def delete(self, *args, **kwargs):
+        pengiriman_id = self.pengiriman_id
+        using = self._state.db
+        result = super().delete(*args, **kwargs)
+        from .totals import schedule_recalculate
+        schedule_recalculate(pengiriman_id, using=using)
+        return result
 
 class RiwayatPengiriman(StatusModel):
     """Model untuk riwayat pengiriman"""
     pengiriman = models.ForeignKey(Pengiriman, on_delete=models.CASCADE, related_name='riwayat_pengiriman')
-    status = models.CharField(max_length=100)
+    # Status pengiriman setelah event ini (lewat transisi.terapkan/simpan)
+    status = models.CharField(max_length=100, choices=Pengiriman.STATUS_CHOICES)
     keterangan = models.TextField()
     lokasi = models.CharField(max_length=255)
     waktu = models.DateTimeField(default=timezone.now)
+    # ID event dari scanner (idempoten saat kirim ulang), kosong untuk input manual
+    event_id = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     
     class Meta:
         verbose_name = "Riwayat Pengiriman"
         verbose_name_plural = "Riwayat Pengiriman" 
         ordering = ['-waktu']
+        indexes = [
+            models.Index(fields=['-waktu', 'id'], condition=AKTIF, name='riwayat_aktif_waktu_idx'),
+            models.Index(fields=['pengiriman', '-waktu', 'id'], condition=AKTIF, name='riwayat_pengiriman_idx'),
+            models.Index(fields=['status', '-waktu', 'id'], condition=AKTIF, name='riwayat_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.pengiriman.nomor_resi} - {self.status}"
+
+class PengirimanArsip(models.Model):
+    """Pengiriman delivered/cancelled yang dipindah dari tabel utama (manage.py archive_pengiriman)"""
+    id = models.BigIntegerField(primary_key=True)
+    # Tanpa constraint: user/layanan boleh dihapus tanpa menyentuh arsip
+    pengirim = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    kurir = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+    nomor_resi = models.CharField(max_length=20, unique=True)
+    tanggal_pengiriman = models.DateTimeField()
+    status_pengiriman = models.CharField(max_length=20, choices=Pengiriman.STATUS_CHOICES)
+    jenis_layanan = models.ForeignKey(
+        JenisLayanan, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    total_berat = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_biaya = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    catatan = models.TextField(blank=True, null=True)
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    last_lokasi = models.CharField(max_length=255, blank=True, default='')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    diarsipkan_at = models.DateTimeField(default=timezone.now)
+    
+    objects = models.Manager()
+    aktif = AktifManager()
+    
+    class Meta:
+        verbose_name = "Arsip Pengiriman"
+        verbose_name_plural = "Arsip Pengiriman"
+        ordering = ['-tanggal_pengiriman']
+        indexes = [
+            models.Index(fields=['pengirim', '-tanggal_pengiriman'], name='arsip_pengirim_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Arsip resi: {self.nomor_resi}"
+
+class PaketArsip(models.Model):
+    """Paket dari pengiriman yang diarsipkan"""
+    id = models.BigIntegerField(primary_key=True)
+    pengiriman = models.ForeignKey(PengirimanArsip, on_delete=models.CASCADE, related_name='paket_set')
+    penerima = models.ForeignKey(Penerima, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    kode_paket = models.CharField(max_length=20, unique=True)
+    nama_barang = models.CharField(max_length=255)
+    deskripsi_barang = models.TextField()
+    berat = models.DecimalField(max_digits=10, decimal_places=2)
+    panjang = models.DecimalField(max_digits=10, decimal_places=2)
+    lebar = models.DecimalField(max_digits=10, decimal_places=2)
+    tinggi = models.DecimalField(max_digits=10, decimal_places=2)
+    jenis_paket = models.CharField(max_length=20, choices=Paket.JENIS_PAKET_CHOICES, default='kecil')
+    nilai_barang = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    asuransi = models.BooleanField(default=False)
+    foto_paket = models.ImageField(upload_to='paket_pics/', blank=True, null=True)
+    foto_paket_hash = models.CharField(max_length=64, blank=True, default='')
+    foto_paket_varian = models.JSONField(default=dict, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    objects = models.Manager()
+    aktif = AktifManager()
+    
+    class Meta:
+        verbose_name = "Arsip Paket"
+        verbose_name_plural = "Arsip Paket"
+    
+    def __str__(self):
+        return f"{self.kode_paket} - {self.nama_barang}"
+
+class RiwayatPengirimanArsip(models.Model):
+    """Riwayat dari pengiriman yang diarsipkan"""
+    id = models.BigIntegerField(primary_key=True)
+    pengiriman = models.ForeignKey(PengirimanArsip, on_delete=models.CASCADE, related_name='riwayat_pengiriman')
+    status = models.CharField(max_length=100)
+    keterangan = models.TextField()
+    lokasi = models.CharField(max_length=255)
+    waktu = models.DateTimeField()
+    event_id = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    objects = models.Manager()
+    aktif = AktifManager()
+    
+    class Meta:
+        verbose_name = "Arsip Riwayat Pengiriman"
+        verbose_name_plural = "Arsip Riwayat Pengiriman"
+        ordering = ['-waktu']
+    
+    def __str__(self):
+        return f"{self.pengiriman.nomor_resi} - {self.status}"
+
+class Statistik(models.Model):
+    """Model counter statistik dashboard (global dan per pengirim)"""
+    kunci = models.CharField(max_length=100, unique=True)
+    nilai = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Statistik"
+        verbose_name_plural = "Statistik"
+    
+    def __str__(self):
+        return f"{self.kunci}: {self.nilai}"
+
+class StatistikHarian(models.Model):
+    """Model counter paket per hari, jenis layanan, kota tujuan dan status"""
+    tanggal = models.DateField()
+    jenis_layanan = models.ForeignKey(JenisLayanan, on_delete=models.CASCADE)
+    kota_tujuan = models.CharField(max_length=100)
+    status_pengiriman = models.CharField(max_length=20, choices=Pengiriman.STATUS_CHOICES)
+    jumlah_paket = models.BigIntegerField(default=0)
+    total_berat = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = "Statistik Harian"
+        verbose_name_plural = "Statistik Harian"
+        ordering = ['-tanggal']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tanggal', 'jenis_layanan', 'kota_tujuan', 'status_pengiriman'],
+                name='statistik_harian_unik',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.tanggal} {self.kota_tujuan} {self.status_pengiriman}: {self.jumlah_paket}"
+
+class WebhookEndpoint(StatusModel):
+    """Callback URL merchant untuk event status dan riwayat pengirimannya"""
+    pemilik = models.ForeignKey(User, on_delete=models.CASCADE, related_name='webhook_endpoints')
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=64, default=buat_secret_webhook, editable=False)
+    konkurensi = models.PositiveSmallIntegerField(default=2, help_text='Maksimal batch yang dikirim bersamaan')
+    
+    class Meta:
+        verbose_name = "Webhook Endpoint"
+        verbose_name_plural = "Webhook Endpoint"
+        indexes = [
+            models.Index(fields=['pemilik'], condition=AKTIF, name='webhook_pemilik_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.pemilik.username}: {self.url}"
+
+class WebhookOutbox(models.Model):
+    """Event pengiriman yang ditulis dalam transaksi yang sama dengan perubahannya"""
+    JENIS_CHOICES = [
+        ('status', 'Perubahan Status'),
+        ('riwayat', 'Riwayat Baru'),
+    ]
+    
+    # Tanpa constraint: pengiriman boleh diarsipkan sebelum event terkirim
+    pengirim = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    pengiriman_id = models.BigIntegerField()
+    jenis = models.CharField(max_length=20, choices=JENIS_CHOICES)
+    payload = models.JSONField()
+    # True setelah diteruskan ke WebhookDelivery per endpoint
+    diteruskan = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Webhook Outbox"
+        verbose_name_plural = "Webhook Outbox"
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(diteruskan=False), name='webhook_outbox_baru_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.jenis} #{self.pengiriman_id}"
+
+class WebhookDelivery(models.Model):
+    """Pengiriman satu event outbox ke satu endpoint, dengan retry"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    ]
+    
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name='deliveries')
+    outbox = models.ForeignKey(WebhookOutbox, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    percobaan = models.PositiveIntegerField(default=0)
+    # Waktu percobaan berikutnya; juga batas klaim worker yang sedang mengirim
+    berikutnya = models.DateTimeField(default=timezone.now)
+    klaim = models.CharField(max_length=32, blank=True, default='', editable=False)
+    error = models.TextField(blank=True, default='')
+    terkirim_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Webhook Delivery"
+        verbose_name_plural = "Webhook Delivery"
+        indexes = [
+            models.Index(
+                fields=['endpoint', 'berikutnya', 'id'], condition=models.Q(status='pending'),
+                name='webhook_delivery_due_idx',
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.pengiriman.nomor_resi} - {self.status}"
\ No newline at end of file
+        return f"{self.endpoint_id} <- {self.outbox_id} ({self.status})"
@@ -0,0 +1,249 @@
+"""
+Pencarian pengiriman berdasarkan resi, paket dan penerima.
+
+Satu dokumen per pengiriman berisi nomor resi, kode paket dan nama barang
+paket aktif, serta nama, telepon dan kota penerimanya. Di SQLite dokumen
+disimpan di tabel virtual FTS5 ``ekspedisi_pencarian`` (rowid = id
+pengiriman) dengan tokenizer ``trigram`` sehingga potongan resi, nomor
+telepon atau nama (minimal ``MIN_PANJANG`` karakter) cocok lewat index,
+bukan ``LIKE '%...%'``. Hasil diurutkan dengan ``bm25`` berbobot per kolom
+dan resi yang sama persis selalu di atas.
+
+Index diperbarui setelah commit untuk pengiriman yang berubah (signal
+``Pengiriman``, ``Paket``, ``Penerima`` dan ``pengiriman_diperbarui``).
+``manage.py rebuild_search_index`` membangun ulang seluruh index.
+Database tanpa FTS5 memakai query ORM (``icontains``) dengan urutan
+sederhana sebagai fallback.
+"""
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from .models import Paket, Penerima, Pengiriman
+from .signals import pengiriman_diperbarui
+from .utils import defer_until_commit
+
+TABEL = 'ekspedisi_pencarian'
+# kolom index: bobot bm25
+KOLOM = {
+    'nomor_resi': 10.0,
+    'kode_paket': 8.0,
+    'nama_barang': 2.0,
+    'nama_penerima': 4.0,
+    'nomor_telepon': 6.0,
+    'kota_tujuan': 1.0,
+}
+# kolom index: lookup Paket untuk kolom selain nomor_resi
+LOOKUP_PAKET = {
+    'kode_paket': 'kode_paket',
+    'nama_barang': 'nama_barang',
+    'nama_penerima': 'penerima__nama_penerima',
+    'nomor_telepon': 'penerima__nomor_telepon_penerima',
+    'kota_tujuan': 'penerima__kota_tujuan',
+}
+MIN_PANJANG = 3
+BATCH_SIZE = 1000
+
+
+def fts_tersedia(using=DEFAULT_DB_ALIAS):
+    """True jika database ``using`` memakai index FTS5"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    cache = connection.__dict__.setdefault('_pencarian_fts', {})
+    if 'ada' not in cache:
+        with connection.cursor() as cursor:
+            cache['ada'] = TABEL in connection.introspection.table_names(cursor)
+    return cache['ada']
+
+
+def buat_index(using=DEFAULT_DB_ALIAS):
+    """Buat tabel FTS5 jika didukung database, kembalikan True jika tersedia"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    kolom = ', '.join(KOLOM)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABEL} USING fts5({kolom}, tokenize='trigram')")
+    except OperationalError:
+        # SQLite tanpa FTS5 atau tokenizer trigram (< 3.34): pakai fallback ORM
+        return False
+    connection.__dict__.pop('_pencarian_fts', None)
+    return True
+
+
+def hapus_index(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABEL}')
+        connection.__dict__.pop('_pencarian_fts', None)
+
+
+def dokumen(pengiriman_ids, apps=global_apps, using=DEFAULT_DB_ALIAS):
+    """Isi kolom index per pengiriman: {id: {kolom: teks}}"""
+    Pengiriman = apps.get_model('ekspedisi_app', 'Pengiriman')
+    Paket = apps.get_model('ekspedisi_app', 'Paket')
+    docs = {
+        pk: dict({kolom: [] for kolom in LOOKUP_PAKET}, nomor_resi=nomor_resi)
+        for pk, nomor_resi in
+        Pengiriman._base_manager.using(using).filter(pk__in=pengiriman_ids).values_list('pk', 'nomor_resi')
+    }
+    rows = (
+        Paket._base_manager.using(using).filter(pengiriman_id__in=list(docs), is_active=True)
+        .order_by('pk').values_list('pengiriman_id', *LOOKUP_PAKET.values())
+    )
+    for pengiriman_id, *values in rows:
+        doc = docs[pengiriman_id]
+        for kolom, value in zip(LOOKUP_PAKET, values):
+            if value and value not in doc[kolom]:
+                doc[kolom].append(value)
+    for doc in docs.values():
+        for kolom in LOOKUP_PAKET:
+            doc[kolom] = ' '.join(doc[kolom])
+    return docs
+
+
+def index_pengiriman(pengiriman_ids, apps=global_apps, using=DEFAULT_DB_ALIAS):
+    """Tulis ulang dokumen index untuk ``pengiriman_ids`` (yang sudah dihapus ikut dibuang)"""
+    ids = list(dict.fromkeys(pengiriman_ids))
+    if not ids or not fts_tersedia(using):
+        return 0
+    kolom = ', '.join(KOLOM)
+    placeholder = ', '.join(['%s'] * (len(KOLOM) + 1))
+    ditulis = 0
+    with connections[using].cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[start:start + BATCH_SIZE]
+            docs = dokumen(chunk, apps, using)
+            cursor.execute(f"DELETE FROM {TABEL} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            cursor.executemany(
+                f'INSERT INTO {TABEL}(rowid, {kolom}) VALUES ({placeholder})',
+                [[pk] + [doc[nama] for nama in KOLOM] for pk, doc in docs.items()],
+            )
+            ditulis += len(docs)
+    return ditulis
+
+
+def rebuild(apps=global_apps, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """Bangun ulang seluruh index, kembalikan jumlah dokumen"""
+    if not fts_tersedia(using):
+        return 0
+    Pengiriman = apps.get_model('ekspedisi_app', 'Pengiriman')
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABEL}')
+    total, chunk = 0, []
+    ids = Pengiriman._base_manager.using(using).order_by('pk').values_list('pk', flat=True)
+    for pk in ids.iterator(chunk_size=batch_size):
+        chunk.append(pk)
+        if len(chunk) >= batch_size:
+            total += index_pengiriman(chunk, apps, using)
+            chunk = []
+    return total + index_pengiriman(chunk, apps, using)
+
+
+def kata_kunci(q):
+    """Kata dalam ``q`` yang cukup panjang untuk dicari"""
+    return [kata for kata in q.split() if len(kata) >= MIN_PANJANG]
+
+
+def _cari_fts(queryset, kata, limit):
+    connection = connections[queryset.db]
+    # Tiap kata dicari sebagai frasa (substring trigram); semua kata harus cocok
+    match = ' AND '.join('"%s"' % kata_.replace('"', '""') for kata_ in kata)
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    bobot = ', '.join(str(nilai) for nilai in KOLOM.values())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, bm25({TABEL}, {bobot}) FROM {TABEL} '
+            f'WHERE {TABEL} MATCH %s AND rowid IN ({sql}) '
+            f'ORDER BY nomor_resi = %s DESC, bm25({TABEL}, {bobot}) LIMIT %s',
+            [match, *params, ' '.join(kata).upper(), limit],
+        )
+        return [(pk, round(-skor, 3)) for pk, skor in cursor.fetchall()]
+
+
+def _cari_orm(queryset, kata, limit):
+    for kata_ in kata:
+        paket = Paket._base_manager.filter(pengiriman_id=OuterRef('pk'), is_active=True).filter(
+            Q(*(Q(**{f'{lookup}__icontains': kata_}) for lookup in LOOKUP_PAKET.values()), _connector=Q.OR)
+        )
+        queryset = queryset.filter(Q(nomor_resi__icontains=kata_) | Exists(paket))
+    resi = ' '.join(kata)
+    rows = (
+        queryset.annotate(skor=Case(
+            When(nomor_resi__iexact=resi, then=Value(3)),
+            When(nomor_resi__istartswith=kata[0], then=Value(2)),
+            When(nomor_resi__icontains=kata[0], then=Value(1)),
+            default=Value(0), output_field=IntegerField(),
+        ))
+        .order_by('-skor', '-tanggal_pengiriman', 'pk')
+        .values_list('pk', 'skor')[:limit]
+    )
+    return [(pk, float(skor)) for pk, skor in rows]
+
+
+def cari(queryset, q, limit=20):
+    """
+    Pengiriman dalam ``queryset`` (sudah dibatasi per role) yang cocok
+    dengan ``q``, urut relevansi: [(id, skor)]
+    """
+    kata = kata_kunci(q)
+    if not kata:
+        return []
+    if fts_tersedia(queryset.db):
+        return _cari_fts(queryset, kata, limit)
+    return _cari_orm(queryset, kata, limit)
+
+
+def cocok(doc, q):
+    """Kolom dokumen yang memuat salah satu kata ``q``"""
+    kata = [kata_.lower() for kata_ in kata_kunci(q)]
+    return [kolom for kolom in KOLOM if any(kata_ in (doc.get(kolom) or '').lower() for kata_ in kata)]
+
+
+def _flush(items, using):
+    """``items`` berisi ('pengiriman', id) atau ('penerima', id)"""
+    pengiriman_ids = {value for kind, value in items if kind == 'pengiriman'}
+    penerima_ids = {value for kind, value in items if kind == 'penerima'}
+    if penerima_ids:
+        pengiriman_ids.update(
+            Paket._base_manager.using(using).filter(penerima_id__in=penerima_ids)
+            .values_list('pengiriman_id', flat=True)
+        )
+    index_pengiriman(pengiriman_ids, using=using)
+
+
+def index_on_commit(items, using):
+    defer_until_commit('pencarian', items, lambda batch: _flush(batch, using), using=using)
+
+
+def _pengiriman_changed(sender, instance, using, created=True, raw=False, **kwargs):
+    # Resi tidak berubah setelah dibuat dan status aktif disaring saat mencari,
+    # jadi hanya pengiriman baru atau terhapus yang perlu ditulis ulang
+    if created and not raw:
+        index_on_commit([('pengiriman', instance.pk)], using)
+
+
+def _paket_changed(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        index_on_commit([('pengiriman', instance.pengiriman_id)], using)
+
+
+def _penerima_changed(sender, instance, using, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        index_on_commit([('penerima', instance.pk)], using)
+
+
+def _pengiriman_bulk_changed(sender, pengiriman_ids, using, **kwargs):
+    index_on_commit([('pengiriman', pk) for pk in pengiriman_ids], using)
+
+
+def connect_signals():
+    for signal in (post_save, post_delete):
+        signal.connect(_pengiriman_changed, sender=Pengiriman, dispatch_uid='pencarian_pengiriman')
+        signal.connect(_paket_changed, sender=Paket, dispatch_uid='pencarian_paket')
+        signal.connect(_penerima_changed, sender=Penerima, dispatch_uid='pencarian_penerima')
+    pengiriman_diperbarui.connect(_pengiriman_bulk_changed, dispatch_uid='pencarian_bulk')
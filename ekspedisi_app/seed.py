@@ -0,0 +1,213 @@
+"""
+Generator data sintetis untuk uji volume (``manage.py seed_ekspedisi`` dan
+benchmark).
+
+Semua baris dibuat dengan ``bulk_create`` per batch transaksi; nomor resi
+dan kode paket dipesan per batch dari ``allocator``, total dihitung di
+memori dengan tabel tarif, dan counter statistik serta index pencarian
+dibangun ulang sekali di akhir. Data bersifat deterministik untuk ``seed``
+yang sama.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from . import pencarian
+from .models import JenisLayanan, Paket, Penerima, Pengiriman, Profile, RiwayatPengiriman, User
+from .sequences import allocator
+from .statistik import rekonsiliasi
+from .totals import NOL, hitung_biaya
+
+PASSWORD = 'seed-pass-123'
+BATCH_SIZE = 1000
+KOTA = [
+    'Jakarta', 'Bandung', 'Surabaya', 'Medan', 'Makassar', 'Semarang', 'Denpasar', 'Pontianak',
+    'Yogyakarta', 'Palembang', 'Balikpapan', 'Manado', 'Padang', 'Malang', 'Pekanbaru', 'Banjarmasin',
+]
+# Prefix kode pos wilayah asli (lihat kode_pos.CENTROID) agar urutan rute manifest realistis
+PREFIX_KOTA = [10, 40, 60, 20, 90, 50, 80, 78, 55, 30, 76, 95, 25, 65, 28, 70]
+LAYANAN = [('Reguler', Decimal('10000')), ('Kilat', Decimal('18000')), ('Kargo', Decimal('6000'))]
+# Urutan status; riwayat sebuah pengiriman mengikuti jalur sampai status akhirnya
+ALUR_STATUS = ['pending', 'pickup', 'transit', 'delivered']
+BOBOT_STATUS = {'pending': 15, 'pickup': 10, 'transit': 30, 'delivered': 40, 'cancelled': 5}
+
+
+def daftar_kota(jumlah):
+    """``jumlah`` nama kota, masing-masing dengan prefix kode pos dua digit"""
+    nama = KOTA[:jumlah] + [f'Kota {i}' for i in range(len(KOTA), jumlah)]
+    return [
+        (kota, PREFIX_KOTA[index] if index < len(PREFIX_KOTA) else 10 + index % 90)
+        for index, kota in enumerate(nama)
+    ]
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+def seed_users(role, jumlah, prefix='seed', using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """Buat ``jumlah`` user (dengan profile) untuk ``role``, kembalikan id-nya"""
+    awal = User.objects.using(using).filter(username__startswith=f'{prefix}-{role}-').count()
+    password = make_password(PASSWORD)
+    ids = []
+    for start, size in _batches(jumlah, batch_size):
+        with transaction.atomic(using=using):
+            users = User.objects.using(using).bulk_create([
+                User(
+                    username=f'{prefix}-{role}-{awal + start + i}', password=password, role=role,
+                    is_staff=role == 'admin',
+                )
+                for i in range(size)
+            ])
+            Profile.objects.using(using).bulk_create([
+                Profile(
+                    user=user, nama_lengkap=user.username.replace('-', ' ').title(), alamat='-',
+                    nomor_telepon=f'08{user.pk:010d}', email=f'{user.username}@contoh.id',
+                )
+                for user in users
+            ])
+        ids += [user.pk for user in users]
+    return ids
+
+
+def seed_layanan(using=DEFAULT_DB_ALIAS):
+    layanan = []
+    for nama, tarif in LAYANAN:
+        obj = JenisLayanan.aktif.using(using).filter(nama_layanan=nama).first()
+        if obj is None:
+            obj = JenisLayanan.objects.using(using).create(
+                nama_layanan=nama, deskripsi=f'Layanan {nama}', tarif_per_kg=tarif
+            )
+        layanan.append(obj)
+    return layanan
+
+
+def seed_penerima(jumlah, kota, rng, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    ids = []
+    for start, size in _batches(jumlah, batch_size):
+        objs = []
+        for i in range(start, start + size):
+            nama_kota, kode = rng.choice(kota)
+            objs.append(Penerima(
+                nama_penerima=f'Penerima {i}', alamat_penerima=f'Jl. Contoh No. {i}, {nama_kota}',
+                nomor_telepon_penerima=f'081{i:09d}', kota_tujuan=nama_kota,
+                kode_pos=f'{kode:02d}{rng.randint(0, 999):03d}',
+            ))
+        ids += [obj.pk for obj in Penerima.objects.using(using).bulk_create(objs)]
+    return ids
+
+
+def seed_pengiriman(jumlah, pengirim_ids, kurir_ids, layanan, penerima_ids, rng, paket=3, riwayat=3,
+                    hari=90, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """Buat pengiriman beserta paket dan riwayatnya, kembalikan jumlah baris per tabel"""
+    status_list, bobot = zip(*BOBOT_STATUS.items())
+    kode_pos = dict(Penerima.objects.using(using).values_list('pk', 'kode_pos'))
+    now = timezone.now()
+    jumlah_paket = jumlah_riwayat = 0
+    for _, size in _batches(jumlah, batch_size):
+        with transaction.atomic(using=using):
+            nomor_resi = allocator.allocate('EKS', Pengiriman, 'nomor_resi', size)
+            pengiriman_list, isi = [], []
+            for i in range(size):
+                layanan_obj = rng.choice(layanan)
+                # Rata-rata ``paket`` paket per pengiriman
+                jumlah_isi = rng.randint(1, paket * 2 - 1) if paket > 0 else 0
+                paket_isi = []
+                for _ in range(jumlah_isi):
+                    berat = Decimal(rng.randint(10, 2000)) / 100
+                    paket_isi.append({
+                        'penerima_id': rng.choice(penerima_ids), 'berat': berat,
+                        'panjang': rng.randint(5, 60), 'lebar': rng.randint(5, 60), 'tinggi': rng.randint(5, 60),
+                        'jenis_paket': 'kargo' if berat > 15 else 'kecil',
+                    })
+                total_berat, total_biaya = hitung_biaya(layanan_obj.pk, [
+                    (kode_pos[p['penerima_id']], p['berat'], p['panjang'], p['lebar'], p['tinggi'])
+                    for p in paket_isi
+                ], using) if paket_isi else (NOL, NOL)
+                status = rng.choices(status_list, bobot)[0]
+                pengiriman_list.append(Pengiriman(
+                    pengirim_id=rng.choice(pengirim_ids),
+                    kurir_id=rng.choice(kurir_ids) if kurir_ids and status != 'pending' else None,
+                    nomor_resi=nomor_resi[i],
+                    tanggal_pengiriman=now - timedelta(seconds=rng.randint(0, hari * 86400)),
+                    status_pengiriman=status,
+                    jenis_layanan=layanan_obj,
+                    total_berat=total_berat,
+                    total_biaya=total_biaya,
+                ))
+                isi.append(paket_isi)
+            # Riwayat dibuat sebelum insert agar last_event_at/last_lokasi ikut terisi
+            riwayat_list = []
+            for pengiriman in pengiriman_list:
+                rows = _riwayat(pengiriman, riwayat, rng)
+                if rows:
+                    pengiriman.last_event_at, pengiriman.last_lokasi = rows[-1].waktu, rows[-1].lokasi
+                riwayat_list += rows
+            Pengiriman.objects.using(using).bulk_create(pengiriman_list)
+
+            kode_paket = iter(allocator.allocate('PKT', Paket, 'kode_paket', sum(map(len, isi))))
+            paket_list = []
+            for pengiriman, paket_isi in zip(pengiriman_list, isi):
+                for values in paket_isi:
+                    paket_list.append(Paket(
+                        pengiriman=pengiriman, kode_paket=next(kode_paket), nama_barang='Barang',
+                        deskripsi_barang='Data sintetis', **values,
+                    ))
+            Paket.objects.using(using).bulk_create(paket_list, batch_size=batch_size)
+            RiwayatPengiriman.objects.using(using).bulk_create(riwayat_list, batch_size=batch_size)
+        jumlah_paket += len(paket_list)
+        jumlah_riwayat += len(riwayat_list)
+    return {'pengiriman': jumlah, 'paket': jumlah_paket, 'riwayat': jumlah_riwayat}
+
+
+def _riwayat(pengiriman, maksimal, rng):
+    if pengiriman.status_pengiriman == 'cancelled':
+        alur = ['pending', 'cancelled']
+    else:
+        alur = ALUR_STATUS[:ALUR_STATUS.index(pengiriman.status_pengiriman) + 1]
+    waktu = pengiriman.tanggal_pengiriman
+    rows = []
+    for status in alur[-maksimal:] if maksimal else []:
+        waktu += timedelta(minutes=rng.randint(30, 24 * 60))
+        rows.append(RiwayatPengiriman(
+            pengiriman=pengiriman, status=status, keterangan=f'Status {status}',
+            lokasi=f'Hub {rng.choice(KOTA)}', waktu=waktu,
+        ))
+    return rows
+
+
+def seed(admin=2, staf=5, kurir=50, pelanggan=1000, pengiriman=10000, paket=3, riwayat=3, kota=16,
+         penerima=5000, hari=90, random_seed=0, prefix='seed', using=DEFAULT_DB_ALIAS,
+         batch_size=BATCH_SIZE, log=None):
+    """Isi database dengan data sintetis, kembalikan jumlah baris yang dibuat"""
+    rng = random.Random(random_seed)
+    log = log or (lambda message: None)
+    hasil = {}
+    user_ids = {}
+    for role, jumlah in (('admin', admin), ('staf', staf), ('kurir', kurir), ('pelanggan', pelanggan)):
+        user_ids[role] = seed_users(role, jumlah, prefix, using, batch_size)
+        log(f'{jumlah} user {role}')
+    hasil['user'] = sum(map(len, user_ids.values()))
+
+    layanan = seed_layanan(using)
+    penerima_ids = seed_penerima(penerima, daftar_kota(kota), rng, using, batch_size)
+    hasil['penerima'] = len(penerima_ids)
+    log(f'{len(penerima_ids)} penerima di {kota} kota')
+
+    if pengiriman:
+        if not user_ids['pelanggan'] or not penerima_ids:
+            raise ValueError('Pengiriman membutuhkan minimal satu pelanggan dan satu penerima')
+        hasil.update(seed_pengiriman(
+            pengiriman, user_ids['pelanggan'], user_ids['kurir'], layanan, penerima_ids, rng,
+            paket=paket, riwayat=riwayat, hari=hari, using=using, batch_size=batch_size,
+        ))
+        log(f"{hasil['pengiriman']} pengiriman, {hasil['paket']} paket, {hasil['riwayat']} riwayat")
+
+    rekonsiliasi(using=using)
+    pencarian.rebuild(using=using)
+    return hasil
@@ -0,0 +1,158 @@
+"""
+Alokator nomor urut untuk nomor resi (EKS) dan kode paket (PKT).
+
+Setiap proses memesan satu blok nomor dari tabel ``NomorUrut`` dengan satu
+UPDATE atomik, lalu membagikan nomor dari memori sampai blok habis. Karena
+pemesanan blok dilakukan di database, beberapa proses/worker tidak akan
+pernah mendapat nomor yang sama. Nomor yang tidak terpakai saat proses
+berhenti akan hilang (ada celah), tetapi tidak pernah terpakai dua kali.
+
+Konfigurasi per prefix lewat ``settings.EKSPEDISI_NOMOR_URUT``::
+
+    EKSPEDISI_NOMOR_URUT = {
+        'EKS': {'per_hari': False, 'digit': 6, 'blok': 20},
+        'PKT': {'per_hari': True, 'digit': 6, 'blok': 50},
+    }
+
+Dengan ``per_hari`` aktif, kode berisi tanggal (``EKS261017000001``) dan
+counter dimulai ulang setiap hari.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import NomorUrut
+
+DEFAULT_CONFIG = {
+    'per_hari': False,
+    'digit': 6,
+    'blok': 20,
+}
+
+
+def get_config(prefix):
+    """Ambil konfigurasi nomor urut untuk sebuah prefix"""
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_NOMOR_URUT', {}).get(prefix, {}))
+    return config
+
+
+class SequenceAllocator:
+    """Pembagi nomor urut berbasis blok yang aman untuk banyak thread/proses"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blok = {}
+
+    def reset(self):
+        """Buang semua blok di memori (nomor sisa akan menjadi celah)"""
+        with self._lock:
+            self._blok.clear()
+
+    def next_code(self, prefix, model, field):
+        """Ambil satu kode berikutnya, mis. ``EKS000042``"""
+        return self.allocate(prefix, model, field, 1)[0]
+
+    def allocate(self, prefix, model, field, jumlah):
+        """Ambil ``jumlah`` kode sekaligus (paling banyak satu round-trip ke DB)"""
+        config = get_config(prefix)
+        awalan = self._awalan(prefix, config)
+        nomor = self.allocate_numbers(awalan, jumlah, model, field, config)
+        return [self.format_code(awalan, n, config) for n in nomor]
+
+    def allocate_numbers(self, kunci, jumlah, model, field, config):
+        """Ambil ``jumlah`` angka urut untuk ``kunci``"""
+        using = router.db_for_write(NomorUrut)
+        hasil = []
+
+        with self._lock:
+            blok = self._blok.get(kunci)
+            while blok and len(hasil) < jumlah and blok[0] <= blok[1]:
+                hasil.append(blok[0])
+                blok[0] += 1
+            if blok and blok[0] > blok[1]:
+                del self._blok[kunci]
+
+        kurang = jumlah - len(hasil)
+        if not kurang:
+            return hasil
+
+        connection = connections[using]
+        ukuran = max(kurang, config['blok'])
+        dalam_transaksi = connection.in_atomic_block
+        if dalam_transaksi:
+            # Blok yang dipesan di dalam transaksi bisa ikut di-rollback,
+            # jadi hanya pesan yang dibutuhkan saja.
+            ukuran = kurang
+        akhir = self._reserve(kunci, ukuran, model, field, config, using)
+        awal = akhir - ukuran + 1
+        hasil.extend(range(awal, awal + kurang))
+
+        sisa_awal = awal + kurang
+        if sisa_awal <= akhir:
+            with self._lock:
+                self._blok[kunci] = [sisa_awal, akhir]
+        return hasil
+
+    def format_code(self, awalan, nomor, config):
+        return f"{awalan}{nomor:0{config['digit']}d}"
+
+    def _awalan(self, prefix, config):
+        if config['per_hari']:
+            return f"{prefix}{timezone.localdate():%y%m%d}"
+        return prefix
+
+    def _reserve(self, kunci, jumlah, model, field, config, using):
+        """Naikkan counter sebesar ``jumlah`` dan kembalikan nilai terakhirnya"""
+        while True:
+            akhir = self._update_counter(kunci, jumlah, using)
+            if akhir is not None:
+                return akhir
+            awal = self._seed(kunci, model, field, config, using)
+            try:
+                with transaction.atomic(using=using):
+                    NomorUrut.objects.using(using).create(kunci=kunci, nilai_terakhir=awal)
+            except IntegrityError:
+                # Proses lain sudah membuat baris counter lebih dulu
+                pass
+
+    def _update_counter(self, kunci, jumlah, using):
+        connection = connections[using]
+        if connection.vendor in ('sqlite', 'postgresql') and connection.features.can_return_columns_from_insert:
+            qn = connection.ops.quote_name
+            sql = 'UPDATE {table} SET {nilai} = {nilai} + %s WHERE {kunci} = %s RETURNING {nilai}'.format(
+                table=qn(NomorUrut._meta.db_table),
+                nilai=qn('nilai_terakhir'),
+                kunci=qn('kunci'),
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [jumlah, kunci])
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        with transaction.atomic(using=using):
+            counter = NomorUrut.objects.using(using).filter(kunci=kunci)
+            if not counter.update(nilai_terakhir=F('nilai_terakhir') + jumlah):
+                return None
+            return counter.values_list('nilai_terakhir', flat=True).get()
+
+    def _seed(self, kunci, model, field, config, using):
+        """Nilai awal counter baru, diambil dari kode terbesar yang sudah ada"""
+        terakhir = (
+            model._base_manager.using(using)
+            .annotate(panjang_kode=Length(field))
+            .filter(**{f'{field}__startswith': kunci, 'panjang_kode': len(kunci) + config['digit']})
+            .order_by(f'-{field}')
+            .values_list(field, flat=True)
+            .first()
+        )
+        if terakhir and terakhir[len(kunci):].isdigit():
+            return int(terakhir[len(kunci):])
+        return 0
+
+
+allocator = SequenceAllocator()
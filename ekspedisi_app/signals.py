@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Dikirim setelah data pengiriman berubah lewat operasi massal yang tidak
+# memicu post_save (bulk_update, update). Argumen: pengiriman_ids, using.
+pengiriman_diperbarui = Signal()
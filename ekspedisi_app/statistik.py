@@ -0,0 +1,355 @@
+"""
+Statistik dashboard dari counter yang dimaterialisasi.
+
+* ``Statistik`` menyimpan counter global dan per pengirim dengan kunci
+  ``pengiriman:<status>``, ``pengiriman:<status>:pengirim:<id>``, ``paket``,
+  ``paket:pengirim:<id>`` dan ``user``. Dashboard cukup membaca beberapa
+  baris ini sehingga latensinya tidak bergantung pada ukuran tabel.
+* ``StatistikHarian`` menyimpan jumlah paket dan total berat per tanggal
+  pengiriman, jenis layanan, kota tujuan dan status.
+
+Counter diperbarui secara inkremental dari signal model (perubahan
+``status_pengiriman``/``is_active``, paket dan user baru/dihapus). Delta
+dikumpulkan per transaksi dan ditulis sekali saat commit. Perubahan lain
+(mis. ``berat`` diedit, ``update()`` massal) dikoreksi oleh
+``manage.py reconcile_statistik`` yang dijalankan berkala. Rekonsiliasi ikut
+menghitung tabel arsip sehingga ``archive_pengiriman`` tidak mengubah counter.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from .models import Paket, Pengiriman, Statistik, StatistikHarian, User
+from .utils import defer_until_commit
+
+STATUS = [status for status, _ in Pengiriman.STATUS_CHOICES]
+KUNCI_USER = 'user'
+
+
+def kunci_pengiriman(status, pengirim_id=None):
+    if pengirim_id is None:
+        return f'pengiriman:{status}'
+    return f'pengiriman:{status}:pengirim:{pengirim_id}'
+
+
+def kunci_paket(pengirim_id=None):
+    if pengirim_id is None:
+        return 'paket'
+    return f'paket:pengirim:{pengirim_id}'
+
+
+def _kunci_ringkasan(pengirim_id):
+    kunci_status = {status: kunci_pengiriman(status, pengirim_id) for status in STATUS}
+    keys = [*kunci_status.values(), kunci_paket(pengirim_id)]
+    if pengirim_id is None:
+        keys.append(KUNCI_USER)
+    return kunci_status, Statistik.objects.filter(kunci__in=keys).values_list('kunci', 'nilai')
+
+
+def ringkasan(pengirim_id=None):
+    """Jumlah pengiriman per status, jumlah paket dan user dalam satu query"""
+    kunci_status, queryset = _kunci_ringkasan(pengirim_id)
+    return _susun_ringkasan(kunci_status, dict(queryset), pengirim_id)
+
+
+async def aringkasan(pengirim_id=None):
+    """Versi async ``ringkasan`` (ORM async)"""
+    kunci_status, queryset = _kunci_ringkasan(pengirim_id)
+    return _susun_ringkasan(kunci_status, {kunci: nilai async for kunci, nilai in queryset}, pengirim_id)
+
+
+def _susun_ringkasan(kunci_status, nilai, pengirim_id):
+    return {
+        'per_status': {status: nilai.get(kunci, 0) for status, kunci in kunci_status.items()},
+        'total_paket': nilai.get(kunci_paket(pengirim_id), 0),
+        'total_user': nilai.get(KUNCI_USER, 0) if pengirim_id is None else 1,
+    }
+
+
+def _tambah(model, lookup, deltas, using):
+    queryset = model._base_manager.using(using).filter(**lookup)
+    if queryset.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        return
+    try:
+        with transaction.atomic(using=using):
+            model._base_manager.using(using).create(**lookup, **deltas)
+    except IntegrityError:
+        # Baris counter baru saja dibuat oleh proses lain
+        queryset.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def _flush(items, using):
+    counter = Counter()
+    harian = {}
+    for item in items:
+        if item[0] == 'kunci':
+            counter[item[1]] += item[2]
+        else:
+            jumlah, berat = harian.get(item[1], (0, Decimal('0')))
+            harian[item[1]] = (jumlah + item[2], berat + item[3])
+
+    # Satu transaksi untuk semua counter (bukan satu commit per baris baru)
+    with transaction.atomic(using=using):
+        for kunci, delta in counter.items():
+            if delta:
+                _tambah(Statistik, {'kunci': kunci}, {'nilai': delta}, using)
+        for (tanggal, layanan_id, kota, status), (jumlah, berat) in harian.items():
+            if jumlah or berat:
+                _tambah(StatistikHarian, {
+                    'tanggal': tanggal,
+                    'jenis_layanan_id': layanan_id,
+                    'kota_tujuan': kota,
+                    'status_pengiriman': status,
+                }, {'jumlah_paket': jumlah, 'total_berat': berat}, using)
+
+
+def catat(items, using=DEFAULT_DB_ALIAS):
+    """
+    Catat delta counter; ``items`` berisi ``('kunci', kunci, delta)`` atau
+    ``('harian', (tanggal, jenis_layanan_id, kota, status), delta, berat)``.
+    """
+    if items:
+        defer_until_commit('statistik', items, lambda batch: _flush(batch, using), using=using)
+
+
+def _delta_pengiriman(status, pengirim_id, delta):
+    return [
+        ('kunci', kunci_pengiriman(status), delta),
+        ('kunci', kunci_pengiriman(status, pengirim_id), delta),
+    ]
+
+
+def _delta_paket(pengirim_id, delta):
+    return [('kunci', kunci_paket(), delta), ('kunci', kunci_paket(pengirim_id), delta)]
+
+
+def catat_pengiriman_baru(pengiriman_list, paket_list, using=DEFAULT_DB_ALIAS):
+    """Catat pengiriman dan paket yang dibuat lewat ``bulk_create``"""
+    items = []
+    for pengiriman in pengiriman_list:
+        if pengiriman.is_active:
+            items += _delta_pengiriman(pengiriman.status_pengiriman, pengiriman.pengirim_id, 1)
+    for paket in paket_list:
+        if not paket.is_active:
+            continue
+        pengiriman = paket.pengiriman
+        items += _delta_paket(pengiriman.pengirim_id, 1)
+        if pengiriman.is_active:
+            key = (
+                timezone.localdate(pengiriman.tanggal_pengiriman), pengiriman.jenis_layanan_id,
+                paket.penerima.kota_tujuan, pengiriman.status_pengiriman,
+            )
+            items.append(('harian', key, 1, paket.berat))
+    catat(items, using)
+
+
+def _status_efektif(status, is_active):
+    return status if is_active else None
+
+
+def _pengiriman_saved(sender, instance, created, using, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        lama = None
+    else:
+        status, is_active = instance.nilai_awal('status_pengiriman'), instance.nilai_awal('is_active')
+        if status is None or is_active is None:
+            # Nilai awal tidak diketahui (objek tidak dimuat dari DB)
+            return
+        lama = _status_efektif(status, is_active)
+    baru = _status_efektif(instance.status_pengiriman, instance.is_active)
+    if lama == baru:
+        return
+
+    if created:
+        catat(_delta_pengiriman(baru, instance.pengirim_id, 1), using)
+    else:
+        catat_perubahan_status([(instance, lama, baru)], using)
+
+
+def catat_perubahan_status(perubahan, using=DEFAULT_DB_ALIAS):
+    """
+    Catat perubahan status efektif pengiriman yang sudah ada; ``perubahan``
+    berisi ``(pengiriman, lama, baru)`` dengan status ``None`` untuk
+    pengiriman nonaktif. Dipakai juga oleh operasi ``update()`` massal.
+    """
+    perubahan = [(pengiriman, lama, baru) for pengiriman, lama, baru in perubahan if lama != baru]
+    if not perubahan:
+        return
+    items = []
+    for pengiriman, lama, baru in perubahan:
+        if lama:
+            items += _delta_pengiriman(lama, pengiriman.pengirim_id, -1)
+        if baru:
+            items += _delta_pengiriman(baru, pengiriman.pengirim_id, 1)
+
+    rows = (
+        Paket._base_manager.using(using)
+        .filter(pengiriman_id__in=[pengiriman.pk for pengiriman, _, _ in perubahan], is_active=True)
+        .values('pengiriman_id', 'penerima__kota_tujuan')
+        .annotate(jumlah=Count('id'), berat=Sum('berat'))
+        .order_by()
+    )
+    per_pengiriman = {}
+    for row in rows:
+        per_pengiriman.setdefault(row['pengiriman_id'], []).append(row)
+    for pengiriman, lama, baru in perubahan:
+        tanggal = timezone.localdate(pengiriman.tanggal_pengiriman)
+        for row in per_pengiriman.get(pengiriman.pk, ()):
+            for status, sign in ((lama, -1), (baru, 1)):
+                if status:
+                    key = (tanggal, pengiriman.jenis_layanan_id, row['penerima__kota_tujuan'], status)
+                    items.append(('harian', key, sign * row['jumlah'], sign * row['berat']))
+    catat(items, using)
+
+
+def _pengiriman_deleted(sender, instance, using, **kwargs):
+    status = _status_efektif(instance.status_pengiriman, instance.is_active)
+    if status:
+        catat(_delta_pengiriman(status, instance.pengirim_id, -1), using)
+
+
+def _paket_items(paket, using, sign):
+    info = (
+        Paket._base_manager.using(using).filter(pk=paket.pk)
+        .values(
+            'pengiriman__pengirim_id', 'pengiriman__status_pengiriman', 'pengiriman__is_active',
+            'pengiriman__tanggal_pengiriman', 'pengiriman__jenis_layanan_id', 'penerima__kota_tujuan',
+        )
+        .first()
+    )
+    if info is None:
+        return []
+    items = _delta_paket(info['pengiriman__pengirim_id'], sign)
+    if info['pengiriman__is_active']:
+        key = (
+            timezone.localdate(info['pengiriman__tanggal_pengiriman']), info['pengiriman__jenis_layanan_id'],
+            info['penerima__kota_tujuan'], info['pengiriman__status_pengiriman'],
+        )
+        items.append(('harian', key, sign, sign * paket.berat))
+    return items
+
+
+def _paket_saved(sender, instance, created, using, raw=False, **kwargs):
+    if raw:
+        return
+    lama = False if created else instance.nilai_awal('is_active')
+    if lama is None or lama == instance.is_active:
+        return
+    catat(_paket_items(instance, using, 1 if instance.is_active else -1), using)
+
+
+def _paket_deleting(sender, instance, using, **kwargs):
+    if instance.is_active:
+        catat(_paket_items(instance, using, -1), using)
+
+
+def _user_saved(sender, instance, created, using, raw=False, **kwargs):
+    if raw:
+        return
+    lama = False if created else instance.nilai_awal('is_active')
+    if lama is None or lama == instance.is_active:
+        return
+    catat([('kunci', KUNCI_USER, 1 if instance.is_active else -1)], using)
+
+
+def _user_deleted(sender, instance, using, **kwargs):
+    if instance.is_active:
+        catat([('kunci', KUNCI_USER, -1)], using)
+
+
+def connect_signals():
+    post_save.connect(_pengiriman_saved, sender=Pengiriman, dispatch_uid='statistik_pengiriman_saved')
+    post_delete.connect(_pengiriman_deleted, sender=Pengiriman, dispatch_uid='statistik_pengiriman_deleted')
+    post_save.connect(_paket_saved, sender=Paket, dispatch_uid='statistik_paket_saved')
+    pre_delete.connect(_paket_deleting, sender=Paket, dispatch_uid='statistik_paket_deleting')
+    post_save.connect(_user_saved, sender=User, dispatch_uid='statistik_user_saved')
+    post_delete.connect(_user_deleted, sender=User, dispatch_uid='statistik_user_deleted')
+
+
+def _model_arsip(apps, nama):
+    """Model arsip, ``None`` di migrasi sebelum tabel arsip ada"""
+    try:
+        return apps.get_model('ekspedisi_app', nama)
+    except LookupError:
+        return None
+
+
+def rekonsiliasi(apps=global_apps, using=DEFAULT_DB_ALIAS):
+    """Hitung ulang semua counter dari tabel sumber (dan arsip) lalu ganti isinya"""
+    User = apps.get_model('ekspedisi_app', 'User')
+    Statistik = apps.get_model('ekspedisi_app', 'Statistik')
+    StatistikHarian = apps.get_model('ekspedisi_app', 'StatistikHarian')
+    sumber = [(apps.get_model('ekspedisi_app', 'Pengiriman'), apps.get_model('ekspedisi_app', 'Paket'))]
+    arsip = (_model_arsip(apps, 'PengirimanArsip'), _model_arsip(apps, 'PaketArsip'))
+    if None not in arsip:
+        # Pengiriman yang diarsipkan tetap dihitung di dashboard
+        sumber.append(arsip)
+
+    with transaction.atomic(using=using):
+        nilai = Counter()
+        harian = {}
+        # Semua bucket status dalam satu agregat kondisional
+        per_status = {status: Count('id', filter=Q(status_pengiriman=status)) for status in STATUS}
+        for Pengiriman, Paket in sumber:
+            rows = (
+                Pengiriman._base_manager.using(using).filter(is_active=True)
+                .values('pengirim_id').annotate(**per_status)
+            )
+            for row in rows:
+                for status in STATUS:
+                    nilai[kunci_pengiriman(status)] += row[status]
+                    nilai[kunci_pengiriman(status, row['pengirim_id'])] += row[status]
+
+            rows = (
+                Paket._base_manager.using(using).filter(is_active=True)
+                .values('pengiriman__pengirim_id').annotate(jumlah=Count('id'))
+            )
+            for row in rows:
+                nilai[kunci_paket()] += row['jumlah']
+                nilai[kunci_paket(row['pengiriman__pengirim_id'])] += row['jumlah']
+
+            rows = (
+                Paket._base_manager.using(using).filter(is_active=True, pengiriman__is_active=True)
+                .annotate(tanggal=TruncDate('pengiriman__tanggal_pengiriman'))
+                .values(
+                    'tanggal', 'pengiriman__jenis_layanan_id', 'penerima__kota_tujuan',
+                    'pengiriman__status_pengiriman',
+                )
+                .annotate(jumlah=Count('id'), berat=Sum('berat'))
+            )
+            for row in rows:
+                key = (
+                    row['tanggal'], row['pengiriman__jenis_layanan_id'], row['penerima__kota_tujuan'],
+                    row['pengiriman__status_pengiriman'],
+                )
+                jumlah, berat = harian.get(key, (0, Decimal('0')))
+                harian[key] = (jumlah + row['jumlah'], berat + row['berat'])
+        nilai[KUNCI_USER] = User._base_manager.using(using).filter(is_active=True).count()
+
+        buckets = [
+            StatistikHarian(
+                tanggal=tanggal,
+                jenis_layanan_id=jenis_layanan_id,
+                kota_tujuan=kota_tujuan,
+                status_pengiriman=status_pengiriman,
+                jumlah_paket=jumlah,
+                total_berat=berat,
+            )
+            for (tanggal, jenis_layanan_id, kota_tujuan, status_pengiriman), (jumlah, berat) in harian.items()
+        ]
+
+        Statistik._base_manager.using(using).all().delete()
+        Statistik._base_manager.using(using).bulk_create(
+            [Statistik(kunci=kunci, nilai=jumlah) for kunci, jumlah in nilai.items()], batch_size=1000
+        )
+        StatistikHarian._base_manager.using(using).all().delete()
+        StatistikHarian._base_manager.using(using).bulk_create(buckets, batch_size=1000)
+    return len(nilai), len(buckets)
@@ -0,0 +1,240 @@
+"""
+Mesin tarif (quote) per jenis layanan, zona tujuan dan rentang berat.
+
+Biaya satu paket dihitung dari berat tagih, yaitu nilai terbesar antara
+berat aktual dan berat volumetrik (``panjang x lebar x tinggi /
+JenisLayanan.pembagi_volumetrik``). Tarif dicari di ``TarifLayanan`` untuk
+zona tujuan (``ZonaTarif``, dari prefix kode pos terpanjang yang cocok)
+lalu di tarif tanpa zona; jika tidak ada rentang berat yang cocok dipakai
+``JenisLayanan.tarif_per_kg``. Paket berasuransi ditambah
+``nilai_barang x asuransi_persen / 100`` (minimal ``asuransi_minimum``).
+
+Semua tabel dikompilasi sekali menjadi struktur di memori (dict per
+layanan dan zona, rentang berat dicari dengan ``bisect``) sehingga quote
+tidak menjalankan query. Setelah commit perubahan ``JenisLayanan``,
+``ZonaTarif`` atau ``TarifLayanan``, tabel di proses ini langsung dibuang.
+Proses lain memeriksa versi tabel di database paling lama setiap
+``interval`` detik, yaitu jumlah baris dan ``updated_at`` terbaru ketiga
+model (tiga query agregat kecil), lalu mengompilasi ulang jika berubah.
+Versi ini terlihat oleh semua proses tanpa cache bersama; ``update()``
+massal pada tabel tarif harus ikut mengisi ``updated_at``.
+
+Selama transaksi yang mengubah tarif belum commit, ``get_tabel`` di
+transaksi itu mengompilasi tabel privat yang tidak disimpan: transaksi
+tersebut melihat perubahannya sendiri, sedangkan tabel global tidak pernah
+dibangun dari baris yang belum commit (dan mungkin di-rollback).
+"""
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Max, Q
+from django.db.models.signals import post_delete, post_save
+
+from .models import JenisLayanan, TarifLayanan, ZonaTarif
+from .utils import ada_tertunda, defer_until_commit
+
+DEFAULT_CONFIG = {
+    # Selang (detik) pemeriksaan versi tabel di database
+    'interval': 5,
+}
+NOL = Decimal('0.00')
+SEN = Decimal('0.01')
+SERATUS = Decimal('100')
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_TARIF', {}))
+    return config
+
+
+class TarifTidakDitemukan(LookupError):
+    """Jenis layanan tidak ada di tabel tarif"""
+
+
+class TabelTarif:
+    """Tabel tarif hasil kompilasi untuk satu database"""
+
+    def __init__(self, layanan, aktif, zona_prefix, zona_nama, versi=None):
+        # layanan: {id: (pembagi, persen, minimum, tarif_per_kg, {zona_id: (batas_bawah, rentang)})}
+        self.layanan = layanan
+        # Layanan nonaktif tetap ada agar total pengiriman lama bisa dihitung ulang
+        self.aktif = aktif
+        self.zona_prefix = zona_prefix
+        self.zona_nama = zona_nama
+        self.panjang_prefix = sorted({len(prefix) for prefix in zona_prefix}, reverse=True)
+        self.versi = versi
+
+    @classmethod
+    def compile(cls, using=DEFAULT_DB_ALIAS, versi=None):
+        """Bangun tabel dari database (tiga query)"""
+        zona_prefix, zona_nama = {}, {}
+        for pk, nama, prefixes in (
+            ZonaTarif.aktif.using(using).order_by('pk')
+            .values_list('pk', 'nama', 'prefix_kode_pos')
+        ):
+            zona_nama[pk] = nama
+            for prefix in prefixes or []:
+                # Prefix yang sama di dua zona: zona dengan id terkecil yang dipakai
+                zona_prefix.setdefault(str(prefix).strip(), pk)
+
+        rentang = {}
+        for layanan_id, zona_id, berat_min, berat_maks, tarif_per_kg, biaya_tetap in (
+            TarifLayanan.aktif.using(using)
+            .filter(Q(zona__isnull=True) | Q(zona__is_active=True))
+            .values_list('jenis_layanan_id', 'zona_id', 'berat_min', 'berat_maks', 'tarif_per_kg', 'biaya_tetap')
+        ):
+            rentang.setdefault(layanan_id, {}).setdefault(zona_id, []).append(
+                (berat_min, berat_maks, tarif_per_kg, biaya_tetap)
+            )
+
+        layanan, aktif = {}, set()
+        for pk, is_active, pembagi, persen, minimum, tarif_per_kg in (
+            JenisLayanan.objects.using(using).values_list(
+                'pk', 'is_active', 'pembagi_volumetrik', 'asuransi_persen', 'asuransi_minimum', 'tarif_per_kg'
+            )
+        ):
+            if is_active:
+                aktif.add(pk)
+            per_zona = {}
+            for zona_id, baris in rentang.get(pk, {}).items():
+                baris.sort(key=lambda item: item[0])
+                per_zona[zona_id] = ([item[0] for item in baris], baris)
+            layanan[pk] = (pembagi, persen, minimum, tarif_per_kg, per_zona)
+        return cls(layanan, aktif, zona_prefix, zona_nama, versi)
+
+    def zona(self, kode_pos):
+        """ID zona untuk ``kode_pos`` dari prefix terpanjang, ``None`` jika tidak ada"""
+        kode_pos = (kode_pos or '').strip()
+        # Satu lookup dict per panjang prefix; tanpa memo per kode pos (input dari client)
+        for n in self.panjang_prefix:
+            if len(kode_pos) >= n and kode_pos[:n] in self.zona_prefix:
+                return self.zona_prefix[kode_pos[:n]]
+        return None
+
+    @staticmethod
+    def _cari(per_zona, zona_id, berat):
+        entry = per_zona.get(zona_id)
+        if entry is None:
+            return None
+        batas_bawah, baris = entry
+        index = bisect_right(batas_bawah, berat) - 1
+        # Rentang yang tumpang tindih: rentang dengan batas bawah terbesar yang masih memuat berat
+        while index >= 0:
+            berat_maks = baris[index][1]
+            if berat_maks is None or berat < berat_maks:
+                return baris[index]
+            index -= 1
+        return None
+
+    def quote(self, jenis_layanan_id, kode_pos, berat, panjang=None, lebar=None, tinggi=None,
+              nilai_barang=None, asuransi=False):
+        """Rincian biaya satu paket (tanpa query database)"""
+        try:
+            pembagi, persen, minimum, tarif_default, per_zona = self.layanan[jenis_layanan_id]
+        except KeyError:
+            raise TarifTidakDitemukan(jenis_layanan_id) from None
+        berat = Decimal(berat).quantize(SEN)
+        volumetrik = NOL
+        if pembagi and panjang and lebar and tinggi:
+            volumetrik = (Decimal(panjang) * Decimal(lebar) * Decimal(tinggi) / pembagi).quantize(SEN)
+        berat_tagih = max(berat, volumetrik)
+
+        zona_id = self.zona(kode_pos) if self.zona_prefix else None
+        tarif = None
+        if per_zona:
+            if zona_id is not None:
+                tarif = self._cari(per_zona, zona_id, berat_tagih)
+            if tarif is None:
+                tarif = self._cari(per_zona, None, berat_tagih)
+        if tarif is None:
+            tarif_per_kg, biaya_tetap = tarif_default, NOL
+        else:
+            tarif_per_kg, biaya_tetap = tarif[2], tarif[3]
+
+        ongkir = (biaya_tetap + berat_tagih * tarif_per_kg).quantize(SEN)
+        biaya_asuransi = NOL
+        if asuransi:
+            biaya_asuransi = max((Decimal(nilai_barang or 0) * persen / SERATUS).quantize(SEN), minimum)
+        return {
+            'berat': berat,
+            'berat_volumetrik': volumetrik,
+            'berat_tagih': berat_tagih,
+            'zona': self.zona_nama.get(zona_id),
+            'tarif_per_kg': tarif_per_kg,
+            'biaya_tetap': biaya_tetap,
+            'ongkir': ongkir,
+            'asuransi': biaya_asuransi,
+            'total': ongkir + biaya_asuransi,
+        }
+
+    def biaya(self, jenis_layanan_id, kode_pos, berat, panjang=None, lebar=None, tinggi=None,
+              nilai_barang=None, asuransi=False):
+        """Total biaya satu paket (ongkir + asuransi)"""
+        return self.quote(
+            jenis_layanan_id, kode_pos, berat, panjang, lebar, tinggi, nilai_barang, asuransi
+        )['total']
+
+
+_lock = threading.Lock()
+# alias database: tabel hasil kompilasi
+_tabel = {}
+_dicek = {}
+
+
+def versi_db(using=DEFAULT_DB_ALIAS):
+    """Versi isi tabel tarif: ``(jumlah baris, updated_at terbaru)`` per model"""
+    return tuple(
+        tuple(model._base_manager.using(using).aggregate(n=Count('pk'), terakhir=Max('updated_at')).values())
+        for model in (JenisLayanan, ZonaTarif, TarifLayanan)
+    )
+
+
+def get_tabel(using=DEFAULT_DB_ALIAS):
+    """Tabel tarif untuk ``using``, dikompilasi ulang jika versinya berubah"""
+    if ada_tertunda('tarif', using):
+        # Transaksi ini mengubah tarif: tabel privat, jangan simpan baris yang belum commit
+        return TabelTarif.compile(using)
+    config = get_config()
+    tabel = _tabel.get(using)
+    sekarang = time.monotonic()
+    if tabel is not None and sekarang - _dicek.get(using, 0) < config['interval']:
+        return tabel
+    versi = versi_db(using)
+    _dicek[using] = sekarang
+    if tabel is not None and tabel.versi == versi:
+        return tabel
+    with _lock:
+        tabel = _tabel.get(using)
+        if tabel is None or tabel.versi != versi:
+            tabel = _tabel[using] = TabelTarif.compile(using, versi)
+    return tabel
+
+
+def clear(using=None):
+    """Buang tabel hasil kompilasi (semua database jika ``using`` kosong)"""
+    with _lock:
+        if using is None:
+            _tabel.clear()
+            _dicek.clear()
+        else:
+            _tabel.pop(using, None)
+            _dicek.pop(using, None)
+
+
+def _tarif_changed(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    # Tabel lokal dibuang setelah commit (proses lain melihat versi database
+    # berubah); sampai itu get_tabel di transaksi ini memakai tabel privat
+    defer_until_commit('tarif', [('tarif', sender.__name__)], lambda batch: clear(using), using=using)
+
+
+def connect_signals():
+    for model in (JenisLayanan, ZonaTarif, TarifLayanan):
+        for signal in (post_save, post_delete):
+            signal.connect(_tarif_changed, sender=model, dispatch_uid=f'tarif_{model.__name__}')
@@ -1,3 +1,1578 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api import (
+    authentication, bulk, explain, export, metrics, paginators, pubsub, replica, response_cache, scan, tracking,
+    views,
+)
+from ekspedisi.database import database_config, replica_configs
+
+from . import arsip, images, pencarian, sequences, statistik, tarif, totals, transisi, webhook
+from .benchmark import WebhookReceiver
+from .models import (
+    JenisLayanan, NomorUrut, Paket, PaketArsip, Penerima, Pengiriman, PengirimanArsip, Profile,
+    RiwayatPengiriman, RiwayatPengirimanArsip, Statistik, StatistikHarian, TarifLayanan, User, WebhookDelivery, WebhookEndpoint,
+    WebhookOutbox, ZonaTarif,
+)
+
+
+class EkspedisiDataMixin:
+    """Pembuat data uji untuk pengiriman lengkap (paket, penerima, riwayat)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Jalankan callback on_commit agar batch tertunda tidak terbawa ke tiap test
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.admin = cls.create_user('admin1', 'admin')
+            cls.kurir = cls.create_user('kurir1', 'kurir')
+            cls.pelanggan = cls.create_user('pelanggan1', 'pelanggan')
+            cls.layanan = JenisLayanan.objects.create(nama_layanan='Reguler', deskripsi='-', tarif_per_kg=10000)
+
+    @classmethod
+    def create_user(cls, username, role):
+        user = User.objects.create_user(username=username, password='rahasia-123', role=role)
+        Profile.objects.create(
+            user=user, nama_lengkap=username, alamat='-', nomor_telepon='0800', email=f'{username}@contoh.id'
+        )
+        Token.objects.create(user=user)
+        return user
+
+    def create_pengiriman(self, jumlah, paket=2, riwayat=2):
+        daftar = []
+        for i in range(jumlah):
+            pengiriman = Pengiriman.objects.create(
+                pengirim=self.pelanggan, kurir=self.kurir, jenis_layanan=self.layanan
+            )
+            for j in range(paket):
+                penerima = Penerima.objects.create(
+                    nama_penerima=f'Penerima {i}-{j}', alamat_penerima='-',
+                    nomor_telepon_penerima=f'08{i:04d}{j:02d}', kota_tujuan='Bandung', kode_pos='40111'
+                )
+                Paket.objects.create(
+                    pengiriman=pengiriman, penerima=penerima, nama_barang='Buku', deskripsi_barang='-',
+                    berat=1, panjang=10, lebar=10, tinggi=10
+                )
+            for j in range(riwayat):
+                RiwayatPengiriman.objects.create(
+                    pengiriman=pengiriman, status='transit', keterangan='-', lokasi='Hub Jakarta'
+                )
+            daftar.append(pengiriman)
+        return daftar
+
+    def authenticate(self, user):
+        if user is None:
+            self.client.credentials()
+        else:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+
+
+class QueryBudgetTestCase(EkspedisiDataMixin, APITestCase):
+    """
+    Harness anggaran query: jumlah query sebuah endpoint harus tetap
+    (tidak bertambah dengan jumlah baris) dan tidak melebihi anggaran.
+    """
+
+    def count_queries(self, url, user):
+        # Anggaran diukur untuk jalur tanpa cache
+        for cache in caches.all():
+            cache.clear()
+        authentication.clear()
+        self.authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return len(queries)
+
+    def assertQueryBudget(self, url, budget, user=None, grow=8):
+        """Ukur query sebelum dan sesudah data ditambah ``grow`` pengiriman"""
+        sedikit = self.count_queries(url() if callable(url) else url, user)
+        self.create_pengiriman(grow)
+        banyak = self.count_queries(url() if callable(url) else url, user)
+        self.assertEqual(sedikit, banyak, f'{url}: query bertambah dari {sedikit} ke {banyak}')
+        self.assertLessEqual(banyak, budget, f'{url}: {banyak} query melebihi anggaran {budget}')
+
+
+class ApiQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        self.pengiriman = self.create_pengiriman(2)[0]
+
+    def test_pengiriman_list(self):
+        for user in (self.admin, self.kurir, self.pelanggan):
+            with self.subTest(role=user.role):
+                self.assertQueryBudget('/api/pengiriman/', 4, user)
+
+    def test_pengiriman_detail(self):
+        self.assertQueryBudget(f'/api/pengiriman/{self.pengiriman.pk}/', 4, self.pelanggan)
+
+    def test_paket_list(self):
+        self.assertQueryBudget('/api/paket/', 2, self.kurir)
+
+    def test_riwayat_pengiriman_list(self):
+        self.assertQueryBudget('/api/riwayat-pengiriman/', 2, self.admin)
+
+    def test_penerima_list(self):
+        self.assertQueryBudget('/api/penerima/', 2, self.admin)
+
+    def test_jenis_layanan_list(self):
+        self.assertQueryBudget('/api/jenis-layanan/', 2, self.pelanggan)
+
+    def test_user_list(self):
+        self.assertQueryBudget('/api/users/', 2, self.admin)
+
+    def test_tracking_by_resi(self):
+        self.assertQueryBudget(f'/api/tracking/{self.pengiriman.nomor_resi}/', 3)
+
+    def test_dashboard_stats(self):
+        for user in (self.admin, self.pelanggan):
+            with self.subTest(role=user.role):
+                self.assertQueryBudget('/api/dashboard/stats/', 2, user)
+
+
+class SequenceTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        self.allocator = sequences.SequenceAllocator()
+
+    def allocate(self, jumlah, prefix='EKS'):
+        return self.allocator.allocate(prefix, Pengiriman, 'nomor_resi', jumlah)
+
+    def test_blok_berurutan_dan_tidak_tumpang_tindih(self):
+        pertama = self.allocate(5)
+        kedua = self.allocate(3)
+        nomor = [int(kode[3:]) for kode in pertama + kedua]
+        self.assertEqual(nomor, list(range(nomor[0], nomor[0] + 8)))
+        self.assertTrue(all(len(kode) == 9 for kode in pertama + kedua))
+        self.assertEqual(NomorUrut.objects.get(kunci='EKS').nilai_terakhir, nomor[-1])
+
+    def test_sisa_blok_dibagikan_dari_memori(self):
+        # Baris counter dibuat dulu agar pemesanan di bawah cukup satu UPDATE
+        self.allocate(1)
+        # Di luar transaksi satu blok penuh dipesan; sisanya tidak butuh query
+        with mock.patch.object(connections['default'], 'in_atomic_block', False):
+            pertama = self.allocate(2)
+        self.assertEqual(NomorUrut.objects.get(kunci='EKS').nilai_terakhir, int(pertama[0][3:]) + 19)
+        with self.assertNumQueries(0):
+            kedua = self.allocate(3)
+        self.assertEqual(int(kedua[0][3:]), int(pertama[-1][3:]) + 1)
+        # Blok lain (proses lain) mulai setelah blok yang sudah dipesan
+        lain = sequences.SequenceAllocator().allocate('EKS', Pengiriman, 'nomor_resi', 1)
+        self.assertEqual(int(lain[0][3:]), int(pertama[0][3:]) + 20)
+
+    def test_seed_dari_nomor_resi_terbesar(self):
+        pengiriman = self.create_pengiriman(1, paket=0, riwayat=0)[0]
+        Pengiriman.objects.filter(pk=pengiriman.pk).update(nomor_resi='EKS000500')
+        # Panjang berbeda dan prefix lain tidak ikut dihitung
+        Pengiriman.objects.create(
+            pengirim=self.pelanggan, jenis_layanan=self.layanan, nomor_resi='EKS9999999'
+        )
+        NomorUrut.objects.filter(kunci='EKS').delete()
+        self.assertEqual(self.allocate(2), ['EKS000501', 'EKS000502'])
+
+    @override_settings(EKSPEDISI_NOMOR_URUT={'TST': {'per_hari': True, 'digit': 4}})
+    def test_per_hari_dimulai_ulang_tiap_hari(self):
+        with mock.patch.object(sequences.timezone, 'localdate', return_value=date(2026, 1, 1)):
+            self.assertEqual(self.allocate(2, 'TST'), ['TST2601010001', 'TST2601010002'])
+        with mock.patch.object(sequences.timezone, 'localdate', return_value=date(2026, 1, 2)):
+            self.assertEqual(self.allocate(1, 'TST'), ['TST2601020001'])
+        with mock.patch.object(sequences.timezone, 'localdate', return_value=date(2026, 1, 1)):
+            self.assertEqual(self.allocate(1, 'TST'), ['TST2601010003'])
+
+    def test_rollback_tidak_merusak_counter(self):
+        terpakai = self.allocate(2)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            batal = self.allocate(3)
+            raise RuntimeError
+        # Counter ikut di-rollback bersama baris yang memakai nomornya: tidak ada
+        # nomor yang sudah commit dipakai ulang dan tidak ada blok basi di memori
+        self.assertEqual(NomorUrut.objects.get(kunci='EKS').nilai_terakhir, int(terpakai[-1][3:]))
+        berikutnya = self.allocate(4)
+        self.assertEqual(berikutnya[:3], batal)
+        self.assertFalse(set(berikutnya) & set(terpakai))
+        self.assertEqual(NomorUrut.objects.get(kunci='EKS').nilai_terakhir, int(berikutnya[-1][3:]))
+
+
+class BulkIngestTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/pengiriman/bulk/'
+
+    def setUp(self):
+        self.authenticate(self.pelanggan)
+
+    def baris(self, ref, nama='Budi', telepon='081200', **lainnya):
+        return dict({
+            'ref': ref, 'jenis_layanan': self.layanan.pk,
+            'paket': [{
+                'nama_barang': 'Buku', 'deskripsi_barang': '-', 'berat': '1.50',
+                'panjang': 10, 'lebar': 10, 'tinggi': 10,
+                'penerima': {
+                    'nama_penerima': nama, 'alamat_penerima': 'Jl. Merdeka 1', 'nomor_telepon_penerima': telepon,
+                    'kota_tujuan': 'Bandung', 'kode_pos': '40111',
+                },
+            }],
+        }, **lainnya)
+
+    def post(self, data, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data, **kwargs)
+
+    def test_json_dan_penerima_digabung_tanpa_beda_huruf(self):
+        ada = Penerima.objects.create(
+            nama_penerima='Budi', alamat_penerima='Jl. Merdeka 1', nomor_telepon_penerima='081200',
+            kota_tujuan='Bandung', kode_pos='40111',
+        )
+        response = self.post([
+            self.baris('A', nama='BUDI '), self.baris('B', nama='budi'),
+            self.baris('C', nama='Sari', telepon='081300'), self.baris('D', nama='SARI', telepon='081300'),
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 4)
+        pengiriman = Pengiriman.objects.filter(pengirim=self.pelanggan).order_by('nomor_resi')
+        self.assertEqual([obj.total_berat for obj in pengiriman], [Decimal('1.50')] * 4)
+        penerima = list(Paket.objects.filter(pengiriman__in=pengiriman).values_list('penerima_id', flat=True))
+        self.assertEqual(penerima[:2], [ada.pk, ada.pk])
+        self.assertEqual(len(set(penerima[2:])), 1)
+        self.assertEqual(Penerima.objects.count(), 2)
+
+    def test_csv_dikelompokkan_per_ref(self):
+        kolom = ('ref,jenis_layanan,nama_barang,deskripsi_barang,berat,panjang,lebar,tinggi,nama_penerima,'
+                 'alamat_penerima,nomor_telepon_penerima,kota_tujuan,kode_pos')
+        baris = [
+            f'R1,{self.layanan.pk},Buku,-,1,10,10,10,Budi,Jl. A,0811,Bandung,40111',
+            f'R2,{self.layanan.pk},Sepatu,-,2,10,10,10,Sari,Jl. B,0812,Bandung,40111',
+            f'R1,{self.layanan.pk},Tas,-,3,10,10,10,Budi,Jl. A,0811,Bandung,40111',
+            f',{self.layanan.pk},Kaos,-,1,10,10,10,Andi,Jl. C,0813,Bandung,40111',
+        ]
+        response = self.post('\n'.join([kolom, *baris]), content_type='text/csv')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([result['ref'] for result in response.data['results']], ['R1', 'R2', ''])
+        self.assertEqual([len(result['kode_paket']) for result in response.data['results']], [2, 1, 1])
+        r1 = Pengiriman.objects.get(nomor_resi=response.data['results'][0]['nomor_resi'])
+        self.assertEqual(r1.total_berat, Decimal('4.00'))
+        self.assertEqual(sorted(r1.paket_set.values_list('nama_barang', flat=True)), ['Buku', 'Tas'])
+
+    def test_gagal_sebagian_207(self):
+        response = self.post([
+            self.baris('A'), self.baris('B', jenis_layanan=999999), self.baris('C', paket=[]),
+        ], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 2))
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'invalid', 'invalid'])
+        self.assertIn('jenis_layanan', results[1]['errors'])
+        self.assertIn('paket', results[2]['errors'])
+        self.assertEqual(Pengiriman.objects.filter(pengirim=self.pelanggan).count(), 1)
+
+    def test_chunk_gagal_tidak_meninggalkan_data(self):
+        asli = Paket.objects.bulk_create
+        panggilan = []
+
+        def bulk_create(objs, *args, **kwargs):
+            panggilan.append(objs)
+            if len(panggilan) == 2:
+                raise DatabaseError('disk penuh')
+            return asli(objs, *args, **kwargs)
+
+        # Chunk kedua gagal; penerima barunya juga dipakai chunk ketiga
+        manifest = [self.baris('A'), self.baris('B', nama='Sari', telepon='081300'),
+                    self.baris('C', nama='Sari', telepon='081300')]
+        valid, _ = bulk.validate_manifest(manifest)
+        self.assertEqual(len(valid), 3)
+        with mock.patch.object(Paket.objects, 'bulk_create', side_effect=bulk_create), \
+                self.captureOnCommitCallbacks(execute=True):
+            results = bulk.ingest_manifest(manifest, self.pelanggan, chunk_size=1)
+        self.assertEqual([result['status'] for result in results], ['created', 'failed', 'created'])
+        self.assertNotIn('nomor_resi', results[1])
+        self.assertIn('disk penuh', results[1]['errors'])
+
+        # Tidak ada pengiriman setengah jadi; penerima dibuat ulang oleh chunk ketiga
+        pengiriman = Pengiriman.objects.filter(pengirim=self.pelanggan)
+        self.assertEqual(sorted(pengiriman.values_list('nomor_resi', flat=True)),
+                         [results[0]['nomor_resi'], results[2]['nomor_resi']])
+        self.assertFalse(pengiriman.filter(paket_set__isnull=True).exists())
+        self.assertEqual(Penerima.objects.filter(nama_penerima='Sari').count(), 1)
+        # Nomor resi/kode paket chunk yang gagal ikut di-rollback dan dipakai chunk berikutnya
+        self.assertEqual(int(results[2]['nomor_resi'][3:]), int(results[0]['nomor_resi'][3:]) + 1)
+        self.assertEqual(int(results[2]['kode_paket'][0][3:]), int(results[0]['kode_paket'][0][3:]) + 1)
+        self.assertEqual(NomorUrut.objects.get(kunci='EKS').nilai_terakhir, int(results[2]['nomor_resi'][3:]))
+
+
+class AuthCacheTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/dashboard/stats/'
+
+    def setUp(self):
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+
+    def test_repeated_request_skips_auth_queries(self):
+        self.authenticate(self.pelanggan)
+        with CaptureQueriesContext(connection) as pertama:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with CaptureQueriesContext(connection) as kedua:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(len(kedua), len(pertama) - 1)
+        self.assertFalse([q for q in kedua.captured_queries if 'authtoken_token' in q['sql']])
+
+    def test_role_change_invalidates(self):
+        self.authenticate(self.pelanggan)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pelanggan.role = 'admin'
+            self.pelanggan.save()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+    def test_deactivation_and_logout_invalidate(self):
+        self.authenticate(self.kurir)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kurir.is_active = False
+            self.kurir.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        self.authenticate(self.pelanggan)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_stale_snapshot_from_other_process_is_rejected(self):
+        self.authenticate(self.pelanggan)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        key = self.pelanggan.auth_token.key
+        basi = authentication.local_cache.get(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pelanggan.role = 'admin'
+            self.pelanggan.save()
+        # Worker lain masih memegang snapshot lama di LRU-nya (atau menyimpannya setelah invalidasi)
+        authentication.set_snapshot(key, basi, authentication.get_config())
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+
+class ManifestTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/kurir/manifest/'
+
+    def setUp(self):
+        caches['default'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pengiriman = self.create_pengiriman(1, paket=0, riwayat=0)[0]
+            for kota, kode in (('Jakarta', '10110'), ('Surabaya', '60111'), ('Bandung', '40111'),
+                               ('Semarang', '50111'), ('Bandung', '40111'), ('Antah', 'X1')):
+                penerima = Penerima.objects.create(
+                    nama_penerima=f'Penerima {kota}', alamat_penerima='-', nomor_telepon_penerima='0800',
+                    kota_tujuan=kota, kode_pos=kode
+                )
+                Paket.objects.create(
+                    pengiriman=self.pengiriman, penerima=penerima, nama_barang='Buku', deskripsi_barang='-',
+                    berat=1, panjang=10, lebar=10, tinggi=10
+                )
+
+    def stops(self, user, **params):
+        self.authenticate(user)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return [(stop['kota_tujuan'], stop['jumlah_paket']) for stop in response.json()['stops']]
+
+    def test_stops_grouped_and_ordered(self):
+        self.assertEqual(self.stops(self.kurir), [
+            ('Surabaya', 1), ('Semarang', 1), ('Bandung', 2), ('Jakarta', 1), ('Antah', 1),
+        ])
+        with override_settings(EKSPEDISI_MANIFEST={'depot_kode_pos': '10220'}):
+            caches['default'].clear()
+            self.assertEqual(self.stops(self.kurir), [
+                ('Jakarta', 1), ('Bandung', 2), ('Semarang', 1), ('Surabaya', 1), ('Antah', 1),
+            ])
+        self.assertEqual(len(self.stops(self.admin, kurir=self.kurir.pk)), 5)
+        self.authenticate(self.pelanggan)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_precomputed_on_reassignment(self):
+        kurir_lain = self.create_user('kurir2', 'kurir')
+        self.stops(self.kurir)
+        self.stops(kurir_lain)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pengiriman.kurir = kurir_lain
+            self.pengiriman.save()
+        # Kedua manifest sudah dibangun ulang saat commit; request hanya membaca cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.stops(self.kurir), [])
+            self.assertEqual(len(self.stops(kurir_lain)), 5)
+
+
+class ImagePipelineTests(EkspedisiDataMixin, APITestCase):
+    def test_process_writes_new_names_before_removing_old_files(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 300), (200, 30, 30)).save(buffer, format='JPEG', quality=100)
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            (pengiriman,) = self.create_pengiriman(1, paket=1, riwayat=0)
+            paket = pengiriman.paket_set.get()
+            paket.foto_paket.save('barang.jpg', ContentFile(buffer.getvalue()))
+            storage, asli = paket.foto_paket.storage, paket.foto_paket.name
+
+            images.process_image(Paket, paket.pk, 'foto_paket')
+            paket.refresh_from_db()
+            self.assertNotEqual(paket.foto_paket.name, asli)
+            self.assertFalse(storage.exists(asli))
+            for info in paket.foto_paket_varian.values():
+                self.assertTrue(storage.exists(info['name']))
+
+            # Isi sama: tidak diproses ulang, nama tetap
+            varian = paket.foto_paket_varian
+            images.process_image(Paket, paket.pk, 'foto_paket')
+            paket.refresh_from_db()
+            self.assertEqual(paket.foto_paket_varian, varian)
+
+
+class TotalsTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pengiriman = self.create_pengiriman(1, paket=2, riwayat=0)[0]
+        self.paket = list(self.pengiriman.paket_set.order_by('pk'))
+
+    def totals(self):
+        self.pengiriman.refresh_from_db()
+        return self.pengiriman.total_berat, self.pengiriman.total_biaya
+
+    def test_sekali_hitung_ulang_per_commit(self):
+        with mock.patch.object(totals, 'recalculate_totals', wraps=totals.recalculate_totals) as hitung:
+            with self.captureOnCommitCallbacks(execute=True):
+                for paket in self.paket:
+                    paket.berat = 2
+                    paket.save()
+                Paket.objects.create(
+                    pengiriman=self.pengiriman, penerima=self.paket[0].penerima, nama_barang='Tas',
+                    deskripsi_barang='-', berat=1, panjang=10, lebar=10, tinggi=10,
+                )
+                self.assertEqual(hitung.call_count, 0)
+        self.assertEqual(hitung.call_count, 1)
+        self.assertEqual(set(hitung.call_args.args[0]), {self.pengiriman.pk})
+        self.assertEqual(self.totals()[0], Decimal('5.00'))
+
+    def test_hapus_dan_soft_delete_paket(self):
+        berat, biaya = self.totals()
+        self.assertEqual(berat, Decimal('2.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paket[0].is_active = False
+            self.paket[0].save()
+        # Paket nonaktif tidak ditampilkan, jadi juga tidak dihitung
+        self.assertEqual(self.totals(), (Decimal('1.00'), biaya / 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paket[1].delete()
+        self.assertEqual(self.totals(), (Decimal('0.00'), Decimal('0.00')))
+
+    def test_backfill_command(self):
+        benar = self.totals()
+        lain = self.create_pengiriman(1, paket=1, riwayat=0)[0]
+        Pengiriman.objects.update(total_berat=0, total_biaya=0)
+        call_command('recalculate_totals', lain.pk, stdout=io.StringIO())
+        self.assertEqual(self.totals(), (Decimal('0.00'), Decimal('0.00')))
+        out = io.StringIO()
+        call_command('recalculate_totals', '--batch-size', '1', stdout=out)
+        self.assertIn('2 pengiriman', out.getvalue())
+        self.assertEqual(self.totals(), benar)
+        lain.refresh_from_db()
+        self.assertEqual(lain.total_berat, Decimal('1.00'))
+
+
+class TarifTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/quote/'
+
+    def setUp(self):
+        # Tabel hasil kompilasi tidak ikut di-rollback antar test
+        tarif.clear()
+        self.addCleanup(tarif.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.zona = ZonaTarif.objects.create(nama='Jawa Barat', prefix_kode_pos=['40'])
+            self.tarif_zona = TarifLayanan.objects.create(
+                jenis_layanan=self.layanan, zona=self.zona, berat_maks=5, tarif_per_kg=8000, biaya_tetap=2000
+            )
+            TarifLayanan.objects.create(jenis_layanan=self.layanan, tarif_per_kg=12000)
+        self.authenticate(self.pelanggan)
+
+    def quote(self, *paket_list):
+        return self.client.post(self.url, {'paket': list(paket_list)}, format='json')
+
+    def test_total_pengiriman_memakai_tabel_tarif(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pengiriman = self.create_pengiriman(1, paket=2, riwayat=0)[0]
+            penerima = Penerima.objects.create(
+                nama_penerima='Penerima Medan', alamat_penerima='-', nomor_telepon_penerima='0800',
+                kota_tujuan='Medan', kode_pos='20111'
+            )
+            # Berat volumetrik 60 x 50 x 40 / 6000 = 20 kg di atas berat aktual 3 kg
+            Paket.objects.create(
+                pengiriman=pengiriman, penerima=penerima, nama_barang='Kardus', deskripsi_barang='-',
+                berat=3, panjang=60, lebar=50, tinggi=40, nilai_barang=1000000, asuransi=True
+            )
+        pengiriman.refresh_from_db()
+        self.assertEqual(str(pengiriman.total_berat), '5.00')
+        # 2 x (2000 + 1 x 8000) zona Jawa Barat + 20 x 12000 + asuransi 0,2% x 1.000.000
+        self.assertEqual(str(pengiriman.total_biaya), str(2 * 10000 + 240000 + 2000) + '.00')
+
+    def test_quote_batch_tanpa_query(self):
+        paket_list = [
+            {'ref': 'a', 'jenis_layanan': self.layanan.pk, 'kode_pos': '40111', 'berat': '2.5'},
+            {'ref': 'b', 'jenis_layanan': self.layanan.pk, 'kode_pos': '99999', 'berat': '1',
+             'panjang': 30, 'lebar': 30, 'tinggi': 20, 'nilai_barang': '100000', 'asuransi': True},
+            {'ref': 'c', 'jenis_layanan': 9999, 'kode_pos': '40111', 'berat': '1'},
+        ]
+        self.quote(*paket_list)
+        with self.assertNumQueries(0):
+            response = self.quote(*paket_list)
+        self.assertEqual(response.status_code, 207)
+        a, b, c = response.json()['results']
+        self.assertEqual((a['zona'], a['berat_tagih'], a['total']), ('Jawa Barat', '2.50', '22000.00'))
+        self.assertEqual(
+            (b['zona'], b['berat_tagih'], b['ongkir'], b['asuransi']), (None, '3.00', '36000.00', '200.00')
+        )
+        self.assertEqual(c['status'], 'invalid')
+        self.assertEqual(Pengiriman.objects.count(), 0)
+
+    def test_tabel_dimuat_ulang_setelah_perubahan(self):
+        paket = {'jenis_layanan': self.layanan.pk, 'kode_pos': '40111', 'berat': '1'}
+        self.assertEqual(self.quote(paket).json()['results'][0]['total'], '10000.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tarif_zona.tarif_per_kg = 9000
+            self.tarif_zona.save()
+        self.assertEqual(self.quote(paket).json()['results'][0]['total'], '11000.00')
+
+        # Proses lain mengubah tarif (tanpa signal di proses ini): terlihat dari
+        # database setelah interval pemeriksaan, tanpa cache bersama
+        TarifLayanan.objects.filter(pk=self.tarif_zona.pk).update(tarif_per_kg=7000, updated_at=timezone.now())
+        self.assertEqual(self.quote(paket).json()['results'][0]['total'], '11000.00')
+        with override_settings(EKSPEDISI_TARIF={'interval': 0}):
+            self.assertEqual(self.quote(paket).json()['results'][0]['total'], '9000.00')
+            # Hapus (tanpa signal, seperti di proses lain) tidak mengubah updated_at
+            # terbaru, tetapi mengubah jumlah baris
+            TarifLayanan.objects.filter(pk=self.tarif_zona.pk)._raw_delete('default')
+            self.assertEqual(self.quote(paket).json()['results'][0]['total'], '12000.00')
+
+    def test_perubahan_yang_di_rollback_tidak_masuk_tabel_global(self):
+        def biaya():
+            return tarif.get_tabel().biaya(self.layanan.pk, '40111', 1)
+
+        self.assertEqual(biaya(), Decimal('10000.00'))
+        try:
+            with transaction.atomic():
+                self.tarif_zona.tarif_per_kg = 999999
+                self.tarif_zona.save()
+                # Transaksi yang mengubah tarif melihat perubahannya sendiri
+                self.assertEqual(biaya(), Decimal('1001999.00'))
+                raise RuntimeError('batal')
+        except RuntimeError:
+            pass
+        self.assertEqual(biaya(), Decimal('10000.00'))
+
+
+class SearchTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/search/'
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.satu, self.dua = self.create_pengiriman(2, paket=2, riwayat=0)
+            self.penerima = self.satu.paket_set.order_by('pk').first().penerima
+            self.penerima.nama_penerima = 'Siti Aminah'
+            self.penerima.save()
+            pelanggan_lain = self.create_user('pelanggan2', 'pelanggan')
+            self.lain = Pengiriman.objects.create(pengirim=pelanggan_lain, jenis_layanan=self.layanan)
+
+    def search(self, user, q):
+        self.authenticate(user)
+        response = self.client.get(self.url, {'q': q})
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return response.json()
+
+    def resi(self, user, q):
+        return [row['nomor_resi'] for row in self.search(user, q)['results']]
+
+    def test_cari_resi_telepon_dan_nama(self):
+        data = self.search(self.admin, 'aminah')
+        self.assertEqual(data['backend'], 'fts5')
+        self.assertEqual([row['id'] for row in data['results']], [self.satu.pk])
+        self.assertEqual(data['results'][0]['cocok'], ['nama_penerima'])
+        # Potongan nomor telepon dan resi
+        self.assertEqual(self.resi(self.admin, '000100'), [self.dua.nomor_resi])
+        self.assertEqual(self.resi(self.admin, self.lain.nomor_resi), [self.lain.nomor_resi])
+        self.assertEqual(self.resi(self.admin, self.lain.nomor_resi.lower())[0], self.lain.nomor_resi)
+        self.authenticate(self.admin)
+        self.assertEqual(self.client.get(self.url, {'q': 'ab'}).status_code, 400)
+
+    def test_cakupan_role(self):
+        self.assertEqual(len(self.resi(self.admin, 'EKS')), 3)
+        self.assertEqual(len(self.resi(self.pelanggan, 'EKS')), 2)
+        self.assertEqual(len(self.resi(self.kurir, 'EKS')), 2)
+        self.assertEqual(self.resi(self.pelanggan, self.lain.nomor_resi), [])
+
+    def test_index_diperbarui_setelah_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.penerima.nama_penerima = 'Budi Santoso'
+            self.penerima.save()
+            self.dua.paket_set.update(is_active=False)
+            pencarian.index_on_commit([('pengiriman', self.dua.pk)], 'default')
+        self.assertEqual(self.resi(self.admin, 'aminah'), [])
+        self.assertEqual(self.resi(self.admin, 'santoso'), [self.satu.nomor_resi])
+        self.assertEqual(self.resi(self.admin, '000100'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lain.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {pencarian.TABEL}')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_fallback_orm(self):
+        with mock.patch.object(pencarian, 'fts_tersedia', return_value=False):
+            data = self.search(self.admin, 'aminah')
+            self.assertEqual(data['backend'], 'orm')
+            self.assertEqual([row['id'] for row in data['results']], [self.satu.pk])
+            self.assertEqual(self.resi(self.admin, '000100'), [self.dua.nomor_resi])
+            self.assertEqual(self.resi(self.admin, self.lain.nomor_resi)[0], self.lain.nomor_resi)
+            self.assertEqual(len(self.resi(self.pelanggan, 'EKS')), 2)
+
+
+class ScanIngestTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/scan/'
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.satu, self.dua = self.create_pengiriman(2, paket=1, riwayat=0)
+        self.kode_paket = self.dua.paket_set.get().kode_paket
+        self.authenticate(self.kurir)
+
+    def post(self, events):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'events': events}, format='json')
+
+    def test_batch_applies_transitions_and_is_idempotent(self):
+        events = [
+            {'event_id': 'e1', 'nomor_resi': self.satu.nomor_resi, 'status': 'pickup', 'lokasi': 'Jakarta',
+             'waktu': '2026-01-01T08:00:00+07:00'},
+            {'event_id': 'e3', 'nomor_resi': self.satu.nomor_resi, 'status': 'transit', 'lokasi': 'Hub Bandung',
+             'waktu': '2026-01-01T10:00:00+07:00'},
+            {'event_id': 'e2', 'kode_paket': self.kode_paket, 'status': 'cancelled', 'lokasi': 'Jakarta'},
+            {'event_id': 'e4', 'kode_paket': self.kode_paket, 'status': 'transit', 'lokasi': 'Jakarta'},
+            {'event_id': 'e5', 'nomor_resi': 'TIDAKADA', 'status': 'transit', 'lokasi': 'Jakarta'},
+            {'event_id': 'e6', 'status': 'transit', 'lokasi': 'Jakarta'},
+        ]
+        response = self.post(events)
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result['status'] for result in response.json()['results']],
+            ['applied', 'applied', 'applied', 'rejected', 'not_found', 'invalid'],
+        )
+        self.satu.refresh_from_db()
+        self.dua.refresh_from_db()
+        self.assertEqual((self.satu.status_pengiriman, self.dua.status_pengiriman), ('transit', 'cancelled'))
+        self.assertEqual(self.satu.last_lokasi, 'Hub Bandung')
+        self.assertEqual(RiwayatPengiriman.objects.filter(event_id__isnull=False).count(), 3)
+
+        # Kirim ulang: tidak ada riwayat ganda, counter sama dengan hasil rekonsiliasi
+        response = self.post(events[:3])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['jumlah'], {'duplicate': 3})
+        self.assertEqual(RiwayatPengiriman.objects.filter(event_id__isnull=False).count(), 3)
+        counters = dict(Statistik.objects.filter(nilai__gt=0).values_list('kunci', 'nilai'))
+        statistik.rekonsiliasi()
+        self.assertEqual(dict(Statistik.objects.filter(nilai__gt=0).values_list('kunci', 'nilai')), counters)
+
+    def test_jumlah_query_tidak_bertambah_dengan_ukuran_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            daftar = self.create_pengiriman(10, paket=0, riwayat=0)
+
+        def events(prefix, pengiriman):
+            return [
+                {'event_id': f'{prefix}{obj.pk}', 'nomor_resi': obj.nomor_resi, 'status': 'pickup',
+                 'lokasi': 'Jakarta', 'waktu': '2026-01-01T08:00:00+07:00'}
+                for obj in pengiriman
+            ]
+
+        # Batch pertama mengisi cache auth/tarif; yang diukur batch berikutnya
+        self.post(events('a', daftar[:1]))
+        with CaptureQueriesContext(connection) as satu:
+            self.post(events('b', daftar[1:2]))
+        with self.assertNumQueries(len(satu)):
+            response = self.post(events('c', daftar[2:]))
+        self.assertEqual(response.json()['jumlah'], {'applied': 8})
+
+    def test_scan_terlambat_tidak_memundurkan_lokasi_terakhir(self):
+        resi = self.satu.nomor_resi
+        self.post([
+            {'event_id': 'e1', 'nomor_resi': resi, 'status': 'pickup', 'lokasi': 'Jakarta',
+             'waktu': '2026-01-01T08:00:00+07:00'},
+            {'event_id': 'e2', 'nomor_resi': resi, 'status': 'transit', 'lokasi': 'Hub Bandung',
+             'waktu': '2026-01-01T10:00:00+07:00'},
+        ])
+        # Scan hub sebelumnya baru terkirim setelah scan yang lebih baru
+        response = self.post([
+            {'event_id': 'e3', 'nomor_resi': resi, 'status': 'transit', 'lokasi': 'Hub Cirebon',
+             'waktu': '2026-01-01T09:00:00+07:00'},
+        ])
+        self.assertEqual(response.json()['results'][0]['status'], 'recorded')
+        self.satu.refresh_from_db()
+        self.assertEqual(self.satu.last_lokasi, 'Hub Bandung')
+        self.assertEqual(self.satu.last_event_at, RiwayatPengiriman.objects.get(event_id='e2').waktu)
+        self.assertEqual(RiwayatPengiriman.objects.filter(pengiriman=self.satu).count(), 3)
+
+        response = self.post([
+            {'event_id': 'e4', 'nomor_resi': resi, 'status': 'delivered', 'lokasi': 'Bandung',
+             'waktu': '2026-01-01T09:30:00+07:00'},
+        ])
+        self.satu.refresh_from_db()
+        self.assertEqual((self.satu.status_pengiriman, self.satu.last_lokasi), ('delivered', 'Hub Bandung'))
+
+    def test_event_id_ganda_dalam_batch_mengulang_hasil_pertama(self):
+        resi = self.satu.nomor_resi
+        ditolak = {'event_id': 'e1', 'nomor_resi': resi, 'status': 'delivered', 'lokasi': 'Jakarta'}
+        diterima = {'event_id': 'e2', 'nomor_resi': resi, 'status': 'pickup', 'lokasi': 'Jakarta'}
+        self.post([{'event_id': 'e0', 'nomor_resi': resi, 'status': 'cancelled', 'lokasi': 'Jakarta'}])
+        response = self.post([ditolak, ditolak])
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], ['rejected', 'rejected'])
+        self.assertEqual(results[1]['errors'], results[0]['errors'])
+        self.assertEqual(results[1]['index'], 1)
+        self.assertEqual(response.status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            (baru,) = self.create_pengiriman(1, paket=0, riwayat=0)
+        diterima['nomor_resi'] = baru.nomor_resi
+        response = self.post([diterima, diterima])
+        self.assertEqual(response.json()['jumlah'], {'applied': 2})
+        self.assertEqual(RiwayatPengiriman.objects.filter(event_id='e2').count(), 1)
+
+    def test_pelanggan_forbidden(self):
+        self.authenticate(self.pelanggan)
+        response = self.client.post(self.url, {'events': [{'event_id': 'x'}]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class TransisiTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            (self.pengiriman,) = self.create_pengiriman(1, paket=1, riwayat=0)
+        self.url = f'/api/pengiriman/{self.pengiriman.pk}/'
+        self.authenticate(self.admin)
+
+    def test_patch_status_writes_riwayat_and_last_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                self.url, {'status_pengiriman': 'pickup', 'lokasi': 'Gudang Jakarta', 'catatan': 'Fragile'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['last_lokasi'], 'Gudang Jakarta')
+        self.pengiriman.refresh_from_db()
+        self.assertEqual((self.pengiriman.status_pengiriman, self.pengiriman.catatan), ('pickup', 'Fragile'))
+        riwayat = RiwayatPengiriman.objects.get(pengiriman=self.pengiriman)
+        self.assertEqual((riwayat.status, riwayat.lokasi), ('pickup', 'Gudang Jakarta'))
+        self.assertEqual(self.pengiriman.last_event_at, riwayat.waktu)
+        self.assertTrue(WebhookOutbox.objects.filter(jenis='status', pengiriman_id=self.pengiriman.pk).exists())
+
+        # Mundur ke pending ditolak tanpa menulis riwayat
+        response = self.client.patch(self.url, {'status_pengiriman': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status_pengiriman', response.json())
+        self.assertEqual(RiwayatPengiriman.objects.filter(pengiriman=self.pengiriman).count(), 1)
+
+    def test_post_riwayat_applies_transition(self):
+        data = {'pengiriman': self.pengiriman.pk, 'status': 'transit', 'keterangan': '-', 'lokasi': 'Hub Bandung'}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/riwayat-pengiriman/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.pengiriman.refresh_from_db()
+        self.assertEqual((self.pengiriman.status_pengiriman, self.pengiriman.last_lokasi), ('transit', 'Hub Bandung'))
+
+        response = self.client.post('/api/riwayat-pengiriman/', dict(data, status='cancelled'), format='json')
+        self.assertEqual(response.status_code, 400)
+        riwayat_id = RiwayatPengiriman.objects.get(pengiriman=self.pengiriman).pk
+        response = self.client.patch(
+            f'/api/riwayat-pengiriman/{riwayat_id}/', {'status': 'delivered'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_stale_status_conflicts(self):
+        basi = Pengiriman.objects.get(pk=self.pengiriman.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            transisi.terapkan(self.pengiriman, 'cancelled', 'Jakarta')
+            with self.assertRaises(transisi.StatusBerubah):
+                transisi.terapkan(basi, 'pickup', 'Jakarta')
+        self.assertEqual(
+            list(RiwayatPengiriman.objects.filter(pengiriman=self.pengiriman).values_list('status', flat=True)),
+            ['cancelled'],
+        )
+        self.pengiriman.refresh_from_db()
+        self.assertEqual(self.pengiriman.status_pengiriman, 'cancelled')
+        with self.assertRaises(transisi.TransisiDitolak):
+            transisi.terapkan(self.pengiriman, 'pickup', 'Jakarta')
+
+    def test_pengiriman_nonaktif_ditolak(self):
+        basi = Pengiriman.objects.get(pk=self.pengiriman.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pengiriman.is_active = False
+            self.pengiriman.save()
+        with self.assertRaises(transisi.PengirimanNonaktif):
+            transisi.terapkan(self.pengiriman, 'pickup', 'Jakarta')
+        # Objek lama (masih aktif di memori) ditolak oleh compare-and-set
+        with self.assertRaises(transisi.PengirimanNonaktif):
+            transisi.terapkan(basi, 'pickup', 'Jakarta')
+        data = {'pengiriman': self.pengiriman.pk, 'status': 'pickup', 'keterangan': '-', 'lokasi': 'Jakarta'}
+        response = self.client.post('/api/riwayat-pengiriman/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['pengiriman'], ['Pengiriman sudah nonaktif.'])
+        self.assertFalse(RiwayatPengiriman.objects.filter(pengiriman=self.pengiriman).exists())
+
+
+class ExportTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        self.create_pengiriman(3, paket=2, riwayat=1)
+        self.authenticate(self.admin)
+
+    def download(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_ndjson_and_gzip(self):
+        _, body = self.download('/api/paket/export/?jenis_paket=kecil')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0][:2], ['kode_paket', 'nomor_resi'])
+        self.assertEqual(len(rows), 7)
+
+        response, body = self.download('/api/riwayat-pengiriman/export/?tipe=ndjson', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(body).decode().splitlines()
+        self.assertEqual([json.loads(line)['status'] for line in lines], ['transit'] * 3)
+
+        self.authenticate(self.pelanggan)
+        _, body = self.download('/api/pengiriman/export/?status_pengiriman=delivered')
+        self.assertEqual(len(body.decode().splitlines()), 1)
+
+    def test_xlsx_rolls_over_sheets(self):
+        _, body = self.download('/api/pengiriman/export/?tipe=xlsx')
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertIn('xl/workbook.xml', archive.namelist())
+            self.assertEqual(archive.read('xl/worksheets/sheet1.xml').count(b'<row>'), 4)
+
+        header, rows = export.export_rows('paket', Paket.objects.all(), chunk_size=2)
+        body = b''.join(export.write_xlsx(header, rows, max_rows=4))
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            sheets = [name for name in archive.namelist() if name.startswith('xl/worksheets/')]
+            self.assertEqual(len(sheets), 2)
+            self.assertIn(b'sheet2.xml', archive.read('xl/_rels/workbook.xml.rels'))
+
+
+class TrackingCacheTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        caches['tracking'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pengiriman = self.create_pengiriman(1)[0]
+        self.url = f'/api/tracking/{self.pengiriman.nomor_resi}/'
+
+    def test_cached_document_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_new_riwayat_invalidates_document(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            RiwayatPengiriman.objects.create(
+                pengiriman=self.pengiriman, status='delivered', keterangan='-', lokasi='Bandung'
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('delivered', [r['status'] for r in response.json()['data']['riwayat_pengiriman']])
+
+    def test_document_built_before_invalidation_is_not_served(self):
+        build = tracking.build_document
+
+        def build_lalu_commit(nomor_resi):
+            # Dokumen dibangun dari data lama, invalidasi commit lain terjadi sebelum set
+            document = build(nomor_resi)
+            tracking.invalidate([nomor_resi])
+            return document
+
+        with mock.patch.object(tracking, 'build_document', build_lalu_commit):
+            tracking.get_document(self.pengiriman.nomor_resi)
+        misses = tracking.stats.snapshot()['misses']
+        tracking.get_document(self.pengiriman.nomor_resi)
+        self.assertEqual(tracking.stats.snapshot()['misses'], misses + 1)
+
+
+class ResponseCacheTests(EkspedisiDataMixin, APITestCase):
+    url = '/api/jenis-layanan/'
+
+    def setUp(self):
+        caches['default'].clear()
+        self.authenticate(self.pelanggan)
+
+    def test_cached_bytes_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Response-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached['X-Response-Cache'], 'hit')
+        self.assertEqual(cached.content, response.content)
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        # Query param dan role berbeda memakai entri sendiri
+        self.assertEqual(self.client.get(self.url, {'nama_layanan': 'Kilat'})['X-Response-Cache'], 'miss')
+        self.authenticate(self.admin)
+        self.assertEqual(self.client.get(self.url)['X-Response-Cache'], 'miss')
+
+    def test_write_invalidates_after_commit(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            JenisLayanan.objects.create(nama_layanan='Kilat', deskripsi='-', tarif_per_kg=20000)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Kilat', [row['nama_layanan'] for row in response.json()['results']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            penerima_id = self.create_pengiriman(1, paket=1)[0].paket_set.get().penerima_id
+        detail = f'/api/penerima/{penerima_id}/'
+        self.authenticate(self.admin)
+        self.client.get(detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail, {'kota_tujuan': 'Surabaya'}, format='json')
+        self.assertEqual(self.client.get(detail).json()['kota_tujuan'], 'Surabaya')
+
+
+    def test_bulk_ingest_menginvalidasi_penerima(self):
+        self.authenticate(self.admin)
+        etag = self.client.get('/api/penerima/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.ingest_manifest([{
+                'jenis_layanan': self.layanan.pk,
+                'paket': [{
+                    'nama_barang': 'Buku', 'deskripsi_barang': '-', 'berat': 1, 'panjang': 1, 'lebar': 1,
+                    'tinggi': 1, 'penerima': {
+                        'nama_penerima': 'Baru', 'alamat_penerima': '-', 'nomor_telepon_penerima': '0899',
+                        'kota_tujuan': 'Bandung', 'kode_pos': '40111',
+                    },
+                }],
+            }], self.admin)
+        response = self.client.get('/api/penerima/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Response-Cache']), (200, 'miss'))
+        self.assertIn('Baru', [row['nama_penerima'] for row in response.json()['results']])
+
+    def test_ttl_pendek_jika_cache_per_proses(self):
+        # LocMem: proses lain tidak melihat token versi baru, jadi entri cepat kedaluwarsa
+        cache = caches['default']
+        with mock.patch.object(cache, 'set', wraps=cache.set) as simpan:
+            self.client.get(self.url)
+        self.assertEqual(simpan.call_args.args[2], response_cache.get_config()['local_timeout'])
+
+        with tempfile.TemporaryDirectory() as direktori, override_settings(
+            CACHES=dict(settings.CACHES, bersama={
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': direktori,
+            }),
+            EKSPEDISI_RESPONSE_CACHE={'cache': 'bersama', 'timeout': 600},
+        ):
+            cache = caches['bersama']
+            with mock.patch.object(cache, 'set', wraps=cache.set) as simpan:
+                self.assertEqual(self.client.get(self.url)['X-Response-Cache'], 'miss')
+            self.assertEqual(simpan.call_args.args[2], 600)
+            self.assertEqual(self.client.get(self.url)['X-Response-Cache'], 'hit')
+
+
+class AsyncViewTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        caches['tracking'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pengiriman = self.create_pengiriman(1)[0]
+        self.events_url = f'/api/async/tracking/{self.pengiriman.nomor_resi}/events/'
+
+    def test_async_tracking_and_dashboard_match_sync(self):
+        resi = self.pengiriman.nomor_resi
+        sync = self.client.get(f'/api/tracking/{resi}/')
+        response = self.client.get(f'/api/async/tracking/{resi}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, sync.content)
+        self.assertEqual(response['ETag'], sync['ETag'])
+        self.assertEqual(self.client.get('/api/async/tracking/TIDAK-ADA/').status_code, 404)
+
+        self.assertEqual(self.client.get('/api/async/dashboard/stats/').status_code, 401)
+        self.authenticate(self.admin)
+        self.assertEqual(
+            self.client.get('/api/async/dashboard/stats/').json(), self.client.get('/api/dashboard/stats/').json()
+        )
+
+    def test_long_poll_returns_events_after_cursor(self):
+        ids = list(self.pengiriman.riwayat_pengiriman.order_by('pk').values_list('pk', flat=True))
+        data = self.client.get(self.events_url, {'after': ids[0]}).json()
+        self.assertEqual([event['id'] for event in data['events']], ids[1:])
+        self.assertEqual(data['cursor'], ids[-1])
+        # Tanpa cursor hanya event baru; timeout 0 langsung menjawab kosong
+        data = self.client.get(self.events_url, {'timeout': 0}).json()
+        self.assertEqual((data['events'], data['cursor']), ([], ids[-1]))
+        self.assertEqual(pubsub.broker.subscribers, 0)
+        self.assertEqual(self.client.get(self.events_url, {'stream': 1}).status_code, 400)
+
+    async def test_long_poll_woken_by_new_riwayat(self):
+        poll = asyncio.ensure_future(self.async_client.get(self.events_url, {'timeout': 5}))
+        while not pubsub.broker.subscribers:
+            await asyncio.sleep(0.01)
+        riwayat = await RiwayatPengiriman.objects.acreate(
+            pengiriman=self.pengiriman, status='delivered', keterangan='-', lokasi='Bandung'
+        )
+        # Dalam TestCase transaksi tidak pernah commit: kirim notifikasi on_commit secara langsung
+        pubsub.broker.publish([self.pengiriman.pk])
+        response = await asyncio.wait_for(poll, 5)
+        self.assertEqual([event['id'] for event in response.json()['events']], [riwayat.pk])
+        self.assertEqual(pubsub.broker.subscribers, 0)
+
+    def test_riwayat_publishes_on_commit(self):
+        before = pubsub.broker.snapshot()['published']
+        with self.captureOnCommitCallbacks(execute=True):
+            RiwayatPengiriman.objects.create(
+                pengiriman=self.pengiriman, status='delivered', keterangan='-', lokasi='Bandung'
+            )
+            RiwayatPengiriman.objects.create(
+                pengiriman=self.pengiriman, status='delivered', keterangan='-', lokasi='Bandung'
+            )
+            self.assertEqual(pubsub.broker.snapshot()['published'], before)
+        self.assertEqual(pubsub.broker.snapshot()['published'], before + 1)
+
+
+class WebhookTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        self.receiver = WebhookReceiver()
+        self.receiver.__enter__()
+        self.addCleanup(self.receiver.__exit__)
+        self.endpoint = WebhookEndpoint.objects.create(pemilik=self.pelanggan, url=self.receiver.url)
+
+    def dispatch(self, **config):
+        config = dict(webhook.get_config(), allowed_hosts=['127.0.0.1'], **config)
+        dispatcher = webhook.Dispatcher(workers=0, config=config)
+        self.addCleanup(dispatcher.close)
+        return dispatcher.run_once()
+
+    def resolve(self, *alamat):
+        return mock.patch.object(webhook.socket, 'getaddrinfo', return_value=[
+            (webhook.socket.AF_INET, webhook.socket.SOCK_STREAM, 6, '', (ip, 443)) for ip in alamat
+        ])
+
+    def test_register_endpoint(self):
+        self.authenticate(self.kurir)
+        with self.resolve('93.184.216.34'):
+            response = self.client.post(
+                '/api/webhooks/', {'url': 'https://kurir.contoh.id/hook', 'konkurensi': 2}, format='json'
+            )
+            invalid = self.client.post('/api/webhooks/', {'url': 'https://x.id/', 'konkurensi': 0}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['secret']), 64)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual([row['url'] for row in self.client.get('/api/webhooks/').data['results']],
+                         ['https://kurir.contoh.id/hook'])
+        self.assertEqual(self.client.get(f'/api/webhooks/{self.endpoint.pk}/').status_code, 404)
+
+    def test_register_menolak_alamat_internal(self):
+        self.authenticate(self.kurir)
+        for url in ['http://127.0.0.1/hook', 'https://127.0.0.1/hook', 'https://169.254.169.254/latest',
+                    'https://10.0.0.1/', 'https://[::ffff:192.168.1.1]/', 'ftp://kurir.contoh.id/']:
+            response = self.client.post('/api/webhooks/', {'url': url}, format='json')
+            self.assertEqual(response.status_code, 400, url)
+        # Nama publik yang ter-resolve ke alamat internal
+        with self.resolve('93.184.216.34', '10.1.2.3'):
+            response = self.client.post('/api/webhooks/', {'url': 'https://kurir.contoh.id/'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # http ditolak walau alamatnya publik
+        with self.resolve('93.184.216.34'):
+            response = self.client.post('/api/webhooks/', {'url': 'http://kurir.contoh.id/'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEndpoint.objects.filter(pemilik=self.kurir).exists())
+
+    def test_alamat_diperiksa_ulang_saat_connect(self):
+        # URL lolos saat didaftarkan, lalu DNS-nya diarahkan ke loopback (rebinding)
+        port = self.receiver.url.split(':')[2].split('/')[0]
+        WebhookEndpoint.objects.filter(pk=self.endpoint.pk).update(url=f'http://rebind.contoh.id:{port}/')
+        self.create_pengiriman(1, paket=0, riwayat=1)
+        with self.resolve('127.0.0.1'):
+            self.dispatch(require_https=False)
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.percobaan), ('pending', 1))
+        self.assertIn('non-publik', delivery.error)
+        self.assertEqual(self.receiver.requests, [])
+
+        # Alamat publik: socket disambungkan ke IP yang sudah diperiksa, bukan resolve ulang
+        WebhookDelivery.objects.update(berikutnya=timezone.now())
+        with self.resolve('93.184.216.34'), mock.patch.object(
+            webhook.socket, 'create_connection', side_effect=ConnectionRefusedError
+        ) as create_connection:
+            self.dispatch(require_https=False)
+        self.assertEqual(create_connection.call_args.args[0], ('93.184.216.34', int(port)))
+
+    def test_outbox_follows_transaction(self):
+        pengiriman = self.create_pengiriman(1, paket=0, riwayat=2)[0]
+        self.assertEqual(list(WebhookOutbox.objects.values_list('jenis', flat=True)), ['riwayat', 'riwayat'])
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            pengiriman.status_pengiriman = 'transit'
+            pengiriman.save()
+            raise RuntimeError
+        self.assertEqual(WebhookOutbox.objects.count(), 2)
+        pengiriman = Pengiriman.objects.get(pk=pengiriman.pk)
+        pengiriman.status_pengiriman = 'transit'
+        pengiriman.save()
+        self.assertEqual(WebhookOutbox.objects.latest('pk').payload['status_baru'], 'transit')
+
+        scan.ingest_scans([{'event_id': 'wh-1', 'nomor_resi': pengiriman.nomor_resi, 'status': 'delivered',
+                       'lokasi': 'Bandung'}])
+        self.assertEqual(
+            sorted(WebhookOutbox.objects.order_by('-pk').values_list('jenis', flat=True)[:2]), ['riwayat', 'status']
+        )
+
+    def test_batched_signed_delivery(self):
+        self.create_pengiriman(2, paket=0, riwayat=2)
+        # Event pengirim tanpa endpoint dibuang saat diteruskan
+        Pengiriman.objects.create(pengirim=self.kurir, jenis_layanan=self.layanan).riwayat_pengiriman.create(
+            status='pending', keterangan='-', lokasi='-'
+        )
+        self.assertEqual(self.dispatch(batch_size=3), 2)
+        self.assertEqual([len(json.loads(body)['events']) for _, _, body, _ in self.receiver.requests], [3, 1])
+        for _, headers, body, _ in self.receiver.requests:
+            self.assertTrue(webhook.verifikasi(
+                self.endpoint.secret, headers['X-Ekspedisi-Timestamp'], body, headers['X-Ekspedisi-Signature']
+            ))
+        self.assertEqual(self.receiver.connections, 1)
+        self.assertEqual(set(WebhookDelivery.objects.values_list('status', flat=True)), {'delivered'})
+        self.assertEqual(WebhookOutbox.objects.count(), 4)
+
+    def test_retry_with_backoff_then_failed(self):
+        self.receiver.responses = [500, 503]
+        self.create_pengiriman(1, paket=0, riwayat=1)
+        self.dispatch(max_attempts=2)
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.percobaan, delivery.error), ('pending', 1, 'HTTP 500'))
+        self.assertGreater(delivery.berikutnya, timezone.now())
+        # Belum jatuh tempo: tidak dikirim ulang
+        self.assertEqual(self.dispatch(max_attempts=2), 0)
+
+        WebhookDelivery.objects.update(berikutnya=timezone.now())
+        self.dispatch(max_attempts=2)
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.percobaan), ('failed', 2))
+        self.assertEqual(len(self.receiver.requests), 2)
+
+
+class StatistikTests(EkspedisiDataMixin, APITestCase):
+    def snapshot(self):
+        return (
+            dict(Statistik.objects.filter(nilai__gt=0).values_list('kunci', 'nilai')),
+            sorted(
+                StatistikHarian.objects.filter(jumlah_paket__gt=0)
+                .values_list('tanggal', 'jenis_layanan_id', 'kota_tujuan', 'status_pengiriman', 'jumlah_paket')
+            ),
+        )
+
+    def test_incremental_counters_match_reconciliation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            statistik.rekonsiliasi()
+            daftar = self.create_pengiriman(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            pengiriman = Pengiriman.objects.get(pk=daftar[0].pk)
+            pengiriman.status_pengiriman = 'transit'
+            pengiriman.save()
+            paket = Paket.objects.filter(pengiriman=daftar[1]).first()
+            paket.is_active = False
+            paket.save()
+            Pengiriman.objects.get(pk=daftar[2].pk).delete()
+
+        incremental = self.snapshot()
+        statistik.rekonsiliasi()
+        self.assertEqual(incremental, self.snapshot())
+
+        self.authenticate(self.admin)
+        data = self.client.get('/api/dashboard/stats/').json()
+        self.assertEqual(data['total_pengiriman'], 2)
+        self.assertEqual(data['pengiriman_transit'], 1)
+        self.assertEqual(data['total_paket'], 3)
+
+    def test_rolled_back_savepoint_discards_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            statistik.rekonsiliasi()
+        kunci = statistik.kunci_pengiriman('pending')
+        awal = Statistik.objects.filter(kunci=kunci).values_list('nilai', flat=True).first() or 0
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Pengiriman.objects.create(pengirim=self.pelanggan, jenis_layanan=self.layanan)
+                try:
+                    with transaction.atomic():
+                        Pengiriman.objects.create(pengirim=self.pelanggan, jenis_layanan=self.layanan)
+                        raise RuntimeError('batal')
+                except RuntimeError:
+                    pass
+        self.assertEqual(Statistik.objects.get(kunci=kunci).nilai, awal + 1)
+        incremental = self.snapshot()
+        statistik.rekonsiliasi()
+        self.assertEqual(incremental, self.snapshot())
+
+
+class ArsipTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lama, self.batal, self.baru = self.create_pengiriman(3)
+            Pengiriman.objects.filter(pk=self.lama.pk).update(status_pengiriman='delivered')
+            Pengiriman.objects.filter(pk=self.batal.pk).update(status_pengiriman='cancelled')
+            Pengiriman.objects.filter(pk=self.baru.pk).update(status_pengiriman='delivered')
+        statistik.rekonsiliasi()
+        dulu = timezone.now() - timedelta(days=120)
+        Pengiriman.objects.filter(pk__in=[self.lama.pk, self.batal.pk]).update(updated_at=dulu)
+
+    def test_manager_aktif_hanya_baris_aktif(self):
+        paket = self.baru.paket_set.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            paket.is_active = False
+            paket.save()
+        self.assertEqual(self.baru.paket_set.count(), 2)
+        self.assertFalse(Paket.aktif.filter(pk=paket.pk).exists())
+        self.assertTrue(Paket.objects.filter(pk=paket.pk).exists())
+        self.authenticate(self.admin)
+        data = self.client.get(f'/api/tracking/{self.baru.nomor_resi}/').json()['data']
+        self.assertEqual(len(data['paket_list']), 1)
+
+    def test_validasi_unik_melihat_baris_nonaktif(self):
+        ZonaTarif.objects.create(nama='Sumatera', prefix_kode_pos=['20'], is_active=False)
+        with self.assertRaises(ValidationError) as ctx:
+            ZonaTarif(nama='Sumatera', prefix_kode_pos=['21']).validate_unique()
+        self.assertIn('nama', ctx.exception.message_dict)
+
+    def test_arsip_dan_tracking_fallback(self):
+        sebelum = self.client.get(f'/api/tracking/{self.lama.nomor_resi}/').json()
+        counter = dict(Statistik.objects.values_list('kunci', 'nilai'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            total = arsip.arsipkan(90, batch_size=1)
+        self.assertEqual(total, {'pengiriman': 2, 'paket': 4, 'riwayatpengiriman': 4})
+        self.assertEqual(list(Pengiriman.objects.values_list('pk', flat=True)), [self.baru.pk])
+        self.assertEqual(PengirimanArsip.objects.count(), 2)
+        self.assertEqual(PaketArsip.objects.filter(pengiriman=self.lama.pk).count(), 2)
+        self.assertEqual(RiwayatPengirimanArsip.objects.filter(pengiriman=self.batal.pk).count(), 2)
+
+        # Dokumen tracking sama, dibangun ulang dari arsip
+        caches['tracking'].clear()
+        response = self.client.get(f'/api/tracking/{self.lama.nomor_resi}/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertIsNotNone(data.pop('diarsipkan_at'))
+        self.assertEqual(data, sebelum['data'])
+
+        # Counter dashboard tidak berubah, juga setelah rekonsiliasi
+        self.assertEqual(dict(Statistik.objects.values_list('kunci', 'nilai')), counter)
+        statistik.rekonsiliasi()
+        self.assertEqual(dict(Statistik.objects.values_list('kunci', 'nilai')), counter)
+
+        self.authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'EKS'}).json()['count'], 1)
+
+
+class KeysetPaginationTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        daftar = self.create_pengiriman(7, paket=1, riwayat=0)
+        # Sebagian tanggal sama agar pemecah seri ``id`` ikut diuji
+        Pengiriman.objects.filter(pk__in=[p.pk for p in daftar[2:5]]).update(
+            tanggal_pengiriman=daftar[2].tanggal_pengiriman
+        )
+        self.expected = list(
+            Pengiriman.objects.order_by('-tanggal_pengiriman', 'id').values_list('id', flat=True)
+        )
+        self.authenticate(self.admin)
+
+    def walk(self, url, key):
+        ids, pages = [], []
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            pages.append([row['id'] for row in data['results']])
+            url = data[key]
+        for page in (pages if key == 'next' else reversed(pages)):
+            ids += page
+        return ids, data
+
+    def test_walk_forward_and_back(self):
+        # ?fields=id memakai jalur .values() (api/values.py)
+        for url in ('/api/pengiriman/?page_size=3', '/api/pengiriman/?page_size=3&fields=id'):
+            with self.subTest(url=url):
+                ids, last = self.walk(url, 'next')
+                self.assertEqual(ids, self.expected)
+                back, _ = self.walk(last['previous'], 'previous')
+                self.assertEqual(back, self.expected[:-len(last['results'])])
+
+    def test_new_rows_do_not_shift_pages(self):
+        first = self.client.get('/api/pengiriman/?page_size=3').json()
+        self.create_pengiriman(2, paket=1, riwayat=0)
+        ids, _ = self.walk(first['next'], 'next')
+        self.assertEqual([row['id'] for row in first['results']] + ids, self.expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/pengiriman/?cursor=bukan-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_estimasi_count_untuk_queryset_aktif(self):
+        with mock.patch.object(paginators, 'estimate_table_rows', return_value=50000) as estimate:
+            paginator = paginators.EstimatedCountPaginator(Pengiriman.aktif.all(), 3, count_limit=5)
+            self.assertEqual((paginator.count, paginator.count_is_estimate), (50000, True))
+            # Filter lain tetap memakai COUNT yang dibatasi
+            paginator = paginators.EstimatedCountPaginator(
+                Pengiriman.aktif.filter(pengirim=self.pelanggan), 3, count_limit=5,
+            )
+            self.assertEqual((paginator.count, paginator.count_is_estimate), (5, True))
+        self.assertEqual(estimate.call_count, 1)
+
+
+class QueryPlanTests(EkspedisiDataMixin, APITestCase):
+    """
+    Regresi EXPLAIN: list endpoint tidak boleh membaca seluruh tabel.
+
+    Tanpa ``ANALYZE`` (tidak ada ``sqlite_stat1``) planner SQLite
+    mengasumsikan setiap tabel berisi sekitar satu juta baris, sehingga
+    rencana di sini sama dengan rencana pada database berukuran produksi.
+    Untuk database nyata yang sudah di-seed jalankan
+    ``manage.py check_query_plans``.
+    """
+    def setUp(self):
+        self.create_pengiriman(2)
+
+    def test_list_endpoints_use_indexes(self):
+        for user in (self.admin, self.kurir, self.pelanggan):
+            with self.subTest(role=user.role):
+                scans = explain.full_scans(explain.capture_plans(user))
+                self.assertEqual(scans, [], '\n'.join(f'{url}: {table}' for url, table, _ in scans))
+
+    def test_values_path_order_by_posisi(self):
+        # Jalur values() menghasilkan ORDER BY posisi kolom; scan rowid + LIMIT tidak dihitung full scan
+        plans = explain.capture_plans(self.admin, urls=['/api/penerima/'])
+        self.assertRegex(' '.join(sql for _, sql, _ in plans), r'ORDER BY \d+ ASC LIMIT')
+        self.assertEqual(explain.full_scans(plans), [])
+
+    def test_scan_classification_reads_plan(self):
+        # Bentuk ORDER BY (kolom atau posisi) tidak menentukan; yang menentukan rencananya
+        for sql in ('SELECT * FROM t ORDER BY "t"."id" ASC LIMIT 11', 'SELECT a, b, id FROM t ORDER BY 3 ASC LIMIT 11'):
+            self.assertIsNone(explain.scanned_table('SCAN t', 'sqlite', sql))
+            self.assertEqual(explain.scanned_table('SCAN t', 'sqlite', sql, sorted_after=True), 't')
+        self.assertEqual(explain.scanned_table('SCAN t', 'sqlite', 'SELECT * FROM t ORDER BY 1'), 't')
+        limit = 'SELECT * FROM t ORDER BY "t"."a" DESC LIMIT 11'
+        self.assertIsNone(explain.scanned_table('SCAN t USING INDEX t_idx', 'sqlite', limit))
+        self.assertEqual(explain.scanned_table('SCAN t USING INDEX t_idx', 'sqlite', limit, sorted_after=True), 't')
+        # Index tanpa LIMIT tetap membaca semua baris (scan) atau semua baris yang cocok (search)
+        self.assertEqual(explain.scanned_table('SCAN t USING INDEX t_idx', 'sqlite'), 't')
+        self.assertEqual(explain.scanned_table('SEARCH t USING INDEX t_status_idx (status=?)', 'sqlite'), 't')
+        self.assertIsNone(explain.scanned_table('SEARCH t USING INDEX t_status_idx (status=?)', 'sqlite', limit))
+        # Prefetch per halaman dibatasi kunci relasi
+        self.assertIsNone(explain.scanned_table('SEARCH t USING INDEX t_induk_idx (induk_id=?)', 'sqlite'))
+        self.assertIsNone(explain.scanned_table('SEARCH t USING INTEGER PRIMARY KEY (rowid=?)', 'sqlite'))
+
+
+@override_settings(EKSPEDISI_RESPONSE_CACHE={'enabled': False})
+class SerializationTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        self.pengiriman = self.create_pengiriman(3)[0]
+        # Relasi kosong di tengah source bertitik (kurir.username) dan FK nullable
+        Pengiriman.objects.filter(pk=self.pengiriman.pk).update(kurir=None)
+        self.authenticate(self.admin)
+
+    def test_values_path_matches_serializer(self):
+        urls = [
+            '/api/jenis-layanan/', '/api/penerima/', '/api/riwayat-pengiriman/',
+            '/api/pengiriman/?fields=id,nomor_resi,status_pengiriman,kurir,kurir_username,pengirim_username,'
+            'total_biaya,tanggal_pengiriman&expand=jenis_layanan_detail',
+            '/api/paket/?fields=id,kode_paket,berat,penerima&expand=penerima_detail',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as cepat:
+                    response = self.client.get(url)
+                query_cepat = len(cepat)
+                with mock.patch('api.values.get_values_plan', return_value=None):
+                    with CaptureQueriesContext(connection) as lambat:
+                        expected = self.client.get(url)
+                self.assertEqual(response.status_code, 200, response.content[:200])
+                self.assertEqual(response.json(), expected.json())
+                self.assertLessEqual(query_cepat, len(lambat))
+
+    def test_sparse_fields_and_expand(self):
+        url = '/api/pengiriman/?fields=nomor_resi,status_pengiriman'
+        with CaptureQueriesContext(connection) as sparse:
+            rows = self.client.get(url).json()['results']
+        self.assertEqual(set(rows[0]), {'nomor_resi', 'status_pengiriman'})
+        self.assertNotIn('JOIN', sparse.captured_queries[-1]['sql'])
+        self.assertNotIn('catatan', sparse.captured_queries[-1]['sql'])
+
+        rows = self.client.get(url + '&expand=paket_list').json()['results']
+        self.assertEqual(set(rows[0]), {'nomor_resi', 'status_pengiriman', 'paket_list'})
+        self.assertEqual(len(rows[0]['paket_list']), 2)
+
+        for query in ('fields=nomor_resi,tidak_ada', 'fields=nomor_resi&expand=catatan'):
+            self.assertEqual(self.client.get(f'/api/pengiriman/?{query}').status_code, 400)
+        detail = self.client.get(f'/api/pengiriman/{self.pengiriman.pk}/?fields=nomor_resi').json()
+        self.assertEqual(detail, {'nomor_resi': self.pengiriman.nomor_resi})
+
+    def test_renderer_matches_drf_output(self):
+        from rest_framework.renderers import JSONRenderer
+        from api.renderers import FastJSONRenderer
+        data = {
+            'waktu': timezone.now(), 'tanggal': timezone.localdate(), 'teks': 'Jl. Merdeka No. 1 ✓',
+            'angka': [1, 2.5, None, True], 'nested': {'id': 3},
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render({'biaya': Decimal('12500.10')}), b'{"biaya":"12500.10"}')
+
+
+class MetricsTests(EkspedisiDataMixin, APITestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.pengiriman = self.create_pengiriman(1)[0]
+
+    def test_requests_recorded_per_view(self):
+        self.authenticate(self.pelanggan)
+        self.client.get('/api/pengiriman/')
+        self.client.get('/api/pengiriman/')
+
+        snapshot = metrics.registry.snapshot()['views']['GET pengiriman_list']
+        self.assertEqual(snapshot['duration']['count'], 2)
+        self.assertGreater(snapshot['db_queries']['mean'], 0)
+        self.assertGreater(snapshot['serializer_time']['mean'], 0)
+        self.assertGreater(snapshot['response_bytes']['mean'], 0)
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.authenticate(self.admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('ekspedisi_requests_total{view="pengiriman_list",method="GET",status="2xx"} 2', body)
+        self.assertIn('ekspedisi_request_duration_seconds_count{view="pengiriman_list",method="GET"} 2', body)
+
+    def test_prometheus_butuh_token_atau_admin(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.client.logout()
+        with override_settings(EKSPEDISI_METRICS={'token': 'rahasia'}):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer salah').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer rahasia').status_code, 200)
+
+    def test_admin_json_view(self):
+        self.authenticate(self.pelanggan)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.authenticate(self.admin)
+        self.client.get('/api/metrics/')
+        self.assertIn('GET metrics_admin', self.client.get('/api/metrics/').json()['views'])
+
+    @override_settings(EKSPEDISI_METRICS={'slow_sample_rate': 1.0, 'slow_ms': 0})
+    def test_slow_request_log(self):
+        with self.assertLogs('ekspedisi.slow_request', 'WARNING'):
+            self.client.get(f'/api/tracking/{self.pengiriman.nomor_resi}/')
+        entry = metrics.registry.snapshot()['slow_requests'][-1]
+        self.assertEqual(entry['view'], 'tracking_by_resi')
+        self.assertTrue(entry['sql'])
+        self.assertIn('cumulative', entry['profile'])
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_sqlite_profiles(self):
+        config = database_config(Path('/srv'), {})
+        self.assertEqual(config['NAME'], Path('/srv/db.sqlite3'))
+        self.assertIn('PRAGMA journal_mode=WAL;', config['OPTIONS']['init_command'])
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        basic = database_config(Path('/srv'), {'EKSPEDISI_DB_PROFILE': 'basic', 'EKSPEDISI_DB_CONN_MAX_AGE': '0'})
+        self.assertEqual(basic['OPTIONS'], {'timeout': 5})
+        self.assertEqual(basic['CONN_MAX_AGE'], 0)
+        with self.assertRaises(ValueError):
+            database_config(Path('/srv'), {'EKSPEDISI_DB_PROFILE': 'turbo'})
+
+    def test_postgresql_pool(self):
+        env = {'EKSPEDISI_DB_ENGINE': 'postgresql', 'EKSPEDISI_DB_HOST': 'db', 'EKSPEDISI_DB_POOL_MAX': '8'}
+        config = database_config(Path('/srv'), env)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 8)
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        config = database_config(Path('/srv'), dict(env, EKSPEDISI_DB_POOL='0'))
+        self.assertNotIn('pool', config['OPTIONS'])
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+
+    def test_replicas(self):
+        primary = database_config(Path('/srv'), {})
+        replicas = replica_configs(primary, {'EKSPEDISI_DB_REPLICAS': '/srv/r1.sqlite3, /srv/r2.sqlite3'})
+        self.assertEqual(list(replicas), ['replica1', 'replica2'])
+        self.assertEqual(replicas['replica2']['NAME'], '/srv/r2.sqlite3')
+        self.assertTrue(replicas['replica1']['OPTIONS']['init_command'].endswith('PRAGMA query_only=ON;'))
+        self.assertNotIn('transaction_mode', replicas['replica1']['OPTIONS'])
+        self.assertEqual(replicas['replica1']['TEST'], {'MIRROR': 'default'})
+        self.assertIn('transaction_mode', primary['OPTIONS'])
+        pg = database_config(Path('/srv'), {'EKSPEDISI_DB_ENGINE': 'postgresql', 'EKSPEDISI_DB_PORT': '5432'})
+        replicas = replica_configs(pg, {'EKSPEDISI_DB_REPLICAS': 'ro1,ro2:6432'})
+        self.assertEqual([(c['HOST'], c['PORT']) for c in replicas.values()], [('ro1', '5432'), ('ro2', '6432')])
+
+
+@override_settings(EKSPEDISI_REPLICA={'aliases': ['replica1', 'replica2'], 'pin_seconds': 5})
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        replica.stats.reset()
+        caches['default'].clear()
+        self.router = replica.ReplicaRouter()
+        self.user = User(pk=42, username='pelanggan', role='pelanggan')
+
+    def request_state(self, eligible=True):
+        request = RequestFactory().get('/api/pengiriman/')
+        request.user = self.user
+        state = replica.RequestState(request)
+        state.eligible = eligible
+        token = replica.current.set(state)
+        self.addCleanup(replica.current.reset, token)
+        return state
+
+    def test_replica_views(self):
+        self.assertTrue(replica.replica_view(views.PengirimanListView.as_view()))
+        self.assertTrue(replica.replica_view(views.PenerimaListCreateView.as_view()))
+        self.assertTrue(replica.replica_view(views.tracking_by_resi))
+        self.assertFalse(replica.replica_view(views.PengirimanDetailView.as_view()))
+        self.assertFalse(replica.replica_view(views.scan_ingest))
+
+    def test_reads_rotate_and_writes_pin(self):
+        self.assertIsNone(self.router.db_for_read(Pengiriman))
+        self.request_state(eligible=False)
+        self.assertIsNone(self.router.db_for_read(Pengiriman))
+
+        self.request_state()
+        aliases = {self.router.db_for_read(Pengiriman) for _ in range(4)}
+        self.assertEqual(aliases, {'replica1', 'replica2'})
+        self.assertTrue(replica.used())
+        self.assertEqual(self.router.db_for_read(Token), 'default')
+
+        state = self.request_state()
+        self.router.db_for_write(Paket)
+        self.assertEqual(self.router.db_for_read(Pengiriman), 'default')
+        replica.pin(state.request, replica.get_config())
+        # Request berikutnya dari user yang sama tetap ke primary
+        self.request_state()
+        self.assertEqual(self.router.db_for_read(Pengiriman), 'default')
+        self.user = User(pk=43, username='lain', role='pelanggan')
+        self.request_state()
+        self.assertIn(self.router.db_for_read(Pengiriman), ('replica1', 'replica2'))
+
+        snapshot = replica.stats.snapshot()
+        self.assertEqual(snapshot['reads']['default'], 3)
+        self.assertEqual(snapshot['primary_reasons'], {'auth': 1, 'after_write': 1, 'pinned': 1})
+        self.assertEqual(snapshot['replica_ratio'], 0.625)
@@ -0,0 +1,79 @@
+"""
+Perhitungan ulang ``total_berat``/``total_biaya`` pengiriman.
+
+Paket semua pengiriman dalam satu kelompok dibaca dengan satu query, biaya
+tiap paket dihitung dengan tabel tarif di memori (``tarif``) lalu total
+disimpan dengan ``bulk_update``. ``total_berat`` tetap jumlah berat aktual.
+Hanya paket aktif yang dihitung, sama dengan paket yang ditampilkan API dan
+index pencarian; soft delete paket lewat ``save()`` ikut menghitung ulang.
+Di dalam transaksi, perubahan paket hanya dicatat dan perhitungan ulang
+dijalankan sekali per pengiriman saat commit.
+"""
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from . import tarif
+from .models import Paket, Pengiriman
+from .signals import pengiriman_diperbarui
+from .utils import defer_until_commit
+
+BATCH_SIZE = 500
+NOL = Decimal('0.00')
+SEN = Decimal('0.01')
+PAKET_FIELDS = (
+    'pengiriman_id', 'pengiriman__jenis_layanan_id', 'penerima__kode_pos', 'berat', 'panjang', 'lebar',
+    'tinggi', 'nilai_barang', 'asuransi',
+)
+
+
+def hitung_biaya(jenis_layanan_id, paket_list, using=DEFAULT_DB_ALIAS):
+    """
+    Total berat aktual dan total biaya untuk ``paket_list`` berisi tuple
+    ``(kode_pos, berat, panjang, lebar, tinggi, nilai_barang, asuransi)``
+    """
+    tabel = tarif.get_tabel(using)
+    if jenis_layanan_id not in tabel.layanan:
+        # Layanan baru dari proses lain yang versinya belum terlihat di sini
+        tarif.clear(using)
+        tabel = tarif.get_tabel(using)
+    total_berat = total_biaya = NOL
+    for kode_pos, berat, *lainnya in paket_list:
+        total_berat += berat
+        total_biaya += tabel.biaya(jenis_layanan_id, kode_pos, berat, *lainnya)
+    return total_berat.quantize(SEN), total_biaya
+
+
+def recalculate_totals(pengiriman_ids, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE):
+    """Hitung ulang total untuk banyak pengiriman sekaligus, kembalikan jumlah baris"""
+    ids = list(dict.fromkeys(pengiriman_ids))
+    diperbarui = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        layanan, paket = {}, {pk: [] for pk in chunk}
+        for pengiriman_id, layanan_id, *values in (
+            Paket._base_manager.using(using).filter(pengiriman_id__in=chunk, is_active=True)
+            .values_list(*PAKET_FIELDS)
+        ):
+            layanan[pengiriman_id] = layanan_id
+            paket[pengiriman_id].append(values)
+        now = timezone.now()
+        objs = []
+        for pk, paket_list in paket.items():
+            total_berat, total_biaya = (
+                hitung_biaya(layanan[pk], paket_list, using) if paket_list else (NOL, NOL)
+            )
+            objs.append(Pengiriman(pk=pk, total_berat=total_berat, total_biaya=total_biaya, updated_at=now))
+        diperbarui += Pengiriman._base_manager.using(using).bulk_update(
+            objs, ['total_berat', 'total_biaya', 'updated_at']
+        )
+        pengiriman_diperbarui.send(sender=Pengiriman, pengiriman_ids=chunk, using=using)
+    return diperbarui
+
+
+def schedule_recalculate(pengiriman_id, using=DEFAULT_DB_ALIAS):
+    """Jadwalkan hitung ulang total; langsung dijalankan jika tidak dalam transaksi"""
+    defer_until_commit(
+        'totals', [pengiriman_id], lambda ids: recalculate_totals(ids, using=using), using=using
+    )
@@ -0,0 +1,145 @@
+"""
+Mesin transisi status pengiriman.
+
+Status hanya berubah lewat modul ini (API PATCH pengiriman, POST riwayat,
+ingest scan), sesuai aturan ``Pengiriman.TRANSISI_STATUS``:
+
+* ``pending`` -> ``pickup``/``transit``/``delivered``/``cancelled``
+* ``pickup`` -> ``transit``/``delivered``/``cancelled``
+* ``transit`` -> ``delivered``
+* ``delivered``/``cancelled`` final
+
+Status yang sama (scan ulang di hub berikutnya) tetap dicatat sebagai
+riwayat tanpa mengubah status.
+
+Perubahan ditulis dengan UPDATE bersyarat (compare-and-set)
+``WHERE id IN (...) AND status_pengiriman = <status lama>``, tanpa
+membaca lalu menulis. Jika jumlah baris yang ter-update kurang dari yang
+diharapkan, status sudah diubah oleh request lain dan ``StatusBerubah``
+dilempar sehingga seluruh transaksi (termasuk riwayatnya) dibatalkan.
+Pengiriman yang sudah di-soft delete (``is_active=False``) tidak ikut
+ter-update dan ditolak dengan ``PengirimanNonaktif``.
+UPDATE yang sama mengisi ``last_event_at``/``last_lokasi`` sehingga list
+status terkini tidak perlu membaca tabel riwayat. Keduanya hanya ditimpa
+jika ``last_event_at`` masih kosong atau tidak lebih baru dari waktu event,
+sehingga scan yang datang terlambat (waktu lebih lama) tidak memundurkan
+lokasi terakhir.
+
+Karena ``update()`` tidak memicu ``post_save``, counter statistik, outbox
+webhook dan signal ``pengiriman_diperbarui`` dipanggil langsung.
+"""
+from django.db import router, transaction
+from django.db.models import Case, CharField, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+from . import statistik, webhook
+from .models import Pengiriman, RiwayatPengiriman
+from .signals import pengiriman_diperbarui
+
+# Batas id per UPDATE (CASE per baris untuk last_event_at/last_lokasi)
+CHUNK_SIZE = 500
+
+
+class TransisiDitolak(Exception):
+    """Transisi tidak diizinkan oleh ``Pengiriman.TRANSISI_STATUS``"""
+
+
+class StatusBerubah(Exception):
+    """Status pengiriman sudah diubah oleh request lain (compare-and-set gagal)"""
+
+
+class PengirimanNonaktif(StatusBerubah):
+    """Pengiriman sudah di-soft delete (``is_active=False``)"""
+
+
+def diizinkan(lama, baru):
+    return baru in Pengiriman.TRANSISI_STATUS.get(lama, ())
+
+
+def validasi(lama, baru):
+    if not diizinkan(lama, baru):
+        raise TransisiDitolak(f"Transisi {lama} -> {baru} tidak diizinkan")
+
+
+def _per_baris(rows, index, output_field):
+    nilai = {row[index] for row in rows}
+    if len(nilai) == 1:
+        return Value(nilai.pop(), output_field=output_field)
+    return Case(
+        *[When(pk=row[0], then=Value(row[index], output_field=output_field)) for row in rows],
+        output_field=output_field,
+    )
+
+
+def simpan(perubahan, using):
+    """
+    Terapkan ``perubahan`` berisi ``(pengiriman, lama, baru, waktu, lokasi)``
+    dengan UPDATE bersyarat per pasangan (lama, baru), lalu catat statistik,
+    outbox webhook dan ``pengiriman_diperbarui``. ``lama == baru`` (scan
+    ulang) hanya memperbarui ``last_event_at``/``last_lokasi``, dan hanya
+    jika ``waktu`` tidak lebih lama dari ``last_event_at`` tersimpan. Harus
+    dipanggil di dalam transaksi; melempar ``PengirimanNonaktif`` jika ada
+    pengiriman yang sudah nonaktif dan ``StatusBerubah`` jika statusnya
+    bukan lagi ``lama``. Objek pengiriman diperbarui di memori.
+    """
+    if not perubahan:
+        return
+    now = timezone.now()
+    grup = {}
+    for pengiriman, lama, baru, waktu, lokasi in perubahan:
+        grup.setdefault((lama, baru), []).append((pengiriman.pk, waktu, lokasi))
+    for (lama, baru), rows in grup.items():
+        for start in range(0, len(rows), CHUNK_SIZE):
+            chunk = rows[start:start + CHUNK_SIZE]
+            waktu = _per_baris(chunk, 1, DateTimeField())
+            lebih_baru = Q(last_event_at__isnull=True) | Q(last_event_at__lte=waktu)
+            ids = [row[0] for row in chunk]
+            jumlah = Pengiriman.objects.using(using).filter(
+                pk__in=ids, status_pengiriman=lama, is_active=True,
+            ).update(
+                status_pengiriman=baru,
+                last_event_at=Case(When(lebih_baru, then=waktu), default=F('last_event_at')),
+                last_lokasi=Case(
+                    When(lebih_baru, then=_per_baris(chunk, 2, CharField())), default=F('last_lokasi'),
+                ),
+                updated_at=now,
+            )
+            if jumlah != len(chunk):
+                if Pengiriman.objects.using(using).filter(pk__in=ids, is_active=False).exists():
+                    raise PengirimanNonaktif("Pengiriman sudah nonaktif")
+                raise StatusBerubah(f"Status pengiriman bukan lagi {lama}")
+
+    for pengiriman, lama, baru, waktu, lokasi in perubahan:
+        pengiriman.status_pengiriman = baru
+        if pengiriman.last_event_at is None or pengiriman.last_event_at <= waktu:
+            pengiriman.last_event_at = waktu
+            pengiriman.last_lokasi = lokasi
+        pengiriman.updated_at = now
+        pengiriman.reset_nilai_awal()
+    status = [(pengiriman, lama, baru) for pengiriman, lama, baru, _, _ in perubahan]
+    statistik.catat_perubahan_status(status, using)
+    webhook.catat_status(status, using)
+    pengiriman_diperbarui.send(
+        sender=Pengiriman, pengiriman_ids=[pengiriman.pk for pengiriman, *_ in perubahan], using=using,
+    )
+
+
+def terapkan(pengiriman, status, lokasi, keterangan='', waktu=None, using=None):
+    """
+    Ubah status satu pengiriman dan tulis riwayatnya dalam satu transaksi;
+    kembalikan ``RiwayatPengiriman`` baru. Status lama diambil dari objek
+    ``pengiriman`` (nilai saat dibaca) sebagai syarat compare-and-set.
+    """
+    using = using or router.db_for_write(Pengiriman, instance=pengiriman)
+    if not pengiriman.is_active:
+        raise PengirimanNonaktif("Pengiriman sudah nonaktif")
+    lama = pengiriman.status_pengiriman
+    validasi(lama, status)
+    waktu = waktu or timezone.now()
+    with transaction.atomic(using=using):
+        simpan([(pengiriman, lama, status, waktu, lokasi)], using)
+        riwayat = RiwayatPengiriman.objects.using(using).create(
+            pengiriman=pengiriman, status=status, lokasi=lokasi, waktu=waktu,
+            keterangan=keterangan or f"Status {status} di {lokasi}",
+        )
+    return riwayat
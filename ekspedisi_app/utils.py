@@ -0,0 +1,57 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class _CommitBatch:
+    """Kumpulan item yang diproses sekali saat transaksi commit"""
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.items = []
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.flush(self.items)
+
+
+def defer_until_commit(nama, items, flush, using=DEFAULT_DB_ALIAS):
+    """
+    Kumpulkan ``items`` per transaksi dan panggil ``flush(items)`` sekali
+    saat commit. Di luar transaksi ``flush`` langsung dipanggil.
+
+    Batch dipisah per savepoint (``atomic()`` bersarang): callback
+    ``on_commit`` setiap batch didaftarkan di level savepoint tempat item
+    pertamanya ditambahkan, sehingga rollback savepoint ikut membuang
+    item-itemnya (Django menghapus callback savepoint yang di-rollback).
+    Savepoint yang di-release tetap di-flush saat transaksi luar commit.
+    Delta aditif (``statistik``) karenanya tidak terhitung ganda.
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        flush(list(items))
+        return
+
+    batches = connection.__dict__.setdefault('_commit_batches', {})
+    key = (nama, tuple(connection.savepoint_ids))
+    batch = batches.get(key)
+    # Callback lama hilang dari antrean jika transaksi/savepoint-nya di-rollback
+    if batch is None or batch.done or not any(item[1] is batch for item in connection.run_on_commit):
+        # Buang batch yang sudah di-flush atau di-rollback agar dict tidak terus tumbuh
+        antre = {id(item[1]) for item in connection.run_on_commit}
+        for lama in [k for k, b in batches.items() if b.done or id(b) not in antre]:
+            del batches[lama]
+        batch = batches[key] = _CommitBatch(flush)
+        transaction.on_commit(batch, using=using)
+    batch.items.extend(items)
+
+
+def ada_tertunda(nama, using=DEFAULT_DB_ALIAS):
+    """True jika transaksi yang sedang berjalan punya item ``nama`` yang menunggu commit"""
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return False
+    antre = {id(item[1]) for item in connection.run_on_commit}
+    return any(
+        key[0] == nama and not batch.done and id(batch) in antre
+        for key, batch in connection.__dict__.get('_commit_batches', {}).items()
+    )
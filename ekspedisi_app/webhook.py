@@ -0,0 +1,569 @@
+"""
+Webhook status pengiriman untuk merchant (``WebhookEndpoint``).
+
+Alur (transactional outbox):
+
+1. Perubahan ``Pengiriman.status_pengiriman`` dan ``RiwayatPengiriman``
+   baru ditulis ke ``WebhookOutbox`` di transaksi yang sama (signal
+   ``post_save``, dan ``catat_status``/``catat_riwayat`` untuk operasi
+   massal seperti scan). Jika transaksi rollback, event ikut hilang; jika
+   commit, event pasti tersimpan walau proses mati sebelum mengirim.
+2. ``Dispatcher.teruskan`` memecah event outbox menjadi ``WebhookDelivery``
+   per endpoint aktif milik pengirim. Event tanpa endpoint dihapus.
+3. Worker pool mengirim delivery yang jatuh tempo per endpoint dalam batch
+   (``batch_size`` event per POST), maksimal ``WebhookEndpoint.konkurensi``
+   batch bersamaan per endpoint. Delivery diklaim dengan token dan lease
+   sehingga beberapa proses dispatcher tidak mengirim event yang sama.
+   Koneksi HTTP dipakai ulang per thread dan host.
+4. Response 2xx menandai batch ``delivered``. Selain itu delivery dijadwal
+   ulang dengan exponential backoff (``backoff_base * 2^(percobaan-1)``,
+   maksimal ``backoff_max``, dengan jitter; ``Retry-After`` dihormati)
+   sampai ``max_attempts`` lalu ``failed``.
+
+Body POST: ``{"events": [{"id", "jenis", "created_at", "data"}]}``. Header
+``X-Ekspedisi-Timestamp`` dan ``X-Ekspedisi-Signature: sha256=<hex>``, yaitu
+HMAC-SHA256 dengan secret endpoint atas ``"<timestamp>.<body>"`` (lihat
+``verifikasi``). Pengiriman bisa terulang (at-least-once); receiver memakai
+``id`` event untuk deduplikasi.
+
+URL endpoint harus https dan host-nya harus ter-resolve ke alamat publik
+(bukan loopback, private, link-local atau reserved) kecuali host ada di
+``allowed_hosts`` (``periksa_url``). Alamat diperiksa ulang setiap kali
+koneksi dibuka dan socket disambungkan ke IP yang sudah diperiksa, sehingga
+DNS rebinding tidak bisa mengarahkan POST ke jaringan internal.
+
+Dispatcher dijalankan dengan ``manage.py deliver_webhooks``. Konfigurasi di
+``settings.EKSPEDISI_WEBHOOK``.
+"""
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import Pengiriman, RiwayatPengiriman, WebhookDelivery, WebhookEndpoint, WebhookOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'workers': 8,
+    # Event per POST
+    'batch_size': 50,
+    'timeout': 10,
+    'max_attempts': 8,
+    'backoff_base': 5,
+    'backoff_max': 3600,
+    # Lama klaim delivery oleh worker (detik); setelah itu boleh diambil proses lain
+    'lease': 60,
+    # Jeda polling outbox saat tidak ada pekerjaan (detik)
+    'interval': 1,
+    # Event outbox yang diteruskan per putaran
+    'relay_batch': 1000,
+    'max_konkurensi': 16,
+    'user_agent': 'ekspedisi-webhook/1.0',
+    'require_https': True,
+    # Host yang dikecualikan dari pemeriksaan alamat (dan boleh http), mis. receiver internal
+    'allowed_hosts': (),
+}
+SIGNATURE_HEADER = 'X-Ekspedisi-Signature'
+TIMESTAMP_HEADER = 'X-Ekspedisi-Timestamp'
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'EKSPEDISI_WEBHOOK', {}))
+    return config
+
+
+# Pencatatan outbox
+
+def _waktu(value):
+    return value.isoformat() if value else None
+
+
+def catat_status(perubahan, using=DEFAULT_DB_ALIAS):
+    """
+    Tulis event perubahan status ke outbox; ``perubahan`` berisi
+    ``(pengiriman, lama, baru)``. Dipanggil di dalam transaksi perubahan.
+    """
+    now = timezone.now()
+    rows = [
+        WebhookOutbox(
+            pengirim_id=pengiriman.pengirim_id, pengiriman_id=pengiriman.pk, jenis='status', created_at=now,
+            payload={
+                'nomor_resi': pengiriman.nomor_resi,
+                'status_lama': lama,
+                'status_baru': baru,
+                'waktu': _waktu(now),
+            },
+        )
+        for pengiriman, lama, baru in perubahan if lama != baru
+    ]
+    if rows:
+        WebhookOutbox.objects.using(using).bulk_create(rows)
+
+
+def catat_riwayat(riwayat_list, pengiriman, using=DEFAULT_DB_ALIAS):
+    """Tulis event riwayat baru ke outbox; ``pengiriman`` memetakan id ke objek (nomor_resi, pengirim_id)"""
+    now = timezone.now()
+    rows = []
+    for riwayat in riwayat_list:
+        induk = pengiriman[riwayat.pengiriman_id]
+        rows.append(WebhookOutbox(
+            pengirim_id=induk.pengirim_id, pengiriman_id=induk.pk, jenis='riwayat', created_at=now,
+            payload={
+                'nomor_resi': induk.nomor_resi,
+                'riwayat_id': riwayat.pk,
+                'status': riwayat.status,
+                'keterangan': riwayat.keterangan,
+                'lokasi': riwayat.lokasi,
+                'waktu': _waktu(riwayat.waktu),
+            },
+        ))
+    if rows:
+        WebhookOutbox.objects.using(using).bulk_create(rows)
+
+
+def _pengiriman_saved(sender, instance, created, using, raw=False, **kwargs):
+    if created or raw:
+        return
+    lama = instance.nilai_awal('status_pengiriman')
+    # None: nilai awal tidak diketahui (objek tidak dimuat dari DB)
+    if lama is not None and lama != instance.status_pengiriman:
+        catat_status([(instance, lama, instance.status_pengiriman)], using)
+
+
+def _riwayat_saved(sender, instance, created, using, raw=False, **kwargs):
+    if not created or raw:
+        return
+    if RiwayatPengiriman.pengiriman.is_cached(instance):
+        induk = instance.pengiriman
+    else:
+        induk = Pengiriman._base_manager.using(using).only('nomor_resi', 'pengirim_id').get(
+            pk=instance.pengiriman_id
+        )
+    catat_riwayat([instance], {induk.pk: induk}, using)
+
+
+def connect_signals():
+    post_save.connect(_pengiriman_saved, sender=Pengiriman, dispatch_uid='webhook_pengiriman')
+    post_save.connect(_riwayat_saved, sender=RiwayatPengiriman, dispatch_uid='webhook_riwayat')
+
+
+# Tanda tangan
+
+def tanda_tangan(secret, timestamp, body):
+    """HMAC-SHA256 hex atas ``"<timestamp>.<body>"``"""
+    return hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+
+
+def verifikasi(secret, timestamp, body, signature, toleransi=300):
+    """Verifikasi header webhook di sisi receiver (juga dipakai test dan benchmark)"""
+    try:
+        if abs(time.time() - int(timestamp)) > toleransi:
+            return False
+    except (TypeError, ValueError):
+        return False
+    expected = 'sha256=' + tanda_tangan(secret, timestamp, body)
+    return hmac.compare_digest(expected, signature or '')
+
+
+# HTTP
+
+class AlamatDitolak(ValueError):
+    """URL webhook mengarah ke alamat yang tidak boleh dihubungi"""
+
+
+def _ip_publik(alamat):
+    ip = ipaddress.ip_address(alamat.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def _diizinkan(host, config):
+    return host.lower() in {h.lower() for h in config['allowed_hosts']}
+
+
+def alamat_aman(host, port):
+    """
+    Resolve ``host`` dan kembalikan IP pertama; lempar ``AlamatDitolak`` jika
+    gagal di-resolve atau ada alamat yang bukan publik.
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as exc:
+        raise AlamatDitolak(f'Host {host} tidak dapat di-resolve') from exc
+    alamat = [info[4][0] for info in infos]
+    if not alamat or not all(_ip_publik(ip) for ip in alamat):
+        raise AlamatDitolak(f'Host {host} mengarah ke alamat non-publik')
+    return alamat[0]
+
+
+def periksa_url(url, config=None):
+    """Validasi URL endpoint (scheme dan alamat host), lempar ``AlamatDitolak``"""
+    config = config or get_config()
+    parts = urlsplit(url)
+    if not parts.hostname:
+        raise AlamatDitolak('URL tidak memiliki host')
+    diizinkan = _diizinkan(parts.hostname, config)
+    scheme = ('https',) if config['require_https'] and not diizinkan else ('http', 'https')
+    if parts.scheme not in scheme:
+        raise AlamatDitolak('URL webhook harus https')
+    if not diizinkan:
+        try:
+            port = parts.port
+        except ValueError as exc:
+            raise AlamatDitolak('Port tidak valid') from exc
+        alamat_aman(parts.hostname, port or (443 if parts.scheme == 'https' else 80))
+
+
+class KoneksiPool:
+    """
+    Koneksi HTTP keep-alive per thread dan (scheme, host, port). Socket
+    disambungkan ke IP hasil ``alamat_aman`` yang di-resolve saat koneksi
+    dibuka; SNI dan verifikasi sertifikat HTTPS tetap memakai hostname.
+    """
+
+    def __init__(self, timeout, config=None):
+        self.timeout = timeout
+        self.config = config or get_config()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._semua = []
+        self.dibuat = 0
+
+    def _koneksi(self, parts, baru=False):
+        pool = self._local.__dict__.setdefault('koneksi', {})
+        key = (parts.scheme, parts.hostname, parts.port)
+        conn = pool.get(key)
+        if conn is None or baru:
+            if conn is not None:
+                conn.close()
+            diizinkan = _diizinkan(parts.hostname, self.config)
+            if parts.scheme != 'https' and (parts.scheme != 'http' or self.config['require_https'] and not diizinkan):
+                raise AlamatDitolak('URL webhook harus https')
+            cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            conn = cls(parts.hostname, parts.port, timeout=self.timeout)
+            if not diizinkan:
+                conn._create_connection = self._sambung
+            pool[key] = conn
+            with self._lock:
+                self._semua.append(conn)
+                self.dibuat += 1
+            return conn, True
+        return conn, False
+
+    @staticmethod
+    def _sambung(address, timeout, source_address=None):
+        # Dipanggil http.client setiap kali membuka socket (termasuk reconnect)
+        host, port = address
+        return socket.create_connection((alamat_aman(host, port), port), timeout, source_address)
+
+    def post(self, url, body, headers):
+        """POST ``body``, kembalikan ``(status, headers)``"""
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        conn, baru = self._koneksi(parts)
+        while True:
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.will_close:
+                    conn.close()
+                return response.status, response.headers
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if baru:
+                    raise
+                # Koneksi keep-alive sudah ditutup server: ulangi sekali dengan koneksi baru
+                conn, baru = self._koneksi(parts, baru=True)
+            except Exception:
+                conn.close()
+                raise
+
+    def close(self):
+        """Tutup koneksi semua thread"""
+        with self._lock:
+            semua, self._semua = self._semua, []
+        for conn in semua:
+            conn.close()
+
+
+# Dispatcher
+
+class DispatchStats:
+    """Counter dispatcher (per proses)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {'batch': 0, 'terkirim': 0, 'retry': 0, 'gagal': 0, 'diteruskan': 0, 'dibuang': 0}
+
+    def incr(self, name, jumlah=1):
+        with self._lock:
+            self.counts[name] += jumlah
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+stats = DispatchStats()
+
+
+def backoff(percobaan, config, retry_after=None):
+    """Jeda (detik) sebelum percobaan berikutnya setelah ``percobaan`` kali gagal"""
+    jeda = min(config['backoff_max'], config['backoff_base'] * 2 ** (percobaan - 1))
+    # Jitter agar endpoint yang pulih tidak menerima semua retry sekaligus
+    jeda *= 0.5 + random.random() / 2
+    if retry_after is not None:
+        jeda = max(jeda, min(retry_after, config['backoff_max']))
+    return jeda
+
+
+def _retry_after(headers):
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class Dispatcher:
+    """
+    Teruskan outbox dan kirim delivery yang jatuh tempo. ``workers=0``
+    mengirim langsung di thread pemanggil (test dan command ``--once``).
+    """
+
+    def __init__(self, workers=None, using=DEFAULT_DB_ALIAS, config=None):
+        self.config = config or get_config()
+        self.workers = self.config['workers'] if workers is None else workers
+        self.using = using
+        self.http = KoneksiPool(self.config['timeout'], self.config)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='webhook') if self.workers else None
+        self._lock = threading.Lock()
+        self._berjalan = {}
+        self._futures = set()
+        self._bangun = threading.Event()
+
+    def teruskan(self):
+        """Pecah event outbox baru menjadi delivery per endpoint aktif, kembalikan jumlah event"""
+        with transaction.atomic(using=self.using):
+            queryset = WebhookOutbox.objects.using(self.using).filter(diteruskan=False).order_by('pk')
+            if connections[self.using].features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            events = list(queryset.only('id', 'pengirim_id')[:self.config['relay_batch']])
+            if not events:
+                return 0
+            endpoints = {}
+            for pk, pemilik_id in WebhookEndpoint.aktif.using(self.using).filter(
+                pemilik_id__in={event.pengirim_id for event in events}
+            ).values_list('pk', 'pemilik_id'):
+                endpoints.setdefault(pemilik_id, []).append(pk)
+            now = timezone.now()
+            deliveries = [
+                WebhookDelivery(endpoint_id=endpoint_id, outbox_id=event.pk, berikutnya=now, created_at=now)
+                for event in events for endpoint_id in endpoints.get(event.pengirim_id, ())
+            ]
+            WebhookDelivery.objects.using(self.using).bulk_create(deliveries)
+            tanpa_endpoint = [event.pk for event in events if event.pengirim_id not in endpoints]
+            dengan_endpoint = [event.pk for event in events if event.pengirim_id in endpoints]
+            WebhookOutbox.objects.using(self.using).filter(pk__in=tanpa_endpoint).delete()
+            WebhookOutbox.objects.using(self.using).filter(pk__in=dengan_endpoint).update(diteruskan=True)
+        stats.incr('diteruskan', len(dengan_endpoint))
+        stats.incr('dibuang', len(tanpa_endpoint))
+        return len(events)
+
+    def klaim(self, endpoint, now):
+        """Klaim satu batch delivery endpoint yang jatuh tempo"""
+        deliveries = WebhookDelivery.objects.using(self.using)
+        ids = list(
+            deliveries.filter(endpoint=endpoint, status='pending', berikutnya__lte=now)
+            .order_by('berikutnya', 'id').values_list('pk', flat=True)[:self.config['batch_size']]
+        )
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        # Hanya baris yang belum diklaim worker lain yang berpindah ke token ini
+        deliveries.filter(pk__in=ids, status='pending', berikutnya__lte=now).update(
+            klaim=token, berikutnya=now + timedelta(seconds=self.config['lease'])
+        )
+        return list(
+            deliveries.filter(pk__in=ids, klaim=token).select_related('outbox').order_by('outbox_id')
+        )
+
+    def tick(self):
+        """Satu putaran: teruskan outbox lalu jadwalkan batch ke endpoint yang punya slot kosong"""
+        while self.teruskan() == self.config['relay_batch']:
+            pass
+        now = timezone.now()
+        due = WebhookDelivery.objects.using(self.using).filter(status='pending', berikutnya__lte=now)
+        endpoints = WebhookEndpoint.objects.using(self.using).filter(
+            pk__in=due.values('endpoint_id')
+        ).only('id', 'url', 'secret', 'konkurensi', 'is_active')
+        dijadwalkan = 0
+        for endpoint in endpoints:
+            konkurensi = max(1, min(endpoint.konkurensi, self.config['max_konkurensi']))
+            while True:
+                with self._lock:
+                    if self._berjalan.get(endpoint.pk, 0) >= konkurensi:
+                        break
+                batch = self.klaim(endpoint, now)
+                if not batch:
+                    break
+                self._jalankan(endpoint, batch)
+                dijadwalkan += 1
+        return dijadwalkan
+
+    def _jalankan(self, endpoint, batch):
+        with self._lock:
+            self._berjalan[endpoint.pk] = self._berjalan.get(endpoint.pk, 0) + 1
+        if self._executor is None:
+            self._kirim(endpoint, batch)
+            return
+        future = self._executor.submit(self._kirim, endpoint, batch)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._selesai)
+
+    def _selesai(self, future):
+        with self._lock:
+            self._futures.discard(future)
+        self._bangun.set()
+
+    def _kirim(self, endpoint, batch):
+        try:
+            self.kirim_batch(endpoint, batch)
+        except Exception:
+            logger.exception('Webhook batch ke endpoint %s gagal diproses', endpoint.pk)
+        finally:
+            with self._lock:
+                self._berjalan[endpoint.pk] -= 1
+            if self._executor is not None:
+                close_old_connections()
+
+    def kirim_batch(self, endpoint, batch):
+        """POST satu batch ke endpoint lalu catat hasilnya per delivery"""
+        if not endpoint.is_active:
+            self._catat_gagal(batch, 'Endpoint nonaktif', final=True)
+            return
+        body = json.dumps({
+            'events': [
+                {
+                    'id': delivery.outbox_id,
+                    'jenis': delivery.outbox.jenis,
+                    'created_at': delivery.outbox.created_at,
+                    'data': delivery.outbox.payload,
+                }
+                for delivery in batch
+            ],
+        }, cls=DjangoJSONEncoder).encode()
+        timestamp = str(int(time.time()))
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': self.config['user_agent'],
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: 'sha256=' + tanda_tangan(endpoint.secret, timestamp, body),
+        }
+        stats.incr('batch')
+        try:
+            status, response_headers = self.http.post(endpoint.url, body, headers)
+        except (AlamatDitolak, OSError, http.client.HTTPException) as exc:
+            self._catat_gagal(batch, f'{type(exc).__name__}: {exc}')
+            return
+        if 200 <= status < 300:
+            now = timezone.now()
+            for delivery in batch:
+                delivery.status, delivery.terkirim_at, delivery.klaim = 'delivered', now, ''
+                delivery.percobaan += 1
+            WebhookDelivery.objects.using(self.using).bulk_update(
+                batch, ['status', 'terkirim_at', 'klaim', 'percobaan']
+            )
+            stats.incr('terkirim', len(batch))
+        else:
+            self._catat_gagal(batch, f'HTTP {status}', retry_after=_retry_after(response_headers))
+
+    def _catat_gagal(self, batch, error, retry_after=None, final=False):
+        now = timezone.now()
+        for delivery in batch:
+            delivery.percobaan += 1
+            delivery.error, delivery.klaim = error[:1000], ''
+            if final or delivery.percobaan >= self.config['max_attempts']:
+                delivery.status = 'failed'
+                stats.incr('gagal')
+            else:
+                delivery.berikutnya = now + timedelta(
+                    seconds=backoff(delivery.percobaan, self.config, retry_after)
+                )
+                stats.incr('retry')
+        WebhookDelivery.objects.using(self.using).bulk_update(
+            batch, ['status', 'percobaan', 'error', 'klaim', 'berikutnya']
+        )
+
+    def wait(self):
+        """Tunggu semua batch yang sedang dikirim"""
+        while True:
+            with self._lock:
+                futures = list(self._futures)
+            if not futures:
+                return
+            wait(futures)
+
+    def run_once(self):
+        """Kirim semua yang jatuh tempo sampai habis, kembalikan jumlah batch"""
+        total = 0
+        while True:
+            dijadwalkan = self.tick()
+            self.wait()
+            if not dijadwalkan:
+                return total
+            total += dijadwalkan
+
+    def run(self, stop=None):
+        """Loop dispatcher sampai ``stop`` (``threading.Event``) di-set"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if not self.tick():
+                # Bangun lebih cepat jika ada batch yang selesai (slot endpoint kosong)
+                self._bangun.wait(self.config['interval'])
+                self._bangun.clear()
+        self.wait()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.http.close()
+
+
+def bersihkan(hari, using=DEFAULT_DB_ALIAS):
+    """Hapus delivery selesai/gagal dan event outbox yang lebih tua dari ``hari`` hari"""
+    batas = timezone.now() - timedelta(days=hari)
+    with transaction.atomic(using=using):
+        jumlah, _ = WebhookDelivery.objects.using(using).filter(
+            created_at__lt=batas, status__in=('delivered', 'failed')
+        ).delete()
+        outbox, _ = WebhookOutbox.objects.using(using).filter(
+            created_at__lt=batas, diteruskan=True, deliveries__isnull=True
+        ).delete()
+    return jumlah, outbox